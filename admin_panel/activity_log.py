@@ -0,0 +1,263 @@
+import json
+import logging
+import os
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils.dateparse import parse_datetime
+
+from .live_updates import publish_activities
+from .models import ActivityLog
+from utils.data_versions import bump_versions, model_namespace
+
+logger = logging.getLogger(__name__)
+
+SPOOL_FILE_NAME = 'pending.jsonl'
+
+_current_buffer = ContextVar('activity_log_buffer', default=None)
+_suppressed_counts = ContextVar('activity_log_suppressed_counts', default=None)
+
+
+class ActivityLogBuffer:
+    """
+    Collects ActivityLog entries and writes them with a single bulk_create.
+
+    An entry only enters the buffer when the transaction that produced it commits
+    (through transaction.on_commit), so entries from rolled-back transactions,
+    including rolled-back savepoints, are discarded.
+    """
+
+    BATCH_SIZE = 500
+
+    def __init__(self):
+        self.entries = []
+
+    def add(self, entry):
+        transaction.on_commit(lambda: self.entries.append(entry))
+
+    def flush(self):
+        """
+        Writes the committed entries collected so far.
+
+        :return: Number of entries written.
+        """
+        if not self.entries:
+            return 0
+
+        entries, self.entries = self.entries, []
+        try:
+            self._clear_deleted_members(entries)
+            ActivityLog.objects.bulk_create(entries, batch_size=self.BATCH_SIZE)
+        except Exception:
+            # Keep the entries so a later flush can retry them
+            self.entries = entries + self.entries
+            raise
+
+        bump_versions(model_namespace(ActivityLog))
+        publish_activities(entries)
+        return len(entries)
+
+    @staticmethod
+    def _clear_deleted_members(entries):
+        """Members deleted after the entry was logged are set to NULL, as on_delete=SET_NULL would do."""
+        from members.models import Member
+
+        member_ids = {entry.member_id for entry in entries if entry.member_id}
+        if not member_ids:
+            return
+
+        existing = set(Member.objects.filter(id__in=member_ids).values_list('id', flat=True))
+        for entry in entries:
+            if entry.member_id and entry.member_id not in existing:
+                entry.member = None
+
+
+def get_activity_log_buffer():
+    """Returns the buffer of the current request/task, or None if there is none."""
+    return _current_buffer.get()
+
+
+def log_activity(event_type, description, member=None):
+    """
+    Records an ActivityLog entry.
+
+    Inside buffer_activity_logs() the entry is written in bulk at the end of the
+    block; outside it the entry is written immediately. Inside
+    suppress_activity_logs() the entry is only counted and None is returned.
+    """
+    suppressed = _suppressed_counts.get()
+    if suppressed is not None:
+        suppressed[event_type] += 1
+        return None
+
+    buffer = _current_buffer.get()
+
+    if buffer is None:
+        entry = ActivityLog.objects.create(member=member, event_type=event_type, description=description)
+        bump_versions(model_namespace(ActivityLog))
+        publish_activities([entry])
+        return entry
+
+    entry = ActivityLog(member=member, event_type=event_type, description=description)
+    buffer.add(entry)
+    return entry
+
+
+def flush_activity_logs():
+    """
+    Writes the entries buffered so far. Long-running tasks should call it
+    periodically to bound memory use.
+
+    :return: Number of entries written.
+    """
+    buffer = _current_buffer.get()
+    return buffer.flush() if buffer else 0
+
+
+def _flush_on_exit(buffer):
+    try:
+        buffer.flush()
+    except Exception:
+        # The entries are committed and exist only in this process: hand them to something durable
+        logger.exception('Failed to write %d buffered activity log entries, saving them for a retry', len(buffer.entries))
+        save_failed_entries(buffer.entries)
+
+
+def serialize_entries(entries):
+    return [
+        {
+            'member_id': entry.member_id,
+            'event_type': entry.event_type,
+            'description': entry.description,
+            'created_at': entry.created_at.isoformat(),
+        }
+        for entry in entries
+    ]
+
+
+def write_serialized_entries(data):
+    """
+    Writes entries serialized by serialize_entries(), keeping their original
+    created_at.
+
+    :return: Number of entries written.
+    """
+    buffer = ActivityLogBuffer()
+    buffer.entries = [
+        ActivityLog(
+            member_id=item['member_id'],
+            event_type=item['event_type'],
+            description=item['description'],
+            created_at=parse_datetime(item['created_at']),
+        )
+        for item in data
+    ]
+    return buffer.flush()
+
+
+def save_failed_entries(entries):
+    """
+    Keeps committed entries whose write failed: they are sent to the
+    write_activity_logs task, which retries until the database accepts them. If
+    the broker cannot be reached either, they are appended to the spool file read
+    by replay_spooled_activity_logs().
+    """
+    from .tasks import write_activity_logs
+
+    data = serialize_entries(entries)
+    try:
+        write_activity_logs.delay(data)
+        return
+    except Exception:
+        logger.exception('Could not queue %d activity log entries, writing them to the spool file', len(data))
+
+    spool_dir = Path(settings.ACTIVITY_LOG_SPOOL_DIR)
+    spool_dir.mkdir(parents=True, exist_ok=True)
+    with open(spool_dir / SPOOL_FILE_NAME, 'a', encoding='utf-8') as spool:
+        spool.writelines(json.dumps(item) + '\n' for item in data)
+        spool.flush()
+        os.fsync(spool.fileno())
+
+
+def replay_spooled_activity_logs():
+    """
+    Writes the entries saved in the spool file by save_failed_entries(). The file
+    is renamed before being read, so entries spooled meanwhile wait for the next
+    run; if the write fails the renamed file is kept and retried first next time.
+
+    :return: Number of entries written.
+    """
+    spool = Path(settings.ACTIVITY_LOG_SPOOL_DIR) / SPOOL_FILE_NAME
+    replaying = spool.with_name(f'{SPOOL_FILE_NAME}.replaying')
+
+    if not replaying.exists():
+        if not spool.exists():
+            return 0
+        os.replace(spool, replaying)
+
+    with open(replaying, encoding='utf-8') as file:
+        data = [json.loads(line) for line in file if line.strip()]
+
+    written = write_serialized_entries(data)
+    replaying.unlink()
+    return written
+
+
+@contextmanager
+def buffer_activity_logs():
+    """
+    Buffers every log_activity() call made inside the block and writes them
+    with one bulk_create when the block ends.
+
+    Nested blocks share the outermost buffer. If the block ends inside a
+    transaction, the flush waits for that transaction to commit.
+    """
+    if _current_buffer.get() is not None:
+        yield _current_buffer.get()
+        return
+
+    buffer = ActivityLogBuffer()
+    token = _current_buffer.set(buffer)
+    try:
+        yield buffer
+    finally:
+        _current_buffer.reset(token)
+
+        if connection.in_atomic_block:
+            # Registered last, so it runs after the entries of this transaction are added
+            transaction.on_commit(lambda: _flush_on_exit(buffer))
+        else:
+            _flush_on_exit(buffer)
+
+
+@contextmanager
+def suppress_activity_logs(summary, event_type='updated', member=None):
+    """
+    Turns off per-row logging for bulk jobs: log_activity() calls made inside the
+    block (including the ones from the members signals) are only counted, and one
+    summary entry is recorded when the block ends without errors.
+
+    `summary` is formatted with `count` (total of suppressed entries) and the
+    count of each event type, e.g. 'Importação: {created} alunos cadastrados.'.
+    No entry is recorded if nothing was suppressed.
+
+    Nested blocks are absorbed by the outermost one, which records the only summary.
+    """
+    if _suppressed_counts.get() is not None:
+        yield _suppressed_counts.get()
+        return
+
+    counts = Counter()
+    token = _suppressed_counts.set(counts)
+    try:
+        yield counts
+    finally:
+        _suppressed_counts.reset(token)
+
+    if counts:
+        values = defaultdict(int, counts, count=sum(counts.values()))
+        log_activity(event_type=event_type, description=summary.format_map(values), member=member)
@@ -1,6 +1,7 @@
 from django.contrib import admin
-from .models import ActivityLog, DailyReport
+from .models import ActivityLog, ActivityLogArchive, DailyReport
 # Register your models here.
 
 admin.site.register(DailyReport)
 admin.site.register(ActivityLog)
+admin.site.register(ActivityLogArchive)
@@ -0,0 +1,111 @@
+import json
+import logging
+import time
+
+import redis
+from django.conf import settings
+from django.db import transaction
+from django.utils.dateformat import format as date_format
+from django.utils.timezone import localtime
+
+from utils.redis_client import get_redis, new_async_redis
+
+logger = logging.getLogger(__name__)
+
+DASHBOARD_CHANNEL = 'dashboard:events'
+ACTIVITY_TIME_FORMAT = 'd/m/y H:i'
+
+# After a failed publish, skip Redis for this many seconds instead of failing every save
+REDIS_RETRY_INTERVAL = 30
+_redis_retry_at = 0.0
+
+
+def format_sse(event, data):
+    """Formats one Server-Sent Events frame."""
+    return f'event: {event}\ndata: {json.dumps(data, separators=(",", ":"))}\n\n'
+
+
+def publish_dashboard_event(event, data):
+    """
+    Publishes an event to every dashboard connected to the stream, once the current
+    transaction commits (immediately outside a transaction).
+
+    `data` may be a callable, evaluated only on commit. The SSE frame is built once,
+    here, so each connected browser only receives the bytes. Live updates are best
+    effort: if Redis is unavailable the event is dropped and the screens catch up on
+    the next page load or feed poll.
+    """
+    transaction.on_commit(lambda: _publish(event, data))
+
+
+def _publish(event, data):
+    global _redis_retry_at
+
+    if time.monotonic() < _redis_retry_at:
+        return
+
+    frame = format_sse(event, data() if callable(data) else data)
+    try:
+        get_redis().publish(DASHBOARD_CHANNEL, frame)
+    except redis.exceptions.RedisError as e:
+        logger.warning('Dashboard live updates disabled for %ss: %s', REDIS_RETRY_INTERVAL, e)
+        _redis_retry_at = time.monotonic() + REDIS_RETRY_INTERVAL
+
+
+def publish_counters(**deltas):
+    """
+    Publishes changes to the dashboard counters, e.g. publish_counters(members_active=1, members_inactive=-1).
+    Zero deltas are left out; nothing is published if all of them are zero.
+    """
+    deltas = {name: delta for name, delta in deltas.items() if delta}
+    if deltas:
+        publish_dashboard_event('counters', deltas)
+
+
+def publish_activities(entries):
+    """Publishes ActivityLog entries that were just written."""
+    for entry in entries:
+        publish_dashboard_event('activity', lambda entry=entry: {
+            'id': entry.pk,
+            'description': entry.description,
+            'created_at': date_format(localtime(entry.created_at), ACTIVITY_TIME_FORMAT),
+        })
+
+
+async def adashboard_event_stream(client=None, max_seconds=None, heartbeat=None):
+    """
+    Yields the frames published on DASHBOARD_CHANNEL for one connected browser.
+
+    Runs on the ASGI event loop with redis.asyncio, so an open stream holds neither
+    a worker nor a thread. No database access happens here: every frame comes ready
+    from Redis. A comment line is sent every `heartbeat` seconds so proxies keep
+    the connection open, and the stream ends after `max_seconds`; the browser
+    reconnects by itself after the `retry` interval.
+
+    :param client: asyncio Redis client; by default one is opened for the stream and closed at the end.
+    """
+    own_client = client is None
+    client = new_async_redis() if own_client else client
+    max_seconds = settings.DASHBOARD_STREAM_MAX_SECONDS if max_seconds is None else max_seconds
+    heartbeat = settings.DASHBOARD_STREAM_HEARTBEAT if heartbeat is None else heartbeat
+
+    yield f'retry: {settings.DASHBOARD_STREAM_RETRY_MS}\n\n'
+
+    pubsub = client.pubsub(ignore_subscribe_messages=True)
+    try:
+        await pubsub.subscribe(DASHBOARD_CHANNEL)
+        deadline = time.monotonic() + max_seconds
+
+        while time.monotonic() < deadline:
+            message = await pubsub.get_message(timeout=heartbeat)
+
+            if message is None:
+                yield ': keepalive\n\n'
+            else:
+                yield message['data'].decode() if isinstance(message['data'], bytes) else message['data']
+    except redis.exceptions.RedisError as e:
+        logger.warning('Dashboard stream closed, Redis is unavailable: %s', e)
+    finally:
+        await pubsub.aclose()
+        if own_client:
+            await client.aclose()
@@ -0,0 +1,222 @@
+import json
+import random
+import threading
+import time
+from datetime import timedelta
+
+import requests
+from django.urls import reverse
+from django.utils.timezone import localdate
+
+from members.seeding import LAST_NAMES
+from utils.utils import percentile
+
+# Relative weight of each action in the simulated front-desk traffic
+SCENARIO_WEIGHTS = {
+    'home': 30,
+    'members': 20,
+    'members_search': 15,
+    'members_filter': 10,
+    'finance': 10,
+    'add_payment': 15,
+}
+
+
+class LoadTestError(Exception):
+    pass
+
+
+class LoadTestResults:
+    """Latencies and errors per endpoint, shared by the virtual users."""
+
+    def __init__(self):
+        self.samples = {}
+        self._lock = threading.Lock()
+
+    def record(self, endpoint, seconds, ok):
+        with self._lock:
+            self.samples.setdefault(endpoint, []).append((seconds, ok))
+
+    def summary(self, duration):
+        """
+        Returns {'duration': ..., 'endpoints': {endpoint: stats}, 'total': stats}, where stats has requests,
+        errors, error_rate, rps and the p50/p90/p99/max latencies in milliseconds.
+        """
+        with self._lock:
+            samples = {endpoint: list(values) for endpoint, values in self.samples.items()}
+
+        endpoints = {endpoint: self._stats(values, duration) for endpoint, values in sorted(samples.items())}
+        total = self._stats([sample for values in samples.values() for sample in values], duration)
+        return {'duration': round(duration, 2), 'endpoints': endpoints, 'total': total}
+
+    @staticmethod
+    def _stats(samples, duration):
+        latencies_ms = [seconds * 1000 for seconds, _ in samples]
+        errors = sum(1 for _, ok in samples if not ok)
+        return {
+            'requests': len(samples),
+            'errors': errors,
+            'error_rate': round(errors / len(samples), 4) if samples else 0.0,
+            'rps': round(len(samples) / duration, 2) if duration else 0.0,
+            'p50_ms': round(percentile(latencies_ms, 50), 1),
+            'p90_ms': round(percentile(latencies_ms, 90), 1),
+            'p99_ms': round(percentile(latencies_ms, 99), 1),
+            'max_ms': round(max(latencies_ms, default=0), 1),
+        }
+
+
+class VirtualUser:
+    """
+    One front-desk user: its own session (cookies and CSRF token), logged in through
+    the login form, picking the next action at random by SCENARIO_WEIGHTS.
+    """
+
+    def __init__(self, base_url, cpf, password, results, member_ids=(), writes=True, rng=None, timeout=10):
+        self.base_url = base_url.rstrip('/')
+        self.cpf = cpf
+        self.password = password
+        self.results = results
+        self.member_ids = list(member_ids)
+        self.rng = rng or random.Random()
+        self.timeout = timeout
+        self.session = requests.Session()
+
+        self.actions = {name: getattr(self, name) for name in SCENARIO_WEIGHTS}
+        if not writes or not self.member_ids:
+            self.actions.pop('add_payment')
+
+    def request(self, endpoint, method, path, expected_status=200, **kwargs):
+        """Sends a request and records its latency; a different status or a network error counts as an error."""
+        headers = kwargs.pop('headers', {})
+        if method == 'POST':
+            # Django's CSRF check wants the cookie token in the form and, over HTTPS, a Referer
+            kwargs.setdefault('data', {})['csrfmiddlewaretoken'] = self.session.cookies.get('csrftoken', '')
+            headers['Referer'] = self.base_url + path
+
+        started = time.perf_counter()
+        try:
+            response = self.session.request(
+                method, self.base_url + path, headers=headers, allow_redirects=False, timeout=self.timeout, **kwargs
+            )
+        except requests.RequestException:
+            self.results.record(endpoint, time.perf_counter() - started, False)
+            return None
+
+        self.results.record(endpoint, time.perf_counter() - started, response.status_code == expected_status)
+        return response
+
+    def login(self):
+        self.request('login_view', 'GET', reverse('users:login_view'))
+        response = self.request('login_submit', 'POST', reverse('users:login_submit'), expected_status=302,
+                                data={'cpf': self.cpf, 'password': self.password})
+
+        if response is None or response.headers.get('Location') != reverse('admin_panel:home'):
+            raise LoadTestError('Não foi possível fazer login: confira o CPF e a senha do usuário de teste.')
+
+    def run_action(self):
+        names = list(self.actions)
+        name = self.rng.choices(names, weights=[SCENARIO_WEIGHTS[name] for name in names])[0]
+        self.actions[name]()
+
+    # Actions
+
+    def home(self):
+        self.request('home', 'GET', reverse('admin_panel:home'))
+
+    def members(self):
+        self.request('members', 'GET', reverse('admin_panel:members'), params={'page': self.rng.randint(1, 5)})
+
+    def members_search(self):
+        self.request('members_search', 'GET', reverse('admin_panel:members'), params={'q': self.rng.choice(LAST_NAMES)})
+
+    def members_filter(self):
+        params = {'status': self.rng.choice(('active', 'inactive'))}
+        if self.rng.random() < 0.3:
+            params['last_payment'] = (localdate() - timedelta(days=self.rng.randrange(0, 60))).isoformat()
+        self.request('members_filter', 'GET', reverse('admin_panel:members'), params=params)
+
+    def finance(self):
+        self.request('finance', 'GET', reverse('admin_panel:finance'))
+
+    def add_payment(self):
+        member_id = self.rng.choice(self.member_ids)
+        self.request('add_payment_view', 'GET', reverse('admin_panel:add_payment_view', kwargs={'id': member_id}))
+        self.request('add_payment', 'POST', reverse('admin_panel:add_payment', kwargs={'id': member_id}),
+                     expected_status=302, data={'payment_date': localdate().isoformat(), 'amount': '100.00'})
+
+
+def run_load_test(base_url, cpf, password, users=10, duration=30, requests_per_user=None, think_time=1.0,
+                  member_ids=(), writes=True, seed=0, timeout=10):
+    """
+    Runs `users` virtual users in parallel threads for `duration` seconds (or
+    `requests_per_user` actions each), waiting a random time with mean `think_time`
+    between actions, and returns LoadTestResults.summary().
+
+    :raises LoadTestError: If a user cannot log in.
+    """
+    results = LoadTestResults()
+    deadline = time.monotonic() + duration
+    login_errors = []
+
+    def simulate(position):
+        user = VirtualUser(base_url, cpf, password, results, member_ids, writes, random.Random(seed + position), timeout)
+        try:
+            user.login()
+            done = 0
+            while time.monotonic() < deadline and (requests_per_user is None or done < requests_per_user):
+                user.run_action()
+                done += 1
+                if think_time:
+                    time.sleep(min(user.rng.expovariate(1 / think_time), max(0.0, deadline - time.monotonic())))
+        except LoadTestError as e:
+            login_errors.append(e)
+        finally:
+            user.session.close()
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=simulate, args=(position,), daemon=True) for position in range(users)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    if login_errors and len(login_errors) == users:
+        raise login_errors[0]
+
+    return results.summary(time.perf_counter() - started)
+
+
+def compare_to_baseline(summary, baseline, tolerance=0.1):
+    """
+    Compares a summary with a saved one and returns the regressions, as strings: p50 or
+    p99 latency or throughput worse than `tolerance` (a fraction), or an error rate
+    more than one percentage point higher, per endpoint.
+    """
+    regressions = []
+
+    for endpoint, current in summary['endpoints'].items():
+        previous = baseline.get('endpoints', {}).get(endpoint)
+        if not previous:
+            continue
+
+        for metric in ('p50_ms', 'p99_ms'):
+            if previous[metric] and current[metric] > previous[metric] * (1 + tolerance):
+                regressions.append(f'{endpoint}: {metric} {previous[metric]} -> {current[metric]}')
+
+        if previous['rps'] and current['rps'] < previous['rps'] * (1 - tolerance):
+            regressions.append(f'{endpoint}: rps {previous["rps"]} -> {current["rps"]}')
+
+        if current['error_rate'] > previous['error_rate'] + 0.01:
+            regressions.append(f'{endpoint}: error_rate {previous["error_rate"]} -> {current["error_rate"]}')
+
+    return regressions
+
+
+def save_baseline(summary, path):
+    with open(path, 'w', encoding='utf-8') as baseline_file:
+        json.dump(summary, baseline_file, indent=2)
+
+
+def load_baseline(path):
+    with open(path, encoding='utf-8') as baseline_file:
+        return json.load(baseline_file)
@@ -0,0 +1,30 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from admin_panel.retention import archive_activity_logs, export_archived_activity_logs
+
+
+class Command(BaseCommand):
+    help = (
+        'Aplica a política de retenção do ActivityLog: move para a tabela de arquivo as entradas mais antigas '
+        'que ACTIVITY_LOG_HOT_DAYS e exporta para arquivos .jsonl.gz as arquivadas há mais de ACTIVITY_LOG_RETENTION_DAYS.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hot-days', type=int, default=settings.ACTIVITY_LOG_HOT_DAYS,
+                            help='Dias mantidos na tabela principal.')
+        parser.add_argument('--retention-days', type=int, default=settings.ACTIVITY_LOG_RETENTION_DAYS,
+                            help='Dias mantidos no banco antes de ir para os arquivos compactados.')
+        parser.add_argument('--directory', default=settings.ACTIVITY_LOG_ARCHIVE_DIR,
+                            help='Diretório dos arquivos compactados.')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        moved = archive_activity_logs(options['hot_days'], batch_size=options['batch_size'])
+        self.stdout.write(f'{moved} entradas movidas para a tabela de arquivo.')
+
+        exported, files = export_archived_activity_logs(
+            options['retention_days'], directory=options['directory'], batch_size=options['batch_size']
+        )
+        self.stdout.write(f'{exported} entradas exportadas para arquivos compactados.')
+        for path in files:
+            self.stdout.write(f'  {path}')
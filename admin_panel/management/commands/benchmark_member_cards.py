@@ -0,0 +1,68 @@
+import time
+
+from django.core.cache import cache
+from django.core.cache.backends.dummy import DummyCache
+from django.core.management.base import BaseCommand, CommandError
+from django.template.loader import render_to_string
+
+from admin_panel.views import MEMBER_CARD_TEMPLATE, member_card_key
+from members.models import Member
+from utils.fragment_cache import render_cached_fragments
+from utils.utils import percentile
+
+
+class Command(BaseCommand):
+    help = (
+        'Mede o tempo de renderização dos cards de uma página da lista de alunos: sem cache, com o '
+        'cache de fragmentos vazio e com o cache preenchido. Usa os alunos mais recentes do banco '
+        '(crie dados com seed_database) e o cache configurado.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--page-size', type=int, default=15, help='Cards por página, como na lista de alunos.')
+        parser.add_argument('--rounds', type=int, default=50, help='Renderizações medidas em cada modo.')
+
+    def handle(self, *args, **options):
+        members = list(Member.objects.with_last_payment_date().order_by('-id')[:options['page_size']])
+        if not members:
+            raise CommandError('Nenhum aluno no banco. Crie dados com o comando seed_database.')
+        if isinstance(cache, DummyCache):
+            self.stderr.write(self.style.WARNING('O cache configurado é o DummyCache: os modos com cache não reaproveitam nada.'))
+
+        keys = [member_card_key(member) for member in members]
+
+        def uncached():
+            return [render_to_string(MEMBER_CARD_TEMPLATE, {'member': member}) for member in members]
+
+        def cold():
+            cache.delete_many(keys)
+            return render_cached_fragments(MEMBER_CARD_TEMPLATE, members, member_card_key, context_name='member')
+
+        def warm():
+            return render_cached_fragments(MEMBER_CARD_TEMPLATE, members, member_card_key, context_name='member')
+
+        # Primeira renderização fora da medição: compila o template (cached.Loader)
+        uncached()
+
+        results = {}
+        for name, render in (('sem cache', uncached), ('cache vazio', cold), ('cache preenchido', warm)):
+            timings = []
+            for _ in range(options['rounds']):
+                start = time.perf_counter()
+                render()
+                timings.append((time.perf_counter() - start) * 1000)
+            results[name] = timings
+
+        self.report(len(members), results)
+
+    def report(self, cards, results):
+        self.stdout.write(self.style.MIGRATE_HEADING(f'Renderização de {cards} cards por página'))
+        baseline = percentile(results['sem cache'], 50)
+
+        for name, timings in results.items():
+            p50 = percentile(timings, 50)
+            speedup = baseline / p50 if p50 else 0
+            self.stdout.write(
+                f'  {name:<17} p50: {p50:.2f}ms  p95: {percentile(timings, 95):.2f}ms  '
+                f'por card: {p50 / cards:.3f}ms  ({speedup:.1f}x)'
+            )
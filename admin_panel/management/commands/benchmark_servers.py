@@ -0,0 +1,151 @@
+import importlib.util
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+
+import requests
+from decouple import config
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from admin_panel.load_test import LoadTestError, compare_to_baseline, run_load_test
+from members.models import Member
+
+
+class Command(BaseCommand):
+    help = (
+        'Compara a latência sob carga do painel servido pelo uWSGI (WSGI, views síncronas) e pelo uvicorn '
+        '(ASGI, views assíncronas do painel, das finanças e dos relatórios): sobe cada servidor com o mesmo '
+        'número de workers, roda o mesmo teste de carga (ver load_test) e mostra os percentis lado a lado. '
+        'Registra pagamentos reais: use um banco descartável (ou --no-writes).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4, help='Processos de cada servidor.')
+        parser.add_argument('--users', type=int, default=20, help='Usuários simultâneos.')
+        parser.add_argument('--duration', type=float, default=30, help='Duração do teste em cada servidor, em segundos.')
+        parser.add_argument('--think-time', type=float, default=0.5, help='Espera média entre as ações de um usuário, em segundos.')
+        parser.add_argument('--wsgi-port', type=int, default=8101)
+        parser.add_argument('--asgi-port', type=int, default=8102)
+        parser.add_argument('--startup-timeout', type=float, default=30, help='Espera máxima pela subida de cada servidor, em segundos.')
+        parser.add_argument('--cpf', default=config('DJANGO_SUPERUSER_CPF', default='12345678901'))
+        parser.add_argument('--password', default=config('DJANGO_SUPERUSER_PASSWORD', default='admin123'))
+        parser.add_argument('--no-writes', action='store_true', help='Não registra pagamentos.')
+        parser.add_argument('--seed', type=int, default=0, help='Semente das escolhas dos usuários.')
+        parser.add_argument('--output', metavar='ARQUIVO', help='Salva os dois resultados em JSON.')
+
+    def handle(self, *args, **options):
+        servers = {
+            'uwsgi': self.uwsgi_command(options['wsgi_port'], options['workers']),
+            'uvicorn': self.uvicorn_command(options['asgi_port'], options['workers']),
+        }
+        ports = {'uwsgi': options['wsgi_port'], 'uvicorn': options['asgi_port']}
+        member_ids = [] if options['no_writes'] else list(Member.objects.values_list('id', flat=True)[:1000])
+
+        results = {}
+        for name, command in servers.items():
+            url = f'http://127.0.0.1:{ports[name]}'
+            self.stdout.write(f'{name}: {options["users"]} usuários contra {url} por {options["duration"]:.0f}s...')
+            with self.server(command, url, options['startup_timeout']):
+                try:
+                    results[name] = run_load_test(
+                        url, options['cpf'], options['password'],
+                        users=options['users'],
+                        duration=options['duration'],
+                        think_time=options['think_time'],
+                        member_ids=member_ids,
+                        writes=not options['no_writes'],
+                        seed=options['seed'],
+                    )
+                except LoadTestError as e:
+                    raise CommandError(f'{name}: {e}')
+
+        self.report(results['uwsgi'], results['uvicorn'])
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as output:
+                json.dump(results, output, indent=2)
+            self.stdout.write(f'Resultados salvos em {options["output"]}.')
+
+    def uwsgi_command(self, port, workers):
+        executable = shutil.which('uwsgi')
+        if executable is None:
+            raise CommandError('uwsgi não encontrado no PATH.')
+        return [
+            executable, '--http', f'127.0.0.1:{port}', '--module', 'project.wsgi', '--chdir', str(settings.BASE_DIR),
+            '--master', '--processes', str(workers), '--enable-threads', '--die-on-term', '--disable-logging',
+        ]
+
+    def uvicorn_command(self, port, workers):
+        # Sobe pelo mesmo interpretador (python -m uvicorn): o pacote precisa estar instalado nele
+        if importlib.util.find_spec('uvicorn') is None:
+            raise CommandError('uvicorn não está instalado: instale as dependências do requirements.txt.')
+        return [
+            sys.executable, '-m', 'uvicorn', 'project.asgi:application', '--app-dir', str(settings.BASE_DIR),
+            '--host', '127.0.0.1', '--port', str(port), '--workers', str(workers), '--no-access-log',
+        ]
+
+    def server(self, command, url, timeout):
+        return _Server(command, url, timeout)
+
+    def report(self, wsgi, asgi):
+        self.stdout.write(self.style.MIGRATE_HEADING('uWSGI (síncrono) x uvicorn (ASGI)'))
+        self.stdout.write(f'  {"endpoint":<18} {"p50 wsgi":>9} {"p50 asgi":>9} {"p99 wsgi":>9} {"p99 asgi":>9} {"req/s wsgi":>11} {"req/s asgi":>11}')
+
+        endpoints = sorted(set(wsgi['endpoints']) | set(asgi['endpoints']))
+        rows = [(endpoint, wsgi['endpoints'].get(endpoint), asgi['endpoints'].get(endpoint)) for endpoint in endpoints]
+        rows.append(('total', wsgi['total'], asgi['total']))
+        empty = {'p50_ms': 0.0, 'p99_ms': 0.0, 'rps': 0.0}
+
+        for endpoint, before, after in rows:
+            before, after = before or empty, after or empty
+            self.stdout.write(
+                f'  {endpoint:<18} {before["p50_ms"]:>9.1f} {after["p50_ms"]:>9.1f} {before["p99_ms"]:>9.1f} '
+                f'{after["p99_ms"]:>9.1f} {before["rps"]:>11.1f} {after["rps"]:>11.1f}'
+            )
+
+        # O uWSGI como linha de base: o que ficou pior sob ASGI
+        regressions = compare_to_baseline(asgi, wsgi)
+        for regression in regressions:
+            self.stdout.write(self.style.WARNING(f'  pior sob ASGI: {regression}'))
+        if not regressions:
+            self.stdout.write(self.style.SUCCESS('  Nenhum endpoint pior sob ASGI.'))
+
+
+class _Server:
+    """Sobe um servidor em um subprocesso, espera ele responder e o encerra na saída do bloco."""
+
+    def __init__(self, command, url, timeout):
+        self.command = command
+        self.url = url
+        self.timeout = timeout
+        self.process = None
+
+    def __enter__(self):
+        # Cada servidor escolhe as views pelo próprio ponto de entrada (project/asgi.py liga as assíncronas)
+        env = {key: value for key, value in os.environ.items() if key != 'ASYNC_DASHBOARD_VIEWS'}
+        self.process = subprocess.Popen(self.command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+        deadline = time.monotonic() + self.timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise CommandError(f'O servidor terminou ao subir: {" ".join(self.command)}')
+            try:
+                requests.get(self.url, timeout=1, allow_redirects=False)
+                return self
+            except requests.RequestException:
+                time.sleep(0.2)
+
+        self.__exit__(None, None, None)
+        raise CommandError(f'O servidor não respondeu em {self.timeout:.0f}s: {self.url}')
+
+    def __exit__(self, *exc_info):
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
@@ -0,0 +1,79 @@
+from decouple import config
+from django.core.management.base import BaseCommand, CommandError
+from admin_panel.load_test import LoadTestError, compare_to_baseline, load_baseline, run_load_test, save_baseline
+from members.models import Member
+
+
+class Command(BaseCommand):
+    help = (
+        'Teste de carga HTTP do painel contra um servidor rodando (ex.: uWSGI local): usuários simultâneos fazem '
+        'login e navegam por home, alunos (com busca e filtros), registro de pagamento e financeiro. Mostra vazão, '
+        'percentis de latência e taxa de erros por endpoint e compara com uma linha de base salva. '
+        'Registra pagamentos reais: use um banco descartável (ou --no-writes).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000', help='Endereço do servidor.')
+        parser.add_argument('--users', type=int, default=10, help='Usuários simultâneos.')
+        parser.add_argument('--duration', type=float, default=30, help='Duração do teste, em segundos.')
+        parser.add_argument('--requests-per-user', type=int, default=None, help='Para cada usuário depois de N ações.')
+        parser.add_argument('--think-time', type=float, default=1.0, help='Espera média entre as ações de um usuário, em segundos.')
+        parser.add_argument('--cpf', default=config('DJANGO_SUPERUSER_CPF', default='12345678901'))
+        parser.add_argument('--password', default=config('DJANGO_SUPERUSER_PASSWORD', default='admin123'))
+        parser.add_argument('--no-writes', action='store_true', help='Não registra pagamentos.')
+        parser.add_argument('--seed', type=int, default=0, help='Semente das escolhas dos usuários.')
+        parser.add_argument('--timeout', type=float, default=10, help='Timeout de cada requisição, em segundos.')
+        parser.add_argument('--save-baseline', metavar='ARQUIVO', help='Salva o resultado como linha de base (JSON).')
+        parser.add_argument('--baseline', metavar='ARQUIVO', help='Compara o resultado com uma linha de base salva.')
+        parser.add_argument('--tolerance', type=float, default=0.1,
+                            help='Piora aceita em relação à linha de base (0.1 = 10%%).')
+        parser.add_argument('--fail-on-regression', action='store_true',
+                            help='Termina com erro se houver regressão em relação à linha de base.')
+
+    def handle(self, *args, **options):
+        baseline = load_baseline(options['baseline']) if options['baseline'] else None
+        member_ids = [] if options['no_writes'] else list(Member.objects.values_list('id', flat=True)[:1000])
+
+        self.stdout.write(f'{options["users"]} usuários contra {options["url"]} por até {options["duration"]:.0f}s...')
+        try:
+            summary = run_load_test(
+                options['url'], options['cpf'], options['password'],
+                users=options['users'],
+                duration=options['duration'],
+                requests_per_user=options['requests_per_user'],
+                think_time=options['think_time'],
+                member_ids=member_ids,
+                writes=not options['no_writes'],
+                seed=options['seed'],
+                timeout=options['timeout'],
+            )
+        except LoadTestError as e:
+            raise CommandError(str(e))
+
+        self.report(summary)
+
+        if options['save_baseline']:
+            save_baseline(summary, options['save_baseline'])
+            self.stdout.write(f'Linha de base salva em {options["save_baseline"]}.')
+
+        if baseline is not None:
+            regressions = compare_to_baseline(summary, baseline, options['tolerance'])
+            self.stdout.write(self.style.MIGRATE_HEADING('Comparação com a linha de base'))
+            for regression in regressions:
+                self.stdout.write(self.style.WARNING(f'  {regression}'))
+            if not regressions:
+                self.stdout.write(self.style.SUCCESS('  Nenhuma regressão.'))
+            elif options['fail_on_regression']:
+                raise CommandError(f'{len(regressions)} regressões em relação à linha de base.')
+
+    def report(self, summary):
+        self.stdout.write(self.style.MIGRATE_HEADING(f'Resultado ({summary["duration"]:.1f}s)'))
+        header = f'  {"endpoint":<18} {"req":>6} {"req/s":>7} {"p50 ms":>8} {"p90 ms":>8} {"p99 ms":>8} {"máx ms":>8} {"erros":>7}'
+        self.stdout.write(header)
+
+        rows = list(summary['endpoints'].items()) + [('total', summary['total'])]
+        for endpoint, stats in rows:
+            self.stdout.write(
+                f'  {endpoint:<18} {stats["requests"]:>6} {stats["rps"]:>7.1f} {stats["p50_ms"]:>8.1f} '
+                f'{stats["p90_ms"]:>8.1f} {stats["p99_ms"]:>8.1f} {stats["max_ms"]:>8.1f} {stats["error_rate"]:>7.1%}'
+            )
@@ -0,0 +1,37 @@
+from pathlib import Path
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from utils.profiling import top_functions
+
+
+class Command(BaseCommand):
+    help = (
+        'Mostra as funções mais caras de um perfil salvo pelo ProfilingMiddleware. Sem arquivo, '
+        'lista os perfis mais recentes de PROFILING_DIR.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('file', nargs='?', help='Arquivo .prof (caminho ou nome dentro de PROFILING_DIR).')
+        parser.add_argument('--limit', type=int, default=settings.PROFILING_TOP_FUNCTIONS,
+                            help='Quantidade de funções mostradas.')
+        parser.add_argument('--sort', default='cumulative',
+                            help='Ordenação do pstats: cumulative, tottime, calls...')
+
+    def handle(self, *args, **options):
+        directory = Path(settings.PROFILING_DIR)
+
+        if not options['file']:
+            files = sorted(directory.glob('*.prof'))[-options['limit']:]
+            if not files:
+                self.stdout.write(f'Nenhum perfil em {directory}.')
+            for path in files:
+                self.stdout.write(path.name)
+            return
+
+        path = Path(options['file'])
+        if not path.exists():
+            path = directory / options['file']
+        if not path.exists():
+            raise CommandError(f'Perfil não encontrado: {options["file"]}')
+
+        self.stdout.write(top_functions(path, options['limit'], options['sort']))
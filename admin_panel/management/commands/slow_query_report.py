@@ -0,0 +1,46 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from utils.slow_queries import aggregate_slow_queries, read_slow_query_log
+
+SORT_KEYS = ('total_ms', 'count', 'max_ms', 'mean_ms', 'p95_ms')
+
+
+class Command(BaseCommand):
+    help = (
+        'Agrupa o log de consultas lentas pela impressão digital do SQL e mostra as piores, '
+        'ordenadas pelo tempo total.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('files', nargs='*', default=[settings.SLOW_QUERY_LOG_FILE],
+                            help='Arquivos de log (padrão: SLOW_QUERY_LOG_FILE).')
+        parser.add_argument('--limit', type=int, default=20, help='Quantidade de consultas mostradas.')
+        parser.add_argument('--sort', choices=SORT_KEYS, default='total_ms')
+        parser.add_argument('--plans', action='store_true', help='Mostra o último EXPLAIN de cada consulta.')
+
+    def handle(self, *args, **options):
+        entries = []
+        for path in options['files']:
+            try:
+                entries.extend(read_slow_query_log(path))
+            except FileNotFoundError:
+                raise CommandError(f'Arquivo não encontrado: {path}')
+
+        report = sorted(aggregate_slow_queries(entries), key=lambda group: group[options['sort']], reverse=True)
+        if not report:
+            self.stdout.write('Nenhuma consulta lenta registrada.')
+            return
+
+        self.stdout.write(f'{len(entries)} consultas lentas, {len(report)} distintas.\n')
+
+        for position, group in enumerate(report[:options['limit']], start=1):
+            self.stdout.write(
+                f'#{position} [{group["fingerprint"]}] {group["count"]}x  total {group["total_ms"]:.0f} ms  '
+                f'média {group["mean_ms"]:.0f} ms  p95 {group["p95_ms"]:.0f} ms  máx {group["max_ms"]:.0f} ms'
+            )
+            self.stdout.write(f'  {group["normalized"]}')
+            for call_site in group['call_sites'][:3]:
+                self.stdout.write(f'  em {call_site}')
+            if options['plans'] and group['plan']:
+                self.stdout.write('  ' + group['plan'].replace('\n', '\n  '))
+            self.stdout.write('')
@@ -0,0 +1,158 @@
+import logging
+import random
+import time
+
+from django.conf import settings
+from django.db import connection
+from django.http import HttpResponse
+
+from utils.profiling import save_profile, start_profiler, top_functions
+from utils.request_metrics import get_request_metrics
+from .activity_log import buffer_activity_logs
+
+# Separate from the module logger so the per-request lines can be routed on their own (see LOGGING)
+request_logger = logging.getLogger('request_metrics')
+profiling_logger = logging.getLogger('profiling')
+
+
+class ActivityLogBufferMiddleware:
+    """Writes every ActivityLog entry produced by a request with a single bulk insert."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with buffer_activity_logs():
+            return self.get_response(request)
+
+
+class QueryTimer:
+    """Database execute wrapper that counts the queries and adds up their time."""
+
+    __slots__ = ('count', 'seconds')
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - started
+            self.count += 1
+
+
+class RequestMetricsMiddleware:
+    """
+    Records, for every request, the wall time, number of queries, SQL time and
+    response size, labelled by view name, method and status class.
+
+    Each request writes one line to the 'request_metrics' logger and feeds the
+    histograms exposed at /metrics/ (see utils.request_metrics). It only adds a
+    timer around each query and a dict update per request, so it stays on in
+    production. It should be the first middleware, so the time of the others is
+    included.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.metrics = get_request_metrics()
+
+    def __call__(self, request):
+        timer = QueryTimer()
+        started = time.perf_counter()
+
+        with connection.execute_wrapper(timer):
+            response = self.get_response(request)
+
+        duration = time.perf_counter() - started
+        match = request.resolver_match
+        view = match.view_name if match else 'unresolved'
+        # Streaming responses (e.g. the dashboard stream) are measured up to the first byte, without size
+        size = None if response.streaming else len(response.content)
+        labels = (('view', view), ('method', request.method), ('status', f'{response.status_code // 100}xx'))
+
+        self.metrics.observe('gym_request_duration_seconds', labels, duration)
+        self.metrics.observe('gym_request_db_seconds', labels, timer.seconds)
+        self.metrics.observe('gym_request_queries', labels, timer.count)
+        if size is not None:
+            self.metrics.observe('gym_response_size_bytes', labels, size)
+        self.metrics.flush_if_due()
+
+        request_logger.info(
+            'view=%s method=%s status=%s duration_ms=%.1f queries=%d db_ms=%.1f size=%s',
+            view, request.method, response.status_code, duration * 1000, timer.count, timer.seconds * 1000,
+            '-' if size is None else size,
+            extra={
+                'view': view,
+                'method': request.method,
+                'status': response.status_code,
+                'duration_ms': round(duration * 1000, 1),
+                'queries': timer.count,
+                'db_ms': round(timer.seconds * 1000, 1),
+                'size': size,
+            },
+        )
+        return response
+
+
+class ProfilingMiddleware:
+    """
+    Profiles a request with cProfile when a staff member asks for it, with
+    "?profile=1" or the "X-Profile: 1" header, or for a random PROFILING_SAMPLE_RATE
+    fraction of all requests.
+
+    The profile is saved in PROFILING_DIR in the pstats format (the newest
+    PROFILING_MAX_FILES are kept) and its top functions are written to the
+    'profiling' logger. Staff requests also get the file name in the X-Profile-File
+    header; with "?profile=text" the response is replaced by the top functions report.
+
+    It must come after AuthenticationMiddleware. Streaming responses are only
+    profiled until the view returns.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def get_mode(self, request):
+        """Returns 'text' or 'file' for requests asked by staff, 'sample' for sampled ones, or None."""
+        flag = request.GET.get('profile') or request.headers.get('X-Profile')
+
+        if flag and flag != '0' and request.user.is_staff:
+            return 'text' if flag == 'text' else 'file'
+
+        if settings.PROFILING_SAMPLE_RATE and random.random() < settings.PROFILING_SAMPLE_RATE:
+            return 'sample'
+
+        return None
+
+    def __call__(self, request):
+        mode = self.get_mode(request)
+        profiler = start_profiler() if mode else None
+
+        if profiler is None:
+            return self.get_response(request)
+
+        try:
+            response = self.get_response(request)
+        finally:
+            profiler.disable()
+
+        match = request.resolver_match
+        label = match.view_name if match else request.path
+        path = save_profile(profiler, settings.PROFILING_DIR, label, settings.PROFILING_MAX_FILES)
+        report = top_functions(profiler, settings.PROFILING_TOP_FUNCTIONS)
+
+        profiling_logger.info(
+            'Profile of %s %s (%s) saved to %s\n%s', request.method, request.get_full_path(), mode, path, report,
+            extra={'view': label, 'profile_file': str(path)},
+        )
+
+        if mode == 'text':
+            response = HttpResponse(report, content_type='text/plain; charset=utf-8')
+        if mode != 'sample':
+            response['X-Profile-File'] = path.name
+
+        return response
@@ -0,0 +1,37 @@
+# Generated by Django 5.1.3 on 2026-10-19 16:29
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_panel', '0006_alter_activitylog_created_at'),
+        ('members', '0008_billingmessage_priority_billingmessage_scheduled_for_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ActivityLogArchive',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('event_type', models.CharField(choices=[('created', 'Created'), ('updated', 'Updated'), ('deleted', 'Deleted'), ('payment', 'Payment'), ('pending', 'Pending')], max_length=20)),
+                ('description', models.TextField()),
+                ('created_at', models.DateTimeField()),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='activitylog',
+            index=models.Index(fields=['created_at'], name='admin_panel_created_77c91f_idx'),
+        ),
+        migrations.AddField(
+            model_name='activitylogarchive',
+            name='member',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='members.member'),
+        ),
+        migrations.AddIndex(
+            model_name='activitylogarchive',
+            index=models.Index(fields=['created_at'], name='admin_panel_created_e804d5_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.3 on 2026-10-19 16:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_panel', '0007_activitylogarchive_and_more'),
+        ('members', '0008_billingmessage_priority_billingmessage_scheduled_for_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='activitylog',
+            index=models.Index(fields=['id'], include=('description', 'created_at'), name='activitylog_feed_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.3 on 2026-10-19 17:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_panel', '0008_activitylog_feed_idx'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='dailyreport',
+            name='daily_profit',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=10),
+        ),
+    ]
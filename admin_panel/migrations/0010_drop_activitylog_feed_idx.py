@@ -0,0 +1,17 @@
+# Generated by Django 5.1.3 on 2026-10-19 18:56
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_panel', '0009_dailyreport_daily_profit_max_digits'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='activitylog',
+            name='activitylog_feed_idx',
+        ),
+    ]
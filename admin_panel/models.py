@@ -23,13 +23,38 @@ class ActivityLog(models.Model):
     def __str__(self):
         return f"{self.get_event_type_display()} - {self.description}"
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at']),
+        ]
+
+
+class ActivityLogArchive(models.Model):
+    """
+    Entradas do ActivityLog mais antigas que ACTIVITY_LOG_HOT_DAYS, movidas para manter a tabela principal pequena.
+    Mantêm o id original; depois de ACTIVITY_LOG_RETENTION_DAYS vão para arquivos compactados (ver admin_panel.retention).
+    """
+    id = models.BigIntegerField(primary_key=True)
+    member = models.ForeignKey(Member, on_delete=models.SET_NULL, null=True, blank=True, db_constraint=False, related_name='+')
+    event_type = models.CharField(max_length=20, choices=ActivityLog.EVENT_TYPES)
+    description = models.TextField()
+    created_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.get_event_type_display()} - {self.description}"
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at']),
+        ]
+
 
 class DailyReport(models.Model):
     date = models.DateField(unique=True)
     active_students = models.PositiveIntegerField(default=0)
     pending_students = models.PositiveIntegerField(default=0)
     new_students = models.PositiveIntegerField(default=0)
-    daily_profit = models.DecimalField(max_digits=6, decimal_places=2, default=0)
+    daily_profit = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     payments = models.ManyToManyField(Payment)
     
 
@@ -0,0 +1,100 @@
+import gzip
+import json
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.timezone import localtime
+
+from .models import ActivityLog, ActivityLogArchive
+
+ARCHIVE_FIELDS = ('id', 'member_id', 'event_type', 'description', 'created_at')
+
+
+def archive_activity_logs(older_than_days=None, batch_size=1000):
+    """
+    Moves ActivityLog entries older than `older_than_days` (default ACTIVITY_LOG_HOT_DAYS)
+    to ActivityLogArchive, keeping the original ids.
+
+    Each batch is copied and deleted in its own transaction, so the hot table is never
+    locked for long and an interrupted run can simply be repeated.
+
+    :return: Number of entries moved.
+    """
+    days = settings.ACTIVITY_LOG_HOT_DAYS if older_than_days is None else older_than_days
+    cutoff = timezone.now() - timedelta(days=days)
+    moved = 0
+
+    while True:
+        with transaction.atomic():
+            entries = list(
+                ActivityLog.objects.filter(created_at__lt=cutoff)
+                .order_by('id')
+                .values(*ARCHIVE_FIELDS)[:batch_size]
+            )
+            if not entries:
+                return moved
+
+            ActivityLogArchive.objects.bulk_create(
+                [ActivityLogArchive(**entry) for entry in entries],
+                ignore_conflicts=True,
+            )
+            ActivityLog.objects.filter(id__in=[entry['id'] for entry in entries]).delete()
+
+        moved += len(entries)
+
+
+def export_archived_activity_logs(older_than_days=None, directory=None, batch_size=1000):
+    """
+    Writes ActivityLogArchive entries older than `older_than_days` (default
+    ACTIVITY_LOG_RETENTION_DAYS) to gzip-compressed JSON Lines files, one per month
+    (activity_log_YYYY-MM.jsonl.gz in ACTIVITY_LOG_ARCHIVE_DIR), and deletes them
+    from the database.
+
+    Files are opened in append mode: running it again adds a new gzip member to the
+    same file, which gzip readers concatenate transparently.
+
+    :return: Tuple (number of entries exported, list of files written).
+    """
+    days = settings.ACTIVITY_LOG_RETENTION_DAYS if older_than_days is None else older_than_days
+    cutoff = timezone.now() - timedelta(days=days)
+    directory = Path(directory or settings.ACTIVITY_LOG_ARCHIVE_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+
+    exported = 0
+    files = set()
+
+    while True:
+        entries = list(
+            ActivityLogArchive.objects.filter(created_at__lt=cutoff)
+            .order_by('id')
+            .values(*ARCHIVE_FIELDS)[:batch_size]
+        )
+        if not entries:
+            return exported, sorted(files)
+
+        by_month = {}
+        for entry in entries:
+            month = localtime(entry['created_at']).strftime('%Y-%m')
+            entry['created_at'] = entry['created_at'].isoformat()
+            by_month.setdefault(month, []).append(entry)
+
+        # The file is written (and closed) before the rows are deleted
+        for month, month_entries in by_month.items():
+            path = directory / f'activity_log_{month}.jsonl.gz'
+            with gzip.open(path, 'at', encoding='utf-8') as archive_file:
+                for entry in month_entries:
+                    archive_file.write(json.dumps(entry, ensure_ascii=False) + '\n')
+            files.add(str(path))
+
+        ActivityLogArchive.objects.filter(id__in=[entry['id'] for entry in entries]).delete()
+        exported += len(entries)
+
+
+def read_archive_file(path):
+    """Yields the entries (dicts) stored in an archive file."""
+    with gzip.open(path, 'rt', encoding='utf-8') as archive_file:
+        for line in archive_file:
+            yield json.loads(line)
@@ -0,0 +1,38 @@
+from celery.signals import task_prerun, task_postrun
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from utils.data_versions import bump_versions, model_namespace
+from utils.slow_queries import install_slow_query_logger
+from .activity_log import buffer_activity_logs
+from .models import DailyReport
+
+# Buffers abertos por task, fechados (e gravados) quando a task termina
+_task_buffers = {}
+
+
+@task_prerun.connect
+def open_task_activity_log_buffer(task_id, **kwargs):
+    context = buffer_activity_logs()
+    context.__enter__()
+    _task_buffers[task_id] = context
+
+
+@task_postrun.connect
+def close_task_activity_log_buffer(task_id, **kwargs):
+    context = _task_buffers.pop(task_id, None)
+    if context is not None:
+        context.__exit__(None, None, None)
+
+
+@connection_created.connect
+def instrument_slow_queries(connection, **kwargs):
+    install_slow_query_logger(connection)
+
+
+# Versão usada nas chaves de cache e nos ETags da API (utils.data_versions). Sem m2m_changed: um receptor
+# desliga o caminho rápido de payments.set(), e create_report salva o relatório depois de definir os pagamentos
+@receiver(post_save, sender=DailyReport)
+@receiver(post_delete, sender=DailyReport)
+def bump_daily_report_version(sender, **kwargs):
+    bump_versions(model_namespace(DailyReport))
@@ -0,0 +1,88 @@
+document.addEventListener('DOMContentLoaded', () => {
+    const feed = document.getElementById('activity-feed');
+
+    if (!feed) {
+        return;
+    }
+
+    const feedUrl = feed.dataset.feedUrl;
+    const pollInterval = parseInt(feed.dataset.pollInterval, 10) * 1000;
+    const maxEntries = 20;  // O mesmo número de entradas que a página mostra
+    let lastId = parseInt(feed.dataset.lastId, 10);
+    let streaming = false;
+
+    // Novas entradas ficam no topo, como na renderização da página
+    function prependEntries(entries) {
+        const placeholder = feed.querySelector('.activity-feed-empty');
+        if (placeholder && entries.length) {
+            placeholder.remove();
+        }
+
+        // O stream e a consulta podem entregar a mesma entrada
+        entries = entries.filter(entry => entry.id > lastId);
+        if (entries.length) {
+            lastId = entries[entries.length - 1].id;
+        }
+
+        entries.forEach(entry => {
+            const item = document.createElement('li');
+            item.textContent = `${entry.description} | ${entry.created_at}`;
+            feed.prepend(item);
+        });
+
+        while (feed.children.length > maxEntries) {
+            feed.lastElementChild.remove();
+        }
+    }
+
+    async function poll() {
+        try {
+            const response = await fetch(`${feedUrl}?after=${lastId}`, {
+                headers: { 'Accept': 'application/json' },
+                credentials: 'same-origin',
+            });
+
+            // Sessão expirada ou erro no servidor: tenta de novo na próxima rodada
+            if (!response.ok || response.redirected) {
+                return;
+            }
+
+            const data = await response.json();
+            prependEntries(data.entries);
+
+            if (data.has_more) {
+                return poll();
+            }
+        } catch (error) {
+            // Sem conexão: tenta de novo na próxima rodada
+        }
+    }
+
+    // Com o stream conectado (dashboard_stream.js) as entradas chegam por ele; a consulta só
+    // recupera o que foi perdido enquanto a conexão estava fechada
+    document.addEventListener('dashboard:activity', event => {
+        prependEntries([event.detail]);
+    });
+
+    document.addEventListener('dashboard:connected', () => {
+        streaming = true;
+        poll();
+    });
+
+    document.addEventListener('dashboard:disconnected', () => {
+        streaming = false;
+    });
+
+    // Não consulta enquanto a aba estiver em segundo plano
+    setInterval(() => {
+        if (!streaming && !document.hidden) {
+            poll();
+        }
+    }, pollInterval);
+
+    document.addEventListener('visibilitychange', () => {
+        if (!document.hidden) {
+            poll();
+        }
+    });
+});
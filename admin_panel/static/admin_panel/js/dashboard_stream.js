@@ -0,0 +1,91 @@
+// Mantém atualizados os cartões marcados com data-counter. Com o stream de eventos (só servido sob
+// ASGI) as variações chegam na hora; além disso os valores são relidos periodicamente do resumo dos
+// contadores, o que corrige o que o stream não publica (ou perdeu enquanto estava desconectado) e é a
+// única fonte de atualização sob WSGI. As novas atividades são repassadas como eventos no document
+// (ver activity_feed.js).
+document.addEventListener('DOMContentLoaded', () => {
+    const panel = document.querySelector('[data-counters-url]');
+
+    if (!panel) {
+        return;
+    }
+
+    function showCounter(card, value) {
+        const decimals = parseInt(card.dataset.decimals || '0', 10);
+
+        card.dataset.value = value.toFixed(decimals);
+        card.querySelector('.count').textContent = (card.dataset.prefix || '') + value.toFixed(decimals).replace('.', ',');
+    }
+
+    function applyCounters(deltas) {
+        Object.entries(deltas).forEach(([name, delta]) => {
+            document.querySelectorAll(`[data-counter="${name}"]`).forEach(card => {
+                showCounter(card, parseFloat(card.dataset.value) + parseFloat(delta));
+            });
+        });
+    }
+
+    async function resync() {
+        try {
+            const response = await fetch(panel.dataset.countersUrl, {
+                headers: { 'Accept': 'application/json' },
+                credentials: 'same-origin',
+            });
+
+            // Sessão expirada ou erro no servidor: tenta de novo na próxima rodada
+            if (!response.ok || response.redirected) {
+                return;
+            }
+
+            Object.entries(await response.json()).forEach(([name, value]) => {
+                document.querySelectorAll(`[data-counter="${name}"]`).forEach(card => {
+                    showCounter(card, parseFloat(value));
+                });
+            });
+        } catch (error) {
+            // Sem conexão: tenta de novo na próxima rodada
+        }
+    }
+
+    // Não consulta enquanto a aba estiver em segundo plano
+    setInterval(() => {
+        if (!document.hidden) {
+            resync();
+        }
+    }, parseInt(panel.dataset.resyncInterval, 10) * 1000);
+
+    document.addEventListener('visibilitychange', () => {
+        if (!document.hidden) {
+            resync();
+        }
+    });
+
+    if (!panel.dataset.streamUrl || !window.EventSource) {
+        return;
+    }
+
+    const source = new EventSource(panel.dataset.streamUrl);
+    let connected = false;
+
+    // Uma reconexão pode ter perdido variações: os valores são relidos
+    source.addEventListener('open', () => {
+        document.dispatchEvent(new CustomEvent('dashboard:connected'));
+        if (connected) {
+            resync();
+        }
+        connected = true;
+    });
+
+    // O navegador reconecta sozinho; enquanto isso o feed volta a ser consultado
+    source.addEventListener('error', () => {
+        document.dispatchEvent(new CustomEvent('dashboard:disconnected'));
+    });
+
+    source.addEventListener('counters', event => {
+        applyCounters(JSON.parse(event.data));
+    });
+
+    source.addEventListener('activity', event => {
+        document.dispatchEvent(new CustomEvent('dashboard:activity', { detail: JSON.parse(event.data) }));
+    });
+});
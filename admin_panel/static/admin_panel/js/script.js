@@ -28,5 +28,17 @@ document.addEventListener("DOMContentLoaded", function () {
     });
 
     const form = document.getElementById('add-student-form');
+
+    const importStudentsBtn = document.getElementById('import-students-btn');
+    const importModalOverlay = document.getElementById('import-modal-overlay');
+    const importModalCloseBtn = document.getElementById('import-modal-close-btn');
+
+    importStudentsBtn.addEventListener('click', function() {
+        importModalOverlay.style.display = 'flex';
+    });
+
+    importModalCloseBtn.addEventListener('click', function() {
+        importModalOverlay.style.display = 'none';
+    });
 });
  
\ No newline at end of file
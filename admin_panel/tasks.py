@@ -1,6 +1,27 @@
+from .activity_log import replay_spooled_activity_logs, write_serialized_entries
 from .models import DailyReport
+from .retention import archive_activity_logs, export_archived_activity_logs
 from celery import shared_task
+from django.db import DatabaseError
 
 @shared_task
 def save_daily_report():
-    DailyReport.create_report()
\ No newline at end of file
+    DailyReport.create_report()
+
+
+@shared_task
+def apply_activity_log_retention():
+    archive_activity_logs()
+    export_archived_activity_logs()
+
+
+@shared_task(autoretry_for=(DatabaseError,), retry_backoff=True, retry_backoff_max=600, max_retries=None)
+def write_activity_logs(entries):
+    """Grava entradas do ActivityLog que falharam ao fim do buffer; tenta de novo até o banco aceitar."""
+    write_serialized_entries(entries)
+
+
+@shared_task
+def replay_activity_log_spool():
+    """Grava as entradas guardadas no arquivo de spool quando nem o Celery estava disponível."""
+    replay_spooled_activity_logs()
@@ -0,0 +1,54 @@
+import time
+from collections import Counter
+from contextlib import contextmanager
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from members.seeding import MemberSeeder
+from utils.slow_queries import fingerprint
+from .test_base import TestBase
+
+
+class TestBaseQueryBudget(TestBase):
+    """
+    Seeds MEMBERS members once per class and checks query budgets and time ceilings.
+
+    Budgets are the same for every dataset size: a view whose query count grows with
+    the data has an N+1 and fails on the bigger classes.
+    """
+
+    MEMBERS = 100
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        # Short payment histories: the general PDF report draws every payment
+        MemberSeeder(history_months=2).run(cls.MEMBERS)
+
+    def setUp(self):
+        self.client.login(cpf=self.user.cpf, password=self.password)
+
+    @contextmanager
+    def assertQueryBudget(self, queries, seconds=None):
+        """
+        Fails if the block runs more than `queries` queries or takes more than `seconds`.
+        The message lists the queries, the repeated ones (usually an N+1) first.
+        """
+        started = time.perf_counter()
+        with CaptureQueriesContext(connection) as context:
+            yield context
+        elapsed = time.perf_counter() - started
+
+        if len(context) > queries:
+            self.fail(f'{len(context)} queries, budget is {queries}.\n{self.describe_queries(context)}')
+
+        if seconds is not None and elapsed > seconds:
+            self.fail(f'{elapsed:.2f}s, ceiling is {seconds}s ({len(context)} queries).')
+
+    @staticmethod
+    def describe_queries(context):
+        repeated = Counter(fingerprint(query['sql']) for query in context.captured_queries)
+        lines = ['Repeated statements:']
+        lines += [f'  {count}x {sql}' for sql, count in repeated.most_common() if count > 1] or ['  none']
+        lines += ['All queries:']
+        lines += [f'  {position}. {query["sql"]}' for position, query in enumerate(context.captured_queries, start=1)]
+        return '\n'.join(lines)
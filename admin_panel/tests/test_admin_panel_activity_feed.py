@@ -0,0 +1,76 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from admin_panel.models import ActivityLog
+from admin_panel import views
+from unittest.mock import patch
+from .base.test_base_home_view import TestBaseHomeView
+
+
+class TestActivityFeedView(TestBaseHomeView):
+    """Test cases for the activity feed JSON endpoint."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.feed_url = reverse('admin_panel:activity_feed')
+
+    def setUp(self):
+        self.client.login(cpf=self.user.cpf, password=self.password)
+
+    def test_activity_feed_requires_authentication(self):
+        """Tests if authentication is required to access the feed."""
+        self.client.logout()
+        response = self.client.get(self.feed_url)
+        self.assertEqual(response.status_code, 302)
+
+    def test_activity_feed_returns_entries_after_cursor(self):
+        """Tests if only the entries after the given id are returned, oldest first."""
+        last_id = ActivityLog.objects.order_by('-id').values_list('id', flat=True).first()
+        first = ActivityLog.objects.create(member=self.active_member, description='Nova atividade 1')
+        second = ActivityLog.objects.create(member=self.active_member, description='Nova atividade 2')
+
+        data = self.client.get(self.feed_url, {'after': last_id}).json()
+
+        self.assertEqual([entry['id'] for entry in data['entries']], [first.id, second.id])
+        self.assertEqual(data['entries'][0]['description'], 'Nova atividade 1')
+        self.assertEqual(data['last_id'], second.id)
+        self.assertFalse(data['has_more'])
+
+    def test_activity_feed_without_new_entries_keeps_cursor(self):
+        """Tests if an empty answer returns the same cursor."""
+        last_id = ActivityLog.objects.order_by('-id').values_list('id', flat=True).first()
+
+        data = self.client.get(self.feed_url, {'after': last_id}).json()
+
+        self.assertEqual(data['entries'], [])
+        self.assertEqual(data['last_id'], last_id)
+
+    @patch.object(views, 'ACTIVITY_FEED_LIMIT', 2)
+    def test_activity_feed_is_limited(self):
+        """Tests if the feed returns at most ACTIVITY_FEED_LIMIT entries and signals there are more."""
+        data = self.client.get(self.feed_url, {'after': 0}).json()
+
+        self.assertEqual(len(data['entries']), 2)
+        self.assertTrue(data['has_more'])
+
+    def test_activity_feed_reads_only_the_activity_log(self):
+        """Tests if the feed reads the entries with one query and does not load the related member."""
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(self.feed_url, {'after': 0})
+
+        feed_queries = [query['sql'] for query in queries if 'admin_panel_activitylog' in query['sql']]
+        self.assertEqual(len(feed_queries), 1)
+        self.assertNotIn('members_member', feed_queries[0])
+
+    def test_activity_feed_invalid_cursor(self):
+        """Tests if a non-numeric cursor returns 400."""
+        response = self.client.get(self.feed_url, {'after': 'abc'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_home_view_exposes_last_activity_id(self):
+        """Tests if the home page gives the feed the id of the newest entry it shows."""
+        response = self.client.get(self.home_url)
+
+        self.assertEqual(response.context['last_activity_id'], response.context['recent_activities'][0].id)
+        self.assertContains(response, 'id="activity-feed"')
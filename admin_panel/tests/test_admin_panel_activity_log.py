@@ -0,0 +1,206 @@
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+from django.db import DatabaseError, connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils.dateparse import parse_datetime
+from django.utils.timezone import localdate
+from members.models import Member
+from admin_panel.models import ActivityLog
+from admin_panel.activity_log import (
+    buffer_activity_logs, flush_activity_logs, log_activity, get_activity_log_buffer, replay_spooled_activity_logs,
+    suppress_activity_logs, write_serialized_entries,
+)
+from .base.test_base import TestBase
+
+
+def count_activity_log_inserts(queries):
+    return len([query for query in queries if query['sql'].startswith('INSERT INTO "admin_panel_activitylog"')])
+
+
+class ActivityLogBufferTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.member = Member.objects.create(email='buffer@example.com', full_name='Aluno Buffer', phone='85988888888')
+
+    def setUp(self):
+        ActivityLog.objects.all().delete()
+
+    def test_log_activity_without_buffer_writes_immediately(self):
+        """Tests that outside a buffer each entry is written right away."""
+        log_activity(event_type='created', description='Entrada imediata', member=self.member)
+
+        self.assertTrue(ActivityLog.objects.filter(description='Entrada imediata').exists())
+
+    def test_buffer_writes_entries_with_one_insert(self):
+        """Tests that the entries of a block are written with a single bulk insert at the end."""
+        with CaptureQueriesContext(connection) as queries, self.captureOnCommitCallbacks(execute=True):
+            with buffer_activity_logs():
+                for i in range(3):
+                    log_activity(event_type='updated', description=f'Entrada {i}', member=self.member)
+
+                self.assertEqual(ActivityLog.objects.count(), 0)
+
+        self.assertEqual(ActivityLog.objects.count(), 3)
+        self.assertEqual(count_activity_log_inserts(queries), 1)
+
+    def test_rolled_back_entries_are_discarded(self):
+        """Tests that entries logged inside a rolled-back transaction are not written."""
+        with self.captureOnCommitCallbacks(execute=True):
+            with buffer_activity_logs():
+                log_activity(event_type='updated', description='Confirmada', member=self.member)
+                try:
+                    with transaction.atomic():
+                        log_activity(event_type='updated', description='Desfeita', member=self.member)
+                        raise ValueError
+                except ValueError:
+                    pass
+
+        self.assertEqual(list(ActivityLog.objects.values_list('description', flat=True)), ['Confirmada'])
+
+    def test_flush_activity_logs(self):
+        """Tests that long-running tasks can write the committed entries before the block ends."""
+        with buffer_activity_logs():
+            with self.captureOnCommitCallbacks(execute=True):
+                log_activity(event_type='updated', description='Primeira', member=self.member)
+
+            self.assertEqual(flush_activity_logs(), 1)
+            self.assertEqual(ActivityLog.objects.count(), 1)
+
+        self.assertEqual(flush_activity_logs(), 0)
+        self.assertIsNone(get_activity_log_buffer())
+
+    def test_nested_blocks_share_buffer(self):
+        """Tests that a nested block does not flush on its own."""
+        with buffer_activity_logs() as outer:
+            with buffer_activity_logs() as inner:
+                self.assertIs(outer, inner)
+
+    def test_member_deleted_before_flush(self):
+        """Tests that an entry whose member was deleted before the flush is kept without the member."""
+        member = Member.objects.create(email='removido@example.com', full_name='Aluno Removido', phone='85988888888')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            with buffer_activity_logs():
+                log_activity(event_type='updated', description='Antes de excluir', member=member)
+                Member.objects.filter(id=member.id).delete()
+
+        entry = ActivityLog.objects.get(description='Antes de excluir')
+        self.assertIsNone(entry.member)
+
+
+class FailedFlushTest(TestCase):
+    """Test cases for the committed entries whose final write fails."""
+
+    def setUp(self):
+        ActivityLog.objects.all().delete()
+        spool_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(spool_dir.cleanup)
+        self.spool_dir = Path(spool_dir.name)
+
+    def log_with_failed_flush(self):
+        with patch.object(ActivityLog.objects, 'bulk_create', side_effect=DatabaseError('banco fora do ar')), \
+                self.assertLogs('admin_panel.activity_log', level='ERROR'), \
+                self.captureOnCommitCallbacks(execute=True):
+            with buffer_activity_logs():
+                log_activity(event_type='payment', description='Pagamento confirmado')
+        self.assertFalse(ActivityLog.objects.exists())
+
+    def test_entries_are_queued_for_retry(self):
+        """Tests that the entries go to the write_activity_logs task, which writes them with the original time."""
+        with patch('admin_panel.tasks.write_activity_logs.delay') as delay:
+            self.log_with_failed_flush()
+
+        [entries] = delay.call_args.args
+        self.assertEqual([entry['description'] for entry in entries], ['Pagamento confirmado'])
+
+        self.assertEqual(write_serialized_entries(entries), 1)
+        self.assertEqual(ActivityLog.objects.get().created_at, parse_datetime(entries[0]['created_at']))
+
+    def test_entries_are_spooled_when_the_broker_is_down(self):
+        """Tests that without the broker the entries are saved to the spool file and replayed later."""
+        with override_settings(ACTIVITY_LOG_SPOOL_DIR=str(self.spool_dir)), \
+                patch('admin_panel.tasks.write_activity_logs.delay', side_effect=ConnectionError('broker fora do ar')):
+            self.log_with_failed_flush()
+            self.assertEqual(replay_spooled_activity_logs(), 1)
+            self.assertEqual(replay_spooled_activity_logs(), 0)
+
+        self.assertEqual(ActivityLog.objects.get().description, 'Pagamento confirmado')
+        self.assertEqual(list(self.spool_dir.iterdir()), [])
+
+
+class SuppressActivityLogsTest(TestCase):
+
+    def setUp(self):
+        ActivityLog.objects.all().delete()
+
+    def test_signals_are_summarized(self):
+        """Tests that the per-row entries of a bulk block are replaced by one summary entry."""
+        with suppress_activity_logs('Lote: {created} cadastrados, {count} no total.', event_type='created'):
+            for i in range(3):
+                member = Member.objects.create(email=f'lote{i}@example.com', full_name=f'Aluno Lote {i}', phone='85988888888')
+            member.save()
+
+        self.assertEqual(list(ActivityLog.objects.values_list('event_type', 'description')), [
+            ('created', 'Lote: 3 cadastrados, 4 no total.'),
+        ])
+
+    def test_missing_event_type_counts_as_zero(self):
+        """Tests that the summary can mention event types that did not happen."""
+        with suppress_activity_logs('{created} cadastrados, {payment} pagamentos.'):
+            log_activity(event_type='created', description='Suprimida')
+
+        self.assertEqual(ActivityLog.objects.get().description, '1 cadastrados, 0 pagamentos.')
+
+    def test_no_summary_when_nothing_was_suppressed(self):
+        """Tests that an empty block records nothing."""
+        with suppress_activity_logs('{count} registros.'):
+            pass
+
+        self.assertFalse(ActivityLog.objects.exists())
+
+    def test_nested_blocks_record_one_summary(self):
+        """Tests that only the outermost block records a summary."""
+        with suppress_activity_logs('Externo: {count}.'):
+            log_activity(event_type='updated', description='Suprimida')
+            with suppress_activity_logs('Interno: {count}.'):
+                log_activity(event_type='updated', description='Suprimida')
+
+        self.assertEqual(list(ActivityLog.objects.values_list('description', flat=True)), ['Externo: 2.'])
+
+    def test_no_summary_when_block_fails(self):
+        """Tests that a failed block does not record a summary."""
+        with self.assertRaises(ValueError):
+            with suppress_activity_logs('{count} registros.'):
+                log_activity(event_type='updated', description='Suprimida')
+                raise ValueError
+
+        self.assertFalse(ActivityLog.objects.exists())
+
+
+class ActivityLogBufferMiddlewareTest(TestBase):
+
+    def test_add_member_writes_activity_logs_in_one_insert(self):
+        """Tests that adding a member through the view writes all its activity logs with one insert."""
+        self.client.login(cpf=self.user.cpf, password=self.password)
+        data = {
+            'email': 'novo@example.com',
+            'full_name': 'Aluno Novo',
+            'phone': '85988888888',
+            'is_active': True,
+            'payment_date': localdate(),
+            'amount': 100,
+        }
+
+        with CaptureQueriesContext(connection) as queries, self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('admin_panel:add_member'), data)
+
+        member = Member.objects.get(email='novo@example.com')
+        self.assertEqual(
+            set(ActivityLog.objects.filter(member=member).values_list('event_type', flat=True)),
+            {'created', 'updated', 'payment'},
+        )
+        self.assertEqual(count_activity_log_inserts(queries), 1)
@@ -0,0 +1,134 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from unittest.mock import patch
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import include, path, reverse
+from django.utils.timezone import localdate
+from admin_panel import urls as admin_panel_urls, views
+from admin_panel.models import DailyReport
+from members.models import Member, Payment
+from .base.test_base import TestBase
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+ASYNC_VIEWS = {
+    'home': views.home_async,
+    'finance': views.finance_async,
+    'generate_pdf_general_report': views.generate_pdf_general_report_async,
+    'generate_pdf_report_of_current_day': views.generate_pdf_report_of_current_day_async,
+    'dashboard_stream': views.dashboard_stream_async,
+}
+
+
+class AsyncDashboardUrls:
+    """The project routes with the async dashboard views, as served under ASGI."""
+    urlpatterns = [
+        path('', include(([
+            path(str(pattern.pattern), ASYNC_VIEWS.get(pattern.name, pattern.callback), name=pattern.name)
+            for pattern in admin_panel_urls.urlpatterns
+        ], 'admin_panel'))),
+        path('users/', include('users.urls')),
+    ]
+
+
+@override_settings(ROOT_URLCONF=AsyncDashboardUrls)
+class AsyncDashboardViewsTest(TestBase):
+    """Test cases for the async versions of the dashboard views."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        active = Member.objects.create(email='ativo@example.com', full_name='Aluno Ativo', phone='85988888888', is_active=True)
+        Member.objects.create(email='pendente@example.com', full_name='Aluno Pendente', phone='85988888887', is_active=False)
+        Payment.objects.create(member=active, payment_date=localdate(), amount=120)
+        Payment.objects.create(member=active, payment_date=localdate().replace(month=1, day=1), amount=80)
+
+    def setUp(self):
+        self.client.login(cpf=self.user.cpf, password=self.password)
+
+    def get_context(self, name, async_views):
+        if async_views:
+            return self.client.get(reverse(f'admin_panel:{name}')).context
+        with override_settings(ROOT_URLCONF=settings.ROOT_URLCONF):
+            return self.client.get(reverse(f'admin_panel:{name}')).context
+
+    def test_home_matches_the_sync_view(self):
+        """Tests that the async home shows the same counters as the sync one."""
+        sync_context = self.get_context('home', async_views=False)
+        async_context = self.get_context('home', async_views=True)
+
+        for key in ('count_members_actives', 'count_members_inactives', 'count_new_members_in_month',
+                    'profit_total_month', 'recent_activities', 'last_activity_id'):
+            self.assertEqual(async_context[key], sync_context[key], key)
+
+    def test_finance_matches_the_sync_view(self):
+        """Tests that the async finance page has the same totals, chart and recent payments as the sync one."""
+        sync_context = self.get_context('finance', async_views=False)
+        async_context = self.get_context('finance', async_views=True)
+
+        for key in ('current_year_profit', 'current_month_profit', 'months_profit', 'month_with_highest_profit'):
+            self.assertEqual(async_context[key], sync_context[key], key)
+        self.assertIn('plotly', async_context['graph_html'])
+        self.assertEqual(list(async_context['recents_payments']), list(sync_context['recents_payments']))
+
+    def test_finance_totals_in_one_query(self):
+        """Tests that the async finance page reads all the year and month totals with a single query."""
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('admin_panel:finance'))
+
+        aggregates = [query['sql'] for query in queries if 'SUM(' in query['sql'].upper()]
+        self.assertEqual(len(aggregates), 1)
+
+    def test_login_required(self):
+        """Tests that the async views still redirect anonymous users to the login."""
+        self.client.logout()
+        response = self.client.get(reverse('admin_panel:home'))
+        self.assertEqual(response.status_code, 302)
+
+    def test_pdf_reports(self):
+        """Tests that the async reports return PDFs, creating the daily report when missing."""
+        response = self.client.get(reverse('admin_panel:generate_pdf_general_report'))
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertTrue(response.content.startswith(b'%PDF'))
+
+        response = self.client.get(reverse('admin_panel:generate_pdf_report_of_current_day'))
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertTrue(DailyReport.objects.filter(date=localdate()).exists())
+
+    @override_settings(CACHES=LOCMEM_CACHE)
+    def test_not_modified(self):
+        """Tests that the async home answers 304 to the ETag of the last load."""
+        cache.clear()
+        self.client.cookies[settings.CSRF_COOKIE_NAME] = 'a' * 32
+        url = reverse('admin_panel:home')
+        etag = self.client.get(url)['ETag']
+
+        response = self.client.get(url, headers={'If-None-Match': etag})
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['Cache-Control'], 'private, no-cache')
+
+    @override_settings(ASYNC_DASHBOARD_VIEWS=True)
+    async def test_dashboard_stream(self):
+        """Tests that the async stream sends the frames as they come, as an uncached event stream."""
+        async def stream():
+            yield 'retry: 3000\n\n'
+            yield ': keepalive\n\n'
+
+        await self.async_client.alogin(cpf=self.user.cpf, password=self.password)
+        with patch('admin_panel.views.adashboard_event_stream', stream):
+            response = await self.async_client.get(reverse('admin_panel:dashboard_stream'))
+            chunks = [chunk async for chunk in response.streaming_content]
+
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertEqual(response['Cache-Control'], 'no-cache')
+        self.assertEqual(chunks, [b'retry: 3000\n\n', b': keepalive\n\n'])
+
+    @override_settings(ASYNC_DASHBOARD_VIEWS=True)
+    def test_pages_open_the_stream(self):
+        """Tests that under ASGI the home and finance pages connect to the stream."""
+        for name in ('home', 'finance'):
+            response = self.client.get(reverse(f'admin_panel:{name}'))
+            self.assertContains(response, f'data-stream-url="{reverse("admin_panel:dashboard_stream")}"')
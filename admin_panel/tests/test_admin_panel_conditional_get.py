@@ -0,0 +1,83 @@
+from django.conf import settings
+from django.contrib.messages import constants, get_messages
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils.timezone import localdate
+from members.models import Member, Payment
+from .base.test_base import TestBase
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class ConditionalGetTest(TestBase):
+    """Test cases for the ETags of the dashboard pages, derived from the data versions."""
+
+    def setUp(self):
+        cache.clear()
+        self.client.login(cpf=self.user.cpf, password=self.password)
+        # Definido pela página de login no uso real
+        self.client.cookies[settings.CSRF_COOKIE_NAME] = 'a' * 32
+        self.member = Member.objects.create(email='etag@example.com', full_name='Aluno ETag', phone='85988888888', is_active=True)
+
+    def revalidate(self, url, etag):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, headers={'If-None-Match': etag})
+        return response, len(queries)
+
+    def test_unchanged_pages_are_not_modified(self):
+        """Tests that home, finance and members answer 304 to the ETag of the last load, without rendering."""
+        for name in ('home', 'finance', 'members'):
+            with self.subTest(name):
+                url = reverse(f'admin_panel:{name}')
+                response = self.client.get(url)
+                self.assertEqual(response['Cache-Control'], 'private, no-cache')
+
+                response, queries = self.revalidate(url, response['ETag'])
+
+                self.assertEqual(response.status_code, 304)
+                self.assertFalse(response.templates)
+                self.assertLessEqual(queries, 1)  # Só o usuário da sessão
+
+    def test_changed_data_renders_again(self):
+        """Tests that a new payment changes the ETag of the pages that show payments."""
+        url = reverse('admin_panel:finance')
+        etag = self.client.get(url)['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Payment.objects.create(member=self.member, payment_date=localdate(), amount=80)
+
+        response, _ = self.revalidate(url, etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_etag_depends_on_the_query_string(self):
+        """Tests that each filter of the member list has its own ETag."""
+        url = reverse('admin_panel:members')
+        etag = self.client.get(url)['ETag']
+
+        response, _ = self.revalidate(f'{url}?status=inactive', etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_pending_messages_skip_the_etag(self):
+        """Tests that a page with a flash message to show is rendered, so the message is not lost."""
+        url = reverse('admin_panel:members')
+        etag = self.client.get(url)['ETag']
+
+        self.client.post(reverse('admin_panel:add_member'), {'full_name': 'A'})  # Inválido: mensagem de erro e formulário na sessão
+        response, _ = self.revalidate(url, etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('ETag', response)
+        self.assertEqual([message.level for message in get_messages(response.wsgi_request)], [constants.ERROR])
+
+    def test_without_csrf_cookie(self):
+        """Tests that pages are rendered normally until the browser has a CSRF cookie."""
+        del self.client.cookies[settings.CSRF_COOKIE_NAME]
+        response = self.client.get(reverse('admin_panel:home'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('ETag', response)
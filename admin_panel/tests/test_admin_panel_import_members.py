@@ -0,0 +1,117 @@
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+from django.contrib.messages import get_messages
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+from django.urls import reverse
+from django.utils.timezone import localdate
+from members.models import Member
+from .base.test_base import TestBase
+
+
+class ImportMembersViewTests(TestBase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.import_url = reverse('admin_panel:import_members')
+        cls.members_url = reverse('admin_panel:members')
+        cls.today = localdate().isoformat()
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+
+        settings_override = override_settings(MEMBER_IMPORT_ERRORS_DIR=str(self.directory), MEMBER_IMPORT_MAX_ERROR_REPORTS=2)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.client.login(cpf=self.user.cpf, password=self.password)
+
+    def upload(self, content):
+        csv_file = SimpleUploadedFile('alunos.csv', content.encode('utf-8-sig'), content_type='text/csv')
+        return self.client.post(self.import_url, {'file': csv_file})
+
+    def test_import_requires_authentication(self):
+        """Ensures authentication is required to import members."""
+        self.client.logout()
+        response = self.upload('full_name,email,phone,payment_date,amount\n')
+        self.assertTrue(response.url.startswith(reverse('users:login_view')))
+
+    def test_import_without_errors(self):
+        """Tests that a clean file is imported and no error report is kept."""
+        response = self.upload(
+            'full_name,email,phone,payment_date,amount\n'
+            f'Ana Souza,ana@example.com,11988887777,{self.today},100\n'
+        )
+
+        self.assertRedirects(response, self.members_url)
+        self.assertTrue(Member.objects.filter(email='ana@example.com').exists())
+        self.assertIn('1 alunos importados de 1 linhas.', [message.message for message in get_messages(response.wsgi_request)])
+        self.assertEqual(list(self.directory.iterdir()), [])
+
+    def test_error_report_can_be_downloaded(self):
+        """Tests that rejected rows are listed in a report linked from the message."""
+        response = self.upload(
+            'full_name,email,phone,payment_date,amount\n'
+            f'Ana Souza,ana@example.com,11988887777,{self.today},100\n'
+            f'Bruno Lima,email-invalido,11988887777,{self.today},100\n'
+        )
+
+        messages = [message.message for message in get_messages(response.wsgi_request)]
+        warning = next(message for message in messages if 'linhas com erro' in message)
+        report_url = warning.split('href="')[1].split('"')[0]
+
+        response = self.client.get(report_url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('attachment', response['Content-Disposition'])
+        content = b''.join(response.streaming_content).decode()
+        self.assertIn('email-invalido', content)
+        self.assertNotIn('ana@example.com', content)
+
+    def test_email_registered_during_the_import(self):
+        """Tests that an e-mail registered after the import started goes to the error report instead of failing the import."""
+        Member.objects.create(email='ana@example.com', full_name='Ana Souza', phone='11988887777')
+
+        # O conjunto de e-mails lido no início ainda não tinha o cadastro feito em paralelo
+        with patch('members.importing.Member.objects.values_list', return_value=[]):
+            response = self.upload(
+                'full_name,email,phone,payment_date,amount\n'
+                f'Ana Souza,ana@example.com,11988887777,{self.today},100\n'
+                f'Bruno Lima,bruno@example.com,11977776666,{self.today},100\n'
+            )
+
+        self.assertRedirects(response, self.members_url)
+        messages = [message.message for message in get_messages(response.wsgi_request)]
+        self.assertIn('1 alunos importados de 2 linhas.', messages)
+        self.assertTrue(Member.objects.get(email='bruno@example.com').payments.exists())
+        self.assertEqual(Member.objects.filter(email='ana@example.com').count(), 1)
+
+        warning = next(message for message in messages if 'linhas com erro' in message)
+        content = b''.join(self.client.get(warning.split('href="')[1].split('"')[0]).streaming_content).decode()
+        self.assertIn('2,Ana Souza,ana@example.com', content)
+        self.assertIn('Este e-mail já está cadastrado.', content)
+
+    def test_old_error_reports_are_deleted(self):
+        """Tests that only the newest MEMBER_IMPORT_MAX_ERROR_REPORTS reports are kept."""
+        for _ in range(3):
+            self.upload(f'full_name,email,phone,payment_date,amount\nX,invalido,1,{self.today},100\n')
+
+        self.assertEqual(len(list(self.directory.glob('*.csv'))), 2)
+
+    def test_unknown_report_returns_404(self):
+        """Tests that a report that does not exist is not found."""
+        response = self.client.get(reverse('admin_panel:import_errors', kwargs={'report': 'nao-existe'}))
+        self.assertEqual(response.status_code, 404)
+
+    def test_missing_columns(self):
+        """Tests that a file without the required columns shows an error and imports nothing."""
+        response = self.upload('nome,email\nAna,ana@example.com\n')
+
+        messages = [message.message for message in get_messages(response.wsgi_request)]
+        self.assertTrue(any(message.startswith('Não foi possível importar o arquivo') for message in messages))
+        self.assertFalse(Member.objects.exists())
+        self.assertEqual(list(self.directory.iterdir()), [])
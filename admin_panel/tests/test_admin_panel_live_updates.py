@@ -0,0 +1,204 @@
+import json
+from decimal import Decimal
+from django.test import TestCase
+from django.urls import reverse
+from django.utils.timezone import localdate
+from unittest.mock import AsyncMock, MagicMock, patch
+from members.models import Member, Payment
+from admin_panel import live_updates
+from admin_panel.activity_log import log_activity
+from admin_panel.live_updates import DASHBOARD_CHANNEL, adashboard_event_stream, publish_dashboard_event
+from .base.test_base import TestBase
+import redis
+
+
+def parse_frames(calls):
+    """Returns (event, data) for each frame published on the mocked Redis client."""
+    frames = []
+    for call in calls:
+        channel, frame = call.args
+        event_line, data_line = frame.strip().split('\n')
+        frames.append((event_line.removeprefix('event: '), json.loads(data_line.removeprefix('data: '))))
+    return frames
+
+
+@patch.object(live_updates, '_redis_retry_at', 0.0)
+class PublishDashboardEventTest(TestCase):
+
+    def setUp(self):
+        patcher = patch('admin_panel.live_updates.get_redis')
+        self.redis = patcher.start().return_value
+        self.addCleanup(patcher.stop)
+
+    def published(self):
+        return parse_frames(self.redis.publish.call_args_list)
+
+    def test_event_is_published_after_commit(self):
+        """Tests that the event only reaches Redis when the transaction commits."""
+        with self.captureOnCommitCallbacks(execute=True):
+            publish_dashboard_event('counters', {'members_active': 1})
+            self.redis.publish.assert_not_called()
+
+        self.redis.publish.assert_called_once_with(DASHBOARD_CHANNEL, 'event: counters\ndata: {"members_active":1}\n\n')
+
+    def test_redis_errors_are_ignored_for_a_while(self):
+        """Tests that a Redis failure does not break the save and skips Redis for the retry interval."""
+        self.redis.publish.side_effect = redis.exceptions.ConnectionError('Connection refused')
+
+        with self.assertLogs('admin_panel.live_updates', level='WARNING'):
+            with self.captureOnCommitCallbacks(execute=True):
+                publish_dashboard_event('counters', {'members_active': 1})
+        with self.captureOnCommitCallbacks(execute=True):
+            publish_dashboard_event('counters', {'members_active': 1})
+
+        self.assertEqual(self.redis.publish.call_count, 1)
+
+    def test_new_active_member_counters(self):
+        """Tests that creating an active member publishes the active and new-member deltas."""
+        with self.captureOnCommitCallbacks(execute=True):
+            Member.objects.create(email='ao-vivo@example.com', full_name='Aluno Ao Vivo', phone='85988888888', is_active=True)
+
+        self.assertIn(('counters', {'members_new_month': 1, 'members_active': 1}), self.published())
+
+    def test_status_change_counters(self):
+        """Tests that a status change moves one member between the active and inactive counters."""
+        member = Member.objects.create(email='status@example.com', full_name='Aluno Status', phone='85988888888', is_active=True)
+        member = Member.objects.get(id=member.id)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            member.is_active = False
+            member.save()
+            member.save()
+
+        counters = [data for event, data in self.published() if event == 'counters']
+        self.assertEqual(counters, [{'members_active': -1, 'members_inactive': 1}])
+
+    def test_payment_counters(self):
+        """Tests that a payment of the current month is added to the month and year profit."""
+        member = Member.objects.create(email='pagou@example.com', full_name='Aluno Pagou', phone='85988888888', is_active=True)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Payment.objects.create(member=member, payment_date=localdate(), amount=Decimal('120.00'))
+
+        self.assertIn(('counters', {'profit_year': '120.00', 'profit_month': '120.00'}), self.published())
+
+    def test_payment_edit_counters(self):
+        """Tests that editing a payment publishes the difference, and moving it to another year removes it."""
+        member = Member.objects.create(email='editou@example.com', full_name='Aluno Editou', phone='85988888888', is_active=True)
+        payment = Payment.objects.create(member=member, payment_date=localdate(), amount=Decimal('120.00'))
+        payment = Payment.objects.get(id=payment.id)
+        self.redis.publish.reset_mock()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            payment.amount = Decimal('150.00')
+            payment.save()
+            payment.payment_date = localdate().replace(year=localdate().year - 1)
+            payment.save()
+
+        # O pagamento movido para o ano passado também desativa o aluno
+        counters = [data for event, data in self.published() if event == 'counters' and 'profit_year' in data]
+        self.assertEqual(counters, [
+            {'profit_year': '30.00', 'profit_month': '30.00'},
+            {'profit_year': '-150.00', 'profit_month': '-150.00'},
+        ])
+
+    def test_activity_entries_are_published(self):
+        """Tests that new activity entries are pushed with the same fields as the feed."""
+        with self.captureOnCommitCallbacks(execute=True):
+            entry = log_activity(event_type='updated', description='Entrada ao vivo')
+
+        event, data = self.published()[-1]
+        self.assertEqual(event, 'activity')
+        self.assertEqual(data['id'], entry.id)
+        self.assertEqual(data['description'], 'Entrada ao vivo')
+
+
+class DashboardEventStreamTest(TestCase):
+
+    def make_client(self, messages):
+        client = MagicMock()
+        pubsub = client.pubsub.return_value
+        pubsub.subscribe = AsyncMock()
+        pubsub.get_message = AsyncMock(side_effect=messages)
+        pubsub.aclose = AsyncMock()
+        return client
+
+    async def collect(self, **kwargs):
+        return [chunk async for chunk in adashboard_event_stream(**kwargs)]
+
+    async def test_stream_forwards_frames_and_heartbeats(self):
+        """Tests that published frames are forwarded as they are and silence becomes a keepalive comment."""
+        frame = 'event: counters\ndata: {"members_active":1}\n\n'
+        client = self.make_client([{'data': frame.encode()}, None, redis.exceptions.ConnectionError('Closed')])
+
+        with self.assertLogs('admin_panel.live_updates', level='WARNING'):
+            chunks = await self.collect(client=client, max_seconds=60, heartbeat=1)
+
+        self.assertTrue(chunks[0].startswith('retry: '))
+        self.assertEqual(chunks[1:], [frame, ': keepalive\n\n'])
+        client.pubsub.return_value.subscribe.assert_awaited_once_with(DASHBOARD_CHANNEL)
+        client.pubsub.return_value.aclose.assert_awaited_once()
+
+    async def test_stream_ends_after_max_seconds(self):
+        """Tests that the stream closes by itself so the connection is released."""
+        client = self.make_client([])
+
+        chunks = await self.collect(client=client, max_seconds=0, heartbeat=1)
+
+        self.assertEqual(len(chunks), 1)
+        client.pubsub.return_value.aclose.assert_awaited_once()
+
+    async def test_stream_opens_and_closes_its_own_client(self):
+        """Tests that without a client the stream opens an asyncio Redis client and closes it at the end."""
+        client = self.make_client([])
+        client.aclose = AsyncMock()
+
+        with patch('admin_panel.live_updates.new_async_redis', return_value=client):
+            await self.collect(max_seconds=0, heartbeat=1)
+
+        client.aclose.assert_awaited_once()
+
+
+class DashboardStreamViewTest(TestBase):
+
+    def test_dashboard_stream_requires_authentication(self):
+        """Tests if authentication is required to open the stream."""
+        response = self.client.get(reverse('admin_panel:dashboard_stream'))
+        self.assertEqual(response.status_code, 302)
+
+    def test_no_stream_under_wsgi(self):
+        """Tests that without the ASGI views the stream answers 204 and the pages do not open it."""
+        self.client.login(cpf=self.user.cpf, password=self.password)
+
+        response = self.client.get(reverse('admin_panel:dashboard_stream'))
+        self.assertEqual(response.status_code, 204)
+
+        for name in ('home', 'finance'):
+            response = self.client.get(reverse(f'admin_panel:{name}'))
+            self.assertNotContains(response, 'data-stream-url')
+            self.assertContains(response, f'data-counters-url="{reverse("admin_panel:dashboard_counters")}"')
+
+
+class DashboardCountersViewTest(TestBase):
+
+    def test_requires_authentication(self):
+        """Tests if authentication is required to read the counters."""
+        response = self.client.get(reverse('admin_panel:dashboard_counters'))
+        self.assertEqual(response.status_code, 302)
+
+    def test_counters_snapshot(self):
+        """Tests that the snapshot has the current value of every counter, named as in the stream events."""
+        member = Member.objects.create(email='contado@example.com', full_name='Aluno Contado', phone='85988888888', is_active=True)
+        Member.objects.create(email='pendente@example.com', full_name='Aluno Pendente', phone='85988888887', is_active=False)
+        Payment.objects.create(member=member, payment_date=localdate(), amount=Decimal('120.00'))
+        self.client.login(cpf=self.user.cpf, password=self.password)
+
+        response = self.client.get(reverse('admin_panel:dashboard_counters'))
+
+        self.assertEqual(response.json(), {
+            'members_active': 1,
+            'members_inactive': 1,
+            'members_new_month': 2,
+            'profit_year': '120.00',
+            'profit_month': '120.00',
+        })
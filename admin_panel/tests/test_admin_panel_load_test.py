@@ -0,0 +1,164 @@
+import json
+import tempfile
+from contextlib import nullcontext
+from io import StringIO
+from pathlib import Path
+from unittest.mock import patch
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import LiveServerTestCase, SimpleTestCase
+from admin_panel.load_test import LoadTestResults, compare_to_baseline, run_load_test
+from members.models import Member
+from members.seeding import MemberSeeder
+from users.models import User
+
+
+class LoadTestResultsTest(SimpleTestCase):
+    """Test cases for the load-test summary and the baseline comparison."""
+
+    def setUp(self):
+        self.results = LoadTestResults()
+        for milliseconds in range(1, 101):
+            self.results.record('home', milliseconds / 1000, ok=milliseconds != 100)
+        self.results.record('finance', 0.5, ok=True)
+
+    def test_summary_per_endpoint_and_total(self):
+        """Tests that the summary has throughput, percentiles and error rate per endpoint and in total."""
+        summary = self.results.summary(duration=10)
+
+        home = summary['endpoints']['home']
+        self.assertEqual(home['requests'], 100)
+        self.assertEqual(home['errors'], 1)
+        self.assertEqual(home['error_rate'], 0.01)
+        self.assertEqual(home['rps'], 10)
+        self.assertAlmostEqual(home['p50_ms'], 50.5, delta=1)
+        self.assertAlmostEqual(home['p99_ms'], 99, delta=1)
+        self.assertEqual(home['max_ms'], 100)
+        self.assertEqual(summary['total']['requests'], 101)
+        self.assertEqual(summary['total']['max_ms'], 500)
+
+    def test_compare_to_baseline(self):
+        """Tests that slower latencies, lower throughput and more errors beyond the tolerance are reported."""
+        baseline = self.results.summary(duration=10)
+        current = json.loads(json.dumps(baseline))
+        self.assertEqual(compare_to_baseline(current, baseline), [])
+
+        current['endpoints']['home']['p99_ms'] *= 1.05
+        self.assertEqual(compare_to_baseline(current, baseline, tolerance=0.1), [])
+
+        current['endpoints']['home']['p99_ms'] = baseline['endpoints']['home']['p99_ms'] * 2
+        current['endpoints']['home']['rps'] = 5
+        current['endpoints']['finance']['error_rate'] = 0.5
+        regressions = compare_to_baseline(current, baseline, tolerance=0.1)
+
+        self.assertEqual(len(regressions), 3)
+        self.assertTrue(regressions[0].startswith('finance: error_rate'))
+        self.assertTrue(regressions[1].startswith('home: p99_ms'))
+        self.assertTrue(regressions[2].startswith('home: rps'))
+
+    def test_new_endpoints_are_not_regressions(self):
+        """Tests that endpoints missing from the baseline are ignored."""
+        baseline = {'endpoints': {}}
+        self.assertEqual(compare_to_baseline(self.results.summary(duration=10), baseline), [])
+
+
+class BenchmarkServersCommandTest(SimpleTestCase):
+    """Test cases for the uWSGI x uvicorn comparison command, with the servers and the load test mocked."""
+
+    def setUp(self):
+        results = LoadTestResults()
+        results.record('home', 0.1, ok=True)
+        self.wsgi_summary = results.summary(duration=1)
+        results.record('home', 0.9, ok=True)
+        self.asgi_summary = results.summary(duration=1)
+
+    def call(self, **options):
+        out = StringIO()
+        with patch('admin_panel.management.commands.benchmark_servers.shutil.which', return_value='/usr/bin/server'), \
+                patch('admin_panel.management.commands.benchmark_servers.importlib.util.find_spec', return_value=object()), \
+                patch('admin_panel.management.commands.benchmark_servers.Command.server', return_value=nullcontext()) as server, \
+                patch('admin_panel.management.commands.benchmark_servers.run_load_test',
+                      side_effect=[self.wsgi_summary, self.asgi_summary]) as load_test:
+            call_command('benchmark_servers', no_writes=True, duration=1, stdout=out, **options)
+        return out.getvalue(), server, load_test
+
+    def test_runs_the_same_load_against_both_servers(self):
+        """Tests that uWSGI and uvicorn are started in turn and get the same load test, with the regressions reported."""
+        output, server, load_test = self.call(workers=2)
+
+        commands = [call.args[0] for call in server.call_args_list]
+        self.assertIn('project.wsgi', commands[0])
+        self.assertIn('project.asgi:application', commands[1])
+        self.assertEqual([commands[0][commands[0].index('--processes') + 1], commands[1][commands[1].index('--workers') + 1]], ['2', '2'])
+        self.assertEqual(load_test.call_args_list[0].kwargs, load_test.call_args_list[1].kwargs)
+        self.assertIn('pior sob ASGI: home: p99_ms', output)
+
+    def test_missing_server(self):
+        """Tests that a missing server executable fails before anything starts."""
+        with patch('admin_panel.management.commands.benchmark_servers.shutil.which', return_value=None):
+            with self.assertRaisesMessage(CommandError, 'uwsgi'):
+                call_command('benchmark_servers', no_writes=True, stdout=StringIO())
+
+    def test_missing_uvicorn_package(self):
+        """Tests that uvicorn is looked up as a package of the running interpreter, which is how it is started."""
+        with patch('admin_panel.management.commands.benchmark_servers.shutil.which', return_value='/usr/bin/uwsgi'), \
+                patch('admin_panel.management.commands.benchmark_servers.importlib.util.find_spec', return_value=None) as find_spec:
+            with self.assertRaisesMessage(CommandError, 'uvicorn'):
+                call_command('benchmark_servers', no_writes=True, stdout=StringIO())
+        find_spec.assert_called_once_with('uvicorn')
+
+
+class LoadTestLiveServerTest(LiveServerTestCase):
+    """Test cases for the load test against a live server."""
+
+    password = 'Senha@Forte123'
+
+    def setUp(self):
+        self.user = User.objects.create_user(cpf='52998224725', email='carga@example.com', password=self.password)
+        MemberSeeder().run(20)
+
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+
+    def test_run_load_test(self):
+        """Tests that the virtual users log in and every scenario succeeds."""
+        summary = run_load_test(
+            self.live_server_url, self.user.cpf, self.password, users=1, duration=30, requests_per_user=30,
+            think_time=0, member_ids=Member.objects.values_list('id', flat=True), seed=1,
+        )
+
+        self.assertEqual(summary['endpoints']['login_submit']['errors'], 0)
+        self.assertEqual(summary['total']['errors'], 0, summary)
+        self.assertGreaterEqual(summary['total']['requests'], 32)
+        self.assertIn('home', summary['endpoints'])
+
+    def test_wrong_password_fails(self):
+        """Tests that the load test stops when no user can log in."""
+        with self.assertRaises(CommandError):
+            call_command(
+                'load_test', url=self.live_server_url, cpf=self.user.cpf, password='errada', users=1,
+                requests_per_user=1, think_time=0, stdout=StringIO(),
+            )
+
+    def test_command_saves_and_compares_baseline(self):
+        """Tests that the command saves a baseline and reports regressions against it."""
+        baseline_path = self.directory / 'baseline.json'
+        options = {
+            'url': self.live_server_url, 'cpf': self.user.cpf, 'password': self.password, 'users': 1,
+            'requests_per_user': 5, 'think_time': 0, 'no_writes': True,
+        }
+        call_command('load_test', save_baseline=str(baseline_path), stdout=StringIO(), **options)
+
+        baseline = json.loads(baseline_path.read_text())
+        self.assertIn('total', baseline)
+
+        # A baseline nothing can match makes every endpoint regress
+        for stats in baseline['endpoints'].values():
+            stats.update(p50_ms=0.001, p99_ms=0.001, rps=10**6)
+        baseline_path.write_text(json.dumps(baseline))
+
+        out = StringIO()
+        with self.assertRaises(CommandError):
+            call_command('load_test', baseline=str(baseline_path), fail_on_regression=True, stdout=out, **options)
+        self.assertIn('login_view: p50_ms', out.getvalue())
@@ -0,0 +1,92 @@
+import tempfile
+from io import StringIO
+from pathlib import Path
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+from unittest.mock import patch
+from utils.profiling import save_profile, start_profiler
+from .base.test_base import TestBase
+
+
+class ProfilingMiddlewareTest(TestBase):
+    """Test cases for the on-demand request profiler."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+
+        settings_override = override_settings(PROFILING_DIR=self.directory, PROFILING_SAMPLE_RATE=0.0)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.url = reverse('admin_panel:home')
+        self.client.login(cpf=self.user.cpf, password=self.password)
+
+    def make_staff(self):
+        self.user.is_staff = True
+        self.user.save()
+
+    def test_flag_is_ignored_for_non_staff_users(self):
+        """Tests that regular users cannot turn the profiler on."""
+        response = self.client.get(self.url, {'profile': '1'})
+
+        self.assertNotIn('X-Profile-File', response)
+        self.assertEqual(list(self.directory.glob('*.prof')), [])
+
+    def test_staff_query_flag_saves_profile(self):
+        """Tests that ?profile=1 saves a .prof file, logs the top functions and keeps the page."""
+        self.make_staff()
+
+        with self.assertLogs('profiling', level='INFO') as logs:
+            response = self.client.get(self.url, {'profile': '1'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, 'admin_panel/pages/home.html')
+        self.assertTrue((self.directory / response['X-Profile-File']).exists())
+        self.assertTrue(response['X-Profile-File'].endswith('_admin_panel_home.prof'))
+        self.assertIn('cumulative', logs.output[0])
+
+    def test_staff_header_with_text_report(self):
+        """Tests that X-Profile: text returns the top functions report instead of the page."""
+        self.make_staff()
+
+        with self.assertLogs('profiling', level='INFO'):
+            response = self.client.get(self.url, HTTP_X_PROFILE='text')
+
+        self.assertEqual(response['Content-Type'], 'text/plain; charset=utf-8')
+        self.assertIn('function calls', response.content.decode())
+
+    @patch('admin_panel.middleware.random.random', return_value=0.0)
+    def test_sampled_requests_are_saved_without_header(self, mock_random):
+        """Tests that a sampled request is profiled without telling the user."""
+        with override_settings(PROFILING_SAMPLE_RATE=0.5), self.assertLogs('profiling', level='INFO'):
+            response = self.client.get(self.url)
+
+        self.assertNotIn('X-Profile-File', response)
+        self.assertEqual(len(list(self.directory.glob('*.prof'))), 1)
+
+    def test_old_profiles_are_pruned(self):
+        """Tests that only the newest max_files profiles are kept."""
+        for _ in range(3):
+            profiler = start_profiler()
+            profiler.disable()
+            save_profile(profiler, self.directory, 'admin_panel:home', max_files=2)
+
+        self.assertEqual(len(list(self.directory.glob('*.prof'))), 2)
+
+    def test_show_profile_command(self):
+        """Tests that the command lists the saved profiles and prints the top functions of one."""
+        profiler = start_profiler()
+        sorted(range(10))
+        profiler.disable()
+        path = save_profile(profiler, self.directory, 'admin_panel:finance')
+
+        listing = StringIO()
+        call_command('show_profile', stdout=listing)
+        report = StringIO()
+        call_command('show_profile', path.name, '--sort', 'tottime', stdout=report)
+
+        self.assertIn(path.name, listing.getvalue())
+        self.assertIn('sorted', report.getvalue())
@@ -0,0 +1,87 @@
+import pytest
+from django.urls import reverse
+from admin_panel.models import DailyReport
+from admin_panel.tasks import save_daily_report
+from members.models import Member
+from members.tasks import update_members_activity_status
+from .base.test_base_query_budget import TestBaseQueryBudget
+
+
+class QueryBudgetTests(TestBaseQueryBudget):
+    """
+    Query budgets and time ceilings of the admin_panel views and the Celery tasks.
+
+    The budgets include the session and user queries of the request. Time ceilings
+    are multiplied by TIME_SCALE on the bigger datasets.
+    """
+
+    TIME_SCALE = 1
+
+    def seconds(self, seconds):
+        return seconds * self.TIME_SCALE
+
+    def test_home(self):
+        """Tests the queries of the home dashboard."""
+        with self.assertQueryBudget(7, self.seconds(2)):
+            self.client.get(reverse('admin_panel:home'))
+
+    def test_members(self):
+        """Tests that the member cards do not query the last payment one by one."""
+        with self.assertQueryBudget(4, self.seconds(2)):
+            response = self.client.get(reverse('admin_panel:members'))
+
+        self.assertEqual(len(response.context['members'].object_list), 15)
+
+    def test_members_with_search_and_filters(self):
+        """Tests the queries of the member list filtered by name, status and last payment."""
+        last_payment = Member.objects.with_last_payment_date().first().last_payment_date
+
+        with self.assertQueryBudget(4, self.seconds(2)):
+            self.client.get(reverse('admin_panel:members'), {'q': 'Silva', 'status': 'active'})
+        with self.assertQueryBudget(4, self.seconds(2)):
+            self.client.get(reverse('admin_panel:members'), {'last_payment': last_payment.isoformat()})
+
+    def test_finance(self):
+        """Tests the queries of the finance page (year, month and the 12 monthly totals)."""
+        with self.assertQueryBudget(17, self.seconds(3)):
+            self.client.get(reverse('admin_panel:finance'))
+
+    def test_pdf_report_of_current_day(self):
+        """Tests the current day report, when it has to be created and when it already exists."""
+        with self.assertQueryBudget(16, self.seconds(3)):
+            self.client.get(reverse('admin_panel:generate_pdf_report_of_current_day'))
+        with self.assertQueryBudget(4, self.seconds(3)):
+            self.client.get(reverse('admin_panel:generate_pdf_report_of_current_day'))
+
+    def test_pdf_general_report(self):
+        """Tests the general report, which renders every payment."""
+        if self.MEMBERS > 1000:
+            self.skipTest('The general report renders every payment; its time grows with the data.')
+
+        with self.assertQueryBudget(6, self.seconds(10)):
+            self.client.get(reverse('admin_panel:generate_pdf_general_report'))
+
+    def test_save_daily_report_task(self):
+        """Tests the queries of the daily report task."""
+        with self.assertQueryBudget(12, self.seconds(2)):
+            save_daily_report()
+
+        self.assertTrue(DailyReport.objects.exists())
+
+    def test_update_members_activity_status_task(self):
+        """Tests that the status task is set-based instead of saving each active member."""
+        with self.assertQueryBudget(10, self.seconds(5)):
+            with self.captureOnCommitCallbacks(execute=True):
+                update_members_activity_status()
+
+
+@pytest.mark.slow
+class QueryBudget10kTests(QueryBudgetTests):
+    MEMBERS = 10_000
+    TIME_SCALE = 2
+
+
+@pytest.mark.slow
+class QueryBudget100kTests(QueryBudgetTests):
+    MEMBERS = 100_000
+    TIME_SCALE = 10
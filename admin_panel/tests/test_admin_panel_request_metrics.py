@@ -0,0 +1,136 @@
+from django.test import override_settings
+from django.urls import reverse
+from unittest.mock import MagicMock, patch
+from admin_panel.middleware import RequestMetricsMiddleware
+from utils.circuit_breaker import CircuitBreaker, LocalState
+from utils.rate_limiter import TokenBucketRateLimiter
+from utils.request_metrics import RequestMetrics
+from .base.test_base import TestBase
+
+
+class RequestMetricsMiddlewareTest(TestBase):
+    """Test cases for the per-request metrics and the /metrics/ endpoint."""
+
+    def setUp(self):
+        self.metrics = RequestMetrics(flush_interval=10, client=MagicMock())
+        patcher = patch('admin_panel.middleware.get_request_metrics', return_value=self.metrics)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client.login(cpf=self.user.cpf, password=self.password)
+
+    def observed(self, metric):
+        return {
+            dict(labels)['view']: series
+            for (name, labels), series in self.metrics._series.items()
+            if name == metric
+        }
+
+    def test_request_is_measured_by_view(self):
+        """Tests that the time, queries, SQL time and size of a request are recorded under its view name."""
+        with self.assertLogs('request_metrics', level='INFO') as logs:
+            response = self.client.get(reverse('admin_panel:home'))
+
+        queries = self.observed('gym_request_queries')['admin_panel:home']
+        self.assertEqual(queries.count, 1)
+        self.assertGreater(queries.sum, 0)
+        self.assertEqual(self.observed('gym_response_size_bytes')['admin_panel:home'].sum, len(response.content))
+        self.assertIn('admin_panel:home', self.observed('gym_request_duration_seconds'))
+        self.assertIn('view=admin_panel:home method=GET status=200', logs.output[0])
+        self.assertEqual(logs.records[0].queries, int(queries.sum))
+
+    def test_unresolved_requests_share_one_label(self):
+        """Tests that 404s for unknown paths do not create one series per path."""
+        with self.assertLogs('request_metrics', level='INFO'):
+            self.client.get('/nao-existe/')
+
+        self.assertIn('unresolved', self.observed('gym_request_duration_seconds'))
+
+    def test_middleware_is_first(self):
+        """Tests that the metrics middleware wraps every other middleware."""
+        from django.conf import settings
+        self.assertEqual(settings.MIDDLEWARE[0], f'{RequestMetricsMiddleware.__module__}.{RequestMetricsMiddleware.__name__}')
+
+
+class MetricsViewTest(TestBase):
+
+    def setUp(self):
+        self.url = reverse('admin_panel:metrics')
+        patcher = patch('admin_panel.views.get_request_metrics')
+        self.render = patcher.start().return_value.render
+        self.render.return_value = '# TYPE gym_request_queries histogram\n'
+        self.addCleanup(patcher.stop)
+        patcher = patch('admin_panel.views.render_ultramsg_metrics', return_value='')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_forbidden_for_anonymous_and_non_staff_users(self):
+        """Tests that only staff members or the collector token can read the metrics."""
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+        self.client.login(cpf=self.user.cpf, password=self.password)
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+    def test_staff_members_can_read_the_metrics(self):
+        """Tests that a logged staff member gets the Prometheus text."""
+        self.user.is_staff = True
+        self.user.save()
+        self.client.login(cpf=self.user.cpf, password=self.password)
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        self.assertEqual(response.content.decode(), '# TYPE gym_request_queries histogram\n')
+
+    @override_settings(METRICS_TOKEN='segredo')
+    def test_collector_token(self):
+        """Tests that the bearer token gives access and a wrong one does not."""
+        self.assertEqual(self.client.get(self.url, HTTP_AUTHORIZATION='Bearer segredo').status_code, 200)
+        self.assertEqual(self.client.get(self.url, HTTP_AUTHORIZATION='Bearer errado').status_code, 403)
+
+
+@override_settings(METRICS_TOKEN='segredo')
+class UltraMsgMetricsTest(TestBase):
+    """Test cases for the UltraMsg rate limiter and circuit breaker state exported by /metrics/."""
+
+    def setUp(self):
+        patcher = patch('admin_panel.views.get_request_metrics')
+        patcher.start().return_value.render.return_value = ''
+        self.addCleanup(patcher.stop)
+
+        client = MagicMock()
+        client.register_script.return_value.return_value = [0, '0', '3.5']
+        self.limiter = TokenBucketRateLimiter('ultramsg:instancia', rate=1, capacity=5, client=client)
+        patcher = patch('utils.ultramsg.get_ultramsg_rate_limiter', return_value=self.limiter)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.breaker = CircuitBreaker('ultramsg:instancia', failure_threshold=1, recovery_timeout=60, client=LocalState())
+        patcher = patch('utils.ultramsg.get_ultramsg_circuit_breaker', return_value=self.breaker)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def scrape(self):
+        response = self.client.get(reverse('admin_panel:metrics'), HTTP_AUTHORIZATION='Bearer segredo')
+        self.assertEqual(response.status_code, 200)
+        return response.content.decode().splitlines()
+
+    def test_token_level_gauges(self):
+        """Tests that the token level and capacity of the rate limiter are scraped as gauges."""
+        lines = self.scrape()
+
+        self.assertIn('# TYPE gym_rate_limiter_tokens gauge', lines)
+        self.assertIn('gym_rate_limiter_tokens{name="ultramsg:instancia"} 3.5', lines)
+        self.assertIn('gym_rate_limiter_capacity{name="ultramsg:instancia"} 5', lines)
+
+    def test_circuit_breaker_state_and_transitions(self):
+        """Tests that the circuit state is scraped as a gauge and its transitions as counters."""
+        with self.assertLogs('utils.circuit_breaker', level='WARNING'):
+            self.breaker.record_failure()
+
+        lines = self.scrape()
+
+        self.assertIn('gym_circuit_breaker_state{name="ultramsg:instancia",state="open"} 1', lines)
+        self.assertIn('gym_circuit_breaker_state{name="ultramsg:instancia",state="closed"} 0', lines)
+        self.assertIn('# TYPE gym_circuit_breaker_transitions_total counter', lines)
+        self.assertIn('gym_circuit_breaker_transitions_total{name="ultramsg:instancia",state="open"} 1', lines)
@@ -0,0 +1,111 @@
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from pathlib import Path
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from members.models import Member
+from admin_panel.models import ActivityLog, ActivityLogArchive
+from admin_panel.retention import archive_activity_logs, export_archived_activity_logs, read_archive_file
+
+
+class ActivityLogRetentionTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.member = Member.objects.create(email='retencao@example.com', full_name='Aluno Retenção', phone='85988888888')
+
+    def setUp(self):
+        ActivityLog.objects.all().delete()
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def create_log(self, days_ago, description):
+        entry = ActivityLog.objects.create(member=self.member, event_type='updated', description=description)
+        # created_at uses auto_now_add, so it is moved back with an update
+        ActivityLog.objects.filter(id=entry.id).update(created_at=timezone.now() - timedelta(days=days_ago))
+        return entry
+
+    def test_archive_moves_only_old_entries(self):
+        """Tests that entries older than the hot period are moved to the archive table keeping their ids."""
+        old = self.create_log(100, 'Antiga')
+        recent = self.create_log(10, 'Recente')
+
+        moved = archive_activity_logs(older_than_days=90)
+
+        self.assertEqual(moved, 1)
+        self.assertEqual(list(ActivityLog.objects.values_list('id', flat=True)), [recent.id])
+        archived = ActivityLogArchive.objects.get(id=old.id)
+        self.assertEqual(archived.description, 'Antiga')
+        self.assertEqual(archived.member, self.member)
+
+    def test_archive_in_batches(self):
+        """Tests that every old entry is moved when there are more than one batch."""
+        for i in range(5):
+            self.create_log(100, f'Antiga {i}')
+
+        moved = archive_activity_logs(older_than_days=90, batch_size=2)
+
+        self.assertEqual(moved, 5)
+        self.assertEqual(ActivityLog.objects.count(), 0)
+        self.assertEqual(ActivityLogArchive.objects.count(), 5)
+
+    def test_export_writes_monthly_files_and_deletes_rows(self):
+        """Tests that archived entries past the retention period are written to compressed files and removed."""
+        old = self.create_log(400, 'Muito antiga')
+        self.create_log(100, 'Antiga')
+        archive_activity_logs(older_than_days=90)
+
+        exported, files = export_archived_activity_logs(older_than_days=365, directory=self.directory.name)
+
+        self.assertEqual(exported, 1)
+        self.assertEqual(len(files), 1)
+        self.assertTrue(Path(files[0]).name.startswith('activity_log_'))
+        self.assertEqual(list(ActivityLogArchive.objects.values_list('description', flat=True)), ['Antiga'])
+
+        entries = list(read_archive_file(files[0]))
+        self.assertEqual(len(entries), 1)
+        self.assertEqual(entries[0]['id'], old.id)
+        self.assertEqual(entries[0]['member_id'], self.member.id)
+        self.assertEqual(entries[0]['description'], 'Muito antiga')
+
+    def test_export_appends_to_existing_file(self):
+        """Tests that a second export to the same month keeps the entries written before."""
+        self.create_log(400, 'Primeira')
+        archive_activity_logs(older_than_days=90)
+        _, files = export_archived_activity_logs(older_than_days=365, directory=self.directory.name)
+
+        ActivityLogArchive.objects.create(
+            id=999999, member=self.member, event_type='updated', description='Segunda',
+            created_at=timezone.now() - timedelta(days=400),
+        )
+        _, second_files = export_archived_activity_logs(older_than_days=365, directory=self.directory.name)
+
+        self.assertEqual(files, second_files)
+        self.assertEqual([entry['description'] for entry in read_archive_file(files[0])], ['Primeira', 'Segunda'])
+
+    def test_archived_entry_survives_member_deletion(self):
+        """Tests that deleting a member keeps its archived entries without the member."""
+        member = Member.objects.create(email='excluido@example.com', full_name='Aluno Excluído', phone='85988888888')
+        entry = ActivityLog.objects.create(member=member, event_type='updated', description='Do aluno excluído')
+        ActivityLog.objects.filter(id=entry.id).update(created_at=timezone.now() - timedelta(days=100))
+        archive_activity_logs(older_than_days=90)
+
+        member.delete()
+
+        self.assertIsNone(ActivityLogArchive.objects.get(id=entry.id).member)
+
+    def test_command(self):
+        """Tests that the management command applies both steps of the retention policy."""
+        self.create_log(400, 'Muito antiga')
+        self.create_log(100, 'Antiga')
+        out = StringIO()
+
+        with override_settings(ACTIVITY_LOG_ARCHIVE_DIR=self.directory.name):
+            call_command('archive_activity_logs', '--hot-days=90', '--retention-days=365', stdout=out)
+
+        self.assertIn('2 entradas movidas', out.getvalue())
+        self.assertIn('1 entradas exportadas', out.getvalue())
+        self.assertEqual(ActivityLog.objects.filter(description__in=['Antiga', 'Muito antiga']).count(), 0)
+        self.assertEqual(ActivityLogArchive.objects.count(), 1)
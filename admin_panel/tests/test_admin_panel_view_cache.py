@@ -0,0 +1,137 @@
+from io import StringIO
+from unittest.mock import patch
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils.formats import date_format
+from django.utils.timezone import localdate
+from members.models import Member, Payment
+from .base.test_base import TestBase
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class ViewCacheTest(TestBase):
+    """Test cases for the cached dashboards, invalidated by the data versions."""
+
+    def setUp(self):
+        cache.clear()
+        self.client.login(cpf=self.user.cpf, password=self.password)
+        self.member = Member.objects.create(email='cache@example.com', full_name='Aluno Cache', phone='85988888888', is_active=True)
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        return response, len(queries)
+
+    def test_home_is_served_from_cache(self):
+        """Tests that a second visit without changes does not run the aggregates again."""
+        url = reverse('admin_panel:home')
+        _, first = self.count_queries(url)
+        _, second = self.count_queries(url)
+
+        self.assertLess(second, first)
+
+    def test_home_is_invalidated_by_a_payment(self):
+        """Tests that a new payment shows up on the next visit."""
+        url = reverse('admin_panel:home')
+        self.client.get(url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Payment.objects.create(member=self.member, payment_date=localdate(), amount=80)
+
+        response = self.client.get(url)
+        self.assertEqual(response.context['profit_total_month'], 80)
+
+    def test_finance_is_invalidated_by_a_payment(self):
+        """Tests that the finance totals are recalculated after a payment of the current year."""
+        url = reverse('admin_panel:finance')
+        self.client.get(url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Payment.objects.create(member=self.member, payment_date=localdate(), amount=80)
+
+        response = self.client.get(url)
+        self.assertEqual(response.context['current_year_profit'], 80)
+
+    def test_members_is_invalidated_by_a_new_member(self):
+        """Tests that the cached member list includes members added after it was cached."""
+        url = reverse('admin_panel:members')
+        self.client.get(url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            new_member = Member.objects.create(email='novo-cache@example.com', full_name='Aluno Novo', phone='85988888888')
+
+        response = self.client.get(url)
+        self.assertIn(new_member, list(response.context['members']))
+
+    @patch('admin_panel.views.MEMBER_IDS_CACHE_LIMIT', 3)
+    def test_large_member_lists_cache_one_page(self):
+        """Tests that above the limit only the total and the ids of the requested page are cached."""
+        for i in range(20):
+            Member.objects.create(email=f'grande{i}@example.com', full_name=f'Aluno Grande {i}', phone='85988888888')
+        url = reverse('admin_panel:members')
+
+        with patch.object(cache, 'set', wraps=cache.set) as cache_set:
+            response = self.client.get(url, {'page': 2})
+
+        expected = list(Member.objects.order_by('-id').values_list('id', flat=True)[15:30])
+        self.assertEqual([member.id for member in response.context['members']], expected)
+        self.assertEqual(response.context['members'].paginator.count, 21)
+
+        cached_lists = [call.args[1] for call in cache_set.call_args_list if isinstance(call.args[1], list)]
+        self.assertEqual(cached_lists, [expected])
+
+        _, queries = self.count_queries(f'{url}?page=2')
+        self.assertLessEqual(queries, 3)  # Sessão, usuário e os alunos da página
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class MemberCardCacheTest(TestBase):
+    """Test cases for the cached HTML of the member cards."""
+
+    def setUp(self):
+        cache.clear()
+        self.client.login(cpf=self.user.cpf, password=self.password)
+        self.member = Member.objects.create(email='card@example.com', full_name='Aluno Card', phone='85988888888', is_active=True)
+        self.url = reverse('admin_panel:members')
+
+    def test_unchanged_cards_are_not_rendered_again(self):
+        """Tests that a second visit assembles the cards from the cache."""
+        self.client.get(self.url)
+
+        with patch('utils.fragment_cache.render_to_string') as mock_render:
+            response = self.client.get(self.url)
+
+        mock_render.assert_not_called()
+        self.assertContains(response, 'Aluno Card')
+
+    def test_changed_member_is_rendered_again(self):
+        """Tests that editing a member or registering a payment refreshes its card."""
+        self.client.get(self.url)
+
+        self.member.full_name = 'Nome Novo'
+        self.member.save()
+        self.assertContains(self.client.get(self.url), 'Nome Novo')
+
+        Payment.objects.create(member=self.member, payment_date=localdate(), amount=80)
+        self.assertContains(self.client.get(self.url), date_format(localdate()))
+
+    def test_bulk_status_change_is_rendered_again(self):
+        """Tests that a status changed by a bulk update, which keeps updated_at, refreshes the card."""
+        self.client.get(self.url)
+        Member.objects.filter(id=self.member.id).update(is_active=False)
+
+        self.assertContains(self.client.get(self.url), 'Registrar pagamento')
+
+    def test_benchmark_member_cards(self):
+        """Tests that the benchmark reports the three render modes."""
+        out = StringIO()
+        call_command('benchmark_member_cards', rounds=2, stdout=out)
+
+        for mode in ('sem cache', 'cache vazio', 'cache preenchido'):
+            self.assertIn(mode, out.getvalue())
@@ -1,21 +1,31 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 
 app_name = 'admin_panel'
 
+# Sob ASGI (project/asgi.py liga ASYNC_DASHBOARD_VIEWS) o painel, as finanças, os relatórios e o stream usam as versões assíncronas
+async_views = settings.ASYNC_DASHBOARD_VIEWS
+
 urlpatterns = [
-    path('', views.home, name='home'),
+    path('', views.home_async if async_views else views.home, name='home'),
+    path('activities/feed/', views.activity_feed, name='activity_feed'),
+    path('dashboard/counters/', views.dashboard_counters, name='dashboard_counters'),
+    path('dashboard/stream/', views.dashboard_stream_async if async_views else views.dashboard_stream, name='dashboard_stream'),
+    path('metrics/', views.metrics, name='metrics'),
     
     path('members/', views.members, name='members'),
     path('members/edit/<int:id>/', views.edit_member_view, name='edit_member_view'),
     path('members/add-payment-view/<int:id>/', views.add_payment_view, name='add_payment_view'),
     
-    path('finance/', views.finance, name='finance'),
+    path('finance/', views.finance_async if async_views else views.finance, name='finance'),
     
-    path('generate-general-report/', views.generate_pdf_general_report, name='generate_pdf_general_report'),
-    path('generate-current-day-report/', views.generate_pdf_report_of_current_day, name='generate_pdf_report_of_current_day'),
+    path('generate-general-report/', views.generate_pdf_general_report_async if async_views else views.generate_pdf_general_report, name='generate_pdf_general_report'),
+    path('generate-current-day-report/', views.generate_pdf_report_of_current_day_async if async_views else views.generate_pdf_report_of_current_day, name='generate_pdf_report_of_current_day'),
     
     path('members/add/', views.add_member, name='add_member'),
+    path('members/import/', views.import_members, name='import_members'),
+    path('members/import/errors/<slug:report>/', views.import_errors, name='import_errors'),
     path('members/delete/<int:id>/', views.delete_member, name='delete_member'),
     path('members/edit/<int:id>/update/', views.edit_member, name='edit_member'),
     path('members/add-payment/<int:id>/', views.add_payment, name='add_payment')
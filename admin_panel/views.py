@@ -1,36 +1,339 @@
+import asyncio
+import csv
+import secrets
+from functools import wraps
+from io import BytesIO
+from io import TextIOWrapper
+from pathlib import Path
+from asgiref.sync import sync_to_async
 from django.shortcuts import render, redirect
 from django.contrib.auth.decorators import login_required
 from members.forms import MemberPaymentForm, PaymentForm, MemberEditForm
 from .models import ActivityLog
+from .live_updates import ACTIVITY_TIME_FORMAT, adashboard_event_stream
+from utils.data_versions import acache_versioned, cache_versioned, model_namespace, versioned_etag
+from utils.fragment_cache import render_cached_fragments
+from members.importing import MemberImportError, MemberImporter
 from members.models import Member, Payment
 from django.shortcuts import get_object_or_404
 from django.utils.timezone import localdate, localtime
-from django.db.models import Q, Max
+from django.db.models import Count, Q, Max, Sum
 from django.utils.dateparse import parse_date
 from utils.utils import make_pagination
+from utils.form_state import clear_form_state, restore_form, stash_form_state
+from utils.request_metrics import get_request_metrics
+from utils.ultramsg import render_ultramsg_metrics
 from django.contrib import messages
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseForbidden, JsonResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.crypto import constant_time_compare
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition, require_GET, require_POST
+from django.urls import reverse
+from django.utils.html import format_html
+from django.utils.dateformat import format as date_format
 
 # Create your views here.
-@login_required
-def home(request):
+def dashboard_etag(name, get_namespaces, form_state_key=None):
+    """
+    etag_func do @condition das páginas do painel: o ETag sai das versões dos dados (utils.data_versions)
+    que a página mostra, então um navegador recarregando uma página que não mudou recebe um 304 sem
+    consultas de agregação nem renderização do template.
+
+    Retorna None (a página é gerada normalmente) quando há algo que só aparece uma vez: mensagens
+    pendentes, um formulário guardado na sessão em `form_state_key` ou um cookie CSRF ainda não definido.
+    """
+    def etag_func(request, *args, **kwargs):
+        csrf_secret = request.META.get('CSRF_COOKIE')
+        if not csrf_secret or len(messages.get_messages(request)) or (form_state_key and form_state_key in request.session):
+            return None
+
+        return versioned_etag(
+            name,
+            get_namespaces(),
+            path=request.get_full_path(),
+            user=request.user.pk,
+            csrf=csrf_secret,  # O token dos formulários da página vem dele
+            today=localdate(),
+        )
+    return etag_func
+
+
+def async_condition(etag_func):
+    """
+    @condition para as views assíncronas: o etag_func do painel lê a sessão e o usuário, que só podem
+    ser carregados fora do event loop, então ele roda em sync_to_async.
+    """
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            etag = await sync_to_async(etag_func)(request, *args, **kwargs) if request.method in ('GET', 'HEAD') else None
+            if etag and (not_modified := get_conditional_response(request, etag=etag)):
+                return not_modified
+
+            response = await view(request, *args, **kwargs)
+            if etag and response.status_code == 200:
+                response.headers.setdefault('ETag', etag)
+            return response
+        return wrapper
+    return decorator
+
+
+async def _alist(queryset):
+    return [obj async for obj in queryset]
+
+
+def home_namespaces():
+    return [model_namespace(Member), model_namespace(Payment, localdate()), model_namespace(ActivityLog)]
+
+
+HOME_ETAG = dashboard_etag('admin_panel:home', home_namespaces)
+
+
+def get_home_dashboard():
     current_month = localdate().month
     current_year = localdate().year
     
     
     count_new_members_in_month = Member.objects.filter( created_at__month=current_month, created_at__year=current_year).count()
     profit_total_month = Payment.get_current_month_profit()
-    recent_activities = ActivityLog.objects.all().order_by('-id').select_related('member')[:20]
+    recent_activities = list(ActivityLog.objects.all().order_by('-id').select_related('member')[:20])
     
-    context = {
+    return {
         'count_members_actives': Member.objects.filter(is_active=True).count(),
         'count_members_inactives': Member.objects.filter(is_active=False).count(),
         'count_new_members_in_month': count_new_members_in_month,
         'profit_total_month': profit_total_month,
-        'recent_activities': recent_activities
+        'recent_activities': recent_activities,
     }
-    return render(request, 'admin_panel/pages/home.html', context)
+
+async def aget_home_dashboard():
+    """
+    Versão assíncrona de get_home_dashboard: os três contadores de alunos saem de uma única consulta
+    (agregação condicional) e as consultas independentes são disparadas juntas com asyncio.gather.
+    """
+    today = localdate()
+    member_counts, month_profit, recent_activities = await asyncio.gather(
+        Member.objects.aaggregate(
+            active=Count('id', filter=Q(is_active=True)),
+            inactive=Count('id', filter=Q(is_active=False)),
+            new_in_month=Count('id', filter=Q(created_at__month=today.month, created_at__year=today.year)),
+        ),
+        Payment.objects.filter(payment_date__month=today.month, payment_date__year=today.year).aaggregate(total=Sum('amount')),
+        _alist(ActivityLog.objects.order_by('-id').select_related('member')[:20]),
+    )
+
+    return {
+        'count_members_actives': member_counts['active'],
+        'count_members_inactives': member_counts['inactive'],
+        'count_new_members_in_month': member_counts['new_in_month'],
+        'profit_total_month': month_profit['total'] or 0.00,
+        'recent_activities': recent_activities,
+    }
+
+
+def home_context(context):
+    recent_activities = context['recent_activities']
+    context.update({
+        'last_activity_id': recent_activities[0].id if recent_activities else 0,
+        'activity_feed_poll_interval': ACTIVITY_FEED_POLL_INTERVAL,
+        **live_updates_context(),
+    })
+    return context
+
+
+@login_required
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=HOME_ETAG)
+def home(request):
+    # Recalculado só quando alunos, pagamentos do mês ou atividades mudam (ver utils.data_versions)
+    context = cache_versioned('admin_panel:home', home_namespaces(), get_home_dashboard, today=localdate())
+    return render(request, 'admin_panel/pages/home.html', home_context(context))
+
 
 @login_required
+@cache_control(private=True, no_cache=True)
+@async_condition(HOME_ETAG)
+async def home_async(request):
+    """Versão assíncrona de home, usada sob ASGI (ver ASYNC_DASHBOARD_VIEWS)."""
+    context = await acache_versioned('admin_panel:home', home_namespaces(), aget_home_dashboard, today=localdate())
+    # O template lê o usuário e as mensagens da sessão: renderizado na thread da requisição
+    return await sync_to_async(render)(request, 'admin_panel/pages/home.html', home_context(context))
+
+
+ACTIVITY_FEED_LIMIT = 50
+ACTIVITY_FEED_POLL_INTERVAL = 15  # Segundos entre as consultas do painel ao feed
+
+@login_required
+def activity_feed(request):
+    """
+    Retorna em JSON as entradas do ActivityLog com id maior que `after`, em ordem crescente, até
+    ACTIVITY_FEED_LIMIT por chamada. O painel consulta periodicamente passando o último id que já
+    mostra, então cada consulta só lê as entradas novas pela chave primária.
+    """
+    try:
+        after = int(request.GET.get('after', 0))
+    except ValueError:
+        return JsonResponse({'error': 'O parâmetro after deve ser um número inteiro.'}, status=400)
+
+    entries = list(
+        ActivityLog.objects.filter(id__gt=after)
+        .order_by('id')
+        .values('id', 'description', 'created_at')[:ACTIVITY_FEED_LIMIT + 1]
+    )
+    has_more = len(entries) > ACTIVITY_FEED_LIMIT
+    entries = entries[:ACTIVITY_FEED_LIMIT]
+
+    for entry in entries:
+        entry['created_at'] = date_format(localtime(entry['created_at']), ACTIVITY_TIME_FORMAT)
+
+    return JsonResponse({
+        'entries': entries,
+        'last_id': entries[-1]['id'] if entries else after,
+        'has_more': has_more,
+    })
+
+
+DASHBOARD_COUNTERS_RESYNC_INTERVAL = 60  # Segundos entre as releituras dos contadores pelas telas abertas
+
+
+def live_updates_context():
+    """
+    Contexto das páginas com contadores ao vivo: o stream só é oferecido sob ASGI (ver dashboard_stream);
+    os contadores são relidos de dashboard_counters em qualquer modo.
+    """
+    return {
+        'dashboard_stream': settings.ASYNC_DASHBOARD_VIEWS,
+        'counters_resync_interval': DASHBOARD_COUNTERS_RESYNC_INTERVAL,
+    }
+
+
+def get_dashboard_counters():
+    today = localdate()
+    members = Member.objects.aggregate(
+        members_active=Count('id', filter=Q(is_active=True)),
+        members_inactive=Count('id', filter=Q(is_active=False)),
+        members_new_month=Count('id', filter=Q(created_at__month=today.month, created_at__year=today.year)),
+    )
+    profit = Payment.objects.filter(payment_date__year=today.year).aggregate(
+        profit_year=Sum('amount'),
+        profit_month=Sum('amount', filter=Q(payment_date__month=today.month)),
+    )
+    return {**members, **{name: f'{total or 0:.2f}' for name, total in profit.items()}}
+
+
+@login_required
+@require_GET
+def dashboard_counters(request):
+    """
+    Valores atuais dos contadores do painel e das finanças, com os mesmos nomes dos eventos do stream.
+    As telas abertas relêem periodicamente, o que corrige o que as variações não cobrem (ex.: alterações
+    em lote) e mantém os cartões atualizados sob WSGI, onde não há stream.
+    """
+    counters = cache_versioned(
+        'admin_panel:dashboard_counters',
+        [model_namespace(Member), model_namespace(Payment)],
+        get_dashboard_counters,
+        today=localdate(),
+    )
+    return JsonResponse(counters)
+
+
+@login_required
+@require_GET
+def dashboard_stream(request):
+    """
+    Sob WSGI não há stream: no uWSGI cada conexão ocuparia um processo inteiro. A resposta 204 faz o
+    navegador desistir de reconectar; as telas ficam com a consulta periódica do feed e dos contadores.
+    Sob ASGI a rota usa dashboard_stream_async.
+    """
+    return HttpResponse(status=204)
+
+
+@login_required
+@require_GET
+async def dashboard_stream_async(request):
+    """
+    Stream Server-Sent Events com as variações dos contadores e as novas atividades, publicadas no
+    Redis pelos sinais de Member e Payment. Cada tela conectada só repassa o que é publicado, sem
+    consultas ao banco, e espera no event loop (redis.asyncio), sem ocupar uma thread.
+    """
+    response = StreamingHttpResponse(adashboard_event_stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # Impede o nginx de segurar os eventos no buffer
+    return response
+
+
+@require_GET
+def metrics(request):
+    """
+    Histogramas de tempo, consultas e tamanho das respostas por view, no formato de texto do
+    Prometheus (ver RequestMetricsMiddleware), seguidos do estado compartilhado da UltraMsg (tokens do
+    limitador de taxa, estado e transições do circuit breaker). Acessível a membros da equipe logados ou com o
+    cabeçalho "Authorization: Bearer <METRICS_TOKEN>", usado pelo coletor.
+    """
+    token = settings.METRICS_TOKEN
+    authorized = request.user.is_staff or (
+        token and constant_time_compare(request.headers.get('Authorization', ''), f'Bearer {token}')
+    )
+    if not authorized:
+        return HttpResponseForbidden()
+
+    return HttpResponse(get_request_metrics().render() + render_ultramsg_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+MEMBER_IDS_CACHE_LIMIT = 1000  # Ids do resultado filtrado guardados numa única entrada do cache
+
+
+class CachedIds:
+    """
+    Lista de ids para o Paginator em que o total e cada fatia pedida são calculados e guardados em cache
+    separadamente (utils.data_versions), com `params` identificando o filtro. Cada entrada do cache fica
+    do tamanho de uma página, por maior que seja o resultado do filtro.
+    """
+
+    def __init__(self, name, namespaces, queryset, **params):
+        self.name = name
+        self.namespaces = namespaces
+        self.queryset = queryset
+        self.params = params
+
+    def count(self):
+        return cache_versioned(f'{self.name}:count', self.namespaces, self.queryset.count, **self.params)
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+
+        return cache_versioned(
+            f'{self.name}:ids',
+            self.namespaces,
+            lambda: list(self.queryset[index]),
+            start=index.start, stop=index.stop, **self.params,
+        )
+
+
+MEMBER_CARD_TEMPLATE = 'admin_panel/partials/member.html'
+
+
+def member_card_key(member):
+    """
+    Chave do HTML em cache do card do aluno: muda com tudo o que o card mostra. O status entra à parte
+    porque as atualizações em lote (MemberQuerySet.update_activity_status) não passam pelo updated_at.
+    """
+    return f'member-card:{member.id}:{member.updated_at.isoformat()}:{member.is_active}:{member.last_payment_date}'
+
+
+@login_required
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=dashboard_etag(
+    'admin_panel:members',
+    lambda: [model_namespace(Member), model_namespace(Payment)],
+    form_state_key='form_data_add_member',
+))
 def members(request):
     search_query = request.GET.get('q', '').strip()
     status = request.GET.get('status', '')
@@ -47,33 +350,40 @@ def members(request):
         filters['is_active'] = False
     
     members = Member.objects.filter(**filters).order_by('-id')
-    
     if date:
-        date = parse_date(date)
-        
         members = members.annotate(
             last_payment=Max('payments__payment_date')
-        ).filter(last_payment=date)
-        
+        ).filter(last_payment=parse_date(date))
+
+    ids = members.values_list('id', flat=True)
+    namespaces = [model_namespace(Member), model_namespace(Payment)]
+    params = {'q': search_query, 'status': status, 'last_payment': date}
 
+    def get_member_ids():
+        member_ids = list(ids[:MEMBER_IDS_CACHE_LIMIT + 1])
+        return member_ids if len(member_ids) <= MEMBER_IDS_CACHE_LIMIT else None
+
+    # Só ids ficam em cache e a página atual é buscada pelo id. Até MEMBER_IDS_CACHE_LIMIT a lista inteira
+    # (uma consulta); acima disso só o total e os ids de cada página, para manter as entradas pequenas
+    member_ids = cache_versioned('admin_panel:members', namespaces, get_member_ids, **params)
+    if member_ids is None:
+        member_ids = CachedIds('admin_panel:members', namespaces, ids, **params)
         
     # Dealing with form 
-    form_data_add_member = request.session.get('form_data_add_member')
-    
-    if form_data_add_member:
-        form = MemberPaymentForm(form_data_add_member)
-        request.session.pop('form_data_add_member', None)
-    else:
-        form = MemberPaymentForm()
+    form = restore_form(request, 'form_data_add_member', MemberPaymentForm)
         
         
         
     # Dealing with pagination
-    page_obj, pagination_range = make_pagination(request, members, 15, 6)
+    page_obj, pagination_range = make_pagination(request, member_ids, 15, 6)
+    members_by_id = Member.objects.with_last_payment_date().in_bulk(page_obj.object_list)
+    page_obj.object_list = [members_by_id[member_id] for member_id in page_obj.object_list if member_id in members_by_id]
+    member_cards = render_cached_fragments(MEMBER_CARD_TEMPLATE, page_obj.object_list, member_card_key, context_name='member')
 
     context = {
         'form': form,
         'members': page_obj,
+        'member_cards': member_cards,
         'pagination_range': pagination_range,
         'search_query': search_query
     }
@@ -84,24 +394,14 @@ def members(request):
 def edit_member_view(request, id):
     member = get_object_or_404(Member, id=id)
 
-    form_data_edit_member = request.session.pop('form_data_edit_member', None)  # Use pop para remover depois de usar
-    
-    if form_data_edit_member:
-        form = MemberEditForm(form_data_edit_member, instance=member)
-    else:
-        form = MemberEditForm(instance=member)
+    form = restore_form(request, 'form_data_edit_member', MemberEditForm, instance=member)
 
     return render(request, 'admin_panel/pages/member_edit.html', {'form': form, 'member': member})
 
 @login_required
 def add_payment_view(request, id):
     member = get_object_or_404(Member, id=id)
-    form_data_add_payment = request.session.get('form_data_add_payment')
-    
-    if form_data_add_payment:
-        form = PaymentForm(form_data_add_payment)
-    else:
-        form = PaymentForm()
+    form = restore_form(request, 'form_data_add_payment', PaymentForm, keep=True)
     
     context = {
         'form': form,
@@ -118,16 +418,65 @@ def add_member(request):
         if form.is_valid():
             form.save()
             messages.success(request, 'Membro adicionado com sucesso!')
-            if 'form_data_add_member' in request.session: # pragma: no cover
-                del request.session['form_data_add_member']
+            clear_form_state(request, 'form_data_add_member')
             return redirect('admin_panel:members')
         else:
-            request.session['form_data_add_member'] = request.POST
-            request.session.modified = True
+            stash_form_state(request, 'form_data_add_member', form)
             messages.error(request, 'Erro ao adicionar o membro. Verifique os dados e tente novamente.')
             return redirect('admin_panel:members')
     return redirect('admin_panel:members')
 
+@login_required
+@require_POST
+def import_members(request):
+    """
+    Importa alunos de um CSV enviado pelo modal de importação (ver members.importing). As linhas com
+    erro ficam em um relatório em MEMBER_IMPORT_ERRORS_DIR, com link para download na mensagem.
+    """
+    upload = request.FILES.get('file')
+    if upload is None:
+        messages.error(request, 'Selecione um arquivo CSV para importar.')
+        return redirect('admin_panel:members')
+
+    directory = Path(settings.MEMBER_IMPORT_ERRORS_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    # O horário no início do nome deixa os relatórios em ordem de criação
+    report = f'{localtime().strftime("%Y%m%d-%H%M%S")}-{secrets.token_hex(8)}'
+    report_path = directory / f'{report}.csv'
+
+    try:
+        with TextIOWrapper(upload.file, encoding='utf-8-sig', newline='') as lines, \
+                open(report_path, 'w', newline='', encoding='utf-8') as errors:
+            counts = MemberImporter().run(lines, errors=errors)
+    except (MemberImportError, UnicodeDecodeError, csv.Error) as e:
+        report_path.unlink(missing_ok=True)
+        messages.error(request, f'Não foi possível importar o arquivo: {e}')
+        return redirect('admin_panel:members')
+
+    messages.success(request, f'{counts["members"]} alunos importados de {counts["rows"]} linhas.')
+
+    if counts['errors']:
+        messages.warning(request, format_html(
+            '{} linhas com erro não foram importadas. <a href="{}">Baixar relatório de erros</a>',
+            counts['errors'], reverse('admin_panel:import_errors', kwargs={'report': report}),
+        ))
+        for old in sorted(directory.glob('*.csv'))[:-settings.MEMBER_IMPORT_MAX_ERROR_REPORTS]:
+            old.unlink(missing_ok=True)
+    else:
+        report_path.unlink(missing_ok=True)
+
+    return redirect('admin_panel:members')
+
+@login_required
+@require_GET
+def import_errors(request, report):
+    """Baixa o relatório de erros de uma importação de alunos."""
+    path = Path(settings.MEMBER_IMPORT_ERRORS_DIR) / f'{report}.csv'
+    if not path.is_file():
+        raise Http404('Relatório de erros não encontrado.')
+
+    return FileResponse(open(path, 'rb'), as_attachment=True, filename=f'erros_importacao_{report}.csv', content_type='text/csv')
+
 @login_required
 def delete_member(request, id):
     member = get_object_or_404(Member, id=id)
@@ -138,7 +487,6 @@ def delete_member(request, id):
 @login_required
 def edit_member(request, id):
     member = get_object_or_404(Member, id=id)
-    request.session['form_data_edit_member'] = request.POST
 
     if request.method == 'POST':
         form = MemberEditForm(request.POST, instance=member)
@@ -156,9 +504,10 @@ def edit_member(request, id):
             member.save()
             
             messages.success(request, 'Membro atualizado com sucesso!')
-            request.session.pop('form_data_edit_member', None)
+            clear_form_state(request, 'form_data_edit_member')
             return redirect('admin_panel:members')
         else:
+            stash_form_state(request, 'form_data_edit_member', form)
             messages.error(request, 'Erro ao atualizar o membro. Verifique os dados e tente novamente.')
             return redirect('admin_panel:edit_member_view', id=id)
         
@@ -169,17 +518,16 @@ def edit_member(request, id):
 def add_payment(request, id):
     member = get_object_or_404(Member, id=id)
     
-    request.session['form_data_add_payment'] = request.POST
-    
     if request.method == 'POST':
         form = PaymentForm(request.POST)
         
         if form.is_valid():
             form.save(member=member)
             messages.success(request, 'Pagamento adicionado com sucesso!')
-            del request.session['form_data_add_payment']
+            clear_form_state(request, 'form_data_add_payment')
             return redirect('admin_panel:members')
         else:
+            stash_form_state(request, 'form_data_add_payment', form)
             messages.error(request, 'Erro ao adicionar pagamento. Verifique os dados e tente novamente.')
             return redirect('admin_panel:add_payment_view', id=id)
     else:
@@ -189,50 +537,98 @@ def add_payment(request, id):
 import plotly.express as px
 import pandas as pd
 
-@login_required
-def finance(request):
-    current_year_profit = Payment.get_current_year_profit()
-    current_month_profit = Payment.get_current_month_profit()
-    
-    months_profit = {
-        'Janeiro': Payment.get_monthly_profit(1),
-        'Fevereiro': Payment.get_monthly_profit(2),
-        'Março': Payment.get_monthly_profit(3),
-        'Abril': Payment.get_monthly_profit(4),
-        'Maio': Payment.get_monthly_profit(5),
-        'Junho': Payment.get_monthly_profit(6),
-        'Julho': Payment.get_monthly_profit(7),
-        'Agosto': Payment.get_monthly_profit(8),
-        'Setembro': Payment.get_monthly_profit(9),
-        'Outubro': Payment.get_monthly_profit(10),
-        'Novembro': Payment.get_monthly_profit(11),
-        'Dezembro': Payment.get_monthly_profit(12),
-    }
-    
+MONTH_NAMES = (
+    'Janeiro', 'Fevereiro', 'Março', 'Abril', 'Maio', 'Junho',
+    'Julho', 'Agosto', 'Setembro', 'Outubro', 'Novembro', 'Dezembro',
+)
+
+
+def render_profit_chart(months_profit):
+    """HTML do gráfico de barras do lucro por mês. Só usa CPU (pandas e plotly), nenhuma consulta."""
     df = pd.DataFrame(list(months_profit.items()), columns=['Month', 'Profit'])
     
     fig = px.bar(df, x='Month', y='Profit', title="Lucro Mensal", labels={'Month': 'Mês', 'Profit': 'Lucro'})
     
-    graph_html = fig.to_html(full_html=False)
-        
-    month_with_highest_profit = max(months_profit, key=lambda month: months_profit[month])
+    return fig.to_html(full_html=False)
+
+
+def get_finance_summary():
+    current_year_profit = Payment.get_current_year_profit()
+    current_month_profit = Payment.get_current_month_profit()
     
-    recents_payments = Payment.objects.order_by('-payment_date').select_related('member')[:12]
+    months_profit = {name: Payment.get_monthly_profit(month) for month, name in enumerate(MONTH_NAMES, start=1)}
     
+    graph_html = render_profit_chart(months_profit)
+        
+    month_with_highest_profit = max(months_profit, key=lambda month: months_profit[month])
     
-    context = {
+    return {
         'current_year_profit': current_year_profit,
         'current_month_profit': current_month_profit,
         'months_profit': months_profit,
         'month_with_highest_profit': month_with_highest_profit,
-        'recents_payments': recents_payments,
         'graph_html': graph_html
     }
-    
+
+
+async def aget_finance_summary():
+    """
+    Versão assíncrona de get_finance_summary: os totais do ano e de cada mês saem de uma única consulta,
+    no lugar de uma por total, e o gráfico é gerado em outra thread (thread_sensitive=False), sem
+    ocupar a thread que o ORM usa para as consultas desta requisição.
+    """
+    today = localdate()
+    totals = await Payment.objects.filter(payment_date__year=today.year).aaggregate(
+        year=Sum('amount'),
+        **{f'month_{month}': Sum('amount', filter=Q(payment_date__month=month)) for month in range(1, 13)},
+    )
+    months_profit = {name: totals[f'month_{month}'] or 0.00 for month, name in enumerate(MONTH_NAMES, start=1)}
+
+    graph_html = await sync_to_async(render_profit_chart, thread_sensitive=False)(months_profit)
+
+    return {
+        'current_year_profit': totals['year'] or 0.00,
+        'current_month_profit': months_profit[MONTH_NAMES[today.month - 1]],
+        'months_profit': months_profit,
+        'month_with_highest_profit': max(months_profit, key=lambda month: months_profit[month]),
+        'graph_html': graph_html,
+    }
+
+
+def finance_namespaces():
+    # Os totais e o gráfico dependem só dos pagamentos do ano; cada mês tem a sua versão
+    return [model_namespace(Payment, localdate().replace(month=month, day=1)) for month in range(1, 13)]
+
+
+# Os últimos pagamentos mostram o nome do aluno
+FINANCE_ETAG = dashboard_etag('admin_panel:finance', lambda: [model_namespace(Payment), model_namespace(Member)])
+
+@login_required
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=FINANCE_ETAG)
+def finance(request):
+    context = cache_versioned('admin_panel:finance', finance_namespaces(), get_finance_summary, today=localdate())
+    context['recents_payments'] = Payment.objects.order_by('-payment_date').select_related('member')[:12]
+    context.update(live_updates_context())
     
     return render(request, 'admin_panel/pages/finance.html', context)
 
 
+@login_required
+@cache_control(private=True, no_cache=True)
+@async_condition(FINANCE_ETAG)
+async def finance_async(request):
+    """Versão assíncrona de finance, usada sob ASGI (ver ASYNC_DASHBOARD_VIEWS)."""
+    context, recents_payments = await asyncio.gather(
+        acache_versioned('admin_panel:finance', finance_namespaces(), aget_finance_summary, today=localdate()),
+        _alist(Payment.objects.order_by('-payment_date').select_related('member')[:12]),
+    )
+    context['recents_payments'] = recents_payments
+    context.update(live_updates_context())
+
+    return await sync_to_async(render)(request, 'admin_panel/pages/finance.html', context)
+
+
 from django.db.models import Sum
 from django.template.loader import render_to_string
 from xhtml2pdf import pisa
@@ -286,7 +682,7 @@ def generate_pdf_report_of_current_day(request):
         'active_members': report.active_students,
         'inactive_members': report.pending_students,
         'total_revenue': report.daily_profit,
-        'payments': report.payments.all()
+        'payments': report.payments.select_related('member')
     }
     
     html_string = render_to_string('reports/gym_current_day_report.html', context)
@@ -302,4 +698,65 @@ def generate_pdf_report_of_current_day(request):
         return redirect('admin_panel:finance')
     
     
-    return response
\ No newline at end of file
+    return response
+
+def render_pdf(template_name, context):
+    """Gera o PDF (xhtml2pdf) de um template de relatório. Retorna os bytes, ou None se houver erro."""
+    output = BytesIO()
+    pisa_status = pisa.CreatePDF(render_to_string(template_name, context), dest=output)
+    return None if pisa_status.err else output.getvalue()
+
+
+async def apdf_response(request, template_name, context, file_name):
+    """
+    Resposta das versões assíncronas dos relatórios: o PDF é gerado em outra thread (thread_sensitive=False),
+    pois só usa CPU; o contexto já tem que estar carregado, sem consultas pendentes.
+    """
+    pdf = await sync_to_async(render_pdf, thread_sensitive=False)(template_name, context)
+
+    if pdf is None:
+        await sync_to_async(messages.error)(request, 'Erro ao gerar o PDF.')
+        return redirect('admin_panel:finance')
+
+    response = HttpResponse(pdf, content_type='application/pdf')
+    response['Content-Disposition'] = f'attachment; filename={file_name}.pdf'
+    return response
+
+
+@login_required
+@require_GET
+async def generate_pdf_general_report_async(request):
+    """Versão assíncrona de generate_pdf_general_report, usada sob ASGI (ver ASYNC_DASHBOARD_VIEWS)."""
+    member_counts, revenue, payments = await asyncio.gather(
+        Member.objects.aaggregate(active=Count('id', filter=Q(is_active=True)), inactive=Count('id', filter=Q(is_active=False))),
+        Payment.objects.aaggregate(total=Sum('amount')),
+        _alist(Payment.objects.select_related('member')),
+    )
+
+    context = {
+        'date': localtime().strftime('%Y-%m-%d %H:%M'),
+        'active_members': member_counts['active'],
+        'inactive_members': member_counts['inactive'],
+        'total_revenue': revenue['total'] or 0.00,
+        'payments': payments,
+    }
+    return await apdf_response(request, 'reports/gym_general_report.html', context, f"gym_report_{localdate().strftime('%Y-%m-%d')}")
+
+
+@login_required
+@require_GET
+async def generate_pdf_report_of_current_day_async(request):
+    """Versão assíncrona de generate_pdf_report_of_current_day, usada sob ASGI (ver ASYNC_DASHBOARD_VIEWS)."""
+    report = await DailyReport.objects.filter(date=localdate()).afirst()
+
+    if not report:
+        report = await sync_to_async(DailyReport.create_report)()
+
+    context = {
+        'date': localtime().strftime('%Y-%m-%d %H:%M'),
+        'active_members': report.active_students,
+        'inactive_members': report.pending_students,
+        'total_revenue': report.daily_profit,
+        'payments': await _alist(report.payments.select_related('member')),
+    }
+    return await apdf_response(request, 'reports/gym_current_day_report.html', context, f"gym_current_day_report_{localdate().strftime('%Y-%m-%d')}")
@@ -0,0 +1,167 @@
+import base64
+import binascii
+import json
+from functools import wraps
+
+from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse
+from django.middleware.csrf import CsrfViewMiddleware
+from django.utils.cache import get_conditional_response
+from django.utils.crypto import constant_time_compare
+from django.views.decorators.csrf import csrf_exempt
+
+from utils.data_versions import versioned_etag
+
+
+class ApiError(Exception):
+    """Turned into a JSON error response by api_view."""
+
+    def __init__(self, status, detail, **extra):
+        super().__init__(detail)
+        self.status = status
+        self.body = {'detail': detail, **extra}
+
+
+def json_response(data, status=200, **kwargs):
+    return JsonResponse(data, status=status, encoder=DjangoJSONEncoder, json_dumps_params={'ensure_ascii': False}, **kwargs)
+
+
+def has_valid_token(request):
+    """True if the request carries "Authorization: Bearer <token>" with one of API_TOKENS (kiosks, mobile apps)."""
+    header = request.headers.get('Authorization', '')
+    return any(token and constant_time_compare(header, f'Bearer {token}') for token in settings.API_TOKENS)
+
+
+def _check_csrf(request):
+    # Como o CsrfViewMiddleware faria, mas só para quem se autentica pela sessão do painel
+    reason = CsrfViewMiddleware(lambda request: None).process_view(request, None, (), {})
+    if reason is not None:
+        raise ApiError(403, 'Falha na verificação CSRF.')
+
+
+def api_view(methods):
+    """
+    Turns a view into an API endpoint accepting `methods`.
+
+    Clients authenticate with an API token (see has_valid_token) or with the panel
+    session, in which case writes are CSRF-checked. ApiError and missing objects
+    become JSON error responses.
+    """
+    def decorator(view):
+        @csrf_exempt
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in methods:
+                response = json_response({'detail': 'Método não permitido.'}, status=405)
+                response['Allow'] = ', '.join(methods)
+                return response
+
+            try:
+                if not has_valid_token(request):
+                    if not request.user.is_authenticated:
+                        raise ApiError(401, 'Autenticação necessária.')
+                    if request.method not in ('GET', 'HEAD', 'OPTIONS'):
+                        _check_csrf(request)
+                return view(request, *args, **kwargs)
+            except ApiError as e:
+                return json_response(e.body, status=e.status)
+            except ObjectDoesNotExist:
+                return json_response({'detail': 'Não encontrado.'}, status=404)
+
+        return wrapper
+    return decorator
+
+
+def read_json(request):
+    """Returns the JSON object sent in the request body."""
+    try:
+        data = json.loads(request.body or b'{}')
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        raise ApiError(400, 'JSON inválido.')
+    if not isinstance(data, dict):
+        raise ApiError(400, 'O corpo deve ser um objeto JSON.')
+    return data
+
+
+def requested_fields(request, available, default=None):
+    """
+    Returns the fields asked with ?fields=a,b (sparse fieldsets), in the order of
+    `available`, or `default` (all of `available` if not given).
+    """
+    value = request.GET.get('fields')
+    if not value:
+        return list(default or available)
+
+    fields = {field.strip() for field in value.split(',') if field.strip()}
+    unknown = sorted(fields - set(available))
+    if unknown:
+        raise ApiError(400, f'Campos desconhecidos: {", ".join(unknown)}.', available=list(available))
+    return [field for field in available if field in fields]
+
+
+def encode_cursor(last_id):
+    return base64.urlsafe_b64encode(str(last_id).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        return int(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode())
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ApiError(400, 'Cursor inválido.')
+
+
+def paginate(request, queryset, serialize):
+    """
+    Cursor pagination by id: returns {'results': [...], 'next': url or None}.
+
+    The cursor is the last id of the page, so the next page is a plain
+    "id > cursor" range scan on the primary key, however deep the client goes,
+    and rows inserted meanwhile are never skipped or repeated (unlike OFFSET).
+    `serialize` turns the sliced queryset into a list of dicts.
+    """
+    try:
+        limit = int(request.GET.get('limit', settings.API_PAGE_SIZE))
+    except ValueError:
+        raise ApiError(400, 'O parâmetro limit deve ser um número.')
+    limit = max(1, min(limit, settings.API_MAX_PAGE_SIZE))
+
+    cursor = request.GET.get('cursor')
+    if cursor:
+        queryset = queryset.filter(id__gt=decode_cursor(cursor))
+
+    # Um item a mais diz se há próxima página sem um COUNT
+    results = serialize(queryset.order_by('id')[:limit + 1])
+    next_url = None
+    if len(results) > limit:
+        results = results[:limit]
+        params = request.GET.copy()
+        params['cursor'] = encode_cursor(results[-1]['id'])
+        next_url = request.build_absolute_uri(f'{request.path}?{params.urlencode()}')
+
+    return {'results': results, 'next': next_url}
+
+
+def conditional(request, namespaces, build):
+    """
+    Answers a GET with ETag/If-None-Match.
+
+    The ETag comes from the data versions of `namespaces` (utils.data_versions)
+    and the full URL, so it is known before any query: a client polling data that
+    did not change gets a 304 that costs one cache read and no database access.
+    Otherwise `build()` returns the response body. If-None-Match is matched as
+    Django's @condition does (weak comparison, "*"), so ETags weakened by a proxy
+    still validate.
+    """
+    etag = versioned_etag('api', namespaces, path=request.get_full_path())
+
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = json_response(build())
+
+    response['ETag'] = etag
+    # Respostas dependem da autenticação: caches compartilhados não devem reutilizá-las
+    response['Cache-Control'] = 'private, no-cache'
+    response['Vary'] = 'Authorization, Cookie'
+    return response
@@ -0,0 +1,28 @@
+import json
+from django.test import TestCase, override_settings
+from users.models import User
+from faker import Faker
+
+API_TOKEN = 'token-de-teste'
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+@override_settings(API_TOKENS=[API_TOKEN])
+class ApiTestBase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.faker = Faker('pt_BR')
+        cls.password = cls.faker.password(length=12, upper_case=True, special_chars=True, digits=True)
+        cls.user = User.objects.create_user(
+            cpf=cls.faker.cpf().replace('.', '').replace('-', ''),
+            email=cls.faker.email(),
+            password=cls.password
+        )
+
+    def api(self, method, url, data=None, **headers):
+        """Sends a request authenticated with the API token, with `data` as the JSON body."""
+        headers.setdefault('Authorization', f'Bearer {API_TOKEN}')
+        send = getattr(self.client, method)
+        if data is None:
+            return send(url, headers=headers)
+        return send(url, json.dumps(data), content_type='application/json', headers=headers)
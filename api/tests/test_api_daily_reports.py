@@ -0,0 +1,68 @@
+from datetime import timedelta
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import reverse
+from django.utils.timezone import localdate
+from admin_panel.models import DailyReport
+from members.models import Member, Payment
+from .base.test_base import LOCMEM_CACHE, ApiTestBase
+
+
+class DailyReportsApiTest(ApiTestBase):
+    """Test cases for /api/daily-reports/."""
+
+    def setUp(self):
+        self.url = reverse('api:daily_reports')
+        member = Member.objects.create(email='relatorio@example.com', full_name='Aluno Relatório', phone='85988888888', is_active=True)
+        self.payment = Payment.objects.create(member=member, payment_date=localdate(), amount=100)
+
+    def test_create(self):
+        """Test that POST generates the report of the date, with its payments."""
+        response = self.api('post', self.url, {'date': localdate().isoformat()})
+
+        self.assertEqual(response.status_code, 201)
+        data = response.json()
+        self.assertEqual(data['active_students'], 1)
+        self.assertEqual(data['payment_ids'], [self.payment.id])
+
+    def test_create_rejects_future_dates(self):
+        """Test that reports cannot be generated for the future or for invalid dates."""
+        tomorrow = localdate() + timedelta(days=1)
+
+        self.assertEqual(self.api('post', self.url, {'date': tomorrow.isoformat()}).status_code, 400)
+        self.assertEqual(self.api('post', self.url, {'date': 'ontem'}).status_code, 400)
+        self.assertFalse(DailyReport.objects.exists())
+
+    def test_payment_ids_only_when_asked(self):
+        """Test that the list skips payment_ids unless asked, which then costs one query for the whole page."""
+        for days in range(3):
+            DailyReport.create_report(localdate() - timedelta(days=days))
+
+        with self.assertNumQueries(1):
+            results = self.api('get', self.url).json()['results']
+        self.assertNotIn('payment_ids', results[0])
+
+        with self.assertNumQueries(2):
+            results = self.api('get', f'{self.url}?fields=date,payment_ids').json()['results']
+        self.assertEqual(results[0]['payment_ids'], [self.payment.id])
+        self.assertEqual(results[1]['payment_ids'], [])
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class DailyReportsApiETagTest(ApiTestBase):
+    """Test cases for the conditional GETs of /api/daily-reports/."""
+
+    def setUp(self):
+        cache.clear()
+        self.report = DailyReport.create_report()
+        self.url = reverse('api:daily_report', args=[self.report.id])
+
+    def test_regenerated_report_changes_the_etag(self):
+        """Test that regenerating the report invalidates the ETag."""
+        etag = self.api('get', self.url)['ETag']
+        self.assertEqual(self.api('get', self.url, **{'If-None-Match': etag}).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            DailyReport.create_report()
+
+        self.assertEqual(self.api('get', self.url, **{'If-None-Match': etag}).status_code, 200)
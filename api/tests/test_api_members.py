@@ -0,0 +1,200 @@
+from datetime import timedelta
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import reverse
+from django.utils.timezone import localdate
+from members.models import Member, Payment
+from .base.test_base import LOCMEM_CACHE, ApiTestBase
+
+
+class MembersApiTest(ApiTestBase):
+    """Test cases for /api/members/."""
+
+    def setUp(self):
+        self.url = reverse('api:members')
+        self.members = [
+            Member.objects.create(email=f'aluno{index}@example.com', full_name=f'Aluno {index}', phone='85988888888', is_active=index % 2 == 0)
+            for index in range(5)
+        ]
+
+    def test_requires_authentication(self):
+        """Test that requests without a token or session get a 401."""
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 401)
+
+        response = self.api('get', self.url, Authorization='Bearer outro-token')
+        self.assertEqual(response.status_code, 401)
+
+    def test_session_authentication(self):
+        """Test that the panel session is accepted too."""
+        self.client.login(cpf=self.user.cpf, password=self.password)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+
+    def test_session_writes_require_csrf(self):
+        """Test that writes authenticated by the session are CSRF-checked, and token writes are not."""
+        self.client.handler.enforce_csrf_checks = True
+        self.client.login(cpf=self.user.cpf, password=self.password)
+
+        response = self.client.delete(reverse('api:member', args=[self.members[0].id]))
+        self.assertEqual(response.status_code, 403)
+
+        response = self.api('delete', reverse('api:member', args=[self.members[0].id]))
+        self.assertEqual(response.status_code, 204)
+
+    def test_cursor_pagination(self):
+        """Test that following `next` walks all members in id order, without repeating any."""
+        ids = []
+        url = f'{self.url}?limit=2'
+        while url:
+            data = self.api('get', url).json()
+            self.assertLessEqual(len(data['results']), 2)
+            ids += [member['id'] for member in data['results']]
+            url = data['next']
+
+        self.assertEqual(ids, [member.id for member in self.members])
+
+    def test_invalid_cursor(self):
+        """Test that a tampered cursor is a 400."""
+        response = self.api('get', f'{self.url}?cursor=@@@')
+        self.assertEqual(response.status_code, 400)
+
+    def test_list_is_a_single_query(self):
+        """Test that a page, last payment dates included, costs one query."""
+        Payment.objects.create(member=self.members[0], payment_date=localdate(), amount=100)
+
+        with self.assertNumQueries(1):
+            response = self.api('get', f'{self.url}?fields=full_name,last_payment_date')
+
+        results = response.json()['results']
+        self.assertEqual(results[0], {'id': self.members[0].id, 'full_name': 'Aluno 0', 'last_payment_date': localdate().isoformat()})
+        self.assertIsNone(results[1]['last_payment_date'])
+
+    def test_unknown_field(self):
+        """Test that asking for a field that does not exist is a 400 listing the available ones."""
+        response = self.api('get', f'{self.url}?fields=full_name,password')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('email', response.json()['available'])
+
+    def test_filters(self):
+        """Test the is_active and q filters."""
+        data = self.api('get', f'{self.url}?is_active=false').json()
+        self.assertEqual([member['id'] for member in data['results']], [self.members[1].id, self.members[3].id])
+
+        data = self.api('get', f'{self.url}?q=aluno4@').json()
+        self.assertEqual([member['id'] for member in data['results']], [self.members[4].id])
+
+        response = self.api('get', f'{self.url}?is_active=talvez')
+        self.assertEqual(response.status_code, 400)
+
+    def test_create(self):
+        """Test that POST creates the member with the first payment, with the rules of the add member modal."""
+        response = self.api('post', self.url, {
+            'email': 'novo@example.com',
+            'full_name': 'Aluno Novo',
+            'phone': '(85) 98888-7777',
+            'is_active': True,
+            'payment_date': localdate().isoformat(),
+            'amount': '100.00',
+        })
+
+        self.assertEqual(response.status_code, 201)
+        member = Member.objects.get(email='novo@example.com')
+        self.assertEqual(response['Location'], reverse('api:member', args=[member.id]))
+        self.assertEqual(response.json()['phone'], '85988887777')
+        self.assertEqual(member.payments.count(), 1)
+
+    def test_create_invalid(self):
+        """Test that validation errors come back per field."""
+        response = self.api('post', self.url, {'email': 'aluno0@example.com', 'full_name': 'A'})
+
+        self.assertEqual(response.status_code, 400)
+        errors = response.json()['errors']
+        self.assertIn('email', errors)
+        self.assertIn('full_name', errors)
+
+    def test_invalid_json(self):
+        """Test that a body that is not a JSON object is a 400."""
+        response = self.client.post(self.url, 'não é json', content_type='application/json', headers={'Authorization': 'Bearer token-de-teste'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_patch(self):
+        """Test that PATCH changes only the fields sent."""
+        member = self.members[0]
+        response = self.api('patch', reverse('api:member', args=[member.id]), {'full_name': 'Nome Alterado'})
+
+        self.assertEqual(response.status_code, 200)
+        member.refresh_from_db()
+        self.assertEqual(member.full_name, 'Nome Alterado')
+        self.assertEqual(member.email, 'aluno0@example.com')
+        self.assertTrue(member.is_active)
+
+    def test_delete(self):
+        """Test that DELETE removes the member and unknown ids are a 404."""
+        url = reverse('api:member', args=[self.members[0].id])
+
+        self.assertEqual(self.api('delete', url).status_code, 204)
+        self.assertFalse(Member.objects.filter(id=self.members[0].id).exists())
+        self.assertEqual(self.api('get', url).status_code, 404)
+
+    def test_method_not_allowed(self):
+        """Test that unsupported methods get a 405 with Allow."""
+        response = self.api('put', self.url, {})
+
+        self.assertEqual(response.status_code, 405)
+        self.assertEqual(response['Allow'], 'GET, POST')
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class MembersApiETagTest(ApiTestBase):
+    """Test cases for the conditional GETs of /api/members/."""
+
+    def setUp(self):
+        cache.clear()
+        self.url = reverse('api:members')
+        self.member = Member.objects.create(email='etag@example.com', full_name='Aluno ETag', phone='85988888888')
+
+    def test_not_modified_without_queries(self):
+        """Test that polling with the last ETag gets a 304 without touching the database."""
+        etag = self.api('get', self.url)['ETag']
+
+        with self.assertNumQueries(0):
+            response = self.api('get', self.url, **{'If-None-Match': etag})
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_not_modified_with_weak_or_any_etag(self):
+        """Test that an ETag weakened by a proxy, or "*", among other tags still validates."""
+        etag = self.api('get', self.url)['ETag']
+
+        for header in (f'W/{etag}', f'"outro", W/{etag}', '*'):
+            with self.subTest(header=header):
+                self.assertEqual(self.api('get', self.url, **{'If-None-Match': header}).status_code, 304)
+
+        self.assertEqual(self.api('get', self.url, **{'If-None-Match': 'W/"outro"'}).status_code, 200)
+
+    def test_etag_changes_with_the_data(self):
+        """Test that a member change gives a new ETag and a full response."""
+        etag = self.api('get', self.url)['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.member.full_name = 'Nome Novo'
+            self.member.save()
+
+        response = self.api('get', self.url, **{'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_etag_depends_on_the_fields(self):
+        """Test that payments only invalidate the responses that include last_payment_date."""
+        plain = self.api('get', self.url)['ETag']
+        with_payments = self.api('get', f'{self.url}?fields=last_payment_date')['ETag']
+        self.assertNotEqual(plain, with_payments)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Payment.objects.create(member=None, payment_date=localdate() - timedelta(days=1), amount=50)
+
+        self.assertEqual(self.api('get', self.url, **{'If-None-Match': plain}).status_code, 304)
+        self.assertEqual(self.api('get', f'{self.url}?fields=last_payment_date', **{'If-None-Match': with_payments}).status_code, 200)
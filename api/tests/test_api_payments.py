@@ -0,0 +1,58 @@
+from datetime import date, timedelta
+from django.urls import reverse
+from django.utils.timezone import localdate
+from members.models import Member, Payment
+from .base.test_base import ApiTestBase
+
+
+class PaymentsApiTest(ApiTestBase):
+    """Test cases for /api/payments/."""
+
+    def setUp(self):
+        self.url = reverse('api:payments')
+        self.member = Member.objects.create(email='pagador@example.com', full_name='Aluno Pagador', phone='85988888888')
+        self.payments = [
+            Payment.objects.create(member=self.member, payment_date=date(2024, month, 10), amount=100)
+            for month in range(1, 4)
+        ]
+
+    def test_list_with_member_name(self):
+        """Test that member_name comes from a join in the same query."""
+        with self.assertNumQueries(1):
+            response = self.api('get', f'{self.url}?fields=member_name,amount')
+
+        self.assertEqual(response.json()['results'][0], {'id': self.payments[0].id, 'member_name': 'Aluno Pagador', 'amount': '100.00'})
+
+    def test_date_filters(self):
+        """Test that date_from and date_to bound the payment dates."""
+        data = self.api('get', f'{self.url}?date_from=2024-02-01&date_to=2024-02-28').json()
+        self.assertEqual([payment['id'] for payment in data['results']], [self.payments[1].id])
+
+        response = self.api('get', f'{self.url}?date_from=2024-02-31')
+        self.assertEqual(response.status_code, 400)
+
+    def test_create(self):
+        """Test that POST registers the payment for the member."""
+        response = self.api('post', self.url, {'member': self.member.id, 'payment_date': localdate().isoformat(), 'amount': 90})
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['member_id'], self.member.id)
+        self.assertEqual(self.member.payments.count(), 4)
+
+    def test_create_rejects_unknown_member_and_future_date(self):
+        """Test that an unknown member or a payment in the future is a 400."""
+        response = self.api('post', self.url, {'member': 0, 'payment_date': localdate().isoformat(), 'amount': 90})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('member', response.json()['errors'])
+
+        tomorrow = localdate() + timedelta(days=1)
+        response = self.api('post', self.url, {'member': self.member.id, 'payment_date': tomorrow.isoformat(), 'amount': 90})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('payment_date', response.json()['errors'])
+
+    def test_delete(self):
+        """Test that DELETE removes the payment."""
+        response = self.api('delete', reverse('api:payment', args=[self.payments[0].id]))
+
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(Payment.objects.count(), 2)
@@ -0,0 +1,13 @@
+from django.urls import path
+from . import views
+
+app_name = 'api'
+
+urlpatterns = [
+    path('members/', views.members, name='members'),
+    path('members/<int:id>/', views.member, name='member'),
+    path('payments/', views.payments, name='payments'),
+    path('payments/<int:id>/', views.payment, name='payment'),
+    path('daily-reports/', views.daily_reports, name='daily_reports'),
+    path('daily-reports/<int:id>/', views.daily_report, name='daily_report'),
+]
@@ -0,0 +1,272 @@
+from django.db.models import F, Max, Q
+from django.http import HttpResponse
+from django.urls import reverse
+from django.utils.dateparse import parse_date, parse_datetime
+
+from admin_panel.models import DailyReport
+from members.forms import MemberEditForm, MemberPaymentForm, PaymentForm
+from members.models import Member, Payment
+from utils.data_versions import model_namespace
+from .base import ApiError, api_view, conditional, json_response, paginate, read_json, requested_fields
+
+MEMBER_FIELDS = ('id', 'email', 'full_name', 'phone', 'start_date', 'is_active', 'created_at', 'updated_at', 'last_payment_date')
+PAYMENT_FIELDS = ('id', 'member_id', 'member_name', 'payment_date', 'amount')
+DAILY_REPORT_FIELDS = ('id', 'date', 'active_students', 'pending_students', 'new_students', 'daily_profit', 'payment_ids')
+
+# Campos calculados na própria consulta: ficam fora da resposta padrão e são pedidos em ?fields=, pois
+# custam um JOIN e tornam o ETag dependente de outra tabela
+MEMBER_EXPRESSIONS = {'last_payment_date': lambda: Max('payments__payment_date')}
+PAYMENT_EXPRESSIONS = {'member_name': lambda: F('member__full_name')}
+MEMBER_DEFAULT_FIELDS = [field for field in MEMBER_FIELDS if field not in MEMBER_EXPRESSIONS]
+PAYMENT_DEFAULT_FIELDS = [field for field in PAYMENT_FIELDS if field not in PAYMENT_EXPRESSIONS]
+
+
+def serialize(queryset, fields, expressions=None):
+    """
+    Lê só as colunas de `fields` com values(), sem instanciar os modelos, e devolve uma lista de
+    dicionários prontos para o JSON. O id vem sempre, pois é o cursor da paginação.
+    """
+    expressions = expressions or {}
+    columns = ['id'] + [field for field in fields if field != 'id' and field not in expressions]
+    annotations = {field: expressions[field]() for field in fields if field in expressions}
+    return list(queryset.values(*columns, **annotations))
+
+
+def get_one(queryset, fields, expressions=None):
+    results = serialize(queryset, fields, expressions)
+    if not results:
+        raise ApiError(404, 'Não encontrado.')
+    return results[0]
+
+
+def form_errors(form):
+    return ApiError(400, 'Dados inválidos.', errors={field: list(errors) for field, errors in form.errors.items()})
+
+
+def parse_filter(request, name, parse):
+    value = request.GET.get(name)
+    if not value:
+        return None
+    parsed = parse(value)
+    if parsed is None:
+        raise ApiError(400, f'Valor inválido para {name}.')
+    return parsed
+
+
+def parse_bool(value):
+    return {'true': True, '1': True, 'false': False, '0': False}.get(value.lower())
+
+
+def safe_parse(parse):
+    # parse_date/parse_datetime levantam ValueError para datas no formato certo mas inexistentes
+    def wrapper(value):
+        try:
+            return parse(value)
+        except ValueError:
+            return None
+    return wrapper
+
+
+def created(url, data):
+    response = json_response(data, status=201)
+    response['Location'] = url
+    return response
+
+
+# Alunos
+
+def member_namespaces(fields):
+    namespaces = [model_namespace(Member)]
+    if 'last_payment_date' in fields:
+        namespaces.append(model_namespace(Payment))
+    return namespaces
+
+
+@api_view(['GET', 'POST'])
+def members(request):
+    """
+    GET: lista paginada por cursor. Filtros: q (nome ou e-mail), is_active e updated_since (ISO 8601),
+    para clientes que só buscam o que mudou desde a última sincronização.
+
+    POST: cadastra um aluno com o primeiro pagamento, com as mesmas regras do modal (MemberPaymentForm).
+    """
+    if request.method == 'POST':
+        form = MemberPaymentForm(read_json(request))
+        if not form.is_valid():
+            raise form_errors(form)
+        member = form.save()
+        fields = requested_fields(request, MEMBER_FIELDS, default=MEMBER_DEFAULT_FIELDS)
+        return created(reverse('api:member', args=[member.id]), get_one(Member.objects.filter(id=member.id), fields, MEMBER_EXPRESSIONS))
+
+    fields = requested_fields(request, MEMBER_FIELDS, default=MEMBER_DEFAULT_FIELDS)
+
+    def build():
+        queryset = Member.objects.all()
+        if q := request.GET.get('q'):
+            queryset = queryset.filter(Q(full_name__icontains=q) | Q(email__icontains=q))
+        if (is_active := parse_filter(request, 'is_active', parse_bool)) is not None:
+            queryset = queryset.filter(is_active=is_active)
+        if updated_since := parse_filter(request, 'updated_since', safe_parse(parse_datetime)):
+            queryset = queryset.filter(updated_at__gte=updated_since)
+        return paginate(request, queryset, lambda page: serialize(page, fields, MEMBER_EXPRESSIONS))
+
+    return conditional(request, member_namespaces(fields), build)
+
+
+@api_view(['GET', 'PATCH', 'DELETE'])
+def member(request, id):
+    """
+    GET: um aluno. PATCH: altera só os campos enviados (full_name, email, phone, is_active), com as
+    validações da edição no painel (MemberEditForm). DELETE: exclui o aluno.
+    """
+    if request.method == 'DELETE':
+        Member.objects.get(id=id).delete()
+        return HttpResponse(status=204)
+
+    fields = requested_fields(request, MEMBER_FIELDS, default=MEMBER_DEFAULT_FIELDS)
+
+    if request.method == 'PATCH':
+        instance = Member.objects.get(id=id)
+        data = {field: getattr(instance, field) for field in MemberEditForm.Meta.fields}
+        data.update(read_json(request))
+        form = MemberEditForm(data, instance=instance)
+        if not form.is_valid():
+            raise form_errors(form)
+        form.save()
+        return json_response(get_one(Member.objects.filter(id=id), fields, MEMBER_EXPRESSIONS))
+
+    return conditional(
+        request,
+        member_namespaces(fields),
+        lambda: get_one(Member.objects.filter(id=id), fields, MEMBER_EXPRESSIONS),
+    )
+
+
+# Pagamentos
+
+def payment_namespaces(fields):
+    namespaces = [model_namespace(Payment)]
+    if 'member_name' in fields:
+        namespaces.append(model_namespace(Member))
+    return namespaces
+
+
+@api_view(['GET', 'POST'])
+def payments(request):
+    """
+    GET: lista paginada por cursor. Filtros: member (id do aluno), date_from e date_to (AAAA-MM-DD).
+
+    POST: registra um pagamento ({"member", "payment_date", "amount"}) com as regras do PaymentForm.
+    """
+    if request.method == 'POST':
+        data = read_json(request)
+        try:
+            payer = Member.objects.get(id=data.get('member'))
+        except (Member.DoesNotExist, ValueError, TypeError):
+            raise ApiError(400, 'Dados inválidos.', errors={'member': ['Aluno não encontrado.']})
+
+        form = PaymentForm(data)
+        if not form.is_valid():
+            raise form_errors(form)
+        payment = form.save(member=payer)
+        fields = requested_fields(request, PAYMENT_FIELDS, default=PAYMENT_DEFAULT_FIELDS)
+        return created(reverse('api:payment', args=[payment.id]), get_one(Payment.objects.filter(id=payment.id), fields, PAYMENT_EXPRESSIONS))
+
+    fields = requested_fields(request, PAYMENT_FIELDS, default=PAYMENT_DEFAULT_FIELDS)
+
+    def build():
+        queryset = Payment.objects.all()
+        if member_id := parse_filter(request, 'member', lambda value: int(value) if value.isdigit() else None):
+            queryset = queryset.filter(member_id=member_id)
+        if date_from := parse_filter(request, 'date_from', safe_parse(parse_date)):
+            queryset = queryset.filter(payment_date__gte=date_from)
+        if date_to := parse_filter(request, 'date_to', safe_parse(parse_date)):
+            queryset = queryset.filter(payment_date__lte=date_to)
+        return paginate(request, queryset, lambda page: serialize(page, fields, PAYMENT_EXPRESSIONS))
+
+    return conditional(request, payment_namespaces(fields), build)
+
+
+@api_view(['GET', 'DELETE'])
+def payment(request, id):
+    """GET: um pagamento. DELETE: exclui o pagamento."""
+    if request.method == 'DELETE':
+        Payment.objects.get(id=id).delete()
+        return HttpResponse(status=204)
+
+    fields = requested_fields(request, PAYMENT_FIELDS, default=PAYMENT_DEFAULT_FIELDS)
+    return conditional(
+        request,
+        payment_namespaces(fields),
+        lambda: get_one(Payment.objects.filter(id=id), fields, PAYMENT_EXPRESSIONS),
+    )
+
+
+# Relatórios diários
+
+def daily_report_namespaces(fields):
+    namespaces = [model_namespace(DailyReport)]
+    if 'payment_ids' in fields:
+        # Pagamentos excluídos saem da tabela intermediária sem disparar m2m_changed
+        namespaces.append(model_namespace(Payment))
+    return namespaces
+
+
+def serialize_daily_reports(queryset, fields):
+    reports = serialize(queryset, [field for field in fields if field != 'payment_ids'])
+    if 'payment_ids' in fields:
+        # Uma consulta na tabela intermediária para a página inteira
+        through = DailyReport.payments.through
+        payment_ids = {report['id']: [] for report in reports}
+        for report_id, payment_id in through.objects.filter(dailyreport_id__in=payment_ids).order_by('payment_id').values_list('dailyreport_id', 'payment_id'):
+            payment_ids[report_id].append(payment_id)
+        for report in reports:
+            report['payment_ids'] = payment_ids[report['id']]
+    return reports
+
+
+@api_view(['GET', 'POST'])
+def daily_reports(request):
+    """
+    GET: lista paginada por cursor. Filtros: date_from e date_to (AAAA-MM-DD). Por padrão sem
+    payment_ids, que precisam de uma consulta a mais; peça com ?fields=.
+
+    POST: gera (ou refaz) o relatório de uma data ({"date": "AAAA-MM-DD"}, padrão hoje) com DailyReport.create_report.
+    """
+    if request.method == 'POST':
+        value = read_json(request).get('date')
+        date = safe_parse(parse_date)(value) if isinstance(value, str) else None
+        if value is not None and date is None:
+            raise ApiError(400, 'Dados inválidos.', errors={'date': ['Informe uma data válida (AAAA-MM-DD).']})
+        try:
+            report = DailyReport.create_report(date)
+        except ValueError as e:
+            raise ApiError(400, 'Dados inválidos.', errors={'date': [str(e)]})
+        fields = requested_fields(request, DAILY_REPORT_FIELDS)
+        return created(reverse('api:daily_report', args=[report.id]), serialize_daily_reports(DailyReport.objects.filter(id=report.id), fields)[0])
+
+    fields = requested_fields(request, DAILY_REPORT_FIELDS, default=DAILY_REPORT_FIELDS[:-1])
+
+    def build():
+        queryset = DailyReport.objects.all()
+        if date_from := parse_filter(request, 'date_from', safe_parse(parse_date)):
+            queryset = queryset.filter(date__gte=date_from)
+        if date_to := parse_filter(request, 'date_to', safe_parse(parse_date)):
+            queryset = queryset.filter(date__lte=date_to)
+        return paginate(request, queryset, lambda page: serialize_daily_reports(page, fields))
+
+    return conditional(request, daily_report_namespaces(fields), build)
+
+
+@api_view(['GET'])
+def daily_report(request, id):
+    """GET: um relatório diário, com payment_ids."""
+    fields = requested_fields(request, DAILY_REPORT_FIELDS)
+
+    def build():
+        reports = serialize_daily_reports(DailyReport.objects.filter(id=id), fields)
+        if not reports:
+            raise ApiError(404, 'Não encontrado.')
+        return reports[0]
+
+    return conditional(request, daily_report_namespaces(fields), build)
@@ -0,0 +1,15 @@
+import pytest
+
+
+def pytest_addoption(parser):
+    parser.addoption('--run-slow', action='store_true', help='Run the tests marked as slow (e.g. the big query budget datasets).')
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption('--run-slow'):
+        return
+
+    skip_slow = pytest.mark.skip(reason='Slow test, use --run-slow to run it.')
+    for item in items:
+        if 'slow' in item.keywords:
+            item.add_marker(skip_slow)
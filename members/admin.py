@@ -1,7 +1,50 @@
-from django.contrib import admin
-from .models import Member, Payment, BillingMessage
+from django.contrib import admin, messages
+from django.core.exceptions import ValidationError
+from .models import Member, Payment, BillingMessage, UnmatchedStatementLine
 # Register your models here.
 
 admin.site.register(Payment)
 admin.site.register(Member)
-admin.site.register(BillingMessage)
\ No newline at end of file
+admin.site.register(BillingMessage)
+
+
+class PendingFilter(admin.SimpleListFilter):
+    title = 'situação'
+    parameter_name = 'pending'
+
+    def lookups(self, request, model_admin):
+        return (('1', 'Pendentes'), ('0', 'Conciliadas'))
+
+    def queryset(self, request, queryset):
+        if self.value() == '1':
+            return queryset.filter(resolved_at__isnull=True)
+        if self.value() == '0':
+            return queryset.filter(resolved_at__isnull=False)
+        return queryset
+
+
+class UnmatchedStatementLineAdmin(admin.ModelAdmin):
+    """Fila de revisão da conciliação de extratos: escolher o aluno e salvar registra o pagamento."""
+    list_display = ('statement', 'line', 'payment_date', 'amount', 'name', 'phone', 'email', 'reference', 'reason', 'member', 'resolved_at')
+    list_filter = (PendingFilter, 'reason', 'statement')
+    search_fields = ('name', 'phone', 'email', 'reference', 'description')
+    raw_id_fields = ('member',)
+    readonly_fields = ('statement', 'line', 'name', 'phone', 'email', 'reference', 'description', 'reason', 'created_at', 'payment', 'resolved_at')
+    fields = ('member', 'payment_date', 'amount') + readonly_fields
+
+    def save_model(self, request, obj, form, change):
+        member = obj.member
+        if member is None or obj.resolved_at is not None:
+            return super().save_model(request, obj, form, change)
+
+        try:
+            obj.resolve(member)
+        except ValidationError as e:
+            obj.member = None
+            super().save_model(request, obj, form, change)
+            self.message_user(request, ' '.join(e.messages), messages.ERROR)
+        else:
+            self.message_user(request, f'Pagamento de R$ {obj.amount} registrado para {member}.')
+
+
+admin.site.register(UnmatchedStatementLine, UnmatchedStatementLineAdmin)
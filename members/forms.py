@@ -1,4 +1,5 @@
 from django import forms
+from django.db import transaction
 from .models import Member, Payment
 from .models import Member
 from django.utils.timezone import localdate
@@ -98,6 +99,7 @@ class MemberPaymentForm(forms.Form):
 
         return payment_date
     
+    @transaction.atomic
     def save(self):
         # Criar um novo membro
         member = Member.objects.create(
@@ -116,6 +118,36 @@ class MemberPaymentForm(forms.Form):
 
         return member
 
+class MemberImportForm(MemberPaymentForm):
+    """
+    Valida uma linha da importação em lote (members.importing) com as mesmas regras do MemberPaymentForm.
+
+    O e-mail é conferido no conjunto `existing_emails`, carregado com uma única consulta no início da
+    importação, em vez de uma consulta por linha. O status vem da data de pagamento, como no cadastro pelo modal.
+    """
+    is_active = None
+
+    def __init__(self, *args, existing_emails, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.existing_emails = existing_emails
+
+    def validate(self, data):
+        """
+        Valida outra linha reaproveitando este formulário: criar um formulário por linha copia todos
+        os campos (deepcopy), o que domina o tempo da importação. Retorna is_valid().
+        """
+        self.data = data
+        self.is_bound = True
+        self._errors = None
+        self._bound_fields_cache = {}
+        return self.is_valid()
+
+    def clean_email(self):
+        email = self.cleaned_data.get('email')
+        if email in self.existing_emails:
+            raise forms.ValidationError('Este e-mail já está cadastrado.')
+        return email
+
 class MemberEditForm(forms.ModelForm):
     class Meta:
         model = Member
@@ -0,0 +1,201 @@
+import csv
+import itertools
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.utils.timezone import localdate
+
+from admin_panel.activity_log import log_activity
+from admin_panel.live_updates import publish_counters
+from utils.bulk_copy import bulk_load
+from utils.data_versions import bump_versions, model_namespace
+from .forms import MemberImportForm
+from .models import BillingMessage, Member, Payment
+
+IMPORT_COLUMNS = ('full_name', 'email', 'phone', 'payment_date', 'amount')
+ERROR_COLUMNS = ('line', *IMPORT_COLUMNS, 'errors')
+
+
+class MemberImportError(Exception):
+    """The file cannot be imported at all (e.g. missing columns)."""
+
+
+def read_csv(lines, required=IMPORT_COLUMNS):
+    """
+    Returns a csv.DictReader over `lines` (any iterable of text lines, read lazily),
+    detecting whether the file uses ',' or ';' (common in spreadsheets exported in
+    Portuguese) from the header line. Column names are lowercased.
+
+    :raises MemberImportError: If the header misses one of the `required` columns.
+    """
+    lines = iter(lines)
+    header = next(lines, '')
+    delimiter = ';' if header.count(';') > header.count(',') else ','
+
+    reader = csv.DictReader(itertools.chain([header], lines), delimiter=delimiter)
+    fieldnames = [name.strip().lower() for name in reader.fieldnames or []]
+    missing = [column for column in required if column not in fieldnames]
+    if missing:
+        raise MemberImportError(f'Colunas obrigatórias ausentes: {", ".join(missing)}.')
+
+    reader.fieldnames = fieldnames
+    return reader
+
+
+class MemberImporter:
+    """
+    Imports members and their first payment from a CSV, streaming it row by row.
+
+    Each row is validated with MemberImportForm (the rules of the add member modal,
+    phone normalization included); e-mails are checked against a set loaded with a
+    single query, which also catches duplicates inside the file. Valid rows are
+    written with bulk_load (COPY on PostgreSQL) every `batch_size` rows, each chunk in its own
+    transaction, so memory stays flat whatever the file size.
+
+    A chunk that hits an e-mail registered meanwhile (after the set was loaded)
+    is inserted again row by row, and the conflicting rows are reported as errors.
+
+    Like Payment.save(), a member whose payment is more than 30 days old is
+    inactive and gets a pending billing message. Rows with errors go to the
+    optional `errors` file (ERROR_COLUMNS, with the line number and the messages).
+    Signals are not fired: one summary ActivityLog entry is recorded, the dashboard
+    counters are published once and the data-version caches are invalidated at the end.
+    """
+
+    def __init__(self, batch_size=2000, today=None):
+        self.batch_size = batch_size
+        self.today = today or localdate()
+        self.counts = {'rows': 0, 'members': 0, 'errors': 0, 'billing_messages': 0}
+        self.counters = {'members_active': 0, 'members_inactive': 0, 'profit_year': Decimal(0), 'profit_month': Decimal(0)}
+        self.payment_months = set()
+        self.errors = None
+        self.error_writer = None
+
+    def run(self, lines, errors=None, progress=None):
+        """
+        Imports the CSV in `lines`.
+
+        :param errors: Text file where the rows with errors are written as CSV; nothing is written without errors.
+        :param progress: Called after each chunk with (rows read so far, seconds elapsed).
+        :return: Dict with the number of rows read, members created, rows with errors and billing messages.
+        :raises MemberImportError: If the header misses one of IMPORT_COLUMNS.
+        """
+        started = time.perf_counter()
+        reader = read_csv(lines)
+        emails = set(Member.objects.values_list('email', flat=True))
+        form = MemberImportForm(existing_emails=emails)
+        self.errors = errors
+        pending = []
+
+        for row in reader:
+            self.counts['rows'] += 1
+            data = {column: (row.get(column) or '').strip() for column in IMPORT_COLUMNS}
+            # Planilhas em português usam vírgula decimal
+            if ',' in data['amount'] and '.' not in data['amount']:
+                data['amount'] = data['amount'].replace(',', '.')
+
+            if form.validate(data):
+                emails.add(form.cleaned_data['email'])
+                pending.append((reader.line_num, data, form.cleaned_data))
+            else:
+                self.reject(reader.line_num, data, form.errors)
+
+            if len(pending) >= self.batch_size:
+                self.create_batch(pending)
+                pending = []
+                if progress:
+                    progress(self.counts['rows'], time.perf_counter() - started)
+
+        if pending:
+            self.create_batch(pending)
+        if progress:
+            progress(self.counts['rows'], time.perf_counter() - started)
+
+        self.finish()
+        return dict(self.counts)
+
+    def reject(self, line, data, errors):
+        """Counts a row with `errors` (field -> messages) and writes it to the errors file."""
+        self.counts['errors'] += 1
+        if self.errors is None:
+            return
+
+        if self.error_writer is None:
+            self.error_writer = csv.DictWriter(self.errors, fieldnames=ERROR_COLUMNS)
+            self.error_writer.writeheader()
+        messages = '; '.join(f'{field}: {" ".join(field_errors)}' for field, field_errors in errors.items())
+        self.error_writer.writerow({'line': line, **data, 'errors': messages})
+
+    def create_batch(self, pending):
+        """Writes a chunk of (line, data, cleaned row) tuples."""
+        try:
+            self.insert([row for _, _, row in pending])
+        except IntegrityError:
+            # Um e-mail cadastrado depois da leitura inicial: as linhas são gravadas uma a uma e as que
+            # conflitam vão para o relatório de erros, em vez de interromper a importação
+            for line, data, row in pending:
+                try:
+                    self.insert([row])
+                except IntegrityError:
+                    self.reject(line, data, {'email': ['Este e-mail já está cadastrado.']})
+
+    def insert(self, rows):
+        overdue_since = self.today - timedelta(days=30)
+        scheduled_for = BillingMessage.get_send_window()[0]
+
+        with transaction.atomic():
+            members = bulk_load([
+                Member(
+                    email=row['email'],
+                    full_name=row['full_name'],
+                    phone=row['phone'],
+                    is_active=row['payment_date'] >= overdue_since,
+                )
+                for row in rows
+            ], batch_size=self.batch_size)
+
+            bulk_load([
+                Payment(member=member, payment_date=row['payment_date'], amount=row['amount'])
+                for member, row in zip(members, rows)
+            ], batch_size=self.batch_size)
+
+            messages = bulk_load([
+                BillingMessage(member=member, priority=(self.today - row['payment_date']).days - 30, scheduled_for=scheduled_for)
+                for member, row in zip(members, rows)
+                if not member.is_active
+            ], batch_size=self.batch_size)
+
+        self.counts['members'] += len(members)
+        self.counts['billing_messages'] += len(messages)
+
+        for member, row in zip(members, rows):
+            self.counters['members_active' if member.is_active else 'members_inactive'] += 1
+            payment_date = row['payment_date']
+            self.payment_months.add(payment_date.replace(day=1))
+            if payment_date.year == self.today.year:
+                self.counters['profit_year'] += row['amount']
+                if payment_date.month == self.today.month:
+                    self.counters['profit_month'] += row['amount']
+
+    def finish(self):
+        if not self.counts['members']:
+            return
+
+        bump_versions(
+            model_namespace(Member),
+            model_namespace(Payment),
+            *(model_namespace(Payment, month) for month in sorted(self.payment_months)),
+        )
+        log_activity(
+            event_type='created',
+            description=f'Importação: {self.counts["members"]} alunos cadastrados.',
+        )
+        publish_counters(
+            members_new_month=self.counts['members'],
+            members_active=self.counters['members_active'],
+            members_inactive=self.counters['members_inactive'],
+            profit_year=str(self.counters['profit_year']) if self.counters['profit_year'] else 0,
+            profit_month=str(self.counters['profit_month']) if self.counters['profit_month'] else 0,
+        )
@@ -0,0 +1,192 @@
+import os
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils.timezone import localdate
+
+from admin_panel.models import ActivityLog
+from members.models import BillingMessage, Member, Payment
+from members.tasks import send_billing_messages, update_members_activity_status
+from utils.fake_ultramsg import FakeUltraMsgServer
+from utils.ultramsg import UltraMsgAPI
+from utils.data_versions import bump_versions, model_namespace
+from utils.utils import percentile
+
+
+@contextmanager
+def timed_sends(latencies):
+    """Mede a duração de cada UltraMsgAPI.send_message feito dentro do bloco."""
+    original_send_message = UltraMsgAPI.send_message
+
+    def send_message(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return original_send_message(self, *args, **kwargs)
+        finally:
+            latencies.append(time.perf_counter() - start)
+
+    UltraMsgAPI.send_message = send_message
+    try:
+        yield
+    finally:
+        UltraMsgAPI.send_message = original_send_message
+
+
+@contextmanager
+def environ(**values):
+    """Define variáveis de ambiente dentro do bloco e restaura as originais na saída."""
+    original = {key: os.environ.get(key) for key in values}
+    os.environ.update(values)
+    try:
+        yield
+    finally:
+        for key, value in original.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+
+class Command(BaseCommand):
+    help = (
+        'Cria N alunos com pagamento atrasado e executa o fluxo de cobrança completo '
+        '(update_members_activity_status + send_billing_messages) contra o servidor UltraMsg falso. '
+        'Use em um banco descartável.'
+    )
+
+    BATCH_SIZE = 1000
+
+    def add_arguments(self, parser):
+        parser.add_argument('--members', type=int, default=200, help='Quantidade de alunos atrasados a criar.')
+        parser.add_argument('--latency', type=float, default=0.05, help='Latência do servidor falso, em segundos.')
+        parser.add_argument('--latency-jitter', type=float, default=0.0, help='Latência aleatória extra, em segundos.')
+        parser.add_argument('--error-rate', type=float, default=0.0, help='Fração (0 a 1) de respostas com HTTP 500.')
+        parser.add_argument('--server-rate-limit', type=float, default=0, help='Requisições por segundo aceitas pelo servidor antes do HTTP 429.')
+        parser.add_argument('--client-rate-limit', type=float, default=None, help='Sobrescreve ULTRAMSG_RATE_LIMIT durante o benchmark (0 desativa).')
+        parser.add_argument('--max-rounds', type=int, default=1000, help='Máximo de execuções de send_billing_messages.')
+        parser.add_argument('--keep', action='store_true', help='Não apaga os dados criados no final.')
+        parser.add_argument('--force', action='store_true', help='Executa mesmo se o banco já tiver alunos.')
+
+    def handle(self, *args, **options):
+        if Member.objects.exists() and not options['force']:
+            raise CommandError(
+                'O banco já tem alunos e mensagens reais seriam processadas. '
+                'Rode em um banco descartável ou use --force.'
+            )
+
+        run_id = uuid.uuid4().hex[:8]
+        name_prefix = f'Bench {run_id} '
+        first_log_id = ActivityLog.objects.order_by('-id').values_list('id', flat=True).first() or 0
+
+        self.seed(options['members'], run_id, name_prefix)
+
+        try:
+            results = self.run_pipeline(options, run_id, name_prefix)
+        finally:
+            if not options['keep']:
+                self.cleanup(name_prefix, first_log_id)
+
+        self.report(results)
+
+    def seed(self, count, run_id, name_prefix):
+        payment_dates = set()
+        for start in range(0, count, self.BATCH_SIZE):
+            members = Member.objects.bulk_create([
+                Member(
+                    email=f'bench-{run_id}-{index}@example.com',
+                    full_name=f'{name_prefix}{index}',
+                    phone=f'859{index:08d}',
+                    is_active=True,
+                )
+                for index in range(start, min(start + self.BATCH_SIZE, count))
+            ])
+            payments = Payment.objects.bulk_create([
+                Payment(member=member, payment_date=localdate() - timedelta(days=31 + index % 60))
+                for index, member in enumerate(members)
+            ])
+            payment_dates.update(payment.payment_date for payment in payments)
+
+        # bulk_create não dispara os sinais que invalidam o cache dos painéis
+        bump_versions(
+            model_namespace(Member),
+            model_namespace(Payment),
+            *(model_namespace(Payment, payment_date) for payment_date in payment_dates),
+        )
+
+    def run_pipeline(self, options, run_id, name_prefix):
+        benchmark_settings = {}
+        if options['client_rate_limit'] is not None:
+            benchmark_settings['ULTRAMSG_RATE_LIMIT'] = options['client_rate_limit']
+
+        server = FakeUltraMsgServer(
+            latency=options['latency'],
+            latency_jitter=options['latency_jitter'],
+            error_rate=options['error_rate'],
+            rate_limit=options['server_rate_limit'],
+        )
+
+        # Uma instância nova por execução, para não herdar o balde do limitador de outra execução
+        with server, environ(ULTRAMSG_TOKEN='benchmark', ULTRAMSG_INSTANCE=f'benchmark-{run_id}'), \
+                override_settings(ULTRAMSG_API_URL=server.url, **benchmark_settings):
+            with CaptureQueriesContext(connection) as status_queries:
+                start = time.perf_counter()
+                update_members_activity_status()
+                status_seconds = time.perf_counter() - start
+
+            pending = BillingMessage.objects.filter(member__full_name__startswith=name_prefix, is_sent=False)
+            to_send = pending.count()
+
+            latencies = []
+            send_queries = 0
+            rounds = 0
+            start = time.perf_counter()
+            with timed_sends(latencies):
+                while rounds < options['max_rounds'] and pending.exists():
+                    with CaptureQueriesContext(connection) as round_queries:
+                        send_billing_messages()
+                    send_queries += len(round_queries)
+                    rounds += 1
+            send_seconds = time.perf_counter() - start
+
+        return {
+            'members': options['members'],
+            'status_seconds': status_seconds,
+            'status_queries': len(status_queries),
+            'to_send': to_send,
+            'sent': to_send - pending.count(),
+            'attempts': len(latencies),
+            'rounds': rounds,
+            'send_seconds': send_seconds,
+            'send_queries': send_queries,
+            'latencies': latencies,
+            'server_stats': server.stats,
+        }
+
+    def cleanup(self, name_prefix, first_log_id):
+        members = Member.objects.filter(full_name__startswith=name_prefix)
+        Payment.objects.filter(member__in=members).delete()
+        members.delete()
+        ActivityLog.objects.filter(id__gt=first_log_id, description__contains=name_prefix).delete()
+
+    def report(self, results):
+        latencies_ms = [latency * 1000 for latency in results['latencies']]
+        attempts = results['attempts'] or 1
+        members = results['members'] or 1
+
+        self.stdout.write(self.style.MIGRATE_HEADING('Atualização de status'))
+        self.stdout.write(f"  alunos: {results['members']}  tempo: {results['status_seconds']:.2f}s  "
+                          f"queries/aluno: {results['status_queries'] / members:.1f}")
+
+        self.stdout.write(self.style.MIGRATE_HEADING('Envio de cobranças'))
+        self.stdout.write(f"  mensagens: {results['sent']}/{results['to_send']} enviadas em {results['attempts']} tentativas "
+                          f"({results['rounds']} execuções da task)")
+        self.stdout.write(f"  tempo: {results['send_seconds']:.2f}s  "
+                          f"mensagens/s: {results['sent'] / results['send_seconds'] if results['send_seconds'] else 0:.1f}")
+        self.stdout.write(f"  latência p50: {percentile(latencies_ms, 50):.1f}ms  p99: {percentile(latencies_ms, 99):.1f}ms")
+        self.stdout.write(f"  queries/mensagem: {results['send_queries'] / attempts:.1f}")
+        self.stdout.write(f"  servidor: {results['server_stats']}")
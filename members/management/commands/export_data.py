@@ -0,0 +1,39 @@
+import time
+from pathlib import Path
+from django.core.management.base import BaseCommand
+from admin_panel.models import ActivityLog
+from members.models import Member, Payment
+from utils.bulk_copy import copy_dump, supports_copy
+
+EXPORTED_MODELS = {
+    'members': Member,
+    'payments': Payment,
+    'activity_logs': ActivityLog,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Exporta alunos, pagamentos e atividades para arquivos CSV (um por tabela, com cabeçalho), usando '
+        'COPY no PostgreSQL. Serve para migrar os dados de uma academia.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('directory', help='Pasta onde os arquivos são gravados.')
+        parser.add_argument('--only', nargs='+', choices=list(EXPORTED_MODELS), default=list(EXPORTED_MODELS),
+                            help='Tabelas a exportar (padrão: todas).')
+
+    def handle(self, *args, **options):
+        directory = Path(options['directory'])
+        directory.mkdir(parents=True, exist_ok=True)
+        method = 'COPY' if supports_copy() else 'consultas em lote'
+
+        for name in options['only']:
+            model = EXPORTED_MODELS[name]
+            path = directory / f'{name}.csv'
+            started = time.perf_counter()
+
+            with open(path, 'w', newline='', encoding='utf-8') as output:
+                rows = copy_dump(model.objects.order_by('pk'), output)
+
+            self.stdout.write(f'{path}: {rows} linhas em {time.perf_counter() - started:.1f}s ({method}).')
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+from members.importing import ERROR_COLUMNS, IMPORT_COLUMNS, MemberImportError, MemberImporter
+
+
+class Command(BaseCommand):
+    help = (
+        f'Importa alunos e o primeiro pagamento de cada um de um CSV (colunas: {", ".join(IMPORT_COLUMNS)}; '
+        'separado por vírgula ou ponto e vírgula), com as mesmas validações do cadastro pelo painel. '
+        'As linhas com erro são ignoradas e podem ser gravadas em um relatório com --errors.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('file', help='Arquivo CSV em UTF-8.')
+        parser.add_argument('--errors', metavar='ARQUIVO',
+                            help=f'Grava as linhas com erro neste CSV (colunas: {", ".join(ERROR_COLUMNS)}).')
+        parser.add_argument('--batch-size', type=int, default=2000, help='Alunos por lote (e por transação).')
+
+    def handle(self, *args, **options):
+        importer = MemberImporter(batch_size=options['batch_size'])
+
+        def progress(rows, seconds):
+            self.stdout.write(f'{rows} linhas lidas ({rows / seconds:.0f} linhas/s)')
+
+        errors = open(options['errors'], 'w', newline='', encoding='utf-8') if options['errors'] else None
+        try:
+            with open(options['file'], newline='', encoding='utf-8-sig') as csv_file:
+                counts = importer.run(csv_file, errors=errors, progress=progress)
+        except (MemberImportError, OSError, UnicodeDecodeError) as e:
+            raise CommandError(str(e))
+        finally:
+            if errors is not None:
+                errors.close()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{counts["members"]} alunos importados de {counts["rows"]} linhas '
+            f'({counts["billing_messages"]} com cobrança pendente).'
+        ))
+        if counts['errors']:
+            destination = f' Veja {options["errors"]}.' if options['errors'] else ''
+            self.stdout.write(self.style.WARNING(f'{counts["errors"]} linhas com erro não foram importadas.{destination}'))
@@ -0,0 +1,43 @@
+from pathlib import Path
+from django.core.management.base import BaseCommand, CommandError
+from members.importing import MemberImportError
+from members.reconciliation import OPTIONAL_COLUMNS, STATEMENT_COLUMNS, StatementReconciler
+
+
+class Command(BaseCommand):
+    help = (
+        f'Concilia um extrato bancário ou PIX em CSV (colunas obrigatórias: {", ".join(STATEMENT_COLUMNS)}; '
+        f'opcionais: {", ".join(OPTIONAL_COLUMNS)}) com os alunos, por referência (ALUNO <id>), e-mail ou telefone. '
+        'Os pagamentos encontrados são registrados em lote e o status dos alunos é recalculado; as linhas sem aluno '
+        'vão para a fila de revisão manual no admin.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('file', help='Extrato em CSV, em UTF-8.')
+        parser.add_argument('--batch-size', type=int, default=2000, help='Linhas por lote (e por transação).')
+
+    def handle(self, *args, **options):
+        reconciler = StatementReconciler(Path(options['file']).name, batch_size=options['batch_size'])
+
+        def progress(lines, seconds):
+            self.stdout.write(f'{lines} linhas lidas ({lines / seconds:.0f} linhas/s)')
+
+        try:
+            with open(options['file'], newline='', encoding='utf-8-sig') as statement:
+                counts = reconciler.run(statement, progress=progress)
+        except (MemberImportError, OSError, UnicodeDecodeError) as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{counts["matched"]} pagamentos registrados de {counts["lines"]} linhas '
+            f'({counts["activated"]} alunos reativados, {counts["deactivated"]} desativados).'
+        ))
+        if counts['duplicates']:
+            self.stdout.write(f'{counts["duplicates"]} pagamentos já estavam registrados e foram ignorados.')
+        if counts['ignored']:
+            self.stdout.write(f'{counts["ignored"]} lançamentos de saída ignorados.')
+        if counts['unmatched']:
+            self.stdout.write(self.style.WARNING(
+                f'{counts["unmatched"]} linhas sem aluno identificado foram para a revisão manual '
+                '(admin: Linhas de extrato não conciliadas).'
+            ))
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from utils.fake_ultramsg import FakeUltraMsgServer
+
+
+class Command(BaseCommand):
+    help = 'Sobe um servidor local que imita a API da UltraMsg, para testes de carga sem enviar mensagens reais.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8001)
+        parser.add_argument('--latency', type=float, default=0.05, help='Latência de cada resposta, em segundos.')
+        parser.add_argument('--latency-jitter', type=float, default=0.0, help='Latência aleatória extra, em segundos.')
+        parser.add_argument('--error-rate', type=float, default=0.0, help='Fração (0 a 1) de respostas com HTTP 500.')
+        parser.add_argument('--rate-limit', type=float, default=0, help='Requisições por segundo antes de responder HTTP 429 (0 desativa).')
+
+    def handle(self, *args, **options):
+        server = FakeUltraMsgServer(
+            host=options['host'],
+            port=options['port'],
+            latency=options['latency'],
+            latency_jitter=options['latency_jitter'],
+            error_rate=options['error_rate'],
+            rate_limit=options['rate_limit'],
+        )
+        self.stdout.write(f'Servidor UltraMsg falso em {server.url} (use ULTRAMSG_API_URL={server.url}). Ctrl+C para sair.')
+
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            self.stdout.write(f'Resultado: {server.stats}')
@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand, CommandError
+from members.models import Member
+from members.seeding import MemberSeeder
+
+
+class Command(BaseCommand):
+    help = (
+        'Gera alunos realistas com histórico de pagamentos, mensagens de cobrança e atividades usando '
+        'COPY (PostgreSQL) ou bulk_create em lotes, sem disparar sinais. Serve para montar bancos de benchmark; a mesma seed '
+        'gera os mesmos dados.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--members', type=int, default=1000, help='Quantidade de alunos a criar.')
+        parser.add_argument('--seed', type=int, default=0, help='Semente do gerador aleatório.')
+        parser.add_argument('--active-ratio', type=float, default=0.7, help='Fração de alunos em dia.')
+        parser.add_argument('--overdue-ratio', type=float, default=0.2,
+                            help='Fração de alunos atrasados, com cobrança pendente; o resto são ex-alunos.')
+        parser.add_argument('--history-months', type=int, default=12,
+                            help='Máximo de mensalidades anteriores ao último pagamento de cada aluno.')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Alunos por lote (e por transação).')
+        parser.add_argument('--force', action='store_true', help='Executa mesmo se o banco já tiver alunos.')
+
+    def handle(self, *args, **options):
+        if Member.objects.exists() and not options['force']:
+            raise CommandError(
+                'O banco já tem alunos. Rode em um banco descartável ou use --force '
+                '(com outra --seed, para não repetir os e-mails).'
+            )
+
+        try:
+            seeder = MemberSeeder(
+                seed=options['seed'],
+                active_ratio=options['active_ratio'],
+                overdue_ratio=options['overdue_ratio'],
+                history_months=options['history_months'],
+                batch_size=options['batch_size'],
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        def progress(created, seconds):
+            self.stdout.write(f'{created}/{options["members"]} alunos ({created / seconds:.0f} alunos/s)')
+
+        counts = seeder.run(options['members'], progress=progress)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{counts["members"]} alunos, {counts["payments"]} pagamentos, {counts["billing_messages"]} mensagens '
+            f'de cobrança e {counts["activity_logs"]} atividades criados.'
+        ))
@@ -0,0 +1,27 @@
+# Generated by Django 5.1.3 on 2026-10-19 16:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('members', '0007_alter_billingmessage_sent_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='billingmessage',
+            name='priority',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='billingmessage',
+            name='scheduled_for',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='billingmessage',
+            index=models.Index(fields=['is_sent', 'scheduled_for'], name='members_bil_is_sent_cd5685_idx'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.1.3 on 2026-10-19 17:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('members', '0008_billingmessage_priority_billingmessage_scheduled_for_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='member',
+            name='phone',
+            field=models.CharField(db_index=True, max_length=15),
+        ),
+        migrations.CreateModel(
+            name='UnmatchedStatementLine',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('statement', models.CharField(max_length=255)),
+                ('line', models.PositiveIntegerField()),
+                ('payment_date', models.DateField(blank=True, null=True)),
+                ('amount', models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True)),
+                ('name', models.CharField(blank=True, max_length=255)),
+                ('phone', models.CharField(blank=True, max_length=30)),
+                ('email', models.CharField(blank=True, max_length=254)),
+                ('reference', models.CharField(blank=True, max_length=255)),
+                ('description', models.TextField(blank=True)),
+                ('reason', models.CharField(choices=[('not_found', 'Nenhum aluno encontrado'), ('ambiguous', 'Mais de um aluno encontrado'), ('invalid', 'Data ou valor inválido')], max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('resolved_at', models.DateTimeField(blank=True, null=True)),
+                ('member', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='statement_lines', to='members.member')),
+                ('payment', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='statement_line', to='members.payment')),
+            ],
+            options={
+                'verbose_name': 'linha de extrato não conciliada',
+                'verbose_name_plural': 'linhas de extrato não conciliadas',
+                'indexes': [models.Index(fields=['resolved_at'], name='members_unm_resolve_890ff5_idx')],
+            },
+        ),
+    ]
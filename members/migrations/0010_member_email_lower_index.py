@@ -0,0 +1,18 @@
+# Generated by Django 5.1.3 on 2026-10-19 18:39
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('members', '0009_statement_reconciliation'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='member',
+            index=models.Index(django.db.models.functions.text.Lower('email'), name='members_member_email_lower_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.3 on 2026-10-19 19:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('members', '0010_member_email_lower_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='billingmessage',
+            name='claimed_until',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
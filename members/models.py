@@ -1,27 +1,92 @@
-from django.db import models
+import random
+from django.db import models, transaction
 from datetime import timedelta
-from django.utils.timezone import localdate
-from django.db.models import Sum, Min, Max, Count
+from django.conf import settings
+from django.utils import timezone
+from django.utils.timezone import localdate, localtime
+from django.db.models import Sum, Min, Max, Count, F, Q
+from django.db.models.functions import Lower
 from django.core.exceptions import ValidationError
 from datetime import datetime
 from django.core.validators import MinLengthValidator
 from utils.ultramsg import UltraMsgAPI
 
+class MemberQuerySet(models.QuerySet):
+    def with_last_payment_date(self):
+        """
+        Anota a data do último pagamento de cada membro, usada por last_payment_date no lugar de
+        uma consulta por membro (ex.: nos cards da lista de alunos).
+        """
+        return self.annotate(annotated_last_payment_date=Max('payments__payment_date'))
+
+    def update_activity_status(self, today=None):
+        """
+        Versão em lote de Member.update_activity_status para os membros do queryset: o status é recalculado
+        com um UPDATE por sentido, em vez de um save() por membro, e as cobranças dos que ficaram inativos
+        são criadas com um bulk_create. Membros sem pagamentos não são alterados.
+
+        Não dispara sinais: quem chama deve invalidar os caches (utils.data_versions).
+
+        :return: Tupla (membros ativados, membros desativados).
+        """
+        today = today or localdate()
+        cutoff = today - timedelta(days=30)
+        members = self.with_last_payment_date()
+
+        activated = Member.objects.filter(
+            id__in=members.filter(is_active=False, annotated_last_payment_date__gte=cutoff).values('id')
+        ).update(is_active=True)
+
+        overdue = dict(
+            members.filter(is_active=True, annotated_last_payment_date__lt=cutoff)
+            .values_list('id', 'annotated_last_payment_date')
+        )
+        if not overdue:
+            return activated, 0
+
+        Member.objects.filter(id__in=overdue).update(is_active=False)
+
+        # Como em update_activity_status: sem cobrança se já há uma pendente ou se uma foi enviada nos últimos 30 dias
+        already_billed = set(
+            BillingMessage.objects.filter(member_id__in=overdue)
+            .filter(models.Q(is_sent=False) | models.Q(sent_at__gte=cutoff))
+            .values_list('member_id', flat=True)
+        )
+        scheduled_for = BillingMessage.get_send_window()[0]
+        BillingMessage.objects.bulk_create([
+            BillingMessage(member_id=member_id, priority=(today - last_payment_date).days - 30, scheduled_for=scheduled_for)
+            for member_id, last_payment_date in overdue.items()
+            if member_id not in already_billed
+        ])
+
+        return activated, len(overdue)
+
+
 class Member(models.Model):
     email = models.EmailField(unique=True)
     full_name = models.CharField(max_length=50, validators=[MinLengthValidator(3)])
-    phone = models.CharField(max_length=15)
+    phone = models.CharField(max_length=15, db_index=True)  # Conciliação de extratos (members.reconciliation) busca por telefone
     start_date = models.DateField(default=localdate)
     is_active = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = MemberQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Conciliação de extratos busca por e-mail sem diferenciar maiúsculas (os formulários guardam como digitado)
+            models.Index(Lower('email'), name='members_member_email_lower_idx'),
+        ]
+
     def __str__(self):
         return f'{self.full_name}'
 
     @property
     def last_payment_date(self):
         """Retorna a última data de pagamento do membro ou None se não houver pagamentos."""
+        if 'annotated_last_payment_date' in self.__dict__:
+            return self.annotated_last_payment_date
         
         last_payment = self.payments.aggregate(last_payment=Max('payment_date'))['last_payment']
         
@@ -30,8 +95,9 @@ class Member(models.Model):
     def update_activity_status(self):
         """Atualiza o status de atividade do membro com base na última data de pagamento."""
         now = localdate()
+        last_payment_date = self.last_payment_date
 
-        if self.last_payment_date and self.last_payment_date < now - timedelta(days=30):
+        if last_payment_date and last_payment_date < now - timedelta(days=30):
             self.is_active = False
 
             thirty_days_ago = now - timedelta(days=30)
@@ -45,6 +111,10 @@ class Member(models.Model):
                 BillingMessage.objects.get_or_create(
                     member=self,
                     is_sent=False,
+                    defaults={
+                        'priority': (now - last_payment_date).days - 30,
+                        'scheduled_for': BillingMessage.get_send_window()[0],
+                    }
                 )
         else:
             self.is_active = True
@@ -115,6 +185,8 @@ class Payment(models.Model):
         super().save(*args, **kwargs)
 
         if self.member:
+            # A data anotada (with_last_payment_date) não inclui este pagamento
+            self.member.__dict__.pop('annotated_last_payment_date', None)
             self.member.update_activity_status()
             
 
@@ -123,6 +195,12 @@ class BillingMessage(models.Model):
     is_sent = models.BooleanField(default=False)  # Flag para saber se já foi enviada
     created_at = models.DateField(default=localdate)  # Data local em que a mensagem foi salva
     sent_at = models.DateField(null=True, blank=True)  # Data e hora em que a mensagem foi enviada
+    scheduled_for = models.DateTimeField(null=True, blank=True)  # Quando a mensagem pode ser enviada; vazio envia assim que possível
+    priority = models.PositiveIntegerField(default=0)  # Dias de atraso; as mais atrasadas são enviadas primeiro
+    claimed_until = models.DateTimeField(null=True, blank=True)  # Reservada por um envio em andamento até este horário
+
+    # Prazo da reserva: se o worker morrer no meio do lote, as mensagens voltam a ficar disponíveis depois dele
+    CLAIM_TIMEOUT = timedelta(minutes=30)
 
     def __str__(self):
         return f"BillingMessage for {self.member.full_name} - Sent: {self.is_sent}"
@@ -131,17 +209,157 @@ class BillingMessage(models.Model):
         indexes = [
             models.Index(fields=['is_sent']),
             models.Index(fields=['sent_at']),
+            models.Index(fields=['is_sent', 'scheduled_for']),
         ]
+
+    @classmethod
+    def get_send_window(cls, now=None):
+        """
+        Retorna (início, fim) da janela de envio atual, ou da próxima se a de hoje já terminou.
+        O fim pode ser 24 (meia-noite).
+        """
+        now = localtime(now)
+        day = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        start = day + timedelta(hours=settings.BILLING_WINDOW_START_HOUR)
+        end = day + timedelta(hours=settings.BILLING_WINDOW_END_HOUR)
+
+        if now >= end:
+            start += timedelta(days=1)
+            end += timedelta(days=1)
+
+        return start, end
+
+    @classmethod
+    def schedule_pending(cls, now=None):
+        """
+        Distribui as mensagens pendentes ainda não vencidas ao longo da janela de envio.
+
+        As mais atrasadas ficam com os primeiros horários e cada horário recebe um atraso aleatório (jitter),
+        então o dispatcher envia um fluxo constante em vez de uma rajada no início da janela.
+        Mensagens sem horário (scheduled_for vazio) não são alteradas e continuam sendo enviadas assim que possível.
+
+        :return: Quantidade de mensagens agendadas.
+        """
+        now = localtime(now)
+        window_start, window_end = cls.get_send_window(now)
+        start = max(now, window_start)
+
+        messages = list(
+            cls.objects.filter(is_sent=False, scheduled_for__gt=now)
+            .order_by('-priority', 'created_at', 'id')
+            .only('id', 'scheduled_for')
+        )
+        if not messages:
+            return 0
+
+        interval = (window_end - start) / len(messages)
+        jitter = min(timedelta(seconds=settings.BILLING_SCHEDULE_JITTER), interval).total_seconds()
+
+        for position, message in enumerate(messages):
+            message.scheduled_for = start + interval * position + timedelta(seconds=random.uniform(0, jitter))
+
+        cls.objects.bulk_update(messages, ['scheduled_for'], batch_size=500)
+        return len(messages)
     
-    def send_message(self):
-        ultramsg = UltraMsgAPI()
+    @classmethod
+    def claim_due(cls, limit, now=None):
+        """
+        Reserva até `limit` mensagens pendentes cujo horário já chegou, as mais atrasadas primeiro, e
+        retorna seus ids.
+
+        As linhas são escolhidas com SELECT ... FOR UPDATE SKIP LOCKED e marcadas em claimed_until na mesma
+        transação, curta: execuções simultâneas de send_billing_messages pegam mensagens diferentes, e as
+        reservadas ficam de fora até serem liberadas (release_claims) ou o CLAIM_TIMEOUT passar.
+        """
+        now = now or timezone.now()
+
+        with transaction.atomic():
+            ids = list(
+                cls.objects
+                .filter(Q(scheduled_for__isnull=True) | Q(scheduled_for__lte=now), is_sent=False, member__is_active=False)
+                .filter(Q(claimed_until__isnull=True) | Q(claimed_until__lte=now))
+                .order_by('-priority', F('scheduled_for').asc(nulls_first=True), 'id')
+                .select_for_update(skip_locked=True, of=('self',))
+                .values_list('id', flat=True)[:limit]
+            )
+            cls.objects.filter(id__in=ids).update(claimed_until=now + cls.CLAIM_TIMEOUT)
+
+        return ids
+
+    @classmethod
+    def release_claims(cls, ids):
+        """Libera as mensagens reservadas por claim_due que não foram enviadas, para a próxima execução."""
+        cls.objects.filter(id__in=ids, is_sent=False).update(claimed_until=None)
+
+    def send_message(self, ultramsg=None):
+        """
+        Envia a mensagem de cobrança pelo WhatsApp.
+
+        :param ultramsg: Cliente UltraMsgAPI a reutilizar em envios em lote; se não for informado, um novo é criado.
+        :return: Resposta da API ou dicionário com o erro.
+        """
+        ultramsg = ultramsg or UltraMsgAPI()
         
         message = f"Olá, {self.member.full_name}! Seu pagamento está atrasado. Por favor, regularize sua situação."
         response = ultramsg.send_message(to=f'55{self.member.phone}', message=message)
         
-        if response.status_code == 200 and 'true' in response.text:
+        if isinstance(response, dict):
+            print(f"Error sending message to {self.member.full_name}: {response['error']}")
+        elif response.status_code == 200 and 'true' in response.text:
             self.is_sent = True
             self.sent_at = localdate()
             self.save()
         else:
-            print(f"Error sending message to {self.member.full_name}: {response.text}")
\ No newline at end of file
+            print(f"Error sending message to {self.member.full_name}: {response.text}")
+
+        return response
+
+
+class UnmatchedStatementLine(models.Model):
+    """
+    Linha de extrato bancário ou PIX que a conciliação (members.reconciliation) não conseguiu associar a
+    um aluno. Fica na fila de revisão manual do admin: ao escolher o aluno, o pagamento é registrado.
+    """
+    REASON_CHOICES = [
+        ('not_found', 'Nenhum aluno encontrado'),
+        ('ambiguous', 'Mais de um aluno encontrado'),
+        ('invalid', 'Data ou valor inválido'),
+    ]
+
+    statement = models.CharField(max_length=255)  # Nome do arquivo do extrato
+    line = models.PositiveIntegerField()
+    payment_date = models.DateField(null=True, blank=True)
+    amount = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
+    name = models.CharField(max_length=255, blank=True)
+    phone = models.CharField(max_length=30, blank=True)
+    email = models.CharField(max_length=254, blank=True)
+    reference = models.CharField(max_length=255, blank=True)
+    description = models.TextField(blank=True)
+    reason = models.CharField(max_length=20, choices=REASON_CHOICES)
+    created_at = models.DateTimeField(auto_now_add=True)
+    member = models.ForeignKey(Member, on_delete=models.SET_NULL, null=True, blank=True, related_name='statement_lines')
+    payment = models.OneToOneField(Payment, on_delete=models.SET_NULL, null=True, blank=True, related_name='statement_line')
+    resolved_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'linha de extrato não conciliada'
+        verbose_name_plural = 'linhas de extrato não conciliadas'
+        indexes = [
+            models.Index(fields=['resolved_at']),
+        ]
+
+    def __str__(self):
+        return f'{self.statement}:{self.line} | {self.payment_date} | R$ {self.amount} | {self.get_reason_display()}'
+
+    def resolve(self, member):
+        """Registra o pagamento da linha para `member` pelo caminho normal (Payment.save e sinais) e a tira da fila."""
+        if self.resolved_at is not None:
+            raise ValidationError('Esta linha já foi conciliada.')
+        if self.payment_date is None or self.amount is None:
+            raise ValidationError('A linha não tem data ou valor válido.')
+
+        self.payment = Payment.objects.create(member=member, payment_date=self.payment_date, amount=self.amount)
+        self.member = member
+        self.resolved_at = timezone.now()
+        self.save()
+        return self.payment
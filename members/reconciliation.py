@@ -0,0 +1,284 @@
+import re
+import time
+from decimal import Decimal
+from pathlib import Path
+
+from django import forms
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.functions import Lower
+from django.utils.timezone import localdate
+
+from admin_panel.activity_log import log_activity
+from admin_panel.live_updates import publish_counters
+from utils.bulk_copy import bulk_load
+from utils.data_versions import bump_versions, model_namespace
+from .importing import read_csv
+from .models import Member, Payment, UnmatchedStatementLine
+
+STATEMENT_COLUMNS = ('date', 'amount')
+OPTIONAL_COLUMNS = ('name', 'phone', 'email', 'reference', 'description')
+
+_EMAIL = re.compile(r'[\w.+-]+@[\w-]+(?:\.[\w-]+)+')
+_REFERENCE = re.compile(r'\bALUNO\s*#?\s*(\d+)\b', re.IGNORECASE)
+# Chaves PIX de telefone na descrição: +55 ou DDD entre parênteses, para não confundir com CPF ou número de conta
+_PHONE = re.compile(r'\+55[\s-]*\(?\d{2}\)?[\s-]*9?\d{4}[\s-]*\d{4}|\(\d{2}\)\s*9?\d{4}-?\d{4}')
+_NON_DIGITS = re.compile(r'\D')
+
+_date_field = forms.DateField()
+_amount_field = forms.DecimalField(max_digits=5, decimal_places=2)
+
+
+def phone_variants(phone):
+    """
+    Returns the forms a phone may be stored in: digits only, with and without
+    Brazil's country code (55), since both are accepted by the member forms.
+
+    >>> sorted(phone_variants('+55 (85) 96666-7979'))
+    ['5585966667979', '85966667979']
+    """
+    digits = _NON_DIGITS.sub('', phone or '')
+    if len(digits) < 10:
+        return set()
+    if digits.startswith('55') and len(digits) >= 12:
+        return {digits, digits[2:]}
+    return {digits, f'55{digits}'}
+
+
+def parse_reference(value, bare_id=True):
+    """
+    Returns the member id in a reference such as 'ALUNO 123' (the code members are
+    asked to write in the transfer description), or None. With `bare_id`, a value
+    holding just the number is read as the id too: only for the reference column,
+    since in a description a bare number is usually a transaction or document number.
+
+    >>> parse_reference('PIX recebido - ALUNO #42 - mensalidade'), parse_reference('42'), parse_reference('abc')
+    (42, 42, None)
+    >>> parse_reference('42', bare_id=False)
+    """
+    value = (value or '').strip()
+    if bare_id and value.isdigit():
+        return int(value)
+    match = _REFERENCE.search(value)
+    return int(match.group(1)) if match else None
+
+
+class StatementLine:
+    """One credit line of a statement, with what can identify the payer."""
+
+    __slots__ = ('line', 'data', 'payment_date', 'amount', 'reference', 'email', 'phones', 'error')
+
+    def __init__(self, line, data):
+        self.line = line
+        self.data = data
+        self.error = None
+
+        try:
+            self.payment_date = _date_field.clean(data['date'])
+            # Extratos em português usam vírgula decimal
+            amount = data['amount'].replace('R$', '').strip()
+            if ',' in amount:
+                amount = amount.replace('.', '').replace(',', '.')
+            self.amount = _amount_field.clean(amount)
+        except ValidationError as e:
+            self.payment_date = self.amount = None
+            self.error = ' '.join(e.messages)
+
+        description = data['description']
+        self.reference = parse_reference(data['reference']) or parse_reference(description, bare_id=False)
+
+        email = data['email'] or next(iter(_EMAIL.findall(description)), '')
+        self.email = email.lower()
+
+        phone = data['phone'] or next(iter(_PHONE.findall(description)), '')
+        self.phones = phone_variants(phone)
+
+    @property
+    def is_credit(self):
+        return self.amount is None or self.amount > 0
+
+
+class StatementReconciler:
+    """
+    Reconciles a bank or PIX statement (CSV with 'date' and 'amount' plus any of
+    OPTIONAL_COLUMNS) against the members.
+
+    Each line is matched by reference (member id, see parse_reference), e-mail or
+    phone, in that order, also looking for them in the description. Lines are
+    read in chunks of `batch_size`; each chunk resolves all its keys with one
+    indexed query (id, email and phone IN lists), skips payments already
+    registered (same member, date and amount) and writes, in one transaction,
+    the matched payments with bulk_load (COPY on PostgreSQL) and the other lines to
+    UnmatchedStatementLine, the manual review queue. Debits are ignored.
+
+    Signals are not fired: statuses of the members who paid are recomputed
+    set-based (MemberQuerySet.update_activity_status), the caches are invalidated,
+    one summary ActivityLog entry is recorded and the dashboard counters are
+    published once, at the end.
+    """
+
+    def __init__(self, statement, batch_size=2000, today=None):
+        self.statement = statement
+        self.batch_size = batch_size
+        self.today = today or localdate()
+        self.counts = {'lines': 0, 'matched': 0, 'duplicates': 0, 'unmatched': 0, 'ignored': 0, 'activated': 0, 'deactivated': 0}
+        self.member_ids = set()
+        self.payment_months = set()
+        self.profit = {'profit_year': Decimal(0), 'profit_month': Decimal(0)}
+
+    def run(self, lines, progress=None):
+        """
+        Reconciles the statement in `lines`.
+
+        :param progress: Called after each chunk with (lines read so far, seconds elapsed).
+        :return: Dict with the number of lines read, matched, duplicated, unmatched and ignored,
+                 and of members activated and deactivated.
+        :raises MemberImportError: If the header misses one of STATEMENT_COLUMNS.
+        """
+        started = time.perf_counter()
+        reader = read_csv(lines, required=STATEMENT_COLUMNS)
+        chunk = []
+
+        for row in reader:
+            self.counts['lines'] += 1
+            data = {column: (row.get(column) or '').strip() for column in STATEMENT_COLUMNS + OPTIONAL_COLUMNS}
+            statement_line = StatementLine(reader.line_num, data)
+
+            if not statement_line.is_credit:
+                self.counts['ignored'] += 1
+                continue
+
+            chunk.append(statement_line)
+            if len(chunk) >= self.batch_size:
+                self.reconcile_chunk(chunk)
+                chunk = []
+                if progress:
+                    progress(self.counts['lines'], time.perf_counter() - started)
+
+        if chunk:
+            self.reconcile_chunk(chunk)
+        if progress:
+            progress(self.counts['lines'], time.perf_counter() - started)
+
+        self.finish()
+        return dict(self.counts)
+
+    def find_members(self, chunk):
+        """Returns (ids, {email: id}, {phone: [ids]}) of the members any line of `chunk` may refer to, in one query."""
+        references = {line.reference for line in chunk if line.reference}
+        emails = {line.email for line in chunk if line.email}
+        phones = set().union(*(line.phones for line in chunk))
+
+        ids, by_email, by_phone = set(), {}, {}
+        if not (references or emails or phones):
+            return ids, by_email, by_phone
+
+        # Statement e-mails are lowercased; members keep theirs as typed (see the Lower('email') index)
+        members = Member.objects.annotate(email_lower=Lower('email')).filter(
+            Q(id__in=references) | Q(email_lower__in=emails) | Q(phone__in=phones)
+        )
+        for member_id, email, phone in members.values_list('id', 'email', 'phone'):
+            ids.add(member_id)
+            by_email[email.lower()] = member_id
+            by_phone.setdefault(phone, []).append(member_id)
+        return ids, by_email, by_phone
+
+    def match(self, line, ids, by_email, by_phone):
+        """Returns (member id, None) or (None, reason) for `line`."""
+        if line.error:
+            return None, 'invalid'
+        if line.reference in ids:
+            return line.reference, None
+        if line.email in by_email:
+            return by_email[line.email], None
+
+        candidates = {member_id for phone in line.phones for member_id in by_phone.get(phone, ())}
+        if len(candidates) == 1:
+            return candidates.pop(), None
+        return None, 'ambiguous' if candidates else 'not_found'
+
+    def reconcile_chunk(self, chunk):
+        ids, by_email, by_phone = self.find_members(chunk)
+        matched, unmatched = [], []
+
+        for line in chunk:
+            member_id, reason = self.match(line, ids, by_email, by_phone)
+            if member_id is None:
+                unmatched.append(self.unmatched_line(line, reason))
+            else:
+                matched.append((member_id, line))
+
+        existing = set(
+            Payment.objects.filter(
+                member_id__in={member_id for member_id, _ in matched},
+                payment_date__in={line.payment_date for _, line in matched},
+            ).values_list('member_id', 'payment_date', 'amount')
+        ) if matched else set()
+
+        payments = []
+        for member_id, line in matched:
+            key = (member_id, line.payment_date, line.amount)
+            if key in existing:
+                self.counts['duplicates'] += 1
+                continue
+            # Repetidas dentro do próprio extrato também contam uma vez só
+            existing.add(key)
+            payments.append(Payment(member_id=member_id, payment_date=line.payment_date, amount=line.amount))
+
+        with transaction.atomic():
+            bulk_load(payments, batch_size=self.batch_size)
+            bulk_load(unmatched, batch_size=self.batch_size)
+
+        self.counts['matched'] += len(payments)
+        self.counts['unmatched'] += len(unmatched)
+
+        for payment in payments:
+            self.member_ids.add(payment.member_id)
+            self.payment_months.add(payment.payment_date.replace(day=1))
+            if payment.payment_date.year == self.today.year:
+                self.profit['profit_year'] += payment.amount
+                if payment.payment_date.month == self.today.month:
+                    self.profit['profit_month'] += payment.amount
+
+    def unmatched_line(self, line, reason):
+        return UnmatchedStatementLine(
+            statement=self.statement,
+            line=line.line,
+            payment_date=line.payment_date,
+            amount=line.amount,
+            name=line.data['name'][:255],
+            phone=line.data['phone'][:30],
+            email=line.data['email'][:254],
+            reference=line.data['reference'][:255],
+            description=line.data['description'],
+            reason=reason,
+        )
+
+    def finish(self):
+        if not self.member_ids:
+            return
+
+        member_ids = sorted(self.member_ids)
+        for start in range(0, len(member_ids), self.batch_size):
+            activated, deactivated = Member.objects.filter(
+                id__in=member_ids[start:start + self.batch_size]
+            ).update_activity_status(today=self.today)
+            self.counts['activated'] += activated
+            self.counts['deactivated'] += deactivated
+
+        bump_versions(
+            model_namespace(Member),
+            model_namespace(Payment),
+            *(model_namespace(Payment, month) for month in sorted(self.payment_months)),
+        )
+        log_activity(
+            event_type='payment',
+            description=f'Conciliação do extrato {Path(self.statement).name}: {self.counts["matched"]} pagamentos registrados.',
+        )
+        status_change = self.counts['activated'] - self.counts['deactivated']
+        publish_counters(
+            members_active=status_change,
+            members_inactive=-status_change,
+            **{name: str(total) if total else 0 for name, total in self.profit.items()},
+        )
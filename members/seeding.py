@@ -0,0 +1,187 @@
+import random
+import time
+import unicodedata
+from contextlib import contextmanager
+from datetime import datetime, time as datetime_time, timedelta
+
+from django.db import transaction
+from django.utils.timezone import get_current_timezone, localdate
+
+from admin_panel.models import ActivityLog
+from utils.bulk_copy import bulk_load
+from utils.data_versions import bump_versions, model_namespace
+from .models import BillingMessage, Member, Payment
+
+FIRST_NAMES = (
+    'Ana', 'Beatriz', 'Bruna', 'Camila', 'Carla', 'Daniela', 'Fernanda', 'Gabriela', 'Juliana', 'Larissa',
+    'Letícia', 'Mariana', 'Patrícia', 'Rafaela', 'Vanessa', 'André', 'Bruno', 'Carlos', 'Diego', 'Eduardo',
+    'Felipe', 'Gustavo', 'João', 'José', 'Lucas', 'Marcos', 'Mateus', 'Pedro', 'Rafael', 'Thiago',
+)
+LAST_NAMES = (
+    'Silva', 'Santos', 'Oliveira', 'Souza', 'Rodrigues', 'Ferreira', 'Alves', 'Pereira', 'Lima', 'Gomes',
+    'Costa', 'Ribeiro', 'Martins', 'Carvalho', 'Almeida', 'Lopes', 'Soares', 'Fernandes', 'Vieira', 'Barbosa',
+)
+AMOUNTS = (80, 90, 100, 100, 100, 120, 150)  # Valores de mensalidade, os mais comuns repetidos
+
+
+@contextmanager
+def explicit_timestamps(*models):
+    """
+    Turns off auto_now/auto_now_add of the `models` inside the block, so bulk_load
+    keeps the created_at/updated_at given to each instance.
+    """
+    fields = [
+        field for model in models for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+    original = [(field, field.auto_now, field.auto_now_add) for field in fields]
+
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in original:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def _ascii(text):
+    return unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode().lower()
+
+
+class MemberSeeder:
+    """
+    Generates realistic members with bulk_load (COPY on PostgreSQL), without firing signals:
+
+    - active members (`active_ratio`) paid in the last 30 days;
+    - overdue members (`overdue_ratio`) are inactive, their last payment was 31 to
+      120 days ago and they have a pending billing message;
+    - the rest are former members, last paid 4 to 24 months ago, with a billing
+      message sent back then.
+
+    Each member pays monthly from its start date (up to `history_months` before its
+    last payment) and gets a 'created' and a 'payment' activity entry. The same
+    seed and day always give the same data. Each batch is written in its own
+    transaction, and the data-version caches are invalidated at the end.
+    """
+
+    def __init__(self, seed=0, active_ratio=0.7, overdue_ratio=0.2, history_months=12, batch_size=5000, today=None):
+        if active_ratio < 0 or overdue_ratio < 0 or active_ratio + overdue_ratio > 1:
+            raise ValueError('The active and overdue ratios must be positive and add up to at most 1.')
+
+        self.seed = seed
+        self.active_ratio = active_ratio
+        self.overdue_ratio = overdue_ratio
+        self.history_months = history_months
+        self.batch_size = batch_size
+        self.today = today or localdate()
+        self.rng = random.Random(seed)
+        self.payment_months = set()
+        self.counts = {'members': 0, 'payments': 0, 'billing_messages': 0, 'activity_logs': 0}
+
+    def run(self, members, progress=None):
+        """
+        Creates `members` members and their data.
+
+        :param progress: Called after each batch with (members created so far, seconds elapsed).
+        :return: Dict with the number of rows created per model.
+        """
+        started = time.perf_counter()
+
+        with explicit_timestamps(Member):
+            for start in range(0, members, self.batch_size):
+                with transaction.atomic():
+                    self.create_batch(range(start, min(start + self.batch_size, members)))
+                if progress:
+                    progress(self.counts['members'], time.perf_counter() - started)
+
+        bump_versions(
+            model_namespace(Member),
+            model_namespace(Payment),
+            model_namespace(ActivityLog),
+            *(model_namespace(Payment, month) for month in sorted(self.payment_months)),
+        )
+        return dict(self.counts)
+
+    def create_batch(self, indexes):
+        profiles = [self.profile(index) for index in indexes]
+        members = bulk_load([profile['member'] for profile in profiles], batch_size=self.batch_size)
+
+        payments = []
+        messages = []
+        activities = []
+
+        for member, profile in zip(members, profiles):
+            member_payments = [
+                Payment(member=member, payment_date=payment_date, amount=profile['amount'])
+                for payment_date in profile['payment_dates']
+            ]
+            payments += member_payments
+            self.payment_months.update(payment_date.replace(day=1) for payment_date in profile['payment_dates'])
+
+            if profile['message'] is not None:
+                messages.append(BillingMessage(member=member, **profile['message']))
+
+            activities.append(ActivityLog(
+                member=member, event_type='created', created_at=member.created_at,
+                description=f'Aluno {member.full_name} foi cadastrado.',
+            ))
+            activities.append(ActivityLog(
+                member=member, event_type='payment', created_at=self.at(profile['payment_dates'][-1]),
+                description=f'Aluno {member.full_name} realizou um pagamento de R$ {profile["amount"]:.2f}.',
+            ))
+
+        bulk_load(payments, batch_size=self.batch_size)
+        bulk_load(messages, batch_size=self.batch_size)
+        bulk_load(activities, batch_size=self.batch_size)
+
+        self.counts['members'] += len(members)
+        self.counts['payments'] += len(payments)
+        self.counts['billing_messages'] += len(messages)
+        self.counts['activity_logs'] += len(activities)
+
+    def profile(self, index):
+        """Draws one member: its status, payment dates and billing message."""
+        rng = self.rng
+        first_name, last_name = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        kind = rng.random()
+
+        if kind < self.active_ratio:
+            last_payment = self.today - timedelta(days=rng.randrange(0, 30))
+        elif kind < self.active_ratio + self.overdue_ratio:
+            last_payment = self.today - timedelta(days=rng.randrange(31, 121))
+        else:
+            last_payment = self.today - timedelta(days=rng.randrange(121, 730))
+
+        months = rng.randrange(0, self.history_months + 1)
+        payment_dates = [last_payment - timedelta(days=30 * month) for month in range(months, -1, -1)]
+        start_date = payment_dates[0]
+        days_late = (self.today - last_payment).days - 30
+
+        message = None
+        if days_late > 0 and kind < self.active_ratio + self.overdue_ratio:
+            message = {'is_sent': False, 'priority': days_late, 'created_at': self.today}
+        elif days_late > 0:
+            sent_at = last_payment + timedelta(days=31)
+            message = {'is_sent': True, 'priority': 1, 'created_at': sent_at, 'sent_at': sent_at}
+
+        created_at = self.at(start_date)
+        return {
+            'member': Member(
+                email=f'{_ascii(first_name)}.{_ascii(last_name)}.{self.seed}.{index}@example.com',
+                full_name=f'{first_name} {last_name}',
+                phone=f'{rng.choice((11, 21, 31, 85))}9{rng.randrange(10**7, 10**8)}',
+                start_date=start_date,
+                is_active=days_late <= 0,
+                created_at=created_at,
+                updated_at=created_at,
+            ),
+            'payment_dates': payment_dates,
+            'amount': rng.choice(AMOUNTS),
+            'message': message,
+        }
+
+    def at(self, day):
+        """A time during opening hours of `day`, as an aware datetime."""
+        moment = datetime_time(hour=self.rng.randrange(6, 22), minute=self.rng.randrange(60))
+        return datetime.combine(day, moment, tzinfo=get_current_timezone())
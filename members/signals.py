@@ -1,18 +1,22 @@
-from django.db.models.signals import post_save, post_delete
+from collections import defaultdict
+from django.db.models.signals import post_init, post_save, post_delete
 from django.dispatch import receiver
+from django.utils.timezone import localdate, localtime
 from .models import Member, Payment
-from admin_panel.models import ActivityLog
+from admin_panel.activity_log import log_activity
+from admin_panel.live_updates import publish_counters
+from utils.data_versions import bump_versions, model_namespace
 
 @receiver(post_save, sender=Member)
 def log_member_activity(sender, instance, created, **kwargs):
     if created:
-        ActivityLog.objects.create(
+        log_activity(
             member=instance,
             event_type='created',
             description=f"Aluno {instance.full_name} foi cadastrado."
         )
     else:
-        ActivityLog.objects.create(
+        log_activity(
             member=instance,
             event_type='updated',
             description=f"Aluno {instance.full_name} foi atualizado."
@@ -21,7 +25,7 @@ def log_member_activity(sender, instance, created, **kwargs):
 
 @receiver(post_delete, sender=Member)
 def log_member_deleted_activity(sender, instance, **kwargs):
-    ActivityLog.objects.create(
+    log_activity(
         event_type='deleted',
         description=f"Aluno {instance.full_name} foi excluído."
     )
@@ -30,8 +34,102 @@ def log_member_deleted_activity(sender, instance, **kwargs):
 @receiver(post_save, sender=Payment)
 def log_payment_activity(sender, instance, created, **kwargs):
     if created:
-        ActivityLog.objects.create(
+        log_activity(
             member=instance.member,
             event_type='payment',
             description=f"{f'Aluno {instance.member.full_name}' if instance.member else 'Pagamento sem aluno associado |'} realizou um pagamento de R$ {instance.amount}."
         )
+
+
+# Contadores do painel ao vivo: só as variações são publicadas, as telas somam ao valor que já mostram
+
+@receiver(post_init, sender=Member)
+def remember_member_status(sender, instance, **kwargs):
+    # Lido de __dict__ para não disparar uma consulta quando o campo foi adiado com only()/defer()
+    instance._original_is_active = instance.__dict__.get('is_active')
+
+
+def _status_counters(is_active, delta):
+    if is_active is None:
+        return {}
+    return {'members_active': delta} if is_active else {'members_inactive': delta}
+
+
+def _is_this_month(date):
+    today = localdate()
+    return date is not None and (date.year, date.month) == (today.year, today.month)
+
+
+@receiver(post_save, sender=Member)
+def publish_member_counters(sender, instance, created, **kwargs):
+    if created:
+        publish_counters(members_new_month=1, **_status_counters(instance.is_active, 1))
+    elif instance._original_is_active is not None and bool(instance.is_active) != bool(instance._original_is_active):
+        publish_counters(**_status_counters(instance._original_is_active, -1), **_status_counters(instance.is_active, 1))
+
+    instance._original_is_active = bool(instance.is_active)
+
+
+@receiver(post_delete, sender=Member)
+def publish_deleted_member_counters(sender, instance, **kwargs):
+    new_this_month = instance.created_at is not None and _is_this_month(localtime(instance.created_at))
+    publish_counters(members_new_month=-1 if new_this_month else 0, **_status_counters(instance.is_active, -1))
+
+
+def _profit_counters(*changes):
+    """Variações do lucro do ano e do mês para as mudanças (data, valor, sinal) de pagamentos."""
+    today = localdate()
+    counters = defaultdict(int)
+    for payment_date, amount, sign in changes:
+        if payment_date is None or amount is None or payment_date.year != today.year:
+            continue
+        counters['profit_year'] += sign * amount
+        if payment_date.month == today.month:
+            counters['profit_month'] += sign * amount
+    return {name: str(total) for name, total in counters.items() if total}
+
+
+@receiver(post_init, sender=Payment)
+def remember_payment_amount(sender, instance, **kwargs):
+    instance._original_amount = instance.__dict__.get('amount')
+
+
+@receiver(post_save, sender=Payment)
+def publish_payment_counters(sender, instance, created, **kwargs):
+    if created:
+        publish_counters(**_profit_counters((instance.payment_date, instance.amount, 1)))
+    else:
+        # Edição: sai o valor antigo, na data antiga, e entra o novo
+        publish_counters(**_profit_counters(
+            (instance._original_payment_date, instance._original_amount, -1),
+            (instance.payment_date, instance.amount, 1),
+        ))
+
+    instance._original_amount = instance.amount
+
+
+@receiver(post_delete, sender=Payment)
+def publish_deleted_payment_counters(sender, instance, **kwargs):
+    publish_counters(**_profit_counters((instance.payment_date, instance.amount, -1)))
+
+
+# Versões usadas nas chaves de cache (utils.data_versions): qualquer alteração descarta o que foi calculado com os dados antigos
+
+@receiver(post_save, sender=Member)
+@receiver(post_delete, sender=Member)
+def bump_member_version(sender, instance, **kwargs):
+    bump_versions(model_namespace(Member))
+
+
+@receiver(post_init, sender=Payment)
+def remember_payment_date(sender, instance, **kwargs):
+    instance._original_payment_date = instance.__dict__.get('payment_date')
+
+
+@receiver(post_save, sender=Payment)
+@receiver(post_delete, sender=Payment)
+def bump_payment_versions(sender, instance, **kwargs):
+    # A data pode ter mudado de mês: os dois meses são invalidados
+    dates = {instance.payment_date, instance._original_payment_date} - {None}
+    bump_versions(model_namespace(Payment), *(model_namespace(Payment, date) for date in dates))
+    instance._original_payment_date = instance.payment_date
@@ -1,18 +1,75 @@
 from celery import shared_task
+from django.conf import settings
+from django.db.models import F
 from .models import Member, BillingMessage
+from admin_panel.activity_log import log_activity
+from admin_panel.live_updates import publish_counters
+from utils.data_versions import bump_versions, model_namespace
+from utils.ultramsg import UltraMsgAPI
+
+STATUS_UPDATE_SUMMARY = 'Atualização diária de status: {updated} alunos verificados.'
+BILLING_RETRY_JOB = 'send_billing_messages'
+BILLING_RETRY_MARGIN = 300  # Segundos além do atraso da nova tentativa até a reserva expirar sozinha
 
 @shared_task
 def update_members_activity_status():
-    """Verifica se o pagamento do membro foi feito há mais de 1 mês e atualiza o status."""
+    """
+    Desativa os membros ativos cujo último pagamento foi há mais de 1 mês e cria as cobranças.
+
+    Em lote (MemberQuerySet.update_activity_status), com um número fixo de consultas qualquer que seja a
+    quantidade de alunos. Como os sinais não são disparados, os caches são invalidados, os contadores do
+    painel publicados e um único registro é feito no ActivityLog para a execução inteira.
+    """
     members = Member.objects.filter(is_active=True)
+    checked = members.count()
+    _, deactivated = members.update_activity_status()
+
+    if deactivated:
+        bump_versions(model_namespace(Member))
+        publish_counters(members_active=-deactivated, members_inactive=deactivated)
+    if checked:
+        log_activity(event_type='updated', description=STATUS_UPDATE_SUMMARY.format(updated=checked))
+
+    # Espalha as cobranças criadas acima ao longo da janela de envio
+    BillingMessage.schedule_pending()
+
 
-    for member in members:
-        member.update_activity_status()
-        
 @shared_task
-def send_billing_messages():
-    """Envia mensagens de cobrança para os membros inativos."""
-    pendent_messages = BillingMessage.objects.filter(is_sent=False, member__is_active=False)[:100]
-    
-    for message in pendent_messages:
-        message.send_message()
\ No newline at end of file
+def send_billing_messages(retry=False):
+    """
+    Envia mensagens de cobrança para os membros inativos.
+
+    Só são enviadas as mensagens cujo horário agendado já chegou, as mais atrasadas primeiro, até
+    BILLING_MESSAGES_PER_RUN por execução. Executada periodicamente durante a janela de envio, drena as
+    mensagens em ritmo constante (ver BillingMessage.schedule_pending). As mensagens do lote são reservadas
+    antes dos envios (BillingMessage.claim_due), então execuções sobrepostas nunca enviam a mesma mensagem.
+
+    Um único cliente UltraMsg é usado no lote, então todos os envios passam pelo mesmo limitador de taxa compartilhado.
+    Se o circuit breaker da UltraMsg abrir, o lote é interrompido e a task é reagendada (com retry=True) para
+    quando o circuito permitir uma nova tentativa; as mensagens restantes são liberadas e continuam pendentes.
+    Só uma nova tentativa fica agendada por vez, por mais execuções que encontrem o circuito aberto.
+    """
+    ultramsg = UltraMsgAPI()
+    breaker = ultramsg.circuit_breaker
+    if retry:
+        breaker.release_retry(BILLING_RETRY_JOB)
+
+    claimed = BillingMessage.claim_due(settings.BILLING_MESSAGES_PER_RUN)
+    pendent_messages = (
+        BillingMessage.objects.filter(id__in=claimed)
+        .order_by('-priority', F('scheduled_for').asc(nulls_first=True), 'id')
+        .select_related('member')
+    )
+
+    try:
+        for message in pendent_messages:
+            response = message.send_message(ultramsg=ultramsg)
+
+            if isinstance(response, dict) and response.get('circuit_open'):
+                countdown = breaker.retry_after()
+                # A reserva dura até a nova tentativa começar, com folga para a fila do Celery
+                if breaker.reserve_retry(BILLING_RETRY_JOB, countdown + BILLING_RETRY_MARGIN):
+                    send_billing_messages.apply_async(kwargs={'retry': True}, countdown=countdown)
+                break
+    finally:
+        BillingMessage.release_claims(claimed)
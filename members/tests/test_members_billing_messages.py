@@ -1,5 +1,6 @@
-from django.test import TestCase
-from django.utils.timezone import localdate
+from django.conf import settings
+from django.test import TestCase, override_settings
+from django.utils.timezone import localdate, localtime
 from unittest.mock import patch
 from datetime import timedelta
 from ..models import Member, Payment, BillingMessage
@@ -158,3 +159,127 @@ class BillingMessageTests(TestCase):
 
         billing_messages = BillingMessage.objects.filter(is_sent=False)
         self.assertEqual(billing_messages.count(), 2)
+
+    def test_messages_are_sent_periodically_during_the_window(self):
+        """Test that beat runs send_billing_messages every few minutes of every hour of the window"""
+        schedule = settings.CELERY_BEAT_SCHEDULE['send-billing-messages']['schedule']
+
+        self.assertEqual(settings.CELERY_BEAT_SCHEDULE['send-billing-messages']['task'], 'members.tasks.send_billing_messages')
+        self.assertEqual(schedule.hour, set(range(settings.BILLING_WINDOW_START_HOUR, settings.BILLING_WINDOW_END_HOUR)))
+        self.assertEqual(len(schedule.minute), 60 // settings.BILLING_SEND_INTERVAL)
+
+
+@override_settings(BILLING_WINDOW_START_HOUR=9, BILLING_WINDOW_END_HOUR=18, BILLING_SCHEDULE_JITTER=60)
+class BillingMessageSchedulingTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.members = [
+            Member.objects.create(email=f'member{i}@example.com', full_name=f'Member {i}', phone='85988888888', is_active=False)
+            for i in range(4)
+        ]
+
+    def local_datetime(self, hour, minute=0, days=0):
+        return localtime().replace(hour=hour, minute=minute, second=0, microsecond=0) + timedelta(days=days)
+
+    def test_send_window_of_current_day(self):
+        """Test that the window of the current day is returned before it ends"""
+        start, end = BillingMessage.get_send_window(self.local_datetime(2))
+
+        self.assertEqual(start, self.local_datetime(9))
+        self.assertEqual(end, self.local_datetime(18))
+
+    def test_send_window_after_end_is_next_day(self):
+        """Test that the window of the next day is returned after today's window ends"""
+        start, end = BillingMessage.get_send_window(self.local_datetime(19))
+
+        self.assertEqual(start, self.local_datetime(9, days=1))
+        self.assertEqual(end, self.local_datetime(18, days=1))
+
+    @override_settings(BILLING_WINDOW_END_HOUR=24)
+    def test_send_window_ending_at_midnight(self):
+        """Test that a window ending at hour 24 ends at the next midnight"""
+        start, end = BillingMessage.get_send_window(self.local_datetime(20))
+
+        self.assertEqual(start, self.local_datetime(9))
+        self.assertEqual(end, self.local_datetime(0, days=1))
+
+    def test_update_activity_status_sets_priority_and_schedule(self):
+        """Test that the billing message created for an overdue member is scheduled and prioritized"""
+        member = self.members[0]
+        Payment.objects.create(member=member, payment_date=localdate() - timedelta(days=40))
+
+        member.update_activity_status()
+
+        billing_message = BillingMessage.objects.get(member=member)
+        self.assertEqual(billing_message.priority, 10)
+        self.assertEqual(billing_message.scheduled_for, BillingMessage.get_send_window()[0])
+
+    def test_schedule_pending_spreads_messages_by_priority(self):
+        """Test that pending messages are spread along the window, most overdue first"""
+        now = self.local_datetime(0, 2)
+        messages = [
+            BillingMessage.objects.create(member=member, priority=priority, scheduled_for=self.local_datetime(9))
+            for member, priority in zip(self.members, [5, 40, 1, 20])
+        ]
+
+        scheduled = BillingMessage.schedule_pending(now)
+
+        self.assertEqual(scheduled, 4)
+        ordered = BillingMessage.objects.order_by('scheduled_for')
+        self.assertEqual([message.priority for message in ordered], [40, 20, 5, 1])
+
+        # 9 hours / 4 messages = one slot every 2h15, plus up to 60 seconds of jitter
+        for position, message in enumerate(ordered):
+            slot = self.local_datetime(9) + timedelta(minutes=135) * position
+            self.assertGreaterEqual(message.scheduled_for, slot)
+            self.assertLessEqual(message.scheduled_for, slot + timedelta(seconds=60))
+
+        for message in messages:
+            message.refresh_from_db()
+            self.assertLess(message.scheduled_for, self.local_datetime(18))
+
+    def test_schedule_pending_keeps_unscheduled_and_due_messages(self):
+        """Test that messages without a schedule or already due are not moved"""
+        now = self.local_datetime(12)
+        unscheduled = BillingMessage.objects.create(member=self.members[0])
+        due = BillingMessage.objects.create(member=self.members[1], scheduled_for=self.local_datetime(10))
+
+        BillingMessage.schedule_pending(now)
+
+        unscheduled.refresh_from_db()
+        due.refresh_from_db()
+        self.assertIsNone(unscheduled.scheduled_for)
+        self.assertEqual(due.scheduled_for, self.local_datetime(10))
+
+    @patch('utils.ultramsg.UltraMsgAPI.send_message')
+    def test_send_billing_messages_only_sends_due_messages(self, mock_send_message):
+        """Test that the dispatcher leaves messages scheduled for later untouched"""
+        mock_send_message.return_value.status_code = 200
+        mock_send_message.return_value.text = 'true'
+
+        due = BillingMessage.objects.create(member=self.members[0], scheduled_for=localtime() - timedelta(minutes=1))
+        later = BillingMessage.objects.create(member=self.members[1], scheduled_for=localtime() + timedelta(hours=1))
+
+        send_billing_messages()
+
+        due.refresh_from_db()
+        later.refresh_from_db()
+        self.assertTrue(due.is_sent)
+        self.assertFalse(later.is_sent)
+
+    @override_settings(BILLING_MESSAGES_PER_RUN=2)
+    @patch('utils.ultramsg.UltraMsgAPI.send_message')
+    def test_send_billing_messages_most_overdue_first(self, mock_send_message):
+        """Test that each run sends the most overdue due messages, up to BILLING_MESSAGES_PER_RUN"""
+        mock_send_message.return_value.status_code = 200
+        mock_send_message.return_value.text = 'true'
+
+        past = localtime() - timedelta(minutes=1)
+        for member, priority in zip(self.members, [5, 40, 1, 20]):
+            BillingMessage.objects.create(member=member, priority=priority, scheduled_for=past)
+
+        send_billing_messages()
+
+        sent = BillingMessage.objects.filter(is_sent=True).values_list('priority', flat=True)
+        self.assertEqual(sorted(sent), [20, 40])
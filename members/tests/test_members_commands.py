@@ -0,0 +1,306 @@
+import csv
+import tempfile
+from datetime import date, timedelta
+from decimal import Decimal
+from pathlib import Path
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from django.utils.timezone import localdate
+from io import StringIO
+from unittest.mock import patch
+from admin_panel.models import ActivityLog
+from members.models import Member, Payment, BillingMessage, UnmatchedStatementLine
+from members.seeding import MemberSeeder
+
+
+class BenchmarkBillingCommandTest(TestCase):
+
+    def test_benchmark_billing_report(self):
+        """Tests that the benchmark sends every billing message and reports the measurements."""
+        out = StringIO()
+
+        call_command('benchmark_billing', members=5, latency=0, client_rate_limit=0, stdout=out)
+        output = out.getvalue()
+
+        self.assertIn('mensagens: 5/5 enviadas', output)
+        self.assertIn('mensagens/s', output)
+        self.assertIn('p99', output)
+        self.assertIn('queries/mensagem', output)
+
+    def test_benchmark_billing_cleans_up(self):
+        """Tests that the data created by the benchmark is removed at the end."""
+        call_command('benchmark_billing', members=3, latency=0, client_rate_limit=0, stdout=StringIO())
+
+        self.assertFalse(Member.objects.exists())
+        self.assertFalse(Payment.objects.exists())
+        self.assertFalse(BillingMessage.objects.exists())
+
+    def test_benchmark_billing_refuses_database_with_members(self):
+        """Tests that the benchmark does not run against a database with real members."""
+        Member.objects.create(full_name='Aluno Real', email='real@example.com')
+
+        with self.assertRaises(CommandError):
+            call_command('benchmark_billing', members=1, stdout=StringIO())
+
+
+class SeedDatabaseCommandTest(TestCase):
+
+    def test_seed_database_creates_members_and_history(self):
+        """Tests that the command creates the members with payments, billing messages and activities."""
+        out = StringIO()
+
+        call_command('seed_database', members=50, batch_size=20, stdout=out)
+
+        self.assertEqual(Member.objects.count(), 50)
+        self.assertTrue(Payment.objects.exists())
+        self.assertEqual(ActivityLog.objects.count(), 100)
+        self.assertEqual(
+            BillingMessage.objects.filter(is_sent=False).count(),
+            Member.objects.filter(is_active=False, billing_messages__is_sent=False).count(),
+        )
+        self.assertIn('50/50 alunos', out.getvalue())
+
+    def test_same_seed_gives_same_data(self):
+        """Tests that the data only depends on the seed and the day."""
+        def generate(seed):
+            seeder = MemberSeeder(seed=seed, today=date(2024, 6, 1))
+            return [
+                (profile['member'].full_name, profile['member'].phone, profile['payment_dates'])
+                for profile in (seeder.profile(index) for index in range(20))
+            ]
+
+        self.assertEqual(generate(1), generate(1))
+        self.assertNotEqual(generate(1), generate(2))
+
+    def test_ratios_control_member_status(self):
+        """Tests that the active ratio decides how many members are active and that signals are skipped."""
+        MemberSeeder(active_ratio=1, overdue_ratio=0).run(30)
+        self.assertEqual(Member.objects.filter(is_active=True).count(), 30)
+        self.assertFalse(BillingMessage.objects.exists())
+
+        Member.objects.all().delete()
+        ActivityLog.objects.all().delete()
+        MemberSeeder(seed=1, active_ratio=0, overdue_ratio=1).run(30)
+        self.assertEqual(Member.objects.filter(is_active=False).count(), 30)
+        self.assertEqual(BillingMessage.objects.filter(is_sent=False).count(), 30)
+        self.assertEqual(ActivityLog.objects.count(), 60)  # Only the generated ones, no signal ran
+
+    def test_seeded_created_at_is_kept(self):
+        """Tests that created_at follows the member start date instead of the time of the run."""
+        MemberSeeder(active_ratio=0, overdue_ratio=0).run(5)
+
+        for member in Member.objects.all():
+            self.assertEqual(member.created_at.date(), member.start_date)
+
+    def test_seed_database_invalidates_cached_dashboards(self):
+        """Tests that the data-version caches are bumped, since bulk_create skips the signals."""
+        with patch('members.seeding.bump_versions') as mock_bump:
+            call_command('seed_database', members=5, stdout=StringIO())
+
+        namespaces = mock_bump.call_args.args
+        self.assertIn('members.member', namespaces)
+        self.assertIn('members.payment', namespaces)
+
+    def test_seed_database_rejects_invalid_ratios(self):
+        """Tests that ratios adding up to more than 1 are rejected."""
+        with self.assertRaises(CommandError):
+            call_command('seed_database', members=5, active_ratio=0.8, overdue_ratio=0.5, stdout=StringIO())
+
+
+
+class ImportMembersCommandTest(TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+        self.today = localdate()
+
+        Member.objects.create(email='existente@example.com', full_name='Aluno Existente', phone='11999990000')
+
+    def write_csv(self, content):
+        path = self.directory / 'alunos.csv'
+        path.write_text(content, encoding='utf-8')
+        return path
+
+    def test_import_creates_members_payments_and_billing_messages(self):
+        """Tests that valid rows become members with their payment, and overdue ones get a pending billing message."""
+        late = self.today - timedelta(days=45)
+        path = self.write_csv(
+            'full_name,email,phone,payment_date,amount\n'
+            f'Ana Souza,ana@example.com,(11) 98888-7777,{self.today.isoformat()},100.00\n'
+            f'Bruno Lima,bruno@example.com,11977776666,{late.isoformat()},90\n'
+        )
+        out = StringIO()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('import_members', str(path), stdout=out)
+
+        ana = Member.objects.get(email='ana@example.com')
+        self.assertEqual(ana.phone, '11988887777')
+        self.assertTrue(ana.is_active)
+        self.assertEqual(ana.last_payment_date, self.today)
+
+        bruno = Member.objects.get(email='bruno@example.com')
+        self.assertFalse(bruno.is_active)
+        message = bruno.billing_messages.get()
+        self.assertEqual((message.is_sent, message.priority), (False, 15))
+
+        # One summary entry instead of one per member and payment
+        self.assertEqual(ActivityLog.objects.exclude(member=Member.objects.get(email='existente@example.com')).count(), 1)
+        self.assertTrue(ActivityLog.objects.filter(description='Importação: 2 alunos cadastrados.').exists())
+        self.assertIn('2 alunos importados de 2 linhas', out.getvalue())
+
+    def test_invalid_rows_go_to_error_report(self):
+        """Tests that rows failing validation or repeating an e-mail are skipped and written to the error report."""
+        path = self.write_csv(
+            'full_name;email;phone;payment_date;amount\n'
+            f'Ana Souza;ana@example.com;11988887777;{self.today.strftime("%d/%m/%Y")};100,50\n'
+            f'Ana Repetida;ana@example.com;11988887777;{self.today.isoformat()};100\n'
+            f'Aluno Existente;existente@example.com;11988887777;{self.today.isoformat()};100\n'
+            f'Telefone Curto;curto@example.com;123;{self.today.isoformat()};100\n'
+            f'Pagamento Futuro;futuro@example.com;11988887777;{(self.today + timedelta(days=1)).isoformat()};100\n'
+        )
+        errors_path = self.directory / 'erros.csv'
+        out = StringIO()
+
+        call_command('import_members', str(path), errors=str(errors_path), batch_size=1, stdout=out)
+
+        self.assertEqual(Member.objects.count(), 2)
+        self.assertEqual(Payment.objects.get(member__email='ana@example.com').amount, Decimal('100.50'))
+
+        with open(errors_path, newline='', encoding='utf-8') as errors_file:
+            rows = list(csv.DictReader(errors_file))
+        self.assertEqual([row['line'] for row in rows], ['3', '4', '5', '6'])
+        self.assertIn('Este e-mail já está cadastrado.', rows[0]['errors'])
+        self.assertIn('Este e-mail já está cadastrado.', rows[1]['errors'])
+        self.assertIn('phone:', rows[2]['errors'])
+        self.assertIn('payment_date:', rows[3]['errors'])
+        self.assertIn('4 linhas com erro', out.getvalue())
+
+    def test_import_uses_one_query_for_emails(self):
+        """Tests that the number of queries does not grow with the number of rows."""
+        rows = ''.join(
+            f'Aluno {index},aluno{index}@example.com,1198888{index:04d},{self.today.isoformat()},100\n'
+            for index in range(50)
+        )
+        path = self.write_csv('full_name,email,phone,payment_date,amount\n' + rows)
+
+        with self.assertNumQueries(6):
+            call_command('import_members', str(path), stdout=StringIO())
+
+        self.assertEqual(Member.objects.count(), 51)
+
+    def test_missing_columns_are_rejected(self):
+        """Tests that a file without the required columns is not imported."""
+        path = self.write_csv('nome,email\nAna,ana@example.com\n')
+
+        with self.assertRaises(CommandError):
+            call_command('import_members', str(path), stdout=StringIO())
+        self.assertEqual(Member.objects.count(), 1)
+
+
+class ReconcileStatementCommandTest(TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+        self.today = localdate()
+
+        self.by_phone = Member.objects.create(email='ana@example.com', full_name='Ana', phone='85966667979')
+        self.by_email = Member.objects.create(email='bruno@example.com', full_name='Bruno', phone='11977776666')
+        self.by_reference = Member.objects.create(email='carla@example.com', full_name='Carla', phone='11955554444')
+        # Dois alunos da mesma família com o mesmo telefone
+        Member.objects.create(email='pai@example.com', full_name='Pai', phone='11933332222')
+        Member.objects.create(email='filho@example.com', full_name='Filho', phone='11933332222')
+
+    def reconcile(self, content, **options):
+        path = self.directory / 'extrato.csv'
+        path.write_text(content, encoding='utf-8')
+        out = StringIO()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('reconcile_statement', str(path), stdout=out, **options)
+        return out.getvalue()
+
+    def test_matches_by_phone_email_and_reference(self):
+        """Tests that lines are matched by phone, e-mail or reference, paid members are reactivated and debits ignored."""
+        today = self.today.strftime('%d/%m/%Y')
+        output = self.reconcile(
+            'date;amount;name;phone;email;reference;description\n'
+            f'{today};100,00;Ana;;;;PIX recebido de +55 (85) 96666-7979\n'
+            f'{today};90,00;Bruno;;BRUNO@example.com;;\n'
+            f'{today};120,00;Carla;;;;Transferência ALUNO {self.by_reference.id}\n'
+            f'{today};-50,00;Tarifa;;;;Tarifa bancária\n'
+        )
+
+        for member, amount in ((self.by_phone, Decimal('100')), (self.by_email, Decimal('90')), (self.by_reference, Decimal('120'))):
+            member.refresh_from_db()
+            self.assertTrue(member.is_active)
+            self.assertEqual(member.payments.get().amount, amount)
+
+        self.assertTrue(ActivityLog.objects.filter(description='Conciliação do extrato extrato.csv: 3 pagamentos registrados.').exists())
+        self.assertIn('3 pagamentos registrados de 4 linhas', output)
+        self.assertIn('1 lançamentos de saída ignorados', output)
+
+    def test_member_email_with_uppercase_letters(self):
+        """Tests that a member whose e-mail was typed with uppercase letters is matched by the statement e-mail."""
+        member = Member.objects.create(email='Daniela.Souza@Example.com', full_name='Daniela', phone='11944443333')
+
+        self.reconcile(f'date;amount;email\n{self.today.isoformat()};75,00;daniela.souza@example.com\n')
+
+        self.assertEqual(member.payments.get().amount, Decimal('75'))
+        self.assertFalse(UnmatchedStatementLine.objects.exists())
+
+    def test_numeric_description_is_not_a_member_id(self):
+        """Tests that a transaction number in the description is not read as a member id, unlike the reference column."""
+        today = self.today.isoformat()
+        self.reconcile(
+            'date,amount,reference,description\n'
+            f'{today},100,,{self.by_reference.id}\n'
+            f'{today},110,{self.by_reference.id},Transferência recebida\n'
+        )
+
+        self.assertEqual(self.by_reference.payments.get().amount, Decimal('110'))
+        self.assertEqual(list(UnmatchedStatementLine.objects.values_list('line', 'reason')), [(2, 'not_found')])
+
+    def test_unmatched_lines_are_queued(self):
+        """Tests that unknown, ambiguous and invalid lines go to the manual review queue."""
+        today = self.today.isoformat()
+        output = self.reconcile(
+            'date,amount,name,phone\n'
+            f'{today},100,Desconhecido,11911112222\n'
+            f'{today},100,Pai ou Filho,11933332222\n'
+            f'ontem,100,Data Ruim,85966667979\n'
+        )
+
+        reasons = dict(UnmatchedStatementLine.objects.values_list('line', 'reason'))
+        self.assertEqual(reasons, {2: 'not_found', 3: 'ambiguous', 4: 'invalid'})
+        self.assertFalse(Payment.objects.exists())
+        self.assertIn('3 linhas sem aluno identificado', output)
+
+    def test_reconciling_twice_skips_registered_payments(self):
+        """Tests that payments already registered (same member, date and amount) are not duplicated."""
+        content = f'date,amount,phone\n{self.today.isoformat()},100,85966667979\n'
+
+        self.reconcile(content)
+        output = self.reconcile(content)
+
+        self.assertEqual(Payment.objects.count(), 1)
+        self.assertIn('1 pagamentos já estavam registrados', output)
+
+    def test_queries_do_not_grow_with_lines(self):
+        """Tests that matching uses a fixed number of queries per chunk instead of one per line."""
+        members = Member.objects.bulk_create(
+            Member(email=f'aluno{index}@example.com', full_name=f'Aluno {index}', phone=f'2198888{index:04d}')
+            for index in range(40)
+        )
+        lines = ''.join(f'{self.today.isoformat()},100,{member.phone}\n' for member in members)
+        path = self.directory / 'extrato.csv'
+        path.write_text('date,amount,phone\n' + lines, encoding='utf-8')
+
+        with self.assertNumQueries(8):
+            call_command('reconcile_statement', str(path), stdout=StringIO())
+
+        self.assertEqual(Member.objects.filter(is_active=True).count(), 40)
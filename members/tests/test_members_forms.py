@@ -1,7 +1,7 @@
 from members.tests.base.test_base_form import BaseTestCase
 from django.utils.timezone import localdate
 from datetime import timedelta
-from members.forms import MemberPaymentForm, MemberEditForm, PaymentForm
+from members.forms import MemberImportForm, MemberPaymentForm, MemberEditForm, PaymentForm
 from members.models import Member, Payment
 from django.core.exceptions import ValidationError
 
@@ -174,3 +174,27 @@ class PaymentFormTests(BaseTestCase):
         
         payment.save()
         self.assertEqual(Payment.objects.count(), 1)
+
+
+class MemberImportFormTests(BaseTestCase):
+
+    def test_email_checked_against_given_set(self):
+        """Tests that the e-mail is checked against the set given to the form, not the database."""
+        form = MemberImportForm(data=self.member_data, existing_emails={self.member_data['email']})
+        self.assertFalse(form.is_valid())
+        self.assertEqual(form.errors['email'], ['Este e-mail já está cadastrado.'])
+
+        form = MemberImportForm(data={**self.member_data, 'email': self.member.email}, existing_emails=set())
+        self.assertTrue(form.is_valid())
+
+    def test_validate_reuses_the_form(self):
+        """Tests that validate() clears the errors and cleaned data of the previous row."""
+        form = MemberImportForm(existing_emails=set())
+
+        self.assertFalse(form.validate({**self.member_data, 'phone': '123'}))
+        self.assertIn('phone', form.errors)
+
+        self.assertTrue(form.validate({**self.member_data, 'phone': '(85) 96666-7979'}))
+        self.assertEqual(form.errors, {})
+        self.assertEqual(form.cleaned_data['phone'], '85966667979')
+        self.assertNotIn('is_active', form.cleaned_data)
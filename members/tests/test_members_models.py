@@ -2,7 +2,7 @@ from datetime import timedelta, date, datetime
 from django.test import TestCase
 from django.utils.timezone import localdate
 from parameterized import parameterized
-from members.models import Member, Payment, BillingMessage
+from members.models import Member, Payment, BillingMessage, UnmatchedStatementLine
 from django.core.exceptions import ValidationError
 from unittest.mock import patch, MagicMock
 
@@ -207,3 +207,71 @@ class BillingMessageModelTest(TestCase):
         # Verifies that the model's indexes are created as expected
         self.assertTrue(BillingMessage._meta.indexes[0].fields, ['is_sent'])
         self.assertTrue(BillingMessage._meta.indexes[1].fields, ['sent_at'])
+
+
+class MemberQuerySetUpdateActivityStatusTest(TestCase):
+
+    def setUp(self):
+        self.today = localdate()
+        self.paid = Member.objects.create(email='paid@example.com', full_name='Em Dia', phone='11999990001')
+        self.late = Member.objects.create(email='late@example.com', full_name='Atrasado', phone='11999990002', is_active=True)
+        self.no_payments = Member.objects.create(email='none@example.com', full_name='Sem Pagamento', phone='11999990003')
+
+        Payment.objects.bulk_create([
+            Payment(member=self.paid, payment_date=self.today - timedelta(days=3)),
+            Payment(member=self.late, payment_date=self.today - timedelta(days=40)),
+        ])
+
+    def test_statuses_recomputed_set_based(self):
+        """Tests that statuses follow the last payment with a fixed number of queries, and members without payments are kept."""
+        with self.assertNumQueries(5):
+            activated, deactivated = Member.objects.all().update_activity_status()
+
+        self.assertEqual((activated, deactivated), (1, 1))
+        self.paid.refresh_from_db()
+        self.late.refresh_from_db()
+        self.no_payments.refresh_from_db()
+        self.assertTrue(self.paid.is_active)
+        self.assertFalse(self.late.is_active)
+        self.assertFalse(self.no_payments.is_active)
+
+        message = BillingMessage.objects.get(member=self.late)
+        self.assertEqual((message.is_sent, message.priority), (False, 10))
+
+    def test_no_duplicate_billing_message(self):
+        """Tests that a member with a pending or recently sent billing message does not get another one."""
+        BillingMessage.objects.create(member=self.late, is_sent=True, sent_at=self.today - timedelta(days=5))
+
+        Member.objects.filter(id=self.late.id).update_activity_status()
+
+        self.assertEqual(BillingMessage.objects.filter(member=self.late).count(), 1)
+
+
+class UnmatchedStatementLineTest(TestCase):
+
+    def setUp(self):
+        self.member = Member.objects.create(email='aluno@example.com', full_name='Aluno', phone='11999990001')
+        self.line = UnmatchedStatementLine.objects.create(
+            statement='extrato.csv', line=2, payment_date=localdate(), amount=100, reason='not_found',
+        )
+
+    def test_resolve_registers_payment(self):
+        """Tests that resolving a line creates the payment through the normal path and removes it from the queue."""
+        payment = self.line.resolve(self.member)
+
+        self.member.refresh_from_db()
+        self.assertEqual(payment.member, self.member)
+        self.assertTrue(self.member.is_active)
+        self.assertIsNotNone(self.line.resolved_at)
+
+        with self.assertRaises(ValidationError):
+            self.line.resolve(self.member)
+        self.assertEqual(Payment.objects.count(), 1)
+
+    def test_invalid_line_cannot_be_resolved(self):
+        """Tests that a line without a valid amount cannot become a payment."""
+        self.line.amount = None
+
+        with self.assertRaises(ValidationError):
+            self.line.resolve(self.member)
+        self.assertFalse(Payment.objects.exists())
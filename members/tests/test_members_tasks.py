@@ -1,28 +1,49 @@
 from django.test import TestCase
+from django.utils import timezone
+from django.utils.timezone import localdate
 from members.models import Member
 from members.tasks import update_members_activity_status
 from unittest.mock import patch, MagicMock
-from ..tasks import send_billing_messages
-from ..models import BillingMessage, Member
+from datetime import timedelta
+from utils.ultramsg import UltraMsgAPI
+from ..tasks import BILLING_RETRY_JOB, send_billing_messages
+from ..models import BillingMessage, Member, Payment
+from admin_panel.models import ActivityLog
 
 class CeleryTasksTest(TestCase):
     
-    @patch('members.models.Member.update_activity_status')
-    def test_update_members_activity_status_task(self, mock_update_status):
-        """Tests the task for updating the activity status of members."""
-    
-        # Creates members with 'is_active=True' status
-        member1 = Member.objects.create(full_name="Member 1", email="member1@example.com", is_active=True)
-        member2 = Member.objects.create(full_name="Member 2", email="member2@example.com", is_active=True)
-    
-        # Executes the task
+    def test_update_members_activity_status_task(self):
+        """Tests that the task deactivates the overdue members, with a billing message, and keeps the others."""
+        overdue = Member.objects.create(full_name="Member 1", email="member1@example.com", is_active=True)
+        up_to_date = Member.objects.create(full_name="Member 2", email="member2@example.com", is_active=True)
+        Payment.objects.create(member=overdue, payment_date=localdate() - timedelta(days=40))
+        Payment.objects.create(member=up_to_date, payment_date=localdate() - timedelta(days=10))
+        # Saving a payment already updates the status: go back to the state of the night before
+        Member.objects.update(is_active=True)
+        BillingMessage.objects.all().delete()
+
+        with patch('members.tasks.publish_counters') as publish_counters:
+            update_members_activity_status()
+
+        overdue.refresh_from_db()
+        up_to_date.refresh_from_db()
+        self.assertFalse(overdue.is_active)
+        self.assertTrue(up_to_date.is_active)
+        self.assertEqual(BillingMessage.objects.get(is_sent=False).member, overdue)
+        publish_counters.assert_called_once_with(members_active=-1, members_inactive=1)
+
+    def test_update_members_activity_status_logs_one_summary(self):
+        """Tests that the task records a single summary ActivityLog entry instead of one per member."""
+        for i in range(3):
+            Member.objects.create(full_name=f"Member {i}", email=f"summary{i}@example.com", is_active=True)
+        ActivityLog.objects.all().delete()
+
         update_members_activity_status()
-    
-        # Verifies that the update_activity_status method was called for both members
-        self.assertEqual(mock_update_status.call_count, 2)  # Verifies it was called twice
-    
-        # Ensures that the mock was called. No need to check the arguments.
-        mock_update_status.assert_any_call()
+
+        self.assertEqual(
+            list(ActivityLog.objects.values_list('description', flat=True)),
+            ['Atualização diária de status: 3 alunos verificados.'],
+        )
 
 class SendBillingMessagesTaskTest(TestCase):
 
@@ -123,3 +144,77 @@ class SendBillingMessagesTaskTest(TestCase):
 
         # Verifies that the send_message method was not called
         mock_send_message.assert_not_called()
+
+    @patch('utils.ultramsg.UltraMsgAPI.send_message')
+    def test_messages_claimed_by_another_run_are_skipped(self, mock_send_message):
+        """
+        Tests that an overlapping run does not send the messages claimed by the run in progress,
+        and that an expired claim (a worker that died) is picked up again.
+        """
+        mock_send_message.return_value = MagicMock(status_code=200, text='true')
+        BillingMessage.claim_due(limit=1)
+        self.assertEqual(BillingMessage.objects.filter(claimed_until__isnull=False).get(), self.message1)
+
+        send_billing_messages()
+
+        self.assertEqual(mock_send_message.call_count, 1)
+        self.message1.refresh_from_db()
+        self.message2.refresh_from_db()
+        self.assertFalse(self.message1.is_sent)
+        self.assertTrue(self.message2.is_sent)
+
+        BillingMessage.objects.filter(id=self.message1.id).update(claimed_until=timezone.now() - timedelta(seconds=1))
+        send_billing_messages()
+
+        self.message1.refresh_from_db()
+        self.assertTrue(self.message1.is_sent)
+
+
+class SendBillingMessagesCircuitBreakerTest(TestCase):
+
+    def setUp(self):
+        self.member1 = Member.objects.create(full_name='John Doe', is_active=False, email='john.doe@example.com')
+        self.member2 = Member.objects.create(full_name='Jane Doe', is_active=False, email='jane.doe@example.com')
+        BillingMessage.objects.create(member=self.member1, is_sent=False)
+        BillingMessage.objects.create(member=self.member2, is_sent=False)
+
+        breaker = UltraMsgAPI().circuit_breaker
+        breaker.release_retry(BILLING_RETRY_JOB)
+        self.addCleanup(breaker.release_retry, BILLING_RETRY_JOB)
+
+    @patch('members.tasks.send_billing_messages.apply_async')
+    @patch('utils.ultramsg.UltraMsgAPI.send_message')
+    def test_batch_stops_and_is_rescheduled_when_circuit_opens(self, mock_send_message, mock_apply_async):
+        """
+        Tests that the task stops sending and reschedules itself when the UltraMsg circuit is open.
+        """
+        mock_send_message.return_value = {'error': 'UltraMsg circuit is open, request not sent.', 'circuit_open': True}
+
+        send_billing_messages()
+
+        # The batch stops at the first rejected message
+        self.assertEqual(mock_send_message.call_count, 1)
+        mock_apply_async.assert_called_once()
+        self.assertIn('countdown', mock_apply_async.call_args.kwargs)
+
+        # Messages remain pending to be sent later, claimed by no one
+        self.assertEqual(BillingMessage.objects.filter(is_sent=False, claimed_until__isnull=True).count(), 2)
+
+    @patch('members.tasks.send_billing_messages.apply_async')
+    @patch('utils.ultramsg.UltraMsgAPI.send_message')
+    def test_only_one_retry_is_scheduled_per_outage(self, mock_send_message, mock_apply_async):
+        """
+        Tests that runs hitting the open circuit while a retry is scheduled do not schedule another one,
+        and that the retry, when it runs, can schedule the next.
+        """
+        mock_send_message.return_value = {'error': 'UltraMsg circuit is open, request not sent.', 'circuit_open': True}
+
+        send_billing_messages()
+        send_billing_messages()
+
+        mock_apply_async.assert_called_once()
+        self.assertEqual(mock_apply_async.call_args.kwargs['kwargs'], {'retry': True})
+
+        send_billing_messages(retry=True)
+
+        self.assertEqual(mock_apply_async.call_count, 2)
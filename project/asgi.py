@@ -3,6 +3,13 @@ ASGI config for project project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Serving through ASGI switches the dashboard, finance and PDF report views to
+their async versions (ASYNC_DASHBOARD_VIEWS), e.g.:
+
+    uvicorn project.asgi:application --uds /var/www/gym-system/gym-system.sock --workers 5
+
+Compare it with the uWSGI setup using the benchmark_servers command.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
 """
@@ -12,5 +19,6 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'project.settings')
+os.environ.setdefault('ASYNC_DASHBOARD_VIEWS', 'True')
 
 application = get_asgi_application()
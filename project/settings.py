@@ -42,17 +42,21 @@ INSTALLED_APPS = [
     'users',
     'members',
     'admin_panel',
+    'api',
     'django_celery_beat',
 ]
 
 MIDDLEWARE = [
+    'admin_panel.middleware.RequestMetricsMiddleware',  # Primeiro, para medir também os outros middlewares
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'admin_panel.middleware.ProfilingMiddleware',  # Depois da autenticação, que diz se o usuário é da equipe
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'admin_panel.middleware.ActivityLogBufferMiddleware',
 ]
 
 ROOT_URLCONF = 'project.urls'
@@ -64,6 +68,8 @@ TEMPLATES = [
             BASE_DIR / 'base_templates'
             ],
         'APP_DIRS': True,
+        # Sem 'loaders', o Django usa o cached.Loader em qualquer ambiente: cada template é compilado uma vez
+        # por processo (em DEBUG, recompilado quando o arquivo muda). Não defina 'loaders' sem mantê-lo
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.debug',
@@ -166,13 +172,126 @@ EMAIL_HOST_USER = config('EMAIL_HOST', cast=str)
 EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD', cast=str)  # Use uma senha de app se a autenticação de dois fatores estiver ativada
 DEFAULT_FROM_EMAIL = config('EMAIL_HOST', cast=str)
 
+# Redis (broker da Celery e estado compartilhado entre os processos)
+REDIS_URL = config('REDIS_URL', default='redis://localhost:6379/0')
+REDIS_SOCKET_TIMEOUT = config('REDIS_SOCKET_TIMEOUT', default=2, cast=float)  # Em segundos
+
+# Cache em duas camadas: LRU pequena na memória de cada processo na frente do Redis, compartilhado entre
+# os workers do uWSGI e da Celery. Usa outro banco do Redis, porque cache.clear() apaga o banco inteiro.
+REDIS_CACHE_URL = config('REDIS_CACHE_URL', default='redis://localhost:6379/1')
+
+CACHES = {
+    'default': {
+        'BACKEND': 'utils.cache.TwoTierCache',
+        'LOCATION': REDIS_CACHE_URL,
+        'TIMEOUT': 300,
+        'KEY_PREFIX': 'gym',
+        'VERSION': config('CACHE_VERSION', default=1, cast=int),  # Aumente para descartar o cache de um deploy anterior
+        'OPTIONS': {
+            'L1_MAX_ENTRIES': 1000,
+            'L1_TIMEOUT': 5,  # Tempo máximo, em segundos, que uma entrada fica na memória do processo
+        },
+    }
+}
+# Entradas com chave versionada (utils.data_versions) ficam inacessíveis quando os dados mudam; o tempo
+# abaixo só limita quanto tempo elas ocupam memória depois disso
+CACHE_VERSIONED_TIMEOUT = config('CACHE_VERSIONED_TIMEOUT', default=60 * 60 * 24, cast=int)
+
+# Sessões lidas do cache e gravadas também no banco, que só é consultado quando a sessão não está no cache
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+
+# Tamanho máximo, em bytes, dos dados de um formulário inválido guardados na sessão (ver utils.form_state)
+FORM_STATE_MAX_BYTES = 4096
+
+# Métricas por requisição (admin_panel.middleware.RequestMetricsMiddleware), expostas em /metrics/
+REQUEST_METRICS_FLUSH_INTERVAL = config('REQUEST_METRICS_FLUSH_INTERVAL', default=10, cast=int)  # Segundos entre os envios de cada processo ao Redis
+METRICS_TOKEN = config('METRICS_TOKEN', default='')  # Token do coletor do Prometheus (vazio: só membros da equipe logados)
+
+# Perfil de requisições com cProfile (admin_panel.middleware.ProfilingMiddleware): membros da equipe pedem com
+# ?profile=1 (ou ?profile=text para ver o relatório) ou o cabeçalho X-Profile: 1; uma fração pode ser sorteada
+PROFILING_SAMPLE_RATE = config('PROFILING_SAMPLE_RATE', default=0.0, cast=float)  # Ex.: 0.001 perfila 1 em cada 1000 requisições
+PROFILING_DIR = config('PROFILING_DIR', default=str(BASE_DIR / 'profiles'))  # Arquivos .prof (abrir com pstats ou snakeviz)
+PROFILING_MAX_FILES = config('PROFILING_MAX_FILES', default=200, cast=int)  # Os mais antigos são apagados
+PROFILING_TOP_FUNCTIONS = config('PROFILING_TOP_FUNCTIONS', default=25, cast=int)  # Funções mostradas no log e no relatório
+
+# Consultas lentas (utils.slow_queries): SQL, impressão digital, origem no código e EXPLAIN (PostgreSQL), uma
+# por linha em JSON no arquivo abaixo; python manage.py slow_query_report gera o ranking
+SLOW_QUERY_THRESHOLD_MS = config('SLOW_QUERY_THRESHOLD_MS', default=200, cast=int)  # 0 desativa
+SLOW_QUERY_MAX_SQL_LENGTH = 10000  # Caracteres do SQL guardados por entrada
+SLOW_QUERY_LOG_FILE = config('SLOW_QUERY_LOG_FILE', default=str(BASE_DIR / 'slow_queries.log'))
+
+# Uma linha por requisição no logger request_metrics (view, status, tempo, consultas, tempo de SQL e tamanho)
+# e os relatórios do ProfilingMiddleware no logger profiling
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+        'slow_queries_file': {
+            'class': 'logging.handlers.WatchedFileHandler',  # Reabre o arquivo depois do logrotate
+            'filename': SLOW_QUERY_LOG_FILE,
+            'delay': True,
+        },
+    },
+    'loggers': {
+        'request_metrics': {
+            'handlers': ['console'],
+            'level': config('REQUEST_METRICS_LOG_LEVEL', default='INFO'),
+            'propagate': False,
+        },
+        'profiling': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+        'slow_queries': {
+            'handlers': ['slow_queries_file'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
+}
+
 # Celery settings
-CELERY_BROKER_URL = config('REDIS_URL', default='redis://localhost:6379/0')  # Endereço do Redis
+CELERY_BROKER_URL = REDIS_URL  # Endereço do Redis
 CELERY_ACCEPT_CONTENT = ['json']  # Aceitar apenas mensagens em JSON
 CELERY_TASK_SERIALIZER = 'json'  # Serializar as tarefas em formato JSON
-CELERY_RESULT_BACKEND = config('REDIS_URL', default='redis://localhost:6379/0')  # Backend para armazenar resultados
+CELERY_RESULT_BACKEND = REDIS_URL  # Backend para armazenar resultados
 CELERY_TIMEZONE = 'America/Sao_Paulo'  # Definir o fuso horário (se necessário)
 
+# Versões assíncronas do painel, das finanças e dos relatórios em PDF (admin_panel.urls). Ligado por
+# project/asgi.py: sob o uWSGI (WSGI) as views síncronas continuam sendo usadas
+ASYNC_DASHBOARD_VIEWS = config('ASYNC_DASHBOARD_VIEWS', default=False, cast=bool)
+
+# Atualizações ao vivo do painel (Server-Sent Events via pub/sub do Redis), servidas só sob ASGI (ASYNC_DASHBOARD_VIEWS)
+DASHBOARD_STREAM_MAX_SECONDS = config('DASHBOARD_STREAM_MAX_SECONDS', default=300, cast=int)  # Duração de cada conexão; o navegador reconecta sozinho
+DASHBOARD_STREAM_HEARTBEAT = config('DASHBOARD_STREAM_HEARTBEAT', default=15, cast=int)  # Segundos entre os comentários que mantêm a conexão aberta
+DASHBOARD_STREAM_RETRY_MS = config('DASHBOARD_STREAM_RETRY_MS', default=3000, cast=int)  # Espera do navegador antes de reconectar
+
+# Retenção do ActivityLog
+ACTIVITY_LOG_HOT_DAYS = config('ACTIVITY_LOG_HOT_DAYS', default=90, cast=int)  # Dias mantidos na tabela principal
+ACTIVITY_LOG_RETENTION_DAYS = config('ACTIVITY_LOG_RETENTION_DAYS', default=365, cast=int)  # Dias mantidos no banco antes de ir para arquivos .jsonl.gz
+ACTIVITY_LOG_ARCHIVE_DIR = config('ACTIVITY_LOG_ARCHIVE_DIR', default=str(BASE_DIR / 'archives' / 'activity_logs'))
+# Entradas já confirmadas que não puderam ser gravadas nem enviadas ao Celery (ver admin_panel.activity_log)
+ACTIVITY_LOG_SPOOL_DIR = config('ACTIVITY_LOG_SPOOL_DIR', default=str(BASE_DIR / 'spool' / 'activity_logs'))
+
+# Importação de alunos por CSV (members.importing): relatórios com as linhas recusadas, para download no painel
+MEMBER_IMPORT_ERRORS_DIR = config('MEMBER_IMPORT_ERRORS_DIR', default=str(BASE_DIR / 'imports' / 'errors'))
+MEMBER_IMPORT_MAX_ERROR_REPORTS = config('MEMBER_IMPORT_MAX_ERROR_REPORTS', default=50, cast=int)  # Os mais antigos são apagados
+
+# API JSON (/api/): além da sessão do painel, aceita "Authorization: Bearer <token>" com um destes tokens
+API_TOKENS = config('API_TOKENS', default='', cast=Csv())
+API_PAGE_SIZE = config('API_PAGE_SIZE', default=50, cast=int)  # Itens por página quando o cliente não envia limit
+API_MAX_PAGE_SIZE = config('API_MAX_PAGE_SIZE', default=500, cast=int)
+
+# Janela de envio das cobranças pelo WhatsApp: as mensagens são distribuídas entre START e END (horário local,
+# END pode ser 24) e send_billing_messages as envia a cada BILLING_SEND_INTERVAL minutos dentro da janela
+BILLING_WINDOW_START_HOUR = config('BILLING_WINDOW_START_HOUR', default=9, cast=int)
+BILLING_WINDOW_END_HOUR = config('BILLING_WINDOW_END_HOUR', default=18, cast=int)
+BILLING_SCHEDULE_JITTER = config('BILLING_SCHEDULE_JITTER', default=120, cast=int)  # Atraso aleatório máximo de cada mensagem, em segundos
+BILLING_MESSAGES_PER_RUN = config('BILLING_MESSAGES_PER_RUN', default=100, cast=int)  # Máximo de envios por execução de send_billing_messages
+BILLING_SEND_INTERVAL = config('BILLING_SEND_INTERVAL', default=5, cast=int)
+
 from celery.schedules import crontab
 
 CELERY_BEAT_SCHEDULE = {
@@ -184,19 +303,47 @@ CELERY_BEAT_SCHEDULE = {
         'task': 'admin_panel.tasks.save_daily_report',
         'schedule': crontab(minute=50, hour=00, )
     },
-    # 'send-billing-messages': {
-    #     'task': 'members.tasks.send_billing_messages',
-    #     'schedule': crontab(minute=0, hour=9, )
-    # }
+    'replay-activity-log-spool-every-10-minutes': {
+        'task': 'admin_panel.tasks.replay_activity_log_spool',
+        'schedule': crontab(minute='*/10', )
+    },
+    'apply-activity-log-retention-every-sunday': {
+        'task': 'admin_panel.tasks.apply_activity_log_retention',
+        'schedule': crontab(minute=0, hour=3, day_of_week='sunday', )
+    },
+    'send-billing-messages': {
+        'task': 'members.tasks.send_billing_messages',
+        'schedule': crontab(minute=f'*/{BILLING_SEND_INTERVAL}', hour=f'{BILLING_WINDOW_START_HOUR}-{BILLING_WINDOW_END_HOUR - 1}', )
+    },
 }
 
 
+# UltraMsg (WhatsApp)
+# Pode apontar para o servidor falso (python manage.py run_fake_ultramsg) em testes de carga
+ULTRAMSG_API_URL = config('ULTRAMSG_API_URL', default='https://api.ultramsg.com')
+# Limite de envios por segundo somado entre todos os processos (0 desativa o limite)
+ULTRAMSG_RATE_LIMIT = config('ULTRAMSG_RATE_LIMIT', default=1, cast=float)
+ULTRAMSG_RATE_BURST = config('ULTRAMSG_RATE_BURST', default=5, cast=int)  # Envios permitidos em rajada
+ULTRAMSG_RATE_LIMIT_TIMEOUT = config('ULTRAMSG_RATE_LIMIT_TIMEOUT', default=60, cast=float)  # Espera máxima por um envio, em segundos
+ULTRAMSG_TIMEOUT = config('ULTRAMSG_TIMEOUT', default=10, cast=float)  # Timeout de cada requisição, em segundos
+# Circuit breaker: após N falhas seguidas os envios falham imediatamente por RECOVERY_TIMEOUT segundos
+ULTRAMSG_CIRCUIT_FAILURE_THRESHOLD = config('ULTRAMSG_CIRCUIT_FAILURE_THRESHOLD', default=5, cast=int)
+ULTRAMSG_CIRCUIT_RECOVERY_TIMEOUT = config('ULTRAMSG_CIRCUIT_RECOVERY_TIMEOUT', default=60, cast=int)
+
+
 # CONFIG OF DEBUG TOOLBAR
 import sys
 
 # Verifica se o pytest está sendo executado
 TESTING = 'pytest' in sys.modules
 
+if TESTING:
+    # Os testes não dependem de um Redis rodando. O banco volta ao estado inicial a cada teste e o cache não,
+    # então nada é guardado; os testes de cache usam override_settings com LocMemCache
+    CACHES = {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+    LOGGING['loggers']['request_metrics']['level'] = 'WARNING'
+    SLOW_QUERY_THRESHOLD_MS = 0  # Os testes instalam o SlowQueryLogger quando precisam
+
 if DEBUG:  # Ativar somente em DEBUG
     INSTALLED_APPS += ['debug_toolbar', 'django_extensions',]
     MIDDLEWARE += ['debug_toolbar.middleware.DebugToolbarMiddleware']
@@ -7,6 +7,7 @@ urlpatterns = [
     path('admin/', admin.site.urls),
     path('', include('admin_panel.urls')),
     path('users/', include('users.urls')),
+    path('api/', include('api.urls')),
     # path('members/', include('members.urls')),
 ]
 
@@ -11,6 +11,7 @@ from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode
 from django.contrib.auth.tokens import PasswordResetTokenGenerator
 from django.contrib.sites.shortcuts import get_current_site
 from utils.utils import send_email
+from utils.form_state import clear_form_state, restore_form, stash_form_state
 
 
     
@@ -18,8 +19,7 @@ def login_view(request):
     if request.user.is_authenticated:
         return redirect('admin_panel:home')
     
-    login_form_data = request.session.get('login_form_data', {})
-    form = LoginForm(login_form_data)
+    form = restore_form(request, 'login_form_data', LoginForm, keep=True)
 
     context = {
         'form': form
@@ -34,10 +34,7 @@ def login_submit(request):
         return redirect('users:login_view')
 
 
-    POST = request.POST
-    request.session['login_form_data'] = POST 
-
-    form = LoginForm(POST)
+    form = LoginForm(request.POST)
 
     if form.is_valid():
         cpf = form.cleaned_data['cpf']
@@ -47,14 +44,17 @@ def login_submit(request):
 
         if user is not None:
             login(request, user) 
+            clear_form_state(request, 'login_form_data')
             messages.success(request, "Login bem-sucedido!")
 
             return redirect('admin_panel:home') 
 
         else:
+            stash_form_state(request, 'login_form_data', form)
             messages.error(request, "CPF ou senha inválidos.")
             return redirect('users:login_view')
     else:
+        stash_form_state(request, 'login_form_data', form)
         messages.error(request, "CPF ou senha inválidos.")
         return redirect('users:login_view')
 
@@ -70,8 +70,7 @@ def password_reset(request):
     if request.user.is_authenticated:
         return redirect('admin_panel:home')
     
-    form_data = request.session.get('reset_password_form_data', {})
-    form = PasswordResetRequestForm(form_data)
+    form = restore_form(request, 'reset_password_form_data', PasswordResetRequestForm, keep=True)
 
     context = {
         'form': form
@@ -86,9 +85,6 @@ def password_reset_send(request):
     
     form = PasswordResetRequestForm(request.POST)
 
-    # Salva os dados do formulário na sessão
-    request.session['reset_password_form_data'] = request.POST
-
     if form.is_valid():
         email = form.cleaned_data['email']
         user = get_object_or_404(User, email=email)
@@ -108,9 +104,12 @@ def password_reset_send(request):
             message=email_body,
             to_email=user.email
         )
+        clear_form_state(request, 'reset_password_form_data')
         messages.success(request, "Se o e-mail existir, um link para redefinir sua senha foi enviado.")
         return redirect('users:login_view') 
     else:
+        # Salva os dados do formulário na sessão
+        stash_form_state(request, 'reset_password_form_data', form)
         messages.error(request, "Por favor, corrija os erros abaixo.")
 
     return redirect('users:password_reset') 
@@ -140,8 +139,7 @@ def password_reset_confirm(request, uidb64, token):
         messages.error(request, 'Link expirado ou inválido. Faça a solicitação novamente.')
         return redirect('users:password_reset')
     
-    form_password_reset_data = request.session.get('form_password_reset_data')
-    form = PasswordResetForm(form_password_reset_data)
+    form = restore_form(request, 'form_password_reset_data', PasswordResetForm, keep=True)
     
     context = {
         'form': form
@@ -171,8 +169,6 @@ def password_reset_complete(request):
         messages.error(request, 'Link inválido.')
         return redirect('users:password_reset')
     
-    request.session['form_password_reset_data'] = request.POST
-    
     if PasswordResetTokenGenerator().check_token(user, token):
         form = PasswordResetForm(request.POST)
         
@@ -183,9 +179,11 @@ def password_reset_complete(request):
             user.save()
             
             del request.session['reset_password_data']
+            clear_form_state(request, 'form_password_reset_data')
             messages.success(request, 'Senha redefinida com sucesso!')
             return redirect('users:login_view')
         else:
+            stash_form_state(request, 'form_password_reset_data', form)
             messages.error(request, 'Por favor, corrija os erros abaixo.')
             url = reverse('users:password_reset_confirm', kwargs={'uidb64': uidb64, 'token': token})
             return redirect(url)
@@ -0,0 +1,322 @@
+import json
+import logging
+import os
+import pickle
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+import redis
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.utils.module_loading import import_string
+
+from utils.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class LocalLRU:
+    """
+    Small thread-safe LRU kept in the memory of the process (the L1 tier).
+
+    Values are pickled, like LocMemCache does, so callers never share mutable
+    objects. Each entry expires after its own timeout.
+    """
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=_MISSING):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+
+            expires_at, pickled = item
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return default
+
+            self._data.move_to_end(key)
+
+        return pickle.loads(pickled)
+
+    def set(self, key, value, timeout):
+        pickled = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+
+        with self._lock:
+            self._data[key] = (time.monotonic() + timeout, pickled)
+            self._data.move_to_end(key)
+
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class InvalidationListener:
+    """
+    Background thread that evicts L1 entries changed by other processes.
+
+    It is started lazily, on first use after the worker is forked. If the pub/sub
+    connection drops, the L1 is cleared when it comes back, because messages may
+    have been missed; meanwhile staleness is bounded by the L1 timeout.
+    """
+
+    RECONNECT_INTERVAL = 5
+
+    def __init__(self, channel, tiers):
+        self.channel = channel
+        self.tiers = tiers
+        self.origin = uuid.uuid4().hex
+        self.pid = os.getpid()
+        self._thread = threading.Thread(target=self._run, name=f'cache-invalidation:{channel}', daemon=True)
+        self._thread.start()
+
+    def is_alive(self):
+        return self.pid == os.getpid() and self._thread.is_alive()
+
+    def _run(self):
+        while True:
+            try:
+                pubsub = get_redis().pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                self._clear_all()
+
+                while True:
+                    message = pubsub.get_message(timeout=self.RECONNECT_INTERVAL)
+                    if message is not None:
+                        self.handle(message['data'])
+            except redis.exceptions.RedisError as e:
+                logger.warning('Cache invalidation listener disconnected, retrying in %ss: %s', self.RECONNECT_INTERVAL, e)
+                time.sleep(self.RECONNECT_INTERVAL)
+
+    def _clear_all(self):
+        for tier in self.tiers.values():
+            tier.clear()
+
+    def handle(self, data):
+        """Applies one invalidation message: {"origin": ..., "tier": ..., "keys": [...] or null for clear}."""
+        message = json.loads(data)
+
+        # The process that made the change already updated its own L1
+        if message['origin'] == self.origin:
+            return
+
+        tier = self.tiers.get(message['tier'])
+        if tier is None:
+            return
+
+        if message['keys'] is None:
+            tier.clear()
+        else:
+            tier.delete(*message['keys'])
+
+
+# L1 tiers are per process, shared by the per-thread instances Django creates for each cache alias
+_tiers = {}
+_tiers_lock = threading.Lock()
+_listeners = {}
+
+
+class TwoTierCache(BaseCache):
+    """
+    Django cache backend with a small in-process LRU (L1) in front of a shared
+    backend (L2, Redis by default).
+
+    Reads hit the L1 first and fall back to the L2, filling the L1 on the way.
+    Every write goes to both tiers and is announced on a Redis pub/sub channel so
+    the other processes (uWSGI and Celery workers) drop their L1 copy. L1 entries
+    also expire after L1_TIMEOUT seconds, which bounds staleness if a message is lost.
+
+    If the L2 cannot be reached, the cache keeps working with the L1 only and tries
+    the L2 again after REDIS_RETRY_INTERVAL seconds.
+
+    OPTIONS:
+        L1_MAX_ENTRIES: entries kept in memory per process (default 1000).
+        L1_TIMEOUT: maximum seconds an entry lives in the L1 (default 5).
+        L2_BACKEND: dotted path of the shared backend (default RedisCache).
+        INVALIDATION_CHANNEL: pub/sub channel (default 'cache:invalidate').
+        Any other option is passed on to the L2 backend.
+    """
+
+    REDIS_RETRY_INTERVAL = 30
+
+    def __init__(self, server, params):
+        super().__init__(params)
+        options = dict(params.get('OPTIONS', {}))
+        l1_max_entries = options.pop('L1_MAX_ENTRIES', 1000)
+        self.l1_timeout = options.pop('L1_TIMEOUT', 5)
+        l2_backend = options.pop('L2_BACKEND', 'django.core.cache.backends.redis.RedisCache')
+        self.channel = options.pop('INVALIDATION_CHANNEL', 'cache:invalidate')
+
+        self._l2 = import_string(l2_backend)(server, {**params, 'OPTIONS': options})
+        self._l2_retry_at = 0.0
+
+        self.tier_name = f'{server}|{self.key_prefix}'
+        with _tiers_lock:
+            self._l1 = _tiers.setdefault(self.tier_name, LocalLRU(l1_max_entries))
+
+    # Tiers
+
+    def _l1_timeout(self, timeout):
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self.default_timeout
+        return self.l1_timeout if timeout is None else min(max(timeout, 0), self.l1_timeout)
+
+    def _call_l2(self, method, *args, default=None, **kwargs):
+        if time.monotonic() < self._l2_retry_at:
+            return default
+
+        try:
+            return getattr(self._l2, method)(*args, **kwargs)
+        except redis.exceptions.RedisError as e:
+            logger.warning('Cache L2 unavailable, using only the local tier for %ss: %s', self.REDIS_RETRY_INTERVAL, e)
+            self._l2_retry_at = time.monotonic() + self.REDIS_RETRY_INTERVAL
+            return default
+
+    def _ensure_listener(self):
+        listener = _listeners.get(self.channel)
+
+        if listener is None or not listener.is_alive():
+            with _tiers_lock:
+                listener = _listeners.get(self.channel)
+                if listener is None or not listener.is_alive():
+                    listener = _listeners[self.channel] = InvalidationListener(self.channel, _tiers)
+
+        return listener
+
+    def _invalidate(self, keys):
+        """Tells the other processes to drop `keys` (None drops everything) from their L1."""
+        listener = self._ensure_listener()
+        if time.monotonic() < self._l2_retry_at:
+            return
+
+        message = json.dumps({'origin': listener.origin, 'tier': self.tier_name, 'keys': keys})
+        try:
+            get_redis().publish(self.channel, message)
+        except redis.exceptions.RedisError as e:
+            logger.warning('Could not publish cache invalidation: %s', e)
+
+    # Cache API
+
+    def get(self, key, default=None, version=None):
+        self._ensure_listener()
+        full_key = self.make_and_validate_key(key, version=version)
+
+        value = self._l1.get(full_key)
+        if value is not _MISSING:
+            return value
+
+        value = self._call_l2('get', key, _MISSING, version=version, default=_MISSING)
+        if value is _MISSING:
+            return default
+
+        self._l1.set(full_key, value, self.l1_timeout)
+        return value
+
+    def get_many(self, keys, version=None):
+        self._ensure_listener()
+        found = {}
+        missing = []
+
+        for key in keys:
+            value = self._l1.get(self.make_and_validate_key(key, version=version))
+            if value is _MISSING:
+                missing.append(key)
+            else:
+                found[key] = value
+
+        if missing:
+            from_l2 = self._call_l2('get_many', missing, version=version, default={})
+            for key, value in from_l2.items():
+                self._l1.set(self.make_key(key, version=version), value, self.l1_timeout)
+            found.update(from_l2)
+
+        return found
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        full_key = self.make_and_validate_key(key, version=version)
+        self._call_l2('set', key, value, timeout, version=version)
+        self._l1.set(full_key, value, self._l1_timeout(timeout))
+        self._invalidate([full_key])
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        full_keys = []
+        for key, value in data.items():
+            full_key = self.make_and_validate_key(key, version=version)
+            self._l1.set(full_key, value, self._l1_timeout(timeout))
+            full_keys.append(full_key)
+
+        failed = self._call_l2('set_many', data, timeout, version=version, default=[])
+        self._invalidate(full_keys)
+        return failed
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        full_key = self.make_and_validate_key(key, version=version)
+        added = self._call_l2('add', key, value, timeout, version=version, default=_MISSING)
+
+        if added is _MISSING:
+            # L2 unavailable: decide with the local tier only
+            added = self._l1.get(full_key) is _MISSING
+
+        if added:
+            self._l1.set(full_key, value, self._l1_timeout(timeout))
+            self._invalidate([full_key])
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self._call_l2('touch', key, timeout, version=version, default=False)
+
+    def delete(self, key, version=None):
+        full_key = self.make_and_validate_key(key, version=version)
+        deleted = self._call_l2('delete', key, version=version, default=False)
+        self._l1.delete(full_key)
+        self._invalidate([full_key])
+        return deleted
+
+    def delete_many(self, keys, version=None):
+        full_keys = [self.make_and_validate_key(key, version=version) for key in keys]
+        self._call_l2('delete_many', keys, version=version)
+        self._l1.delete(*full_keys)
+        self._invalidate(full_keys)
+
+    def has_key(self, key, version=None):
+        if self._l1.get(self.make_and_validate_key(key, version=version)) is not _MISSING:
+            return True
+        return self._call_l2('has_key', key, version=version, default=False)
+
+    def incr(self, key, delta=1, version=None):
+        full_key = self.make_and_validate_key(key, version=version)
+        value = self._call_l2('incr', key, delta, version=version, default=_MISSING)
+
+        if value is _MISSING:
+            # Counters are only meaningful when shared; without the L2 they fail like a missing key
+            raise ValueError(f"Key '{key}' not found")
+
+        self._l1.delete(full_key)
+        self._invalidate([full_key])
+        return value
+
+    def clear(self):
+        self._call_l2('clear')
+        self._l1.clear()
+        self._invalidate(None)
+
+    def close(self, **kwargs):
+        self._l2.close(**kwargs)
@@ -0,0 +1,281 @@
+import logging
+import threading
+import time
+
+import redis
+from django.conf import settings
+
+from utils.redis_client import get_redis
+from utils.request_metrics import format_labels
+
+logger = logging.getLogger(__name__)
+
+
+class LocalState:
+    """
+    In-process stand-in for the few Redis commands the circuit breaker uses,
+    used when Redis cannot be reached.
+    """
+
+    def __init__(self):
+        self._values = {}
+        self._expires = {}
+        self._lock = threading.Lock()
+
+    def _alive(self, key):
+        expires_at = self._expires.get(key)
+        if expires_at is not None and expires_at <= time.monotonic():
+            self._values.pop(key, None)
+            self._expires.pop(key, None)
+        return key in self._values
+
+    def get(self, key):
+        with self._lock:
+            return self._values.get(key) if self._alive(key) else None
+
+    def set(self, key, value, ex=None, nx=False):
+        with self._lock:
+            if nx and self._alive(key):
+                return None
+            self._values[key] = value
+            self._expires.pop(key, None)
+            if ex is not None:
+                self._expires[key] = time.monotonic() + ex
+            return True
+
+    def incr(self, key):
+        with self._lock:
+            value = int(self._values.get(key, 0)) + 1 if self._alive(key) else 1
+            self._values[key] = value
+            return value
+
+    def expire(self, key, seconds):
+        with self._lock:
+            if self._alive(key):
+                self._expires[key] = time.monotonic() + seconds
+
+    def ttl(self, key):
+        with self._lock:
+            if not self._alive(key):
+                return -2
+            expires_at = self._expires.get(key)
+            return -1 if expires_at is None else max(0, int(expires_at - time.monotonic()))
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._values.pop(key, None)
+                self._expires.pop(key, None)
+
+    def hincrby(self, key, field, amount=1):
+        with self._lock:
+            counters = self._values.setdefault(key, {})
+            counters[field] = counters.get(field, 0) + amount
+            return counters[field]
+
+    def hgetall(self, key):
+        with self._lock:
+            return dict(self._values.get(key, {}))
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker whose state is shared by every process through Redis.
+
+    - closed: requests go through; `failure_threshold` consecutive failures open it.
+    - open: requests fail fast for `recovery_timeout` seconds.
+    - half_open: after the timeout a single process is allowed to send a probe;
+      a success closes the circuit again, a failure keeps it open for another
+      `recovery_timeout`.
+
+    Transitions are logged and counted in Redis (see `get_metrics`). If Redis is
+    down, the state is kept per process.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    KEY_PREFIX = 'circuit'
+    REDIS_RETRY_INTERVAL = 30
+
+    def __init__(self, name, failure_threshold, recovery_timeout, client=None):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.client = client or get_redis()
+        self.local_state = LocalState()
+        self._redis_retry_at = 0.0
+
+        prefix = f'{self.KEY_PREFIX}:{name}'
+        self.failures_key = f'{prefix}:failures'
+        self.tripped_key = f'{prefix}:tripped'  # Exists while the circuit is not closed
+        self.open_key = f'{prefix}:open'  # Exists (with TTL) while requests must fail fast
+        self.probe_key = f'{prefix}:probe'  # Held by the process sending the half-open probe
+        self.transitions_key = f'{prefix}:transitions'
+
+    def __deepcopy__(self, memo):
+        # Shared by design, like the rate limiter
+        return self
+
+    def _call(self, command, *args, **kwargs):
+        """Runs a command on Redis, or on the local state when Redis is unavailable."""
+        if time.monotonic() >= self._redis_retry_at:
+            try:
+                return getattr(self.client, command)(*args, **kwargs)
+            except redis.exceptions.RedisError as e:
+                logger.warning('Circuit breaker %s falling back to local state: %s', self.name, e)
+                self._redis_retry_at = time.monotonic() + self.REDIS_RETRY_INTERVAL
+
+        return getattr(self.local_state, command)(*args, **kwargs)
+
+    def _transition(self, state):
+        self._call('hincrby', self.transitions_key, state, 1)
+        log = logger.info if state == self.CLOSED else logger.warning
+        log('Circuit breaker %s is now %s', self.name, state, extra={'circuit': self.name, 'state': state})
+
+    @property
+    def state(self):
+        if not self._call('get', self.tripped_key):
+            return self.CLOSED
+        if self._call('get', self.open_key):
+            return self.OPEN
+        return self.HALF_OPEN
+
+    def is_open(self):
+        """True while requests must fail fast (does not take the half-open probe)."""
+        return self.state == self.OPEN
+
+    def allow_request(self):
+        """
+        Returns True if a request may be sent now. In the half-open state only
+        the first caller gets True and becomes the probe.
+        """
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state == self.OPEN:
+            return False
+
+        return bool(self._call('set', self.probe_key, 1, nx=True, ex=self.recovery_timeout))
+
+    def record_success(self):
+        if self._call('get', self.tripped_key):
+            self._call('delete', self.tripped_key, self.open_key, self.probe_key, self.failures_key)
+            self._transition(self.CLOSED)
+        else:
+            self._call('delete', self.failures_key)
+
+    def record_failure(self):
+        if self._call('get', self.tripped_key):
+            # Only the half-open probe failing reopens the circuit; failures of requests sent
+            # before the trip find it already open and change nothing
+            if self._call('set', self.open_key, 1, nx=True, ex=self.recovery_timeout):
+                self._call('delete', self.probe_key)
+                self._transition(self.OPEN)
+            return
+
+        failures = self._call('incr', self.failures_key)
+        self._call('expire', self.failures_key, self.recovery_timeout * 10)
+
+        # Only the process that wins the NX opens the circuit and logs it
+        if failures >= self.failure_threshold and self._call('set', self.tripped_key, 1, nx=True):
+            self._call('set', self.open_key, 1, ex=self.recovery_timeout)
+            self._transition(self.OPEN)
+
+    def reset(self):
+        """Closes the circuit and clears the failure count (e.g. after fixing the gateway by hand)."""
+        self._call('delete', self.tripped_key, self.open_key, self.probe_key, self.failures_key)
+
+    def retry_after(self):
+        """
+        Seconds callers turned away should wait before trying again: the rest of the
+        open period, or while half open the time left to the probe in flight (its
+        lock expires after `recovery_timeout`). 0 if the circuit is closed.
+        """
+        state = self.state
+        if state == self.CLOSED:
+            return 0
+        if state == self.OPEN:
+            return max(1, self._call('ttl', self.open_key))
+
+        ttl = self._call('ttl', self.probe_key)
+        return ttl if ttl > 0 else 1
+
+    def reserve_retry(self, job, seconds):
+        """
+        Returns True for the first caller reserving a retry of `job` (any name), until
+        release_retry(job) or `seconds` pass. A job turned away by the circuit only
+        schedules its retry when it gets the reservation, so an outage leaves one
+        retry chain however many runs of the job hit it.
+        """
+        return bool(self._call('set', self._retry_key(job), 1, nx=True, ex=seconds))
+
+    def release_retry(self, job):
+        """Drops the reservation of `job`, called by the retry when it starts."""
+        self._call('delete', self._retry_key(job))
+
+    def _retry_key(self, job):
+        return f'{self.KEY_PREFIX}:{self.name}:retry:{job}'
+
+    def get_metrics(self):
+        transitions = {
+            (key.decode() if isinstance(key, bytes) else key): int(value)
+            for key, value in self._call('hgetall', self.transitions_key).items()
+        }
+        return {
+            'name': self.name,
+            'state': self.state,
+            'failures': int(self._call('get', self.failures_key) or 0),
+            'transitions': transitions,
+        }
+
+
+def render_circuit_breaker_metrics(breakers):
+    """
+    Renders each breaker as Prometheus metrics: its current state as a gauge per
+    state (1 for the current one), the consecutive failures and the transitions.
+    """
+    states = [breaker.get_metrics() for breaker in breakers]
+
+    lines = [
+        '# HELP gym_circuit_breaker_state Current state of the circuit (1 for the current state).',
+        '# TYPE gym_circuit_breaker_state gauge',
+    ]
+    for state in states:
+        for name in (CircuitBreaker.CLOSED, CircuitBreaker.OPEN, CircuitBreaker.HALF_OPEN):
+            labels = format_labels((('name', state['name']), ('state', name)))
+            lines.append(f'gym_circuit_breaker_state{{{labels}}} {int(state["state"] == name)}')
+
+    lines += [
+        '# HELP gym_circuit_breaker_failures Consecutive failures counted toward opening the circuit.',
+        '# TYPE gym_circuit_breaker_failures gauge',
+    ]
+    for state in states:
+        lines.append(f'gym_circuit_breaker_failures{{{format_labels((("name", state["name"]),))}}} {state["failures"]}')
+
+    lines += [
+        '# HELP gym_circuit_breaker_transitions_total Transitions of the circuit to each state.',
+        '# TYPE gym_circuit_breaker_transitions_total counter',
+    ]
+    for state in states:
+        for name, count in sorted(state['transitions'].items()):
+            labels = format_labels((('name', state['name']), ('state', name)))
+            lines.append(f'gym_circuit_breaker_transitions_total{{{labels}}} {count}')
+
+    return '\n'.join(lines) + '\n'
+
+
+_ultramsg_circuit_breakers = {}
+
+
+def get_ultramsg_circuit_breaker(instance):
+    """Returns the circuit breaker shared by every sender of the given UltraMsg instance."""
+    if instance not in _ultramsg_circuit_breakers:
+        _ultramsg_circuit_breakers[instance] = CircuitBreaker(
+            name=f'ultramsg:{instance}',
+            failure_threshold=settings.ULTRAMSG_CIRCUIT_FAILURE_THRESHOLD,
+            recovery_timeout=settings.ULTRAMSG_CIRCUIT_RECOVERY_TIMEOUT,
+        )
+
+    return _ultramsg_circuit_breakers[instance]
@@ -0,0 +1,123 @@
+import hashlib
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+VERSION_KEY_PREFIX = 'data-version'
+
+_MISSING = object()
+
+
+def model_namespace(model, date=None):
+    """
+    Namespace of a model's version, e.g. 'members.member'. With `date`, the
+    namespace of one month of data, e.g. 'members.payment:2024-10'.
+    """
+    namespace = model._meta.label_lower
+    return f'{namespace}:{date:%Y-%m}' if date is not None else namespace
+
+
+def _version_key(namespace):
+    return f'{VERSION_KEY_PREFIX}:{namespace}'
+
+
+def _new_version():
+    # Based on the clock, so a version key lost from the cache never restarts at a number
+    # that was already used, which would bring back entries cached under it
+    return time.time_ns()
+
+
+def get_versions(*namespaces):
+    """Returns {namespace: version}, creating the versions that do not exist yet."""
+    keys = {namespace: _version_key(namespace) for namespace in namespaces}
+    found = cache.get_many(keys.values())
+    versions = {}
+
+    for namespace, key in keys.items():
+        version = found.get(key)
+        if version is None:
+            version = _new_version()
+            if not cache.add(key, version, timeout=None):
+                version = cache.get(key, version)
+        versions[namespace] = version
+
+    return versions
+
+
+def _bump(namespaces):
+    for namespace in namespaces:
+        try:
+            cache.incr(_version_key(namespace))
+        except ValueError:
+            cache.set(_version_key(namespace), _new_version(), timeout=None)
+
+
+def bump_versions(*namespaces):
+    """
+    Invalidates everything cached under `namespaces`.
+
+    The bump waits for the current transaction to commit; otherwise another request
+    could read the old rows and cache them under the new version. Saves and deletes
+    of members, payments and activity entries bump their namespaces automatically;
+    bulk operations that skip signals (bulk_create, update) must call it themselves.
+    """
+    namespaces = tuple(dict.fromkeys(namespaces))
+    transaction.on_commit(lambda: _bump(namespaces))
+
+
+def versioned_key(name, namespaces, **params):
+    """
+    Builds a cache key that changes whenever one of the `namespaces` is bumped or
+    one of the `params` changes, so stale entries are simply never read again.
+
+    Read the key before querying the data: a change committed in between then only
+    makes this entry unreachable, instead of being cached under the new version.
+    """
+    versions = get_versions(*namespaces)
+    parts = [f'{namespace}={versions[namespace]}' for namespace in namespaces]
+    parts += [f'{param}={value}' for param, value in sorted(params.items())]
+    digest = hashlib.md5('|'.join(parts).encode(), usedforsecurity=False).hexdigest()
+    return f'{name}:{digest}'
+
+
+def versioned_etag(name, namespaces, **params):
+    """
+    Returns a quoted HTTP ETag for the current versions of `namespaces` and `params`.
+
+    It is known from the versions alone, before querying or rendering anything, so a
+    client revalidating unchanged data can get a 304 for the price of one cache read.
+    """
+    return '"{}"'.format(versioned_key(name, namespaces, **params).split(':', 1)[1])
+
+
+def cache_versioned(name, namespaces, compute, timeout=None, **params):
+    """
+    Returns the cached result of `compute()` for the current versions of
+    `namespaces` and `params`, computing and caching it on a miss.
+
+    `timeout` only bounds how long unreachable entries take up memory; it defaults
+    to CACHE_VERSIONED_TIMEOUT.
+    """
+    key = versioned_key(name, namespaces, **params)
+    value = cache.get(key, _MISSING)
+
+    if value is _MISSING:
+        value = compute()
+        cache.set(key, value, settings.CACHE_VERSIONED_TIMEOUT if timeout is None else timeout)
+
+    return value
+
+
+async def acache_versioned(name, namespaces, compute, timeout=None, **params):
+    """Async version of cache_versioned(), for async views: `compute` is a coroutine function."""
+    key = await sync_to_async(versioned_key)(name, namespaces, **params)
+    value = await cache.aget(key, _MISSING)
+
+    if value is _MISSING:
+        value = await compute()
+        await cache.aset(key, value, settings.CACHE_VERSIONED_TIMEOUT if timeout is None else timeout)
+
+    return value
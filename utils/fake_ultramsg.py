@@ -0,0 +1,114 @@
+import json
+import random
+import re
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from utils.rate_limiter import LocalTokenBucket
+
+
+class FakeUltraMsgHandler(BaseHTTPRequestHandler):
+    """
+    Answers the same payloads utils.ultramsg.UltraMsgAPI sends to
+    POST /<instance>/messages/chat and POST /<instance>/messages/image.
+    """
+
+    PATH_PATTERN = re.compile(r'^/(?P<instance>[^/]+)/messages/(?P<kind>chat|image)/?$')
+    REQUIRED_FIELDS = {
+        'chat': ('token', 'to', 'body'),
+        'image': ('token', 'to', 'image'),
+    }
+
+    def do_POST(self):
+        server = self.server
+        match = self.PATH_PATTERN.match(urllib.parse.urlparse(self.path).path)
+
+        length = int(self.headers.get('Content-Length') or 0)
+        payload = urllib.parse.parse_qs(self.rfile.read(length).decode())
+
+        if not match:
+            return self._reply(404, {'error': 'Not found'})
+
+        missing = [field for field in self.REQUIRED_FIELDS[match['kind']] if not payload.get(field)]
+        if missing:
+            server.record('invalid')
+            return self._reply(400, {'error': f"Missing fields: {', '.join(missing)}"})
+
+        if server.bucket and not server.bucket.take()[0]:
+            server.record('throttled')
+            return self._reply(429, {'error': 'Too many requests'})
+
+        delay = server.latency + random.uniform(0, server.latency_jitter)
+        if delay > 0:
+            time.sleep(delay)
+
+        if random.random() < server.error_rate:
+            server.record('errors')
+            return self._reply(500, {'error': 'Internal server error'})
+
+        message_id = server.record('sent')
+        return self._reply(200, {'sent': 'true', 'message': 'ok', 'id': message_id})
+
+    def _reply(self, status, body):
+        content = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        # Um log por requisição distorce o benchmark
+        pass
+
+
+class FakeUltraMsgServer(ThreadingHTTPServer):
+    """
+    Local stand-in for the UltraMsg API, used to load-test the billing pipeline.
+
+    :param latency: Seconds every request takes before answering.
+    :param latency_jitter: Extra random latency, between 0 and this value.
+    :param error_rate: Fraction (0 to 1) of requests answered with HTTP 500.
+    :param rate_limit: Requests per second accepted before answering HTTP 429 (0 disables).
+    """
+
+    daemon_threads = True
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0, latency_jitter=0.0, error_rate=0.0, rate_limit=0):
+        super().__init__((host, port), FakeUltraMsgHandler)
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.error_rate = error_rate
+        self.bucket = LocalTokenBucket(rate_limit, max(1, rate_limit)) if rate_limit > 0 else None
+        self.stats = {'sent': 0, 'errors': 0, 'throttled': 0, 'invalid': 0}
+        self._stats_lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def url(self):
+        """Base URL to use as ULTRAMSG_API_URL."""
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def record(self, outcome):
+        with self._stats_lock:
+            self.stats[outcome] += 1
+            return self.stats[outcome]
+
+    def start(self):
+        """Serves in a background thread and returns the server."""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
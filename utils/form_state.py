@@ -0,0 +1,77 @@
+import json
+
+from django import forms
+from django.conf import settings
+
+ERRORS_KEY = '__errors__'
+
+
+def _is_secret(field):
+    return isinstance(field.widget, forms.PasswordInput)
+
+
+def stash_form_state(request, key, form):
+    """
+    Keeps what the user typed in an invalid form so it can be shown again after
+    the redirect. Call it only when validation fails.
+
+    Only the form's own fields are kept (no CSRF token or unknown keys), one value
+    per field, truncated to the field's max_length. Password fields are never
+    stored: their errors are kept instead, so restore_form() can still show them.
+    Nothing is stored if the result is larger than FORM_STATE_MAX_BYTES.
+
+    :return: True if the state was stored.
+    """
+    state = {}
+    secret_errors = {}
+
+    for name, field in form.fields.items():
+        if _is_secret(field):
+            secret_errors[name] = list(form.errors.get(name, []))
+            continue
+
+        value = form.data.get(form.add_prefix(name), '')
+        max_length = getattr(field, 'max_length', None) or settings.FORM_STATE_MAX_BYTES
+        state[name] = str(value)[:max_length]
+
+    if secret_errors:
+        state[ERRORS_KEY] = secret_errors
+
+    if len(json.dumps(state).encode()) > settings.FORM_STATE_MAX_BYTES:
+        return False
+
+    request.session[key] = state
+    return True
+
+
+def clear_form_state(request, key):
+    """Removes a stashed state. The session is only written if there was one."""
+    request.session.pop(key, None)
+
+
+def restore_form(request, key, form_class, keep=False, **kwargs):
+    """
+    Returns `form_class` bound to the state stashed under `key`, with its errors;
+    returns an unbound form if there is none.
+
+    The state is removed from the session unless `keep` is True, for pages that
+    show it again on reload until the form is submitted successfully (the view
+    handling the submit then calls clear_form_state()).
+    """
+    state = request.session.get(key) if keep else request.session.pop(key, None)
+
+    if not state:
+        return form_class(**kwargs)
+
+    state = dict(state)
+    secret_errors = state.pop(ERRORS_KEY, {})
+    form = form_class(state, **kwargs)
+
+    # Password fields come back empty: show the errors they had, not "required"
+    for name, errors in secret_errors.items():
+        if errors:
+            form.errors[name] = form.error_class(errors)
+        else:
+            form.errors.pop(name, None)
+
+    return form
@@ -0,0 +1,35 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+
+def render_cached_fragments(template_name, objects, key, context_name='object', timeout=None):
+    """
+    Renders `template_name` once per object, reusing the HTML cached for the
+    objects that did not change.
+
+    `key(obj)` must change whenever the rendered HTML would (e.g. id plus
+    updated_at), so stale fragments are simply never read again. All keys are
+    fetched with a single get_many and the misses stored with a single set_many,
+    so a page costs two cache round trips however many fragments it has.
+
+    The template gets only `{context_name: obj}`: fragments must not depend on
+    the request or the user.
+
+    :param timeout: Bounds how long unreachable fragments take up memory; defaults to CACHE_VERSIONED_TIMEOUT.
+    :return: List with the HTML of each object, in order, marked safe.
+    """
+    keys = [key(obj) for obj in objects]
+    fragments = cache.get_many(keys) if keys else {}
+
+    missing = {}
+    for obj, obj_key in zip(objects, keys):
+        if obj_key not in fragments and obj_key not in missing:
+            missing[obj_key] = render_to_string(template_name, {context_name: obj})
+
+    if missing:
+        cache.set_many(missing, settings.CACHE_VERSIONED_TIMEOUT if timeout is None else timeout)
+        fragments.update(missing)
+
+    return [mark_safe(fragments[obj_key]) for obj_key in keys]
@@ -0,0 +1,54 @@
+import cProfile
+import io
+import os
+import pstats
+import re
+import time
+from pathlib import Path
+
+
+def start_profiler():
+    """
+    Returns a running cProfile.Profile, or None if another profiler is already
+    active in this thread (only one can be enabled at a time).
+    """
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        return None
+    return profiler
+
+
+def save_profile(profiler, directory, label, max_files=None):
+    """
+    Writes the stats of `profiler` to `directory` in the pstats format (readable by
+    pstats, snakeviz or gprof2dot) and returns the path.
+
+    The file name starts with the time, so the newest files sort last; with
+    `max_files`, the oldest .prof files beyond that number are deleted.
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+
+    slug = re.sub(r'[^\w.-]+', '_', label).strip('_') or 'request'
+    path = directory / f'{time.strftime("%Y%m%d-%H%M%S")}_{time.time_ns() % 10**9:09d}_{os.getpid()}_{slug}.prof'
+    profiler.dump_stats(path)
+
+    if max_files:
+        for old in sorted(directory.glob('*.prof'))[:-max_files]:
+            old.unlink(missing_ok=True)
+
+    return path
+
+
+def top_functions(source, limit=25, sort='cumulative'):
+    """
+    Returns the pstats report of the `limit` most expensive functions, sorted by
+    `sort` ('cumulative', 'tottime', 'calls'...). `source` is a Profile or the path
+    of a saved profile.
+    """
+    output = io.StringIO()
+    stats = pstats.Stats(str(source) if isinstance(source, Path) else source, stream=output)
+    stats.strip_dirs().sort_stats(sort).print_stats(limit)
+    return output.getvalue()
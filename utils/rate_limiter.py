@@ -0,0 +1,201 @@
+import logging
+import threading
+import time
+
+import redis
+from django.conf import settings
+
+from utils.redis_client import get_redis
+from utils.request_metrics import format_labels
+
+logger = logging.getLogger(__name__)
+
+
+# Refill + take is done in a single script so that concurrent workers never race
+# on the bucket. The clock comes from Redis itself, so skew between hosts does not
+# matter. Floats are returned as strings because Redis truncates Lua numbers.
+TOKEN_BUCKET_SCRIPT = """
+local key = KEYS[1]
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local requested = tonumber(ARGV[3])
+
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+
+local bucket = redis.call('HMGET', key, 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or capacity
+local ts = tonumber(bucket[2]) or now
+
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+
+local allowed = 0
+local wait = 0
+if requested > 0 then
+    if tokens >= requested then
+        tokens = tokens - requested
+        allowed = 1
+    else
+        wait = (requested - tokens) / rate
+    end
+end
+
+redis.call('HSET', key, 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', key, math.ceil(capacity / rate) + 60)
+
+return {allowed, tostring(wait), tostring(tokens)}
+"""
+
+
+class LocalTokenBucket:
+    """In-process token bucket, used when Redis cannot be reached."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def take(self, requested=1):
+        """Returns (allowed, seconds_to_wait, tokens_left)."""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+
+            if requested <= 0:
+                return False, 0.0, self.tokens
+
+            if self.tokens >= requested:
+                self.tokens -= requested
+                return True, 0.0, self.tokens
+
+            return False, (requested - self.tokens) / self.rate, self.tokens
+
+
+class TokenBucketRateLimiter:
+    """
+    Token bucket shared by every process through Redis.
+
+    `rate` tokens are added per second up to `capacity` (the allowed burst). Each
+    call to `acquire` takes tokens, sleeping until they are available. If Redis is
+    down the limiter keeps working with a per-process bucket instead of blocking
+    the sends, and tries Redis again after `REDIS_RETRY_INTERVAL` seconds.
+    """
+
+    KEY_PREFIX = 'ratelimit'
+    REDIS_RETRY_INTERVAL = 30
+
+    def __init__(self, name, rate, capacity, client=None):
+        if rate <= 0:
+            raise ValueError('The rate must be greater than zero.')
+        if capacity < 1:
+            raise ValueError('The capacity must be at least 1.')
+
+        self.name = name
+        self.key = f'{self.KEY_PREFIX}:{name}'
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.client = client or get_redis()
+        self.local_bucket = LocalTokenBucket(self.rate, self.capacity)
+        self._script = self.client.register_script(TOKEN_BUCKET_SCRIPT)
+        self._redis_retry_at = 0.0
+
+    def __deepcopy__(self, memo):
+        # The limiter is shared by design, copies of its owner (e.g. in TestCase
+        # class data) must keep using the same bucket.
+        return self
+
+    def _take(self, requested):
+        if time.monotonic() >= self._redis_retry_at:
+            try:
+                allowed, wait, tokens = self._script(keys=[self.key], args=[self.rate, self.capacity, requested])
+                return bool(int(allowed)), float(wait), float(tokens)
+            except redis.exceptions.RedisError as e:
+                logger.warning('Rate limiter %s falling back to the local bucket: %s', self.name, e)
+                self._redis_retry_at = time.monotonic() + self.REDIS_RETRY_INTERVAL
+
+        return self.local_bucket.take(requested)
+
+    def try_acquire(self, tokens=1):
+        """
+        Tries to take `tokens` without blocking.
+
+        :return: Tuple (allowed, seconds to wait before the tokens are available).
+        """
+        allowed, wait, _ = self._take(tokens)
+        return allowed, wait
+
+    def acquire(self, tokens=1, timeout=None):
+        """
+        Blocks until `tokens` are taken from the bucket.
+
+        :param timeout: Maximum number of seconds to wait, None waits forever.
+        :return: True if the tokens were taken, False if the timeout expired.
+        :raises ValueError: If more tokens than the capacity are requested, as they would never be available.
+        """
+        if tokens > self.capacity:
+            raise ValueError(f'Cannot take {tokens} tokens from a bucket with capacity {self.capacity:g}.')
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        while True:
+            allowed, wait = self.try_acquire(tokens)
+            if allowed:
+                return True
+
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or wait > remaining:
+                    return False
+
+            time.sleep(wait)
+
+    def get_metrics(self):
+        """Returns the current state of the bucket without taking any token."""
+        _, _, tokens = self._take(0)
+        return {
+            'name': self.name,
+            'tokens': tokens,
+            'capacity': self.capacity,
+            'rate': self.rate,
+        }
+
+
+def render_rate_limiter_metrics(limiters):
+    """Renders the token level and capacity of each limiter as Prometheus gauges."""
+    gauges = {
+        'gym_rate_limiter_tokens': ('Tokens currently available in the bucket.', 'tokens'),
+        'gym_rate_limiter_capacity': ('Maximum tokens in the bucket (the allowed burst).', 'capacity'),
+    }
+    states = [limiter.get_metrics() for limiter in limiters]
+
+    lines = []
+    for metric, (help_text, field) in gauges.items():
+        lines += [f'# HELP {metric} {help_text}', f'# TYPE {metric} gauge']
+        for state in states:
+            lines.append(f'{metric}{{{format_labels((("name", state["name"]),))}}} {state[field]:g}')
+
+    return '\n'.join(lines) + '\n'
+
+
+_ultramsg_rate_limiters = {}
+
+
+def get_ultramsg_rate_limiter(instance):
+    """
+    Returns the limiter shared by every sender of the given UltraMsg instance, or
+    None when ULTRAMSG_RATE_LIMIT is 0 (limiting disabled).
+    """
+    if settings.ULTRAMSG_RATE_LIMIT <= 0:
+        return None
+
+    if instance not in _ultramsg_rate_limiters:
+        _ultramsg_rate_limiters[instance] = TokenBucketRateLimiter(
+            name=f'ultramsg:{instance}',
+            rate=settings.ULTRAMSG_RATE_LIMIT,
+            capacity=settings.ULTRAMSG_RATE_BURST,
+        )
+
+    return _ultramsg_rate_limiters[instance]
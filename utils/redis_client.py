@@ -0,0 +1,36 @@
+import redis
+import redis.asyncio
+from django.conf import settings
+
+_client = None
+
+
+def get_redis():
+    """
+    Returns a process-wide Redis client for the instance configured in REDIS_URL
+    (the same one Celery uses as broker).
+
+    The connection is lazy: nothing is opened until the first command, so importing
+    modules that use it does not require Redis to be running.
+    """
+    global _client
+
+    if _client is None:
+        _client = redis.Redis.from_url(
+            settings.REDIS_URL,
+            socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+            socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT,
+        )
+
+    return _client
+
+
+def new_async_redis():
+    """
+    Returns a new asyncio Redis client for REDIS_URL, for async views.
+
+    Unlike get_redis() it is not shared: asyncio connections belong to the event
+    loop that opened them, so each caller creates its own client and closes it
+    with `await client.aclose()` when done.
+    """
+    return redis.asyncio.Redis.from_url(settings.REDIS_URL, socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT)
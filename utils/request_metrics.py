@@ -0,0 +1,226 @@
+import bisect
+import logging
+import threading
+import time
+from collections import defaultdict
+
+import redis
+from django.conf import settings
+
+from utils.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+METRICS_KEY = 'metrics:requests'
+
+# Upper bounds of the histogram buckets (Prometheus "le"); +Inf is implied
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+SIZE_BUCKETS = (1_000, 5_000, 10_000, 50_000, 100_000, 500_000, 1_000_000, 5_000_000)
+
+HISTOGRAMS = {
+    'gym_request_duration_seconds': ('Wall time of the request, in seconds.', DURATION_BUCKETS),
+    'gym_request_db_seconds': ('Time spent running SQL queries, in seconds.', DURATION_BUCKETS),
+    'gym_request_queries': ('Number of SQL queries run by the request.', QUERY_BUCKETS),
+    'gym_response_size_bytes': ('Size of the response body, in bytes.', SIZE_BUCKETS),
+}
+
+
+class Histogram:
+    """Bucket counts, sum and count of one labelled series, kept by one process."""
+
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # Not cumulative; the last one is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def fields(self):
+        """Yields (suffix, amount) for the non-empty buckets, the sum and the count."""
+        for le, count in zip((*self.buckets, '+Inf'), self.counts):
+            if count:
+                yield str(le), count
+        yield 'sum', self.sum
+        yield 'count', self.count
+
+
+class RequestMetrics:
+    """
+    Request histograms shared by every process.
+
+    Observations are kept in memory and added to a Redis hash at most every
+    `flush_interval` seconds with one pipeline, so a request only pays for a dict
+    update. If Redis is unavailable the observations stay in memory and are sent
+    on the next successful flush.
+    """
+
+    REDIS_RETRY_INTERVAL = 30
+
+    def __init__(self, flush_interval, client=None):
+        self.flush_interval = flush_interval
+        self._client = client
+        self._series = {}
+        self._lock = threading.Lock()
+        self._flushed_at = time.monotonic()
+        self._redis_retry_at = 0.0
+
+    def __deepcopy__(self, memo):
+        # Shared by design, like the rate limiter
+        return self
+
+    @property
+    def client(self):
+        return self._client or get_redis()
+
+    def observe(self, metric, labels, value):
+        """Adds an observation to `metric` for the `labels` (a tuple of (name, value) pairs)."""
+        key = (metric, labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = Histogram(HISTOGRAMS[metric][1])
+            series.observe(value)
+
+    def flush_if_due(self):
+        if time.monotonic() - self._flushed_at >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        """Sends the pending observations to Redis."""
+        now = time.monotonic()
+        self._flushed_at = now
+
+        if now < self._redis_retry_at:
+            return
+
+        with self._lock:
+            pending, self._series = self._series, {}
+        if not pending:
+            return
+
+        pipeline = self.client.pipeline(transaction=False)
+        for (metric, labels), series in pending.items():
+            for suffix, amount in series.fields():
+                field = series_field(metric, labels, suffix)
+                if isinstance(amount, float):
+                    pipeline.hincrbyfloat(METRICS_KEY, field, amount)
+                else:
+                    pipeline.hincrby(METRICS_KEY, field, amount)
+
+        try:
+            pipeline.execute()
+        except redis.exceptions.RedisError as e:
+            logger.warning('Request metrics kept in memory for %ss, Redis is unavailable: %s', self.REDIS_RETRY_INTERVAL, e)
+            self._redis_retry_at = time.monotonic() + self.REDIS_RETRY_INTERVAL
+            self._merge(pending)
+
+    def _merge(self, pending):
+        with self._lock:
+            for key, series in pending.items():
+                current = self._series.get(key)
+                if current is None:
+                    self._series[key] = series
+                    continue
+                current.counts = [a + b for a, b in zip(current.counts, series.counts)]
+                current.sum += series.sum
+                current.count += series.count
+
+    def render(self):
+        """
+        Returns every series in the Prometheus text exposition format.
+
+        The pending observations of this process are flushed first; if Redis is
+        unavailable only this process's observations are shown.
+        """
+        self.flush()
+
+        try:
+            stored = self.client.hgetall(METRICS_KEY)
+        except redis.exceptions.RedisError as e:
+            logger.warning('Could not read the request metrics from Redis: %s', e)
+            stored = {}
+            with self._lock:
+                for (metric, labels), series in self._series.items():
+                    for suffix, amount in series.fields():
+                        stored[series_field(metric, labels, suffix)] = amount
+
+        return render_prometheus(stored)
+
+
+def series_field(metric, labels, suffix):
+    """Hash field of one bucket, sum or count, e.g. 'gym_request_queries|view="admin_panel:home"|5'."""
+    return '|'.join((metric, format_labels(labels), suffix))
+
+
+def format_labels(labels):
+    return ','.join(f'{name}="{_escape(value)}"' for name, value in labels)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n').replace('|', '/')
+
+
+def render_prometheus(stored):
+    """Renders the hash fields written by RequestMetrics.flush() as cumulative histograms."""
+    by_series = defaultdict(dict)
+    for field, amount in stored.items():
+        field = field.decode() if isinstance(field, bytes) else field
+        amount = amount.decode() if isinstance(amount, bytes) else amount
+        metric, labels, suffix = field.split('|')
+        by_series[(metric, labels)][suffix] = _parse_number(amount)
+
+    lines = []
+    for metric, (help_text, buckets) in HISTOGRAMS.items():
+        lines += [f'# HELP {metric} {help_text}', f'# TYPE {metric} histogram']
+
+        for (name, labels), values in sorted(by_series.items()):
+            if name != metric:
+                continue
+
+            prefix = f'{labels},' if labels else ''
+            cumulative = 0
+            for le in (*buckets, '+Inf'):
+                cumulative += values.get(str(le), 0)
+                lines.append(f'{metric}_bucket{{{prefix}le="{le}"}} {format_value(cumulative)}')
+
+            suffix_labels = f'{{{labels}}}' if labels else ''
+            lines.append(f'{metric}_sum{suffix_labels} {format_value(values.get("sum", 0))}')
+            lines.append(f'{metric}_count{suffix_labels} {format_value(values.get("count", 0))}')
+
+    return '\n'.join(lines) + '\n'
+
+
+def format_value(value):
+    """Renders a sample value at full precision (':g' would round counters past 999999)."""
+    return str(value) if isinstance(value, int) else repr(float(value))
+
+
+def _parse_number(amount):
+    """Reads a hash value written by HINCRBY (an int) or HINCRBYFLOAT (an int or a float)."""
+    if not isinstance(amount, str):
+        # Read from memory while Redis is unavailable
+        return amount
+    try:
+        return int(amount)
+    except ValueError:
+        return float(amount)
+
+
+_metrics = None
+
+
+def get_request_metrics():
+    """Returns the RequestMetrics of this process."""
+    global _metrics
+
+    if _metrics is None:
+        _metrics = RequestMetrics(flush_interval=settings.REQUEST_METRICS_FLUSH_INTERVAL)
+
+    return _metrics
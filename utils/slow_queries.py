@@ -0,0 +1,175 @@
+import hashlib
+import json
+import logging
+import re
+import threading
+import time
+import traceback
+from pathlib import Path
+
+from django.conf import settings
+from django.db import DatabaseError, transaction
+
+# One JSON object per line, written to SLOW_QUERY_LOG_FILE (see LOGGING) and read by slow_query_report
+logger = logging.getLogger('slow_queries')
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'(?<![\w."])-?\b\d+(?:\.\d+)?\b')
+_PLACEHOLDER = re.compile(r'%s|\?')
+_IN_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+_SPACES = re.compile(r'\s+')
+
+_IGNORED_PATHS = ('/site-packages/', '/django/', __file__)
+
+
+def fingerprint(sql):
+    """
+    Normalizes a query so every execution of the same statement gives the same
+    text: literals and parameters become '?' and IN lists of any size become (...).
+
+    >>> fingerprint("SELECT * FROM t WHERE id IN (%s, %s, %s) AND name = 'Ana' LIMIT 21")
+    'SELECT * FROM t WHERE id IN (...) AND name = ? LIMIT ?'
+    """
+    sql = _STRING.sub('?', sql)
+    sql = _PLACEHOLDER.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = _IN_LIST.sub('(...)', sql)
+    return _SPACES.sub(' ', sql).strip()
+
+
+def fingerprint_id(normalized):
+    """Short, stable id of a fingerprint, handy to grep the log."""
+    return hashlib.md5(normalized.encode(), usedforsecurity=False).hexdigest()[:12]
+
+
+def call_site():
+    """Returns 'file:line in function' of the innermost project frame that led to the query."""
+    project_dir = str(settings.BASE_DIR)
+
+    for frame in reversed(traceback.extract_stack()):
+        if frame.filename.startswith(project_dir) and not any(part in frame.filename for part in _IGNORED_PATHS):
+            return f'{Path(frame.filename).relative_to(project_dir)}:{frame.lineno} in {frame.name}'
+    return None
+
+
+def capture_plan(connection, sql, params):
+    """
+    Returns the PostgreSQL plan of a SELECT, without running it again (plain
+    EXPLAIN, not ANALYZE), or None for other databases and statements.
+
+    It runs in a savepoint, so a failing EXPLAIN never breaks the caller's transaction.
+    """
+    if connection.vendor != 'postgresql' or sql.lstrip()[:6].upper() not in ('SELECT', 'WITH '):
+        return None
+
+    try:
+        with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN {sql}', params)
+            return '\n'.join(str(row[0]) for row in cursor.fetchall())
+    except DatabaseError as e:
+        return f'EXPLAIN failed: {e}'
+
+
+class SlowQueryLogger:
+    """
+    Database execute wrapper that logs every query slower than
+    SLOW_QUERY_THRESHOLD_MS with its SQL, fingerprint, call site and, on
+    PostgreSQL, its EXPLAIN plan.
+
+    Fast queries only pay for two clock reads. It is installed on every
+    connection by install_slow_query_logger(), in web and Celery processes alike.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration_ms = (time.perf_counter() - started) * 1000
+            # The EXPLAIN goes through this wrapper too
+            if duration_ms >= settings.SLOW_QUERY_THRESHOLD_MS and not getattr(self._local, 'active', False):
+                self._local.active = True
+                try:
+                    self.log(context['connection'], sql, params, many, duration_ms)
+                finally:
+                    self._local.active = False
+
+    def log(self, connection, sql, params, many, duration_ms):
+        normalized = fingerprint(sql)
+        entry = {
+            'fingerprint': fingerprint_id(normalized),
+            'duration_ms': round(duration_ms, 1),
+            'database': connection.alias,
+            'normalized': normalized,
+            'sql': sql[:settings.SLOW_QUERY_MAX_SQL_LENGTH],
+            'many': many,
+            'call_site': call_site(),
+            'plan': None if many else capture_plan(connection, sql, params),
+        }
+        logger.warning(json.dumps(entry, ensure_ascii=False, default=str), extra={'slow_query': entry})
+
+
+slow_query_logger = SlowQueryLogger()
+
+
+def install_slow_query_logger(connection):
+    """Adds the wrapper to `connection` once (it is kept across reconnections)."""
+    if settings.SLOW_QUERY_THRESHOLD_MS > 0 and slow_query_logger not in connection.execute_wrappers:
+        connection.execute_wrappers.append(slow_query_logger)
+
+
+def read_slow_query_log(path):
+    """Yields the entries of a slow query log file, skipping lines that are not entries."""
+    with open(path, encoding='utf-8') as log_file:
+        for line in log_file:
+            start = line.find('{')
+            if start == -1:
+                continue
+            try:
+                entry = json.loads(line[start:])
+            except json.JSONDecodeError:
+                continue
+            if isinstance(entry, dict) and 'fingerprint' in entry:
+                yield entry
+
+
+def aggregate_slow_queries(entries):
+    """
+    Groups log entries by fingerprint and returns one dict per statement with
+    count, total_ms, max_ms, mean_ms, p95_ms, the most common call sites, an
+    example SQL and the latest plan, sorted by total time.
+    """
+    groups = {}
+    for entry in entries:
+        group = groups.setdefault(entry['fingerprint'], {
+            'fingerprint': entry['fingerprint'],
+            'normalized': entry['normalized'],
+            'durations': [],
+            'call_sites': {},
+            'example': entry['sql'],
+            'plan': None,
+        })
+        group['durations'].append(entry['duration_ms'])
+        if entry.get('call_site'):
+            group['call_sites'][entry['call_site']] = group['call_sites'].get(entry['call_site'], 0) + 1
+        if entry.get('plan'):
+            group['plan'] = entry['plan']
+
+    report = []
+    for group in groups.values():
+        durations = sorted(group.pop('durations'))
+        call_sites = group.pop('call_sites')
+        report.append({
+            **group,
+            'count': len(durations),
+            'total_ms': round(sum(durations), 1),
+            'max_ms': durations[-1],
+            'mean_ms': round(sum(durations) / len(durations), 1),
+            'p95_ms': durations[min(len(durations) - 1, int(len(durations) * 0.95))],
+            'call_sites': sorted(call_sites, key=call_sites.get, reverse=True),
+        })
+
+    return sorted(report, key=lambda group: group['total_ms'], reverse=True)
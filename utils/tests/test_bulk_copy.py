@@ -0,0 +1,123 @@
+import csv
+import tempfile
+from contextlib import contextmanager
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+from pathlib import Path
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from unittest.mock import patch
+from admin_panel.models import ActivityLog
+from members.models import Member, Payment
+from utils.bulk_copy import bulk_load, copy_dump
+
+
+class FakeCopyCursor:
+    """Records the COPY statement and reads the streamed file the way psycopg2 does."""
+
+    def __init__(self):
+        self.statements = []
+        self.data = b''
+
+    def copy_expert(self, sql, file):
+        self.statements.append(sql)
+        while chunk := file.read(8192):
+            self.data += chunk
+
+
+class FakePostgresConnection:
+    vendor = 'postgresql'
+
+    def __init__(self):
+        self.ops = connection.ops
+        self.features = connection.features
+        self.copy_cursor = FakeCopyCursor()
+
+    @contextmanager
+    def cursor(self):
+        yield type('CursorWrapper', (), {'cursor': self.copy_cursor})()
+
+
+class BulkLoadTest(TestCase):
+
+    def test_fallback_uses_bulk_create(self):
+        """
+        Test that on other databases the instances are inserted with bulk_create, pks and auto_now included.
+        """
+        members = bulk_load([
+            Member(email=f'aluno{index}@example.com', full_name=f'Aluno {index}', phone='11999990000')
+            for index in range(3)
+        ], batch_size=2)
+
+        self.assertTrue(all(member.pk for member in members))
+        self.assertTrue(all(member.created_at for member in members))
+        self.assertEqual(Member.objects.count(), 3)
+
+    def test_empty_list(self):
+        """
+        Test that loading nothing runs no query.
+        """
+        with self.assertNumQueries(0):
+            self.assertEqual(bulk_load([]), [])
+
+    def test_postgresql_streams_copy_with_reserved_ids(self):
+        """
+        Test that on PostgreSQL the rows go through COPY, with pks reserved from the sequence and NULLs unquoted.
+        """
+        fake = FakePostgresConnection()
+        member = Member(id=7, email='ana@example.com', full_name='Ana "Aninha"', phone='11999990000')
+        payments = [
+            Payment(member=member, payment_date=date(2024, 6, 1), amount=Decimal('100.00')),
+            Payment(member=None, payment_date=date(2024, 6, 2), amount=Decimal('90.00')),
+        ]
+
+        with patch('utils.bulk_copy.connections', {'default': fake}), \
+                patch('utils.bulk_copy.allocate_ids', return_value=[10, 11]) as mock_allocate:
+            bulk_load(payments)
+            bulk_load([member])
+
+        mock_allocate.assert_called_once_with(Payment, 2, 'default')
+        self.assertEqual([payment.pk for payment in payments], [10, 11])
+        self.assertEqual(fake.copy_cursor.statements[0], 'COPY "members_payment" ("id", "member_id", "payment_date", "amount") FROM STDIN WITH (FORMAT csv)')
+
+        rows = list(csv.reader(fake.copy_cursor.data.decode().splitlines()))
+        self.assertEqual(rows[0], ['10', '7', '2024-06-01', '100.00'])
+        self.assertEqual(rows[1][1], '')  # NULL member_id
+        self.assertIn(',"Ana ""Aninha""",', fake.copy_cursor.data.decode())
+        self.assertFalse(payments[0]._state.adding)
+
+
+class CopyDumpTest(TestCase):
+
+    def test_fallback_writes_csv_with_header(self):
+        """
+        Test that on other databases the queryset is written as CSV with the column names as header.
+        """
+        member = Member.objects.create(email='ana@example.com', full_name='Ana', phone='11999990000')
+        Payment.objects.create(member=member, payment_date=date(2024, 6, 1), amount=Decimal('100.00'))
+        output = StringIO()
+
+        count = copy_dump(Payment.objects.order_by('pk'), output)
+
+        rows = list(csv.reader(StringIO(output.getvalue())))
+        self.assertEqual(count, 1)
+        self.assertEqual(rows[0], ['id', 'member_id', 'payment_date', 'amount'])
+        self.assertEqual(rows[1][1:], [str(member.pk), '2024-06-01', '100.00'])
+
+    def test_export_data_command(self):
+        """
+        Test that export_data writes one file per table.
+        """
+        Member.objects.create(email='ana@example.com', full_name='Ana', phone='11999990000')
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        out = StringIO()
+
+        call_command('export_data', directory.name, stdout=out)
+
+        files = sorted(path.name for path in Path(directory.name).iterdir())
+        self.assertEqual(files, ['activity_logs.csv', 'members.csv', 'payments.csv'])
+        self.assertEqual(ActivityLog.objects.count(), 1)
+        self.assertIn('members.csv: 1 linhas', out.getvalue())
@@ -0,0 +1,187 @@
+from django.test import SimpleTestCase
+from unittest.mock import patch, MagicMock
+from utils import cache as two_tier
+from utils.cache import LocalLRU, TwoTierCache
+import json
+import redis
+
+
+def make_cache(**options):
+    return TwoTierCache('', {
+        'OPTIONS': {
+            'L2_BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'L1_MAX_ENTRIES': 3,
+            'L1_TIMEOUT': 5,
+            **options,
+        },
+    })
+
+
+class LocalLRUTest(SimpleTestCase):
+
+    def test_evicts_least_recently_used(self):
+        """
+        Test that the oldest unused entry is dropped when the LRU is full.
+        """
+        lru = LocalLRU(max_entries=2)
+        lru.set('a', 1, 60)
+        lru.set('b', 2, 60)
+        lru.get('a')
+        lru.set('c', 3, 60)
+
+        self.assertEqual(lru.get('a'), 1)
+        self.assertIs(lru.get('b', None), None)
+
+    @patch('utils.cache.time.monotonic')
+    def test_entries_expire(self, mock_monotonic):
+        """
+        Test that an entry is not returned after its timeout.
+        """
+        lru = LocalLRU(max_entries=2)
+        mock_monotonic.return_value = 1000.0
+        lru.set('a', 1, 5)
+
+        mock_monotonic.return_value = 1006.0
+        self.assertIs(lru.get('a', None), None)
+
+    def test_values_are_copies(self):
+        """
+        Test that changing a returned value does not change the cached one.
+        """
+        lru = LocalLRU(max_entries=2)
+        lru.set('a', [1], 60)
+        lru.get('a').append(2)
+
+        self.assertEqual(lru.get('a'), [1])
+
+
+@patch('utils.cache.get_redis')
+@patch('utils.cache.threading.Thread')
+class TwoTierCacheTest(SimpleTestCase):
+
+    def setUp(self):
+        two_tier._tiers.clear()
+        two_tier._listeners.clear()
+        self.addCleanup(two_tier._tiers.clear)
+        self.addCleanup(two_tier._listeners.clear)
+
+    def test_get_fills_local_tier(self, mock_thread, mock_get_redis):
+        """
+        Test that a value read from the shared tier is then served from memory.
+        """
+        cache = make_cache()
+        cache._l2.set('key', 'value')
+
+        self.assertEqual(cache.get('key'), 'value')
+        cache._l2.delete('key')
+
+        self.assertEqual(cache.get('key'), 'value')
+
+    def test_local_tier_is_shared_between_instances(self, mock_thread, mock_get_redis):
+        """
+        Test that the per-thread instances of one alias share the same local tier.
+        """
+        self.assertIs(make_cache()._l1, make_cache()._l1)
+
+    def test_writes_publish_invalidation(self, mock_thread, mock_get_redis):
+        """
+        Test that set and delete tell the other processes which keys changed.
+        """
+        cache = make_cache()
+        cache.set('key', 'value')
+        cache.delete('key')
+
+        messages = [json.loads(call.args[1]) for call in mock_get_redis.return_value.publish.call_args_list]
+        self.assertEqual([message['keys'] for message in messages], [[cache.make_key('key')]] * 2)
+        self.assertIsNone(cache.get('key'))
+
+    def test_version_is_part_of_the_key(self, mock_thread, mock_get_redis):
+        """
+        Test that each version of a key is a separate entry in both tiers.
+        """
+        cache = make_cache()
+        cache.set('key', 'old', version=1)
+        cache.incr_version('key', version=1)
+
+        self.assertIsNone(cache.get('key', version=1))
+        self.assertEqual(cache.get('key', version=2), 'old')
+
+    def test_get_many(self, mock_thread, mock_get_redis):
+        """
+        Test that get_many combines the local tier and the shared tier.
+        """
+        cache = make_cache()
+        cache.set('a', 1)
+        cache._l2.set('b', 2)
+
+        self.assertEqual(cache.get_many(['a', 'b', 'c']), {'a': 1, 'b': 2})
+
+    def test_incr(self, mock_thread, mock_get_redis):
+        """
+        Test that counters live in the shared tier and are not served stale from memory.
+        """
+        cache = make_cache()
+        cache.set('counter', 1)
+
+        self.assertEqual(cache.incr('counter'), 2)
+        self.assertEqual(cache.get('counter'), 2)
+
+    def test_works_with_local_tier_when_redis_is_down(self, mock_thread, mock_get_redis):
+        """
+        Test that the cache keeps working per process when the shared tier cannot be reached.
+        """
+        cache = make_cache()
+        cache._l2 = MagicMock()
+        cache._l2.set.side_effect = redis.exceptions.ConnectionError('Connection refused')
+
+        with self.assertLogs('utils.cache', level='WARNING'):
+            cache.set('key', 'value')
+
+        self.assertEqual(cache.get('key'), 'value')
+        cache._l2.get.assert_not_called()
+        mock_get_redis.return_value.publish.assert_not_called()
+
+
+class InvalidationListenerTest(SimpleTestCase):
+
+    def make_listener(self, tiers):
+        with patch('utils.cache.threading.Thread'):
+            return two_tier.InvalidationListener('cache:invalidate', tiers)
+
+    def test_handle_evicts_keys(self):
+        """
+        Test that a message from another process removes the keys from the local tier.
+        """
+        lru = LocalLRU(max_entries=3)
+        lru.set('a', 1, 60)
+        lru.set('b', 2, 60)
+        listener = self.make_listener({'tier': lru})
+
+        listener.handle(json.dumps({'origin': 'other', 'tier': 'tier', 'keys': ['a']}))
+
+        self.assertIs(lru.get('a', None), None)
+        self.assertEqual(lru.get('b'), 2)
+
+    def test_handle_ignores_own_messages(self):
+        """
+        Test that a process does not evict the value it has just written.
+        """
+        lru = LocalLRU(max_entries=3)
+        lru.set('a', 1, 60)
+        listener = self.make_listener({'tier': lru})
+
+        listener.handle(json.dumps({'origin': listener.origin, 'tier': 'tier', 'keys': ['a']}))
+
+        self.assertEqual(lru.get('a'), 1)
+
+    def test_handle_clear(self):
+        """
+        Test that clear() in another process empties the local tier.
+        """
+        lru = LocalLRU(max_entries=3)
+        lru.set('a', 1, 60)
+        listener = self.make_listener({'tier': lru})
+
+        listener.handle(json.dumps({'origin': 'other', 'tier': 'tier', 'keys': None}))
+
+        self.assertEqual(len(lru), 0)
@@ -0,0 +1,246 @@
+from django.test import TestCase
+from unittest.mock import patch, MagicMock
+from utils.circuit_breaker import CircuitBreaker, LocalState
+from utils.ultramsg import UltraMsgAPI
+import redis
+import requests
+
+
+class CircuitBreakerTest(TestCase):
+
+    def setUp(self):
+        # LocalState implements the same commands used on Redis
+        self.breaker = CircuitBreaker('test', failure_threshold=3, recovery_timeout=60, client=LocalState())
+
+    def open_circuit(self):
+        for _ in range(3):
+            self.breaker.record_failure()
+
+    def test_starts_closed(self):
+        """
+        Test that a new circuit lets requests through.
+        """
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+        self.assertTrue(self.breaker.allow_request())
+        self.assertEqual(self.breaker.retry_after(), 0)
+
+    def test_opens_after_consecutive_failures(self):
+        """
+        Test that the circuit opens after the threshold and then fails fast.
+        """
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+        with self.assertLogs('utils.circuit_breaker', level='WARNING'):
+            self.breaker.record_failure()
+
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        self.assertFalse(self.breaker.allow_request())
+        self.assertGreater(self.breaker.retry_after(), 0)
+
+    def test_success_resets_failure_count(self):
+        """
+        Test that only consecutive failures count toward opening the circuit.
+        """
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.breaker.record_success()
+        self.breaker.record_failure()
+
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+    @patch('utils.circuit_breaker.time.monotonic')
+    def test_half_open_allows_a_single_probe(self, mock_monotonic):
+        """
+        Test that after the recovery timeout only one request is let through.
+        """
+        mock_monotonic.return_value = 1000.0
+        self.open_circuit()
+
+        mock_monotonic.return_value = 1061.0
+        self.assertEqual(self.breaker.state, CircuitBreaker.HALF_OPEN)
+        self.assertTrue(self.breaker.allow_request())
+        self.assertFalse(self.breaker.allow_request())
+
+    @patch('utils.circuit_breaker.time.monotonic')
+    def test_successful_probe_closes_circuit(self, mock_monotonic):
+        """
+        Test that sending resumes automatically when the probe succeeds.
+        """
+        mock_monotonic.return_value = 1000.0
+        self.open_circuit()
+
+        mock_monotonic.return_value = 1061.0
+        self.breaker.allow_request()
+        self.breaker.record_success()
+
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+        self.assertTrue(self.breaker.allow_request())
+
+    @patch('utils.circuit_breaker.time.monotonic')
+    def test_failed_probe_reopens_circuit(self, mock_monotonic):
+        """
+        Test that a failed probe keeps the circuit open for another period.
+        """
+        mock_monotonic.return_value = 1000.0
+        self.open_circuit()
+
+        mock_monotonic.return_value = 1061.0
+        self.breaker.allow_request()
+        self.breaker.record_failure()
+
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        mock_monotonic.return_value = 1100.0
+        self.assertFalse(self.breaker.allow_request())
+
+    @patch('utils.circuit_breaker.time.monotonic')
+    def test_half_open_retry_after_waits_for_the_probe(self, mock_monotonic):
+        """
+        Test that callers turned away while the probe runs are told to wait for it, not to retry at once.
+        """
+        mock_monotonic.return_value = 1000.0
+        self.open_circuit()
+
+        mock_monotonic.return_value = 1061.0
+        self.assertTrue(self.breaker.allow_request())
+        self.assertFalse(self.breaker.allow_request())
+
+        self.assertEqual(self.breaker.state, CircuitBreaker.HALF_OPEN)
+        self.assertEqual(self.breaker.retry_after(), 60)
+
+    def test_failures_after_the_trip_are_not_transitions(self):
+        """
+        Test that failures of requests already in flight when the circuit opened neither extend it nor count.
+        """
+        self.open_circuit()
+        retry_after = self.breaker.retry_after()
+
+        for _ in range(3):
+            self.breaker.record_failure()
+
+        self.assertEqual(self.breaker.get_metrics()['transitions'], {'open': 1})
+        self.assertEqual(self.breaker.retry_after(), retry_after)
+
+    @patch('utils.circuit_breaker.time.monotonic')
+    def test_transitions_are_counted(self, mock_monotonic):
+        """
+        Test that open and close transitions are exposed as metrics.
+        """
+        mock_monotonic.return_value = 1000.0
+        self.open_circuit()
+        mock_monotonic.return_value = 1061.0
+        self.breaker.allow_request()
+        self.breaker.record_success()
+
+        metrics = self.breaker.get_metrics()
+
+        self.assertEqual(metrics['state'], CircuitBreaker.CLOSED)
+        self.assertEqual(metrics['transitions'], {'open': 1, 'closed': 1})
+
+    def test_reset(self):
+        """
+        Test that reset closes an open circuit.
+        """
+        self.open_circuit()
+        self.breaker.reset()
+
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_retry_is_reserved_once(self):
+        """
+        Test that only the first caller reserves a retry of a job, until it is released.
+        """
+        self.assertTrue(self.breaker.reserve_retry('job', 60))
+        self.assertFalse(self.breaker.reserve_retry('job', 60))
+        self.assertTrue(self.breaker.reserve_retry('other job', 60))
+
+        self.breaker.release_retry('job')
+
+        self.assertTrue(self.breaker.reserve_retry('job', 60))
+
+    def test_falls_back_to_local_state_when_redis_is_down(self):
+        """
+        Test that the breaker keeps working per process when Redis cannot be reached.
+        """
+        client = MagicMock()
+        client.get.side_effect = redis.exceptions.ConnectionError('Connection refused')
+        breaker = CircuitBreaker('test', failure_threshold=1, recovery_timeout=60, client=client)
+
+        with self.assertLogs('utils.circuit_breaker', level='WARNING'):
+            breaker.record_failure()
+
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+
+
+class UltraMsgAPICircuitBreakerTest(TestCase):
+
+    def setUp(self):
+        self.api = UltraMsgAPI()
+        self.api.rate_limiter = None
+        self.api.circuit_breaker = CircuitBreaker('test', failure_threshold=2, recovery_timeout=60, client=LocalState())
+
+    def mock_http_error(self, mock_post, status_code):
+        response = MagicMock()
+        response.status_code = status_code
+        response.raise_for_status.side_effect = requests.exceptions.HTTPError(f'{status_code} Error', response=response)
+        mock_post.return_value = response
+
+    @patch('utils.ultramsg.requests.post')
+    def test_open_circuit_fails_fast(self, mock_post):
+        """
+        Test that no request is made while the circuit is open.
+        """
+        self.api.circuit_breaker.record_failure()
+        self.api.circuit_breaker.record_failure()
+
+        response = self.api.send_message(to='558599999999', message='Test message')
+
+        self.assertTrue(response['circuit_open'])
+        mock_post.assert_not_called()
+
+    @patch('utils.ultramsg.requests.post')
+    def test_connection_errors_open_circuit(self, mock_post):
+        """
+        Test that network failures count toward opening the circuit.
+        """
+        mock_post.side_effect = requests.exceptions.ConnectionError('Connection refused')
+
+        self.api.send_message(to='558599999999', message='Test message')
+        self.api.send_message(to='558599999999', message='Test message')
+
+        self.assertTrue(self.api.circuit_breaker.is_open())
+
+    @patch('utils.ultramsg.requests.post')
+    def test_server_errors_open_circuit(self, mock_post):
+        """
+        Test that HTTP 5xx and 429 answers count as gateway failures.
+        """
+        self.mock_http_error(mock_post, 503)
+        self.api.send_message(to='558599999999', message='Test message')
+        self.mock_http_error(mock_post, 429)
+        self.api.send_message(to='558599999999', message='Test message')
+
+        self.assertTrue(self.api.circuit_breaker.is_open())
+
+    @patch('utils.ultramsg.requests.post')
+    def test_client_errors_do_not_open_circuit(self, mock_post):
+        """
+        Test that an HTTP 4xx caused by the request itself does not open the circuit.
+        """
+        self.mock_http_error(mock_post, 400)
+
+        for _ in range(3):
+            response = self.api.send_message(to='invalid', message='Test message')
+
+        self.assertIn('400', response['error'])
+        self.assertFalse(self.api.circuit_breaker.is_open())
+
+    @patch('utils.ultramsg.requests.post')
+    def test_request_has_timeout(self, mock_post):
+        """
+        Test that the request does not wait forever for the socket to fail.
+        """
+        self.api.send_message(to='558599999999', message='Test message')
+
+        self.assertIsNotNone(mock_post.call_args.kwargs['timeout'])
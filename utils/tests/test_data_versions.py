@@ -0,0 +1,104 @@
+from datetime import date
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from members.models import Member, Payment
+from utils.data_versions import bump_versions, cache_versioned, get_versions, model_namespace, versioned_key
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class DataVersionsTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_versions_are_stable_until_bumped(self):
+        """
+        Test that a version is created once and only changes after a bump is committed.
+        """
+        first = get_versions('members.member')['members.member']
+        self.assertEqual(get_versions('members.member')['members.member'], first)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            bump_versions('members.member')
+            self.assertEqual(get_versions('members.member')['members.member'], first)
+
+        self.assertEqual(get_versions('members.member')['members.member'], first + 1)
+
+    def test_model_namespace(self):
+        """
+        Test the namespaces of a model and of one month of it.
+        """
+        self.assertEqual(model_namespace(Payment), 'members.payment')
+        self.assertEqual(model_namespace(Payment, date(2024, 3, 15)), 'members.payment:2024-03')
+
+    def test_versioned_key_depends_on_params(self):
+        """
+        Test that different parameters give different keys for the same versions.
+        """
+        self.assertNotEqual(
+            versioned_key('members', ['members.member'], page=1),
+            versioned_key('members', ['members.member'], page=2),
+        )
+
+    def test_cache_versioned_recomputes_only_after_bump(self):
+        """
+        Test that the value is computed once and again only when its data changes.
+        """
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return len(calls)
+
+        self.assertEqual(cache_versioned('test', ['members.member'], compute), 1)
+        self.assertEqual(cache_versioned('test', ['members.member'], compute), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            bump_versions('members.member')
+
+        self.assertEqual(cache_versioned('test', ['members.member'], compute), 2)
+
+    def test_lost_version_does_not_reuse_old_entries(self):
+        """
+        Test that a version key evicted from the cache does not restart at a used number.
+        """
+        version = get_versions('members.member')['members.member']
+        cache.delete('data-version:members.member')
+
+        self.assertGreater(get_versions('members.member')['members.member'], version)
+
+    def test_member_signals_bump_version(self):
+        """
+        Test that saving and deleting a member invalidate the member namespace.
+        """
+        version = get_versions('members.member')['members.member']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            member = Member.objects.create(email='versao@example.com', full_name='Aluno Versão', phone='85988888888')
+        after_create = get_versions('members.member')['members.member']
+        with self.captureOnCommitCallbacks(execute=True):
+            member.delete()
+
+        self.assertGreater(after_create, version)
+        self.assertGreater(get_versions('members.member')['members.member'], after_create)
+
+    def test_payment_signals_bump_both_months_when_date_moves(self):
+        """
+        Test that moving a payment to another month invalidates the old and the new month.
+        """
+        payment = Payment.objects.create(payment_date=date(2024, 3, 10), amount=100)
+        payment = Payment.objects.get(id=payment.id)
+        namespaces = ['members.payment', 'members.payment:2024-03', 'members.payment:2024-04', 'members.payment:2024-05']
+        before = get_versions(*namespaces)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            payment.payment_date = date(2024, 4, 10)
+            payment.save()
+
+        after = get_versions(*namespaces)
+        self.assertEqual(
+            [namespace for namespace in namespaces if after[namespace] != before[namespace]],
+            ['members.payment', 'members.payment:2024-03', 'members.payment:2024-04'],
+        )
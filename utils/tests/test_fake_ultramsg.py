@@ -0,0 +1,63 @@
+from django.test import TestCase, override_settings
+from utils.fake_ultramsg import FakeUltraMsgServer
+from utils.ultramsg import UltraMsgAPI
+import requests
+
+
+@override_settings(ULTRAMSG_RATE_LIMIT=0)
+class FakeUltraMsgServerTest(TestCase):
+
+    def test_send_message_success(self):
+        """
+        Test that the fake server accepts the chat payload sent by UltraMsgAPI.
+        """
+        with FakeUltraMsgServer() as server, override_settings(ULTRAMSG_API_URL=server.url):
+            response = UltraMsgAPI().send_message(to='558599999999', message='Olá, tudo bem?')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('true', response.text)
+        self.assertEqual(server.stats['sent'], 1)
+
+    def test_send_image_success(self):
+        """
+        Test that the fake server accepts the image payload sent by UltraMsgAPI.
+        """
+        with FakeUltraMsgServer() as server, override_settings(ULTRAMSG_API_URL=server.url):
+            response = UltraMsgAPI().send_image(to='558599999999', image_url='https://example.com/image.jpg')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['sent'], 'true')
+
+    def test_missing_fields(self):
+        """
+        Test that a payload without the required fields is rejected with HTTP 400.
+        """
+        with FakeUltraMsgServer() as server:
+            response = requests.post(f'{server.url}/instance/messages/chat', data='token=abc')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('to', response.json()['error'])
+        self.assertEqual(server.stats['invalid'], 1)
+
+    def test_error_rate(self):
+        """
+        Test that the configured fraction of requests fails with HTTP 500.
+        """
+        with FakeUltraMsgServer(error_rate=1) as server, override_settings(ULTRAMSG_API_URL=server.url):
+            response = UltraMsgAPI().send_message(to='558599999999', message='Olá')
+
+        self.assertIn('500', response['error'])
+        self.assertEqual(server.stats['errors'], 1)
+
+    def test_rate_limit(self):
+        """
+        Test that requests above the configured rate are answered with HTTP 429.
+        """
+        with FakeUltraMsgServer(rate_limit=1) as server, override_settings(ULTRAMSG_API_URL=server.url):
+            api = UltraMsgAPI()
+            first = api.send_message(to='558599999999', message='Olá')
+            second = api.send_message(to='558599999999', message='Olá')
+
+        self.assertEqual(first.status_code, 200)
+        self.assertIn('429', second['error'])
+        self.assertEqual(server.stats['throttled'], 1)
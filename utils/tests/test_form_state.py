@@ -0,0 +1,95 @@
+from django.test import RequestFactory, TestCase, override_settings
+from users.forms import LoginForm
+from utils.form_state import clear_form_state, restore_form, stash_form_state
+
+
+class FormStateTest(TestCase):
+
+    def setUp(self):
+        self.request = RequestFactory().get('/')
+        self.request.session = {}
+
+    def test_stash_keeps_only_form_fields_and_never_passwords(self):
+        """
+        Test that the CSRF token, unknown keys and the password are left out of the session.
+        """
+        form = LoginForm({'cpf': '123', 'password': 'secret', 'csrfmiddlewaretoken': 'x', 'extra': 'y'})
+        form.is_valid()
+
+        self.assertTrue(stash_form_state(self.request, 'login', form))
+        state = self.request.session['login']
+
+        self.assertEqual(state['cpf'], '123')
+        self.assertNotIn('password', state)
+        self.assertNotIn('csrfmiddlewaretoken', state)
+        self.assertNotIn('extra', state)
+
+    def test_stash_truncates_values_to_max_length(self):
+        """
+        Test that a value longer than the field's max_length is truncated.
+        """
+        form = LoginForm({'cpf': '1' * 100, 'password': ''})
+        form.is_valid()
+
+        stash_form_state(self.request, 'login', form)
+
+        self.assertEqual(self.request.session['login']['cpf'], '1' * 14)
+
+    @override_settings(FORM_STATE_MAX_BYTES=10)
+    def test_stash_refuses_states_over_the_size_limit(self):
+        """
+        Test that nothing is stored when the state is larger than FORM_STATE_MAX_BYTES.
+        """
+        form = LoginForm({'cpf': '12345678901', 'password': ''})
+        form.is_valid()
+
+        self.assertFalse(stash_form_state(self.request, 'login', form))
+        self.assertNotIn('login', self.request.session)
+
+    def test_restore_shows_stored_errors_of_password_fields(self):
+        """
+        Test that a restored form shows the password error it had, not "required".
+        """
+        form = LoginForm({'cpf': '123', 'password': 'secret'})
+        form.is_valid()
+        form.add_error('password', 'Senha inválida.')
+        stash_form_state(self.request, 'login', form)
+
+        restored = restore_form(self.request, 'login', LoginForm)
+
+        self.assertEqual(restored['cpf'].value(), '123')
+        self.assertEqual(restored.errors['password'], ['Senha inválida.'])
+        self.assertNotIn('login', self.request.session)
+
+    def test_restore_hides_required_error_of_empty_password_fields(self):
+        """
+        Test that a password field that was valid is not reported as missing after the restore.
+        """
+        form = LoginForm({'cpf': '', 'password': 'secret'})
+        form.is_valid()
+        stash_form_state(self.request, 'login', form)
+
+        restored = restore_form(self.request, 'login', LoginForm)
+
+        self.assertIn('cpf', restored.errors)
+        self.assertNotIn('password', restored.errors)
+
+    def test_restore_with_keep_leaves_the_state_until_cleared(self):
+        """
+        Test that keep=True does not remove the state and clear_form_state() does.
+        """
+        form = LoginForm({'cpf': '123', 'password': ''})
+        form.is_valid()
+        stash_form_state(self.request, 'login', form)
+
+        restore_form(self.request, 'login', LoginForm, keep=True)
+        self.assertIn('login', self.request.session)
+
+        clear_form_state(self.request, 'login')
+        self.assertNotIn('login', self.request.session)
+
+    def test_restore_without_state_returns_unbound_form(self):
+        """
+        Test that an unbound form is returned when nothing was stashed.
+        """
+        self.assertFalse(restore_form(self.request, 'login', LoginForm).is_bound)
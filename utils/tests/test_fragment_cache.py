@@ -0,0 +1,48 @@
+from unittest.mock import patch
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+from utils.fragment_cache import render_cached_fragments
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class RenderCachedFragmentsTest(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def render(self, objects):
+        return render_cached_fragments('fragment.html', objects, lambda obj: f'fragment:{obj}', context_name='name')
+
+    def test_renders_only_the_misses(self):
+        """
+        Test that cached fragments are reused and only the new keys are rendered, keeping the order.
+        """
+        with patch('utils.fragment_cache.render_to_string', side_effect=lambda template, context: f'<p>{context["name"]}</p>') as mock_render:
+            self.render(['ana', 'bia'])
+            fragments = self.render(['caio', 'ana', 'bia'])
+
+        self.assertEqual(fragments, ['<p>caio</p>', '<p>ana</p>', '<p>bia</p>'])
+        self.assertEqual(mock_render.call_count, 3)
+
+    def test_single_cache_round_trips(self):
+        """
+        Test that a page costs one get_many and, on misses, one set_many.
+        """
+        with patch('utils.fragment_cache.render_to_string', return_value='<p></p>'), \
+                patch.object(cache, 'get_many', wraps=cache.get_many) as mock_get_many, \
+                patch.object(cache, 'set_many', wraps=cache.set_many) as mock_set_many:
+            self.render(['ana', 'bia', 'ana'])
+            self.render(['ana', 'bia'])
+
+        self.assertEqual(mock_get_many.call_count, 2)
+        self.assertEqual(mock_set_many.call_count, 1)
+
+    def test_empty_page(self):
+        """
+        Test that an empty page does not touch the cache.
+        """
+        with patch.object(cache, 'get_many') as mock_get_many:
+            self.assertEqual(self.render([]), [])
+        mock_get_many.assert_not_called()
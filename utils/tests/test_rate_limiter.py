@@ -0,0 +1,176 @@
+from django.test import TestCase, override_settings
+from unittest.mock import patch, MagicMock
+from utils.rate_limiter import LocalTokenBucket, TokenBucketRateLimiter, get_ultramsg_rate_limiter
+from utils.ultramsg import UltraMsgAPI
+import redis
+
+
+class LocalTokenBucketTest(TestCase):
+
+    @patch('utils.rate_limiter.time.monotonic')
+    def test_take_until_empty_and_refill(self, mock_monotonic):
+        """
+        Test that the bucket allows a burst up to its capacity and refills over time.
+        """
+        mock_monotonic.return_value = 100.0
+        bucket = LocalTokenBucket(rate=2, capacity=3)
+
+        self.assertTrue(bucket.take()[0])
+        self.assertTrue(bucket.take()[0])
+        self.assertTrue(bucket.take()[0])
+
+        allowed, wait, tokens = bucket.take()
+        self.assertFalse(allowed)
+        self.assertAlmostEqual(wait, 0.5)
+
+        # After one second 2 tokens are back
+        mock_monotonic.return_value = 101.0
+        self.assertTrue(bucket.take()[0])
+        self.assertTrue(bucket.take()[0])
+        self.assertFalse(bucket.take()[0])
+
+    @patch('utils.rate_limiter.time.monotonic')
+    def test_refill_never_exceeds_capacity(self, mock_monotonic):
+        """
+        Test that an idle bucket does not accumulate more tokens than its capacity.
+        """
+        mock_monotonic.return_value = 0.0
+        bucket = LocalTokenBucket(rate=10, capacity=2)
+
+        mock_monotonic.return_value = 1000.0
+        _, _, tokens = bucket.take(0)
+        self.assertEqual(tokens, 2)
+
+
+class TokenBucketRateLimiterTest(TestCase):
+
+    def setUp(self):
+        self.script = MagicMock()
+        self.client = MagicMock()
+        self.client.register_script.return_value = self.script
+
+    def test_invalid_configuration(self):
+        """
+        Test that a rate or capacity that would never allow a send is rejected.
+        """
+        with self.assertRaises(ValueError):
+            TokenBucketRateLimiter('test', rate=0, capacity=1, client=self.client)
+        with self.assertRaises(ValueError):
+            TokenBucketRateLimiter('test', rate=1, capacity=0, client=self.client)
+
+    def test_try_acquire_uses_redis_script(self):
+        """
+        Test that the shared bucket in Redis is used to take tokens.
+        """
+        self.script.return_value = [1, '0', '4']
+        limiter = TokenBucketRateLimiter('test', rate=1, capacity=5, client=self.client)
+
+        allowed, wait = limiter.try_acquire()
+
+        self.assertTrue(allowed)
+        self.assertEqual(wait, 0)
+        self.script.assert_called_once_with(keys=['ratelimit:test'], args=[1.0, 5.0, 1])
+
+    @patch('utils.rate_limiter.time.sleep')
+    def test_acquire_sleeps_until_token_is_available(self, mock_sleep):
+        """
+        Test that acquire waits the time reported by the bucket before retrying.
+        """
+        self.script.side_effect = [[0, '0.25', '0.75'], [1, '0', '0']]
+        limiter = TokenBucketRateLimiter('test', rate=1, capacity=5, client=self.client)
+
+        self.assertTrue(limiter.acquire())
+        mock_sleep.assert_called_once_with(0.25)
+
+    @patch('utils.rate_limiter.time.sleep')
+    def test_acquire_gives_up_after_timeout(self, mock_sleep):
+        """
+        Test that acquire returns False when the wait is longer than the timeout.
+        """
+        self.script.return_value = [0, '10', '0']
+        limiter = TokenBucketRateLimiter('test', rate=0.1, capacity=1, client=self.client)
+
+        self.assertFalse(limiter.acquire(timeout=1))
+        mock_sleep.assert_not_called()
+
+    def test_acquire_more_than_capacity(self):
+        """
+        Test that asking for more tokens than the bucket can hold fails instead of waiting forever.
+        """
+        limiter = TokenBucketRateLimiter('test', rate=1, capacity=5, client=self.client)
+
+        with self.assertRaises(ValueError):
+            limiter.acquire(6)
+        self.script.assert_not_called()
+
+    def test_falls_back_to_local_bucket_when_redis_is_down(self):
+        """
+        Test that sends keep being limited per process when Redis cannot be reached.
+        """
+        self.script.side_effect = redis.exceptions.ConnectionError('Connection refused')
+        limiter = TokenBucketRateLimiter('test', rate=1, capacity=2, client=self.client)
+
+        with self.assertLogs('utils.rate_limiter', level='WARNING'):
+            self.assertTrue(limiter.try_acquire()[0])
+        self.assertTrue(limiter.try_acquire()[0])
+        self.assertFalse(limiter.try_acquire()[0])
+
+        # Redis is not retried on every call while it is down
+        self.assertEqual(self.script.call_count, 1)
+
+    def test_get_metrics(self):
+        """
+        Test that the metrics report the current token level without taking tokens.
+        """
+        self.script.return_value = [0, '0', '3.5']
+        limiter = TokenBucketRateLimiter('test', rate=1, capacity=5, client=self.client)
+
+        metrics = limiter.get_metrics()
+
+        self.assertEqual(metrics, {'name': 'test', 'tokens': 3.5, 'capacity': 5.0, 'rate': 1.0})
+        self.script.assert_called_once_with(keys=['ratelimit:test'], args=[1.0, 5.0, 0])
+
+    @override_settings(ULTRAMSG_RATE_LIMIT=0)
+    def test_ultramsg_rate_limiter_disabled(self):
+        """
+        Test that no limiter is used when ULTRAMSG_RATE_LIMIT is 0.
+        """
+        self.assertIsNone(get_ultramsg_rate_limiter('instance'))
+
+    def test_ultramsg_rate_limiter_is_shared_per_instance(self):
+        """
+        Test that every client of the same UltraMsg instance shares one limiter.
+        """
+        self.assertIs(get_ultramsg_rate_limiter('instance-a'), get_ultramsg_rate_limiter('instance-a'))
+        self.assertIsNot(get_ultramsg_rate_limiter('instance-a'), get_ultramsg_rate_limiter('instance-b'))
+
+
+class UltraMsgAPIRateLimitTest(TestCase):
+
+    @patch('utils.ultramsg.requests.post')
+    def test_send_message_waits_for_rate_limiter(self, mock_post):
+        """
+        Test that a send takes a token from the limiter before calling the API.
+        """
+        api = UltraMsgAPI()
+        api.rate_limiter = MagicMock()
+        api.rate_limiter.acquire.return_value = True
+
+        api.send_message(to='558599999999', message='Test message')
+
+        api.rate_limiter.acquire.assert_called_once()
+        mock_post.assert_called_once()
+
+    @patch('utils.ultramsg.requests.post')
+    def test_send_message_rate_limit_timeout(self, mock_post):
+        """
+        Test that the API is not called when no slot is available within the timeout.
+        """
+        api = UltraMsgAPI()
+        api.rate_limiter = MagicMock()
+        api.rate_limiter.acquire.return_value = False
+
+        response = api.send_message(to='558599999999', message='Test message')
+
+        self.assertIn('Rate limit exceeded', response['error'])
+        mock_post.assert_not_called()
@@ -0,0 +1,111 @@
+from django.test import SimpleTestCase
+from unittest.mock import MagicMock
+from utils.request_metrics import METRICS_KEY, Histogram, RequestMetrics, render_prometheus, series_field
+import redis
+
+LABELS = (('view', 'admin_panel:home'), ('method', 'GET'), ('status', '2xx'))
+
+
+class HistogramTest(SimpleTestCase):
+
+    def test_observe_counts_each_value_in_its_bucket(self):
+        """
+        Test that values go to the first bucket whose bound is not lower than them, or +Inf.
+        """
+        histogram = Histogram((1, 5))
+        for value in (0, 1, 3, 10):
+            histogram.observe(value)
+
+        self.assertEqual(histogram.counts, [2, 1, 1])
+        self.assertEqual(dict(histogram.fields()), {'1': 2, '5': 1, '+Inf': 1, 'sum': 14.0, 'count': 4})
+
+
+class RenderPrometheusTest(SimpleTestCase):
+
+    def test_buckets_are_rendered_cumulatively(self):
+        """
+        Test that stored per-bucket counts are rendered as cumulative Prometheus buckets.
+        """
+        stored = {
+            series_field('gym_request_queries', LABELS, '1').encode(): b'2',
+            series_field('gym_request_queries', LABELS, '5').encode(): b'1',
+            series_field('gym_request_queries', LABELS, 'sum').encode(): b'6',
+            series_field('gym_request_queries', LABELS, 'count').encode(): b'3',
+        }
+
+        text = render_prometheus(stored)
+
+        labels = 'view="admin_panel:home",method="GET",status="2xx"'
+        self.assertIn('# TYPE gym_request_queries histogram', text)
+        self.assertIn(f'gym_request_queries_bucket{{{labels},le="0"}} 0', text)
+        self.assertIn(f'gym_request_queries_bucket{{{labels},le="1"}} 2', text)
+        self.assertIn(f'gym_request_queries_bucket{{{labels},le="5"}} 3', text)
+        self.assertIn(f'gym_request_queries_bucket{{{labels},le="+Inf"}} 3', text)
+        self.assertIn(f'gym_request_queries_sum{{{labels}}} 6', text)
+        self.assertIn(f'gym_request_queries_count{{{labels}}} 3', text)
+
+    def test_large_values_are_rendered_at_full_precision(self):
+        """
+        Test that counts above a million and fractional sums are not rounded to six significant digits.
+        """
+        stored = {
+            series_field('gym_response_size_bytes', LABELS, '+Inf').encode(): b'1234567',
+            series_field('gym_response_size_bytes', LABELS, 'sum').encode(): b'98765432101.5',
+            series_field('gym_response_size_bytes', LABELS, 'count').encode(): b'1234567',
+        }
+
+        text = render_prometheus(stored)
+
+        labels = 'view="admin_panel:home",method="GET",status="2xx"'
+        self.assertIn(f'gym_response_size_bytes_bucket{{{labels},le="+Inf"}} 1234567\n', text)
+        self.assertIn(f'gym_response_size_bytes_sum{{{labels}}} 98765432101.5\n', text)
+        self.assertIn(f'gym_response_size_bytes_count{{{labels}}} 1234567\n', text)
+
+
+class RequestMetricsTest(SimpleTestCase):
+
+    def setUp(self):
+        self.client = MagicMock()
+        self.metrics = RequestMetrics(flush_interval=10, client=self.client)
+
+    def test_flush_sends_pending_observations_in_one_pipeline(self):
+        """
+        Test that a flush adds the buckets, sum and count to the Redis hash and empties the local store.
+        """
+        self.metrics.observe('gym_request_queries', LABELS, 3)
+        self.metrics.observe('gym_request_queries', LABELS, 4)
+
+        self.metrics.flush()
+
+        pipeline = self.client.pipeline.return_value
+        pipeline.hincrby.assert_any_call(METRICS_KEY, series_field('gym_request_queries', LABELS, '5'), 2)
+        pipeline.hincrby.assert_any_call(METRICS_KEY, series_field('gym_request_queries', LABELS, 'count'), 2)
+        pipeline.hincrbyfloat.assert_called_once_with(METRICS_KEY, series_field('gym_request_queries', LABELS, 'sum'), 7.0)
+        pipeline.execute.assert_called_once()
+        self.assertEqual(self.metrics._series, {})
+
+    def test_flush_keeps_observations_while_redis_is_unavailable(self):
+        """
+        Test that observations survive a failed flush and are shown by render() from memory.
+        """
+        self.client.pipeline.return_value.execute.side_effect = redis.exceptions.ConnectionError('Connection refused')
+        self.client.hgetall.side_effect = redis.exceptions.ConnectionError('Connection refused')
+        self.metrics.observe('gym_request_queries', LABELS, 3)
+
+        with self.assertLogs('utils.request_metrics', level='WARNING'):
+            self.metrics.flush()
+            text = self.metrics.render()
+
+        self.assertIn('gym_request_queries_count{view="admin_panel:home",method="GET",status="2xx"} 1', text)
+        self.assertIn('gym_request_queries_sum{view="admin_panel:home",method="GET",status="2xx"} 3.0', text)
+        self.assertEqual(self.client.pipeline.return_value.execute.call_count, 1)
+
+    def test_flush_if_due_waits_for_the_interval(self):
+        """
+        Test that nothing is sent to Redis before the flush interval has passed.
+        """
+        self.metrics.observe('gym_request_queries', LABELS, 1)
+
+        self.metrics.flush_if_due()
+
+        self.client.pipeline.assert_not_called()
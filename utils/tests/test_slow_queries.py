@@ -0,0 +1,108 @@
+import json
+import tempfile
+from io import StringIO
+from pathlib import Path
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from unittest.mock import patch
+from members.models import Member
+from utils.slow_queries import aggregate_slow_queries, capture_plan, fingerprint, fingerprint_id, slow_query_logger
+
+
+class FingerprintTest(TestCase):
+
+    def test_same_statement_with_other_values_has_same_fingerprint(self):
+        """
+        Test that literals, parameters and IN list sizes do not change the fingerprint.
+        """
+        first = fingerprint("SELECT * FROM m WHERE name LIKE '%ana%' AND id IN (1, 2) AND age > 30")
+        second = fingerprint("SELECT * FROM m WHERE name LIKE '%joão%' AND id IN (%s, %s, %s) AND age > %s")
+
+        self.assertEqual(first, second)
+        self.assertEqual(first, 'SELECT * FROM m WHERE name LIKE ? AND id IN (...) AND age > ?')
+
+    def test_identifiers_with_digits_are_kept(self):
+        """
+        Test that numbers inside table or column names are not replaced.
+        """
+        self.assertEqual(fingerprint('SELECT "t1"."col2" FROM t1 LIMIT 21'), 'SELECT "t1"."col2" FROM t1 LIMIT ?')
+
+
+@override_settings(SLOW_QUERY_THRESHOLD_MS=0)
+class SlowQueryLoggerTest(TestCase):
+
+    def test_slow_query_is_logged_with_fingerprint_and_call_site(self):
+        """
+        Test that a query over the threshold is logged as JSON with its fingerprint and the project line that ran it.
+        """
+        with self.assertLogs('slow_queries', level='WARNING') as logs, connection.execute_wrapper(slow_query_logger):
+            list(Member.objects.filter(full_name__icontains='ana'))
+
+        entry = json.loads(logs.records[0].getMessage())
+        self.assertEqual(entry['fingerprint'], fingerprint_id(entry['normalized']))
+        self.assertIn('LIKE', entry['normalized'])
+        self.assertTrue(entry['call_site'].startswith('utils/tests/test_slow_queries.py:'))
+        self.assertIsNone(entry['plan'])  # EXPLAIN is only captured on PostgreSQL
+
+    def test_fast_queries_are_not_logged(self):
+        """
+        Test that queries under the threshold are not logged.
+        """
+        with override_settings(SLOW_QUERY_THRESHOLD_MS=10_000), connection.execute_wrapper(slow_query_logger):
+            with self.assertNoLogs('slow_queries', level='WARNING'):
+                Member.objects.count()
+
+    def test_plan_is_captured_on_postgresql(self):
+        """
+        Test that the plan of a SELECT is captured, and that a failing EXPLAIN does not break the transaction.
+        """
+        with patch.object(connection, 'vendor', 'postgresql'):
+            plan = capture_plan(connection, 'SELECT id FROM members_member WHERE id = %s', [1])
+            failed = capture_plan(connection, 'SELECT nada FROM tabela_inexistente', [])
+            not_select = capture_plan(connection, 'DELETE FROM members_member', [])
+
+        self.assertTrue(plan)
+        self.assertTrue(failed.startswith('EXPLAIN failed'))
+        self.assertIsNone(not_select)
+        self.assertEqual(Member.objects.count(), 0)
+
+
+class SlowQueryReportTest(TestCase):
+
+    def entry(self, sql, duration_ms, call_site='admin_panel/views.py:10 in members'):
+        normalized = fingerprint(sql)
+        return {
+            'fingerprint': fingerprint_id(normalized), 'duration_ms': duration_ms, 'normalized': normalized,
+            'sql': sql, 'call_site': call_site, 'plan': None,
+        }
+
+    def test_entries_are_grouped_and_ranked_by_total_time(self):
+        """
+        Test that executions of the same statement are grouped and the group with most total time comes first.
+        """
+        report = aggregate_slow_queries([
+            self.entry('SELECT * FROM p WHERE id = 1', 300),
+            self.entry("SELECT * FROM m WHERE name LIKE '%a%'", 250),
+            self.entry("SELECT * FROM m WHERE name LIKE '%b%'", 250),
+        ])
+
+        self.assertEqual([group['count'] for group in report], [2, 1])
+        self.assertEqual(report[0]['total_ms'], 500)
+        self.assertEqual(report[0]['max_ms'], 250)
+
+    def test_command_reads_log_file(self):
+        """
+        Test that the command ranks the entries of a log file, ignoring lines that are not entries.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / 'slow_queries.log'
+            lines = [json.dumps(self.entry('SELECT * FROM p WHERE id = 1', 300)), 'linha qualquer']
+            path.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+
+            output = StringIO()
+            call_command('slow_query_report', str(path), stdout=output)
+
+        self.assertIn('1 consultas lentas, 1 distintas.', output.getvalue())
+        self.assertIn('SELECT * FROM p WHERE id = ?', output.getvalue())
+        self.assertIn('em admin_panel/views.py:10 in members', output.getvalue())
@@ -1,12 +1,19 @@
 import requests
 import urllib.parse
 from decouple import config
+from django.conf import settings
+from utils.circuit_breaker import get_ultramsg_circuit_breaker, render_circuit_breaker_metrics
+from utils.rate_limiter import get_ultramsg_rate_limiter, render_rate_limiter_metrics
 
 
 class UltraMsgAPI:
     def __init__(self):
         """
         Initializes the UltraMsg API with data from the .env file.
+
+        Every request goes through the circuit breaker and the rate limiter shared
+        by all the processes that use the same UltraMsg instance (see
+        utils.circuit_breaker and utils.rate_limiter).
         """
         self.token = config('ULTRAMSG_TOKEN', default=None, cast=str)
         self.instance = config('ULTRAMSG_INSTANCE', default=None, cast=str)
@@ -14,8 +21,44 @@ class UltraMsgAPI:
             # O coverage está dizendo que não testei essa possibilidade
             raise ValueError('ULTRAMSG_TOKEN or ULTRAMSG_INSTANCE not configured in .env')
 
-        self.base_url = f'https://api.ultramsg.com/{self.instance}/messages'
+        self.base_url = f'{settings.ULTRAMSG_API_URL}/{self.instance}/messages'
         self.headers = {'content-type': 'application/x-www-form-urlencoded'}
+        self.rate_limiter = get_ultramsg_rate_limiter(self.instance)
+        self.circuit_breaker = get_ultramsg_circuit_breaker(self.instance)
+
+    def _post(self, url, payload):
+        """
+        Sends the request if the circuit is closed, after waiting for a slot in the rate limiter.
+
+        Connection errors, timeouts, HTTP 429 and HTTP 5xx count as failures of the
+        gateway; other HTTP errors (e.g. an invalid number) do not.
+
+        :return: API response or error message. When the circuit is open the error
+            message has 'circuit_open': True and no request is made.
+        """
+        if not self.circuit_breaker.allow_request():
+            return {'error': 'UltraMsg circuit is open, request not sent.', 'circuit_open': True}
+
+        if self.rate_limiter and not self.rate_limiter.acquire(timeout=settings.ULTRAMSG_RATE_LIMIT_TIMEOUT):
+            return {'error': 'Rate limit exceeded: no slot available within the timeout.'}
+
+        try:
+            response = requests.post(url, data=payload, headers=self.headers, timeout=settings.ULTRAMSG_TIMEOUT)
+            response.raise_for_status()
+        except requests.exceptions.HTTPError as e:
+            status_code = e.response.status_code if e.response is not None else None
+            if status_code is None or status_code == 429 or status_code >= 500:
+                self.circuit_breaker.record_failure()
+            else:
+                self.circuit_breaker.record_success()
+            return {'error': str(e)}
+        except requests.exceptions.RequestException as e:
+            # O coverage está dizendo que não testei essa possibilidade
+            self.circuit_breaker.record_failure()
+            return {'error': str(e)}
+
+        self.circuit_breaker.record_success()
+        return response
 
     def send_message(self, to, message):
         """
@@ -29,14 +72,8 @@ class UltraMsgAPI:
         encoded_message = urllib.parse.quote(message)  # Encode the message
         payload = f"token={self.token}&to={to}&body={encoded_message}"
 
-        try:
-            response = requests.post(url, data=payload, headers=self.headers)
-            response.raise_for_status()
-            return response
-        except requests.exceptions.RequestException as e:
-            # O coverage está dizendo que não testei essa possibilidade
-            return {'error': str(e)}
-        
+        return self._post(url, payload)
+
     def send_image(self, to, image_url, caption=""):
         """
         Sends an image via WhatsApp.
@@ -50,13 +87,25 @@ class UltraMsgAPI:
         encoded_caption = urllib.parse.quote(caption)
         payload = f'token={self.token}&to={to}&image={image_url}&caption={encoded_caption}'
 
-        try:
-            response = requests.post(url, data=payload, headers=self.headers)
-            response.raise_for_status()
-            return response
-        except requests.exceptions.RequestException as e:
-            # O coverage está dizendo que não testei essa possibilidade
-            return {'error': str(e)}
+        return self._post(url, payload)
+
+
+def render_ultramsg_metrics():
+    """
+    Renders the shared state of the configured UltraMsg instance (token level of
+    its rate limiter, state and transitions of its circuit breaker) in the
+    Prometheus text format, for the /metrics/ endpoint.
+    Empty when no instance is configured.
+    """
+    instance = config('ULTRAMSG_INSTANCE', default=None, cast=str)
+    if not instance:
+        return ''
+
+    limiter = get_ultramsg_rate_limiter(instance)
+    return (
+        render_rate_limiter_metrics([limiter] if limiter else [])
+        + render_circuit_breaker_metrics([get_ultramsg_circuit_breaker(instance)])
+    )
 
 
 # Example usage:
@@ -65,7 +114,7 @@ if __name__ == '__main__': # pragma: no cover
         ultramsg = UltraMsgAPI()
 
         response = ultramsg.send_image(to='The-number', image_url='https://blog.emania.com.br/wp-content/uploads/2016/02/direitos-autorais-e-de-imagem.jpg', caption='Imagem aleatória')
-        
-        print(response) 
+
+        print(response)
     except ValueError as e:
-        print(f'Invalid configuration: {e}')
\ No newline at end of file
+        print(f'Invalid configuration: {e}')
@@ -89,4 +89,16 @@ def make_pagination(request, queryset, per_page, qty_pages=4):
         current_page
     )
 
-    return page_obj, pagination_range
\ No newline at end of file
+    return page_obj, pagination_range
+
+def percentile(values, percent):
+    """Retorna o percentil (0 a 100) de uma lista de números, por interpolação linear."""
+    if not values:
+        return 0.0
+
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * percent / 100
+    lower = math.floor(position)
+    upper = math.ceil(position)
+
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)